@@ -25,6 +25,7 @@ from werkzeug.exceptions import Unauthorized
 
 from commands import register_commands
 from config import Config
+from core.model_runtime.model_providers.__base.tokenizers.gpt2_tokenzier import GPT2Tokenizer
 
 # DO NOT REMOVE BELOW
 from events import event_handlers
@@ -131,6 +132,9 @@ def create_app() -> Flask:
     register_blueprints(app)
     register_commands(app)
 
+    # load the gpt2 tokenizer once before worker processes are forked, so they share it
+    GPT2Tokenizer.get_encoder()
+
     return app
 
 
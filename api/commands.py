@@ -6,19 +6,23 @@ from typing import Optional
 
 import click
 from flask import current_app
+from sqlalchemy import update
 from werkzeug.exceptions import NotFound
 
 from constants.languages import languages
+from core.embedding.embedding_codec import decode_embedding, encode_embedding, is_compact_embedding
 from core.rag.datasource.vdb.vector_factory import Vector
 from core.rag.datasource.vdb.vector_type import VectorType
+from core.rag.extractor.extraction_cache import ExtractionCache
 from core.rag.models.document import Document
+from core.tools.provider.builtin_tool_manifest import BuiltinToolManifest
 from extensions.ext_database import db
 from extensions.ext_redis import redis_client
 from libs.helper import email as email_validate
 from libs.password import hash_password, password_pattern, valid_password
 from libs.rsa import generate_key_pair
 from models.account import Tenant
-from models.dataset import Dataset, DatasetCollectionBinding, DocumentSegment
+from models.dataset import Dataset, DatasetCollectionBinding, DatasetKeywordTable, DocumentSegment, Embedding
 from models.dataset import Document as DatasetDocument
 from models.model import Account, App, AppAnnotationSetting, AppMode, Conversation, MessageAnnotation
 from models.provider import Provider, ProviderModel
@@ -585,6 +589,129 @@ def upgrade_db():
         click.echo('Database migration skipped')
 
 
+@click.command('migrate-embedding-cache-format', help='Convert cached embeddings to the compact binary format.')
+@click.option('--batch-size', default=1000, prompt=False, help='The number of embeddings converted in a batch, default: 1000.')
+def migrate_embedding_cache_format(batch_size: int):
+    """
+    Convert pickled embeddings of the embeddings table to the compact binary format
+    """
+    click.echo(click.style('Start migrate embedding cache format.', fg='green'))
+    dtype = current_app.config.get('EMBEDDING_CACHE_DTYPE') or 'float32'
+
+    last_id = None
+    converted_count = 0
+    while True:
+        query = db.session.query(Embedding.id, Embedding.embedding).order_by(Embedding.id)
+        if last_id:
+            query = query.filter(Embedding.id > last_id)
+        embeddings = query.limit(batch_size).all()
+        if not embeddings:
+            break
+
+        last_id = embeddings[-1].id
+        rows = [
+            {'id': embedding.id, 'embedding': encode_embedding(decode_embedding(embedding.embedding), dtype=dtype)}
+            for embedding in embeddings
+            if not is_compact_embedding(embedding.embedding)
+        ]
+
+        try:
+            if rows:
+                db.session.execute(update(Embedding), rows)
+            db.session.commit()
+            converted_count += len(rows)
+        except Exception as e:
+            db.session.rollback()
+            click.echo(
+                click.style('Convert embeddings error: {} {}'.format(e.__class__.__name__,
+                                                                     str(e)), fg='red'))
+
+        # release the loaded rows of the batch
+        db.session.expunge_all()
+        click.echo('Converted {} embeddings.'.format(converted_count))
+
+    click.echo(click.style('Congratulations! Converted {} embeddings.'.format(converted_count), fg='green'))
+
+
+@click.command('migrate-keyword-index', help='Build keyword postings of datasets indexed by the jieba keyword table.')
+@click.option('--batch-size', default=500, prompt=False, help='The number of segments indexed in a batch, default: 500.')
+def migrate_keyword_index(batch_size: int):
+    """
+    Build keyword postings for the jieba_inverted_index keyword store from the keywords of indexed segments
+    """
+    click.echo(click.style('Start migrate keyword index.', fg='green'))
+    from core.rag.datasource.keyword.jieba.jieba_inverted_index import JiebaInvertedIndex
+
+    dataset_ids = [dataset_id for dataset_id, in db.session.query(DatasetKeywordTable.dataset_id).all()]
+    migrated_count = 0
+    for dataset_id in dataset_ids:
+        dataset = db.session.query(Dataset).filter(Dataset.id == dataset_id).first()
+        if not dataset:
+            continue
+
+        try:
+            click.echo('Migrating keyword index of dataset: {}'.format(dataset.id))
+            keyword = JiebaInvertedIndex(dataset)
+            page = 1
+            while True:
+                try:
+                    segments = db.session.query(DocumentSegment).filter(
+                        DocumentSegment.dataset_id == dataset.id,
+                        DocumentSegment.status == 'completed',
+                        DocumentSegment.enabled == True
+                    ).order_by(DocumentSegment.created_at, DocumentSegment.id).paginate(
+                        page=page, per_page=batch_size, error_out=False
+                    )
+                except NotFound:
+                    break
+
+                if not segments.items:
+                    break
+
+                page += 1
+                documents = [
+                    Document(page_content=segment.content, metadata={'doc_id': segment.index_node_id})
+                    for segment in segments.items
+                ]
+                keyword.add_texts(documents, keywords_list=[segment.keywords for segment in segments.items])
+
+            migrated_count += 1
+            click.echo(click.style('Migrated keyword index of dataset: {}'.format(dataset.id), fg='green'))
+        except Exception as e:
+            db.session.rollback()
+            click.echo(
+                click.style('Migrate keyword index error: {} {}'.format(e.__class__.__name__,
+                                                                        str(e)), fg='red'))
+
+    click.echo(click.style('Congratulations! Migrated keyword index of {} datasets.'.format(migrated_count),
+                           fg='green'))
+
+
+@click.command('clear-extraction-cache', help='Clear the documents extracted from upload files of a tenant.')
+@click.option('--tenant-id', prompt=True, help='The tenant id of the extraction cache.')
+def clear_extraction_cache(tenant_id: str):
+    """
+    Clear the extraction cache of a tenant
+    """
+    cache_size = ExtractionCache.get_size(tenant_id)
+    click.echo(click.style('Extraction cache of tenant {}: {} entries, {} bytes.'.format(
+        tenant_id, cache_size['entries'], cache_size['size']), fg='green'))
+
+    deleted_count = ExtractionCache.clear(tenant_id)
+    click.echo(click.style('Congratulations! Cleared {} extraction cache entries.'.format(deleted_count),
+                           fg='green'))
+
+
+@click.command('build-builtin-tool-manifest', help='Build the manifest of the builtin tool providers.')
+def build_builtin_tool_manifest():
+    """
+    Build the manifest of the builtin tool providers, read on startup instead of their yaml files
+    """
+    provider_count = BuiltinToolManifest.build()
+    click.echo(click.style('Congratulations! Built the manifest of {} builtin tool providers.'.format(provider_count),
+                           fg='green'))
+
+
 def register_commands(app):
     app.cli.add_command(reset_password)
     app.cli.add_command(reset_email)
@@ -594,3 +721,7 @@ def register_commands(app):
     app.cli.add_command(add_qdrant_doc_id_index)
     app.cli.add_command(create_tenant)
     app.cli.add_command(upgrade_db)
+    app.cli.add_command(migrate_embedding_cache_format)
+    app.cli.add_command(migrate_keyword_index)
+    app.cli.add_command(clear_extraction_cache)
+    app.cli.add_command(build_builtin_tool_manifest)
@@ -221,6 +221,11 @@ class WorkflowConfigs(BaseModel):
         default=5,
     )
 
+    WORKFLOW_MAX_PARALLELISM: PositiveInt = Field(
+        description='max number of nodes running concurrently in parallel branches of single workflow execution',
+        default=5,
+    )
+
 
 class OAuthConfigs(BaseModel):
     """
@@ -263,6 +268,11 @@ class ModerationConfigs(BaseModel):
         default=300,
     )
 
+    OUTPUT_MODERATION_BUFFER_OVERLAP: NonNegativeInt = Field(
+        description='number of characters of the previous window moderated again with the next window of an answer',
+        default=100,
+    )
+
 
 class ToolConfigs(BaseModel):
     """
@@ -274,6 +284,16 @@ class ToolConfigs(BaseModel):
         default=3600,
     )
 
+    AGENT_TOOL_CALL_MAX_WORKERS: PositiveInt = Field(
+        description='max number of tool calls of an agent round invoked concurrently',
+        default=4,
+    )
+
+    AGENT_TOOL_CALL_TIMEOUT: PositiveInt = Field(
+        description='timeout in seconds of a tool call invoked concurrently by an agent',
+        default=120,
+    )
+
 
 class MailConfigs(BaseModel):
     """
@@ -356,6 +376,28 @@ class RagEtlConfigs(BaseModel):
         default=None,
     )
 
+    EXTRACTION_CACHE_ENABLED: bool = Field(
+        description='whether to cache the documents extracted from upload files in storage,'
+                    ' keyed by file content hash and extractor version',
+        default=True,
+    )
+
+    EXTRACTION_PROCESS_POOL_SIZE: NonNegativeInt = Field(
+        description='number of processes parsing large PDF and Excel files in parallel, 0 to parse them'
+                    ' in the worker thread',
+        default=0,
+    )
+
+    EXTRACTION_PDF_PAGES_PER_JOB: PositiveInt = Field(
+        description='number of PDF pages parsed by a job of the extraction process pool',
+        default=50,
+    )
+
+    EXTRACTION_JOB_MEMORY_LIMIT: NonNegativeInt = Field(
+        description='max memory in MB of a job of the extraction process pool, 0 for no limit',
+        default=2048,
+    )
+
 
 class DataSetConfigs(BaseModel):
     """
@@ -367,6 +409,17 @@ class DataSetConfigs(BaseModel):
         default=30,
     )
 
+    DATASET_COUNTER_CACHE_TTL: PositiveInt = Field(
+        description='seconds the cached numbers of available documents and segments of a dataset are kept'
+                    ' before they are counted again',
+        default=600,
+    )
+
+    DATASET_ANALYTICS_FLUSH_INTERVAL: PositiveInt = Field(
+        description='interval in seconds for writing the buffered segment hits and dataset queries of retrievals',
+        default=60,
+    )
+
 
 class WorkspaceConfigs(BaseModel):
     """
@@ -389,6 +442,39 @@ class IndexingConfigs(BaseModel):
         default=1000,
     )
 
+    EMBEDDING_CACHE_LRU_SIZE: NonNegativeInt = Field(
+        description='max number of document embeddings cached in process memory in front of the embeddings table,'
+                    ' 0 to disable',
+        default=0,
+    )
+
+    EMBEDDING_CACHE_DTYPE: str = Field(
+        description='value type of cached embeddings in the embeddings table and redis,'
+                    ' available values are `float32` and `float16`',
+        default='float32',
+    )
+
+    INDEXING_PIPELINE_BATCH_SIZE: PositiveInt = Field(
+        description='number of segments saved, indexed and checkpointed together by the indexing pipeline',
+        default=50,
+    )
+
+    INDEXING_PIPELINE_QUEUE_SIZE: PositiveInt = Field(
+        description='max number of batches waiting between two stages of the indexing pipeline',
+        default=2,
+    )
+
+    INDEXING_PIPELINE_EMBEDDING_WORKERS: PositiveInt = Field(
+        description='number of threads embedding batches of segments in the indexing pipeline',
+        default=4,
+    )
+
+    INDEXING_PIPELINE_KEYWORD_BATCH_SIZE: PositiveInt = Field(
+        description='min number of segments whose keywords are written together by the indexing pipeline,'
+                    ' the keywords of the remaining segments are written at the end of the document',
+        default=1000,
+    )
+
 
 class ImageFormatConfigs(BaseModel):
     MULTIMODAL_SEND_IMAGE_FORMAT: str = Field(
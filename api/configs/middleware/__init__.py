@@ -1,6 +1,6 @@
 from typing import Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PositiveInt
 
 from configs.middleware.redis_configs import RedisConfigs
 from configs.middleware.vdb.chroma_configs import ChromaConfigs
@@ -35,10 +35,20 @@ class VectorStoreConfigs(BaseModel):
         default=None,
     )
 
+    VECTOR_STORE_CLIENT_IDLE_TIMEOUT: PositiveInt = Field(
+        description='seconds a shared vector store client can stay unused before it is dropped from the registry',
+        default=600,
+    )
+
+    VECTOR_STORE_CLIENT_HEALTH_CHECK_INTERVAL: PositiveInt = Field(
+        description='min interval in seconds between health checks of a shared vector store client',
+        default=30,
+    )
+
 
 class KeywordStoreConfigs(BaseModel):
     KEYWORD_STORE: str = Field(
-        description='keyword store type',
+        description='keyword store type, available values are `jieba` and `jieba_inverted_index`.',
         default='jieba',
     )
 
@@ -32,3 +32,18 @@ class PGVectorConfigs(BaseModel):
         description='PGVector database',
         default=None,
     )
+
+    PGVECTOR_MIN_CONNECTION: PositiveInt = Field(
+        description='min connection of the PGVector connection pool',
+        default=1,
+    )
+
+    PGVECTOR_MAX_CONNECTION: PositiveInt = Field(
+        description='max connection of the PGVector connection pool',
+        default=20,
+    )
+
+    PGVECTOR_POOL_TIMEOUT: PositiveInt = Field(
+        description='seconds to wait for a free connection of the PGVector connection pool',
+        default=30,
+    )
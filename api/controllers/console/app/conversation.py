@@ -22,6 +22,7 @@ from fields.conversation_fields import (
 )
 from libs.helper import datetime_string
 from libs.login import login_required
+from models.batch_loader import BatchLoader
 from models.model import AppMode, Conversation, Message, MessageAnnotation
 
 
@@ -96,6 +97,7 @@ class CompletionConversationApi(Resource):
             per_page=args['limit'],
             error_out=False
         )
+        BatchLoader.attach(conversations.items)
 
         return conversations
 
@@ -221,6 +223,7 @@ class ChatConversationApi(Resource):
             per_page=args['limit'],
             error_out=False
         )
+        BatchLoader.attach(conversations.items)
 
         return conversations
 
@@ -24,6 +24,7 @@ from fields.conversation_fields import annotation_fields, message_detail_fields
 from libs.helper import uuid_value
 from libs.infinite_scroll_pagination import InfiniteScrollPagination
 from libs.login import login_required
+from models.batch_loader import BatchLoader
 from models.model import AppMode, Conversation, Message, MessageAnnotation, MessageFeedback
 from services.annotation_service import AppAnnotationService
 from services.errors.conversation import ConversationNotExistsError
@@ -90,7 +91,7 @@ class ChatMessageListApi(Resource):
         history_messages = list(reversed(history_messages))
 
         return InfiniteScrollPagination(
-            data=history_messages,
+            data=BatchLoader.attach(history_messages),
             limit=args['limit'],
             has_more=has_more
         )
@@ -45,6 +45,7 @@ from fields.document_fields import (
     document_with_segments_fields,
 )
 from libs.login import login_required
+from models.batch_loader import BatchLoader
 from models.dataset import Dataset, DatasetProcessRule, Document, DocumentSegment
 from models.model import UploadFile
 from services.dataset_service import DatasetService, DocumentService
@@ -185,7 +186,7 @@ class DatasetDocumentListApi(Resource):
 
         paginated_documents = query.paginate(
             page=page, per_page=limit, max_per_page=100, error_out=False)
-        documents = paginated_documents.items
+        documents = BatchLoader.attach(paginated_documents.items)
         if fetch:
             for document in documents:
                 completed_segments = DocumentSegment.query.filter(DocumentSegment.completed_at.isnot(None),
@@ -545,6 +546,7 @@ class DocumentIndexingStatusApi(DocumentResource):
 
         document.completed_segments = completed_segments
         document.total_segments = total_segments
+        document.indexing_metrics = IndexingRunner.get_indexing_metrics(document_id)
         if document.is_paused:
             document.indexing_status = 'paused'
         return marshal(document, document_status_fields)
@@ -1,8 +1,13 @@
 import json
 import logging
+import time
 from collections.abc import Generator
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from copy import deepcopy
-from typing import Any, Union
+from typing import Any, Optional, Union
+
+from flask import Flask, current_app
 
 from core.agent.base_agent_runner import BaseAgentRunner
 from core.app.apps.base_app_queue_manager import PublishFrom
@@ -19,8 +24,9 @@ from core.model_runtime.entities.message_entities import (
 )
 from core.prompt.agent_history_prompt_transform import AgentHistoryPromptTransform
 from core.tools.entities.tool_entities import ToolInvokeMeta
+from core.tools.tool.tool import Tool
 from core.tools.tool_engine import ToolEngine
-from models.model import Message
+from models.model import Message, MessageFile
 
 logger = logging.getLogger(__name__)
 
@@ -224,9 +230,9 @@ class FunctionCallAgentRunner(BaseAgentRunner):
 
             # call tools
             tool_responses = []
-            for tool_call_id, tool_call_name, tool_call_args in tool_calls:
-                tool_instance = tool_instances.get(tool_call_name)
-                if not tool_instance:
+            tool_invoke_results = self._invoke_tools(tool_calls, tool_instances)
+            for (tool_call_id, tool_call_name, _), tool_invoke_result in zip(tool_calls, tool_invoke_results):
+                if tool_invoke_result is None:
                     tool_response = {
                         "tool_call_id": tool_call_id,
                         "tool_call_name": tool_call_name,
@@ -234,16 +240,7 @@ class FunctionCallAgentRunner(BaseAgentRunner):
                         "meta": ToolInvokeMeta.error_instance(f"there is not a tool named {tool_call_name}").to_dict()
                     }
                 else:
-                    # invoke tool
-                    tool_invoke_response, message_files, tool_invoke_meta = ToolEngine.agent_invoke(
-                        tool=tool_instance,
-                        tool_parameters=tool_call_args,
-                        user_id=self.user_id,
-                        tenant_id=self.tenant_id,
-                        message=self.message,
-                        invoke_from=self.application_generate_entity.invoke_from,
-                        agent_tool_callback=self.agent_callback,
-                    )
+                    tool_invoke_response, message_files, tool_invoke_meta = tool_invoke_result
                     # publish files
                     for message_file, save_as in message_files:
                         if save_as:
@@ -363,6 +360,102 @@ class FunctionCallAgentRunner(BaseAgentRunner):
 
         return tool_calls
 
+    def _invoke_tools(self, tool_calls: list[tuple[str, str, dict[str, Any]]],
+                      tool_instances: dict[str, Tool]) \
+            -> list[Optional[tuple[str, list[tuple[MessageFile, str]], ToolInvokeMeta]]]:
+        """
+        Invoke the tool calls of a round, several tool calls are invoked concurrently
+        by at most AGENT_TOOL_CALL_MAX_WORKERS threads, each of them within AGENT_TOOL_CALL_TIMEOUT
+
+        Returns:
+            List[Optional[Tuple[str, List[Tuple[MessageFile, str]], ToolInvokeMeta]]]:
+            [(tool_invoke_response, message_files, tool_invoke_meta)] in the order of the tool calls,
+            None for the tool calls of unknown tools
+        """
+        results = [None] * len(tool_calls)
+        invocations = [
+            (index, tool_instances[tool_call_name], tool_call_args)
+            for index, (_, tool_call_name, tool_call_args) in enumerate(tool_calls)
+            if tool_call_name in tool_instances
+        ]
+
+        max_workers = min(int(current_app.config.get('AGENT_TOOL_CALL_MAX_WORKERS', 4)), len(invocations))
+        if max_workers <= 1:
+            for index, tool_instance, tool_call_args in invocations:
+                results[index] = self._invoke_tool(tool_instance, tool_call_args)
+            return results
+
+        timeout = int(current_app.config.get('AGENT_TOOL_CALL_TIMEOUT', 120))
+        started_at: list[Optional[float]] = [None] * len(tool_calls)
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='agent_tool_call')
+        try:
+            futures = {
+                index: executor.submit(
+                    self._invoke_tool_in_thread,
+                    current_app._get_current_object(),
+                    tool_instance,
+                    tool_call_args,
+                    started_at,
+                    index
+                )
+                for index, tool_instance, tool_call_args in invocations
+            }
+
+            for index, tool_instance, _ in invocations:
+                try:
+                    results[index] = self._wait_tool_result(futures[index], started_at, index, timeout)
+                except FutureTimeoutError:
+                    error = f"tool {tool_instance.identity.name} timed out after {timeout} seconds"
+                    logger.warning(error)
+                    results[index] = f"tool invoke error: {error}", [], ToolInvokeMeta.error_instance(error)
+        finally:
+            # timed out tools can not be interrupted, they finish in the background
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return results
+
+    def _invoke_tool(self, tool_instance: Tool, tool_call_args: dict[str, Any]) \
+            -> tuple[str, list[tuple[MessageFile, str]], ToolInvokeMeta]:
+        """
+        Invoke a tool call
+        """
+        return ToolEngine.agent_invoke(
+            tool=tool_instance,
+            tool_parameters=tool_call_args,
+            user_id=self.user_id,
+            tenant_id=self.tenant_id,
+            message=self.message,
+            invoke_from=self.application_generate_entity.invoke_from,
+            agent_tool_callback=self.agent_callback,
+        )
+
+    def _invoke_tool_in_thread(self, flask_app: Flask,
+                               tool_instance: Tool,
+                               tool_call_args: dict[str, Any],
+                               started_at: list[Optional[float]],
+                               index: int) -> tuple[str, list[tuple[MessageFile, str]], ToolInvokeMeta]:
+        """
+        Invoke a tool call in a thread of the pool
+        """
+        with flask_app.app_context():
+            started_at[index] = time.perf_counter()
+            return self._invoke_tool(tool_instance, tool_call_args)
+
+    @staticmethod
+    def _wait_tool_result(future: Future, started_at: list[Optional[float]], index: int, timeout: int) \
+            -> tuple[str, list[tuple[MessageFile, str]], ToolInvokeMeta]:
+        """
+        Wait for the result of a tool call, the timeout starts when the tool call leaves the queue of the pool
+        """
+        while True:
+            start = started_at[index]
+            remaining = timeout if start is None else start + timeout - time.perf_counter()
+            try:
+                return future.result(timeout=max(remaining, 0))
+            except FutureTimeoutError:
+                if start is not None:
+                    raise
+
     def _init_system_message(self, prompt_template: str, prompt_messages: list[PromptMessage] = None) -> list[PromptMessage]:
         """
         Initialize system message
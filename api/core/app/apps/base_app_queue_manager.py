@@ -3,17 +3,22 @@ import time
 from abc import abstractmethod
 from collections.abc import Generator
 from enum import Enum
-from typing import Any
+from typing import Any, Optional
 
 from flask import current_app
 from sqlalchemy.orm import DeclarativeMeta
 
+from core.app.apps.task_stop_listener import TaskStopListener
 from core.app.entities.app_invoke_entities import InvokeFrom
 from core.app.entities.queue_entities import (
     AppQueueEvent,
+    QueueAgentMessageEvent,
     QueueErrorEvent,
+    QueueLLMChunkEvent,
+    QueueMessage,
     QueuePingEvent,
     QueueStopEvent,
+    QueueTextChunkEvent,
 )
 from extensions.ext_redis import redis_client
 
@@ -24,6 +29,12 @@ class PublishFrom(Enum):
 
 
 class AppQueueManager:
+    # chunk events are published for every token and only carry generated text
+    CHUNK_EVENT_TYPES = (QueueLLMChunkEvent, QueueAgentMessageEvent, QueueTextChunkEvent)
+    # seconds between reads of the stop flag from redis, when stop signals are received and when not
+    STOP_FLAG_CHECK_INTERVAL = 10
+    STOP_FLAG_CHECK_INTERVAL_UNSUBSCRIBED = 1
+
     def __init__(self, task_id: str,
                  user_id: str,
                  invoke_from: InvokeFrom) -> None:
@@ -41,6 +52,8 @@ class AppQueueManager:
         q = queue.Queue()
 
         self._q = q
+        self._stop_flag = TaskStopListener.register(self._task_id)
+        self._stop_flag_checked_at = 0.0
 
     def listen(self) -> Generator:
         """
@@ -52,12 +65,17 @@ class AppQueueManager:
         start_time = time.time()
         last_ping_time = 0
 
+        # message dequeued while coalescing chunks, not yielded yet
+        next_messages = []
         while True:
             try:
-                message = self._q.get(timeout=1)
+                message = next_messages.pop() if next_messages else self._q.get(timeout=1)
                 if message is None:
                     break
 
+                if isinstance(message.event, self.CHUNK_EVENT_TYPES):
+                    message, next_messages = self._coalesce_chunk_messages(message)
+
                 yield message
             except queue.Empty:
                 continue
@@ -100,7 +118,8 @@ class AppQueueManager:
         :param pub_from:
         :return:
         """
-        self._check_for_sqlalchemy_models(event.model_dump())
+        if not isinstance(event, self.CHUNK_EVENT_TYPES):
+            self._check_for_sqlalchemy_models(event.model_dump())
         self._publish(event, pub_from)
 
     @abstractmethod
@@ -129,19 +148,89 @@ class AppQueueManager:
 
         stopped_cache_key = cls._generate_stopped_cache_key(task_id)
         redis_client.setex(stopped_cache_key, 600, 1)
+        TaskStopListener.publish(task_id)
 
     def _is_stopped(self) -> bool:
         """
-        Check if task is stopped
+        Check if task is stopped, the stop flag is set by the stop signal of the task.
+        It is read from redis periodically in case the signal was missed
         :return:
         """
+        if self._stop_flag.is_set():
+            return True
+
+        check_interval = self.STOP_FLAG_CHECK_INTERVAL if TaskStopListener.is_subscribed() \
+            else self.STOP_FLAG_CHECK_INTERVAL_UNSUBSCRIBED
+        now = time.monotonic()
+        if now - self._stop_flag_checked_at < check_interval:
+            return False
+
+        self._stop_flag_checked_at = now
         stopped_cache_key = AppQueueManager._generate_stopped_cache_key(self._task_id)
         result = redis_client.get(stopped_cache_key)
         if result is not None:
+            self._stop_flag.set()
             return True
 
         return False
 
+    def _coalesce_chunk_messages(self, message: QueueMessage) -> tuple[QueueMessage, list[Optional[QueueMessage]]]:
+        """
+        Merge the chunk messages already waiting in the queue into the message
+        :param message: chunk message
+        :return: merged message, and the dequeued message which can not be merged, if any
+        """
+        event = message.event
+        next_messages = []
+        while not next_messages:
+            try:
+                next_message = self._q.get_nowait()
+            except queue.Empty:
+                break
+
+            merged_event = self._merge_chunk_events(event, next_message.event) if next_message else None
+            if merged_event:
+                event = merged_event
+            else:
+                next_messages.append(next_message)
+
+        if event is not message.event:
+            message = message.model_copy(update={'event': event})
+
+        return message, next_messages
+
+    @classmethod
+    def _merge_chunk_events(cls, event: AppQueueEvent, next_event: AppQueueEvent) -> Optional[AppQueueEvent]:
+        """
+        Merge two chunk events of generated text
+        :param event: chunk event
+        :param next_event: next event
+        :return: merged event, None if they can not be merged
+        """
+        if type(event) is not type(next_event):
+            return None
+
+        if isinstance(event, QueueTextChunkEvent):
+            if event.metadata != next_event.metadata:
+                return None
+
+            return event.model_copy(update={'text': event.text + next_event.text})
+
+        chunk, next_chunk = event.chunk, next_event.chunk
+        if (chunk.model != next_chunk.model
+                or chunk.delta.index != next_chunk.delta.index
+                or chunk.delta.usage or chunk.delta.finish_reason
+                or chunk.delta.message.tool_calls or next_chunk.delta.message.tool_calls
+                or not isinstance(chunk.delta.message.content, str)
+                or not isinstance(next_chunk.delta.message.content, str)):
+            return None
+
+        message = chunk.delta.message.model_copy(
+            update={'content': chunk.delta.message.content + next_chunk.delta.message.content}
+        )
+        delta = next_chunk.delta.model_copy(update={'message': message})
+        return event.model_copy(update={'chunk': chunk.model_copy(update={'delta': delta})})
+
     @classmethod
     def _generate_task_belong_cache_key(cls, task_id: str) -> str:
         """
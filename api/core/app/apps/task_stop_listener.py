@@ -0,0 +1,100 @@
+import logging
+import os
+import threading
+import time
+import weakref
+from typing import Optional
+
+from extensions.ext_redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class TaskStopListener:
+    """
+    Stop signals of the generate tasks running in the process.
+
+    Stopping a task publishes its id on a redis channel. A thread of the process subscribed to the
+    channel sets the local stop flags of the tasks, so queue managers check a `threading.Event`
+    instead of reading redis for every message. Flags are held weakly and go away with the queue
+    managers of finished tasks.
+    """
+    CHANNEL = 'generate_task_stopped'
+    RECONNECT_INTERVAL = 1
+
+    _flags: 'weakref.WeakValueDictionary[str, threading.Event]' = weakref.WeakValueDictionary()
+    _thread: Optional[threading.Thread] = None
+    _subscribed = threading.Event()
+    _pid: Optional[int] = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def register(cls, task_id: str) -> threading.Event:
+        """
+        Get the stop flag of a task, set when the task is stopped
+        :param task_id: task id
+        :return:
+        """
+        cls._ensure_thread()
+        with cls._lock:
+            flag = cls._flags.get(task_id)
+            if flag is None:
+                flag = threading.Event()
+                cls._flags[task_id] = flag
+
+            return flag
+
+    @classmethod
+    def publish(cls, task_id: str) -> None:
+        """
+        Publish the stop signal of a task to all processes
+        :param task_id: task id
+        :return:
+        """
+        redis_client.publish(cls.CHANNEL, task_id)
+
+    @classmethod
+    def is_subscribed(cls) -> bool:
+        """
+        Whether stop signals are received, they may be missed while the subscription reconnects
+        :return:
+        """
+        return cls._subscribed.is_set()
+
+    @classmethod
+    def _ensure_thread(cls) -> None:
+        with cls._lock:
+            if cls._pid == os.getpid() and cls._thread and cls._thread.is_alive():
+                return
+
+            # the thread of the parent process is not running in a forked worker
+            cls._pid = os.getpid()
+            cls._subscribed.clear()
+            cls._thread = threading.Thread(target=cls._listen, name='task_stop_listener', daemon=True)
+            cls._thread.start()
+
+    @classmethod
+    def _listen(cls) -> None:
+        while True:
+            pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.subscribe(cls.CHANNEL)
+                cls._subscribed.set()
+                for message in pubsub.listen():
+                    if message.get('type') != 'message':
+                        continue
+
+                    task_id = message['data']
+                    if isinstance(task_id, bytes):
+                        task_id = task_id.decode('utf-8')
+
+                    flag = cls._flags.get(task_id)
+                    if flag is not None:
+                        flag.set()
+            except Exception:
+                logger.warning('Task stop signal subscription failed, reconnecting', exc_info=True)
+            finally:
+                cls._subscribed.clear()
+                pubsub.close()
+
+            time.sleep(cls.RECONNECT_INTERVAL)
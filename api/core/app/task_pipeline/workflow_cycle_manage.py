@@ -534,9 +534,10 @@ class WorkflowCycleManage(WorkflowIterationCycleManage):
                 error=event.error
             )
         else:
-            if self._task_state.latest_node_execution_info:
+            output_node_execution_info = self._get_output_node_execution_info()
+            if output_node_execution_info:
                 workflow_node_execution = db.session.query(WorkflowNodeExecution).filter(
-                    WorkflowNodeExecution.id == self._task_state.latest_node_execution_info.workflow_node_execution_id).first()
+                    WorkflowNodeExecution.id == output_node_execution_info.workflow_node_execution_id).first()
                 outputs = workflow_node_execution.outputs
             else:
                 outputs = None
@@ -555,6 +556,18 @@ class WorkflowCycleManage(WorkflowIterationCycleManage):
 
         return workflow_run
 
+    def _get_output_node_execution_info(self) -> Optional[NodeExecutionInfo]:
+        """
+        Get execution info of the node whose outputs are the workflow run outputs
+        :return:
+        """
+        # nodes of parallel branches may start after the end node, so the latest node is not always the end node
+        for node_execution_info in self._task_state.ran_node_execution_infos.values():
+            if node_execution_info.node_type == NodeType.END:
+                return node_execution_info
+
+        return self._task_state.latest_node_execution_info
+
     def _fetch_files_from_node_outputs(self, outputs_dict: dict) -> list[dict]:
         """
         Fetch files from node outputs
@@ -3,8 +3,8 @@ from core.app.apps.base_app_queue_manager import AppQueueManager, PublishFrom
 from core.app.entities.app_invoke_entities import InvokeFrom
 from core.app.entities.queue_entities import QueueRetrieverResourcesEvent
 from core.rag.models.document import Document
+from core.rag.retrieval.retrieval_recorder import RetrievalRecorder
 from extensions.ext_database import db
-from models.dataset import DatasetQuery, DocumentSegment
 from models.model import DatasetRetrieverResource
 
 
@@ -26,9 +26,9 @@ class DatasetIndexToolCallbackHandler:
         """
         Handle query.
         """
-        dataset_query = DatasetQuery(
-            dataset_id=dataset_id,
-            content=query,
+        RetrievalRecorder.record_queries(
+            query=query,
+            dataset_ids=[dataset_id],
             source='app',
             source_app_id=self._app_id,
             created_by_role=('account'
@@ -36,27 +36,9 @@ class DatasetIndexToolCallbackHandler:
             created_by=self._user_id
         )
 
-        db.session.add(dataset_query)
-        db.session.commit()
-
     def on_tool_end(self, documents: list[Document]) -> None:
         """Handle tool end."""
-        for document in documents:
-            query = db.session.query(DocumentSegment).filter(
-                DocumentSegment.index_node_id == document.metadata['doc_id']
-            )
-
-            # if 'dataset_id' in document.metadata:
-            if 'dataset_id' in document.metadata:
-                query = query.filter(DocumentSegment.dataset_id == document.metadata['dataset_id'])
-
-            # add hit count to document segment
-            query.update(
-                {DocumentSegment.hit_count: DocumentSegment.hit_count + 1},
-                synchronize_session=False
-            )
-
-            db.session.commit()
+        RetrievalRecorder.record_hits(documents)
 
     def return_retriever_resource_info(self, resource: list):
         """Handle return_retriever_resource_info."""
@@ -1,10 +1,14 @@
-import base64
 import logging
+import threading
 from typing import Optional, cast
 
 import numpy as np
+from cachetools import LRUCache
+from flask import current_app
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import IntegrityError
 
+from core.embedding.embedding_codec import decode_cached_query_embedding, decode_embedding, encode_embedding
 from core.model_manager import ModelInstance
 from core.model_runtime.entities.model_entities import ModelPropertyKey
 from core.model_runtime.model_providers.__base.text_embedding_model import TextEmbeddingModel
@@ -16,8 +20,17 @@ from models.dataset import Embedding
 
 logger = logging.getLogger(__name__)
 
+# max number of text hashes in a single lookup or insert statement of the embeddings table
+EMBEDDING_CACHE_QUERY_BATCH_SIZE = 1000
+
 
 class CacheEmbedding(Embeddings):
+    # in-process LRU of document embeddings in front of the embeddings table,
+    # keyed by (provider, model, text hash), created on first use from EMBEDDING_CACHE_LRU_SIZE.
+    # vectors are kept as the float lists returned to callers, so hits are not converted again
+    _lru_cache: Optional[LRUCache] = None
+    _lru_cache_lock = threading.Lock()
+
     def __init__(self, model_instance: ModelInstance, user: Optional[str] = None) -> None:
         self._model_instance = model_instance
         self._user = user
@@ -26,56 +39,47 @@ class CacheEmbedding(Embeddings):
         """Embed search docs in batches of 10."""
         # use doc embedding cache or store if not exists
         text_embeddings = [None for _ in range(len(texts))]
-        embedding_queue_indices = []
-        for i, text in enumerate(texts):
-            hash = helper.generate_text_hash(text)
-            embedding = db.session.query(Embedding).filter_by(model_name=self._model_instance.model,
-                                                              hash=hash,
-                                                              provider_name=self._model_instance.provider).first()
-            if embedding:
-                text_embeddings[i] = embedding.get_embedding()
-            else:
-                embedding_queue_indices.append(i)
-        if embedding_queue_indices:
-            embedding_queue_texts = [texts[i] for i in embedding_queue_indices]
-            embedding_queue_embeddings = []
+        text_hashes = [helper.generate_text_hash(text) for text in texts]
+
+        cached_embeddings = self._get_cached_embeddings(set(text_hashes))
+
+        # embed each missing text only once, even if it occurs multiple times
+        embedding_queue_texts = {}
+        for i, hash in enumerate(text_hashes):
+            if hash in cached_embeddings:
+                text_embeddings[i] = cached_embeddings[hash]
+            elif hash not in embedding_queue_texts:
+                embedding_queue_texts[hash] = texts[i]
+
+        if embedding_queue_texts:
+            embedding_queue_hashes = list(embedding_queue_texts.keys())
+            embedding_queue_embeddings = {}
             try:
                 model_type_instance = cast(TextEmbeddingModel, self._model_instance.model_type_instance)
                 model_schema = model_type_instance.get_model_schema(self._model_instance.model,
                                                                     self._model_instance.credentials)
                 max_chunks = model_schema.model_properties[ModelPropertyKey.MAX_CHUNKS] \
                     if model_schema and ModelPropertyKey.MAX_CHUNKS in model_schema.model_properties else 1
-                for i in range(0, len(embedding_queue_texts), max_chunks):
-                    batch_texts = embedding_queue_texts[i:i + max_chunks]
+                for i in range(0, len(embedding_queue_hashes), max_chunks):
+                    batch_hashes = embedding_queue_hashes[i:i + max_chunks]
 
                     embedding_result = self._model_instance.invoke_text_embedding(
-                        texts=batch_texts,
+                        texts=[embedding_queue_texts[hash] for hash in batch_hashes],
                         user=self._user
                     )
 
-                    for vector in embedding_result.embeddings:
+                    for hash, vector in zip(batch_hashes, embedding_result.embeddings):
                         try:
                             normalized_embedding = (vector / np.linalg.norm(vector)).tolist()
-                            embedding_queue_embeddings.append(normalized_embedding)
-                        except IntegrityError:
-                            db.session.rollback()
+                            embedding_queue_embeddings[hash] = normalized_embedding
                         except Exception as e:
                             logging.exception('Failed transform embedding: ', e)
-                cache_embeddings = []
-                try:
-                    for i, embedding in zip(embedding_queue_indices, embedding_queue_embeddings):
-                        text_embeddings[i] = embedding
-                        hash = helper.generate_text_hash(texts[i])
-                        if hash not in cache_embeddings:
-                            embedding_cache = Embedding(model_name=self._model_instance.model,
-                                                        hash=hash,
-                                                        provider_name=self._model_instance.provider)
-                            embedding_cache.set_embedding(embedding)
-                            db.session.add(embedding_cache)
-                            cache_embeddings.append(hash)
-                    db.session.commit()
-                except IntegrityError:
-                    db.session.rollback()
+
+                for i, hash in enumerate(text_hashes):
+                    if text_embeddings[i] is None:
+                        text_embeddings[i] = embedding_queue_embeddings.get(hash)
+
+                self._store_embeddings(embedding_queue_embeddings)
             except Exception as ex:
                 db.session.rollback()
                 logger.error('Failed to embed documents: ', ex)
@@ -83,6 +87,100 @@ class CacheEmbedding(Embeddings):
 
         return text_embeddings
 
+    def _get_cached_embeddings(self, hashes: set[str]) -> dict[str, list[float]]:
+        """
+        Get cached embeddings of text hashes, from the in-process LRU first and then from the database
+        :param hashes: text hashes
+        :return: text hash -> embedding
+        """
+        cached_embeddings = {}
+        lru_cache = self._get_lru_cache()
+        if lru_cache is not None:
+            with self._lru_cache_lock:
+                for hash in hashes:
+                    embedding = lru_cache.get(self._lru_cache_key(hash))
+                    if embedding is not None:
+                        cached_embeddings[hash] = embedding
+
+        missing_hashes = [hash for hash in hashes if hash not in cached_embeddings]
+        for i in range(0, len(missing_hashes), EMBEDDING_CACHE_QUERY_BATCH_SIZE):
+            batch_hashes = missing_hashes[i:i + EMBEDDING_CACHE_QUERY_BATCH_SIZE]
+            embeddings = db.session.query(Embedding.hash, Embedding.embedding).filter(
+                Embedding.model_name == self._model_instance.model,
+                Embedding.provider_name == self._model_instance.provider,
+                Embedding.hash.in_(batch_hashes)
+            ).all()
+
+            for hash, embedding in embeddings:
+                # converted once, the list is kept in the LRU for the next hits
+                cached_embeddings[hash] = decode_embedding(embedding).tolist()
+
+        if lru_cache is not None and missing_hashes:
+            self._put_lru_cache({
+                hash: cached_embeddings[hash] for hash in missing_hashes if hash in cached_embeddings
+            })
+
+        return cached_embeddings
+
+    def _store_embeddings(self, embeddings: dict[str, list[float]]) -> None:
+        """
+        Bulk store new embeddings into the database, skipping the ones stored concurrently
+        :param embeddings: text hash -> embedding
+        :return:
+        """
+        if not embeddings:
+            return
+
+        try:
+            rows = []
+            for hash, embedding in embeddings.items():
+                embedding_cache = Embedding(model_name=self._model_instance.model,
+                                            hash=hash,
+                                            provider_name=self._model_instance.provider)
+                embedding_cache.set_embedding(embedding)
+                rows.append({
+                    'model_name': embedding_cache.model_name,
+                    'hash': embedding_cache.hash,
+                    'provider_name': embedding_cache.provider_name,
+                    'embedding': embedding_cache.embedding,
+                })
+
+            for i in range(0, len(rows), EMBEDDING_CACHE_QUERY_BATCH_SIZE):
+                db.session.execute(
+                    insert(Embedding).values(rows[i:i + EMBEDDING_CACHE_QUERY_BATCH_SIZE])
+                    .on_conflict_do_nothing(index_elements=['model_name', 'hash', 'provider_name'])
+                )
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+
+        self._put_lru_cache(embeddings)
+
+    def _lru_cache_key(self, hash: str) -> tuple[str, str, str]:
+        return self._model_instance.provider, self._model_instance.model, hash
+
+    @classmethod
+    def _get_lru_cache(cls) -> Optional[LRUCache]:
+        if cls._lru_cache is None:
+            maxsize = current_app.config.get('EMBEDDING_CACHE_LRU_SIZE') or 0
+            if maxsize <= 0:
+                return None
+
+            with cls._lru_cache_lock:
+                if cls._lru_cache is None:
+                    cls._lru_cache = LRUCache(maxsize=maxsize)
+
+        return cls._lru_cache
+
+    def _put_lru_cache(self, embeddings: dict[str, list[float]]) -> None:
+        lru_cache = self._get_lru_cache()
+        if lru_cache is None:
+            return
+
+        with self._lru_cache_lock:
+            for hash, embedding in embeddings.items():
+                lru_cache[self._lru_cache_key(hash)] = embedding
+
     def embed_query(self, text: str) -> list[float]:
         """Embed query text."""
         # use doc embedding cache or store if not exists
@@ -91,7 +189,7 @@ class CacheEmbedding(Embeddings):
         embedding = redis_client.get(embedding_cache_key)
         if embedding:
             redis_client.expire(embedding_cache_key, 600)
-            return list(np.frombuffer(base64.b64decode(embedding), dtype="float"))
+            return decode_cached_query_embedding(embedding).tolist()
         try:
             embedding_result = self._model_instance.invoke_text_embedding(
                 texts=[text],
@@ -104,14 +202,12 @@ class CacheEmbedding(Embeddings):
             raise ex
 
         try:
-            # encode embedding to base64
-            embedding_vector = np.array(embedding_results)
-            vector_bytes = embedding_vector.tobytes()
-            # Transform to Base64
-            encoded_vector = base64.b64encode(vector_bytes)
-            # Transform to string
-            encoded_str = encoded_vector.decode("utf-8")
-            redis_client.setex(embedding_cache_key, 600, encoded_str)
+            # encode embedding to compact binary format
+            encoded_vector = encode_embedding(
+                embedding_results,
+                dtype=current_app.config.get('EMBEDDING_CACHE_DTYPE') or 'float32'
+            )
+            redis_client.setex(embedding_cache_key, 600, encoded_vector)
 
         except IntegrityError:
             db.session.rollback()
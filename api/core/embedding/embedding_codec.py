@@ -0,0 +1,70 @@
+import base64
+import pickle
+from typing import Union
+
+import numpy as np
+
+# compact format: 1 byte magic, 1 byte format version, 1 byte dtype code, 1 byte padding, then raw little-endian values.
+# the 4 bytes header keeps the values aligned, and never collides with pickle (starts with 0x80) or base64 data.
+EMBEDDING_FORMAT_MAGIC = b'\x00'
+EMBEDDING_FORMAT_VERSION = 1
+EMBEDDING_HEADER_SIZE = 4
+
+EMBEDDING_DTYPES = {
+    'float32': (1, np.dtype('<f4')),
+    'float16': (2, np.dtype('<f2')),
+}
+_EMBEDDING_DTYPE_CODES = {code: dtype for code, dtype in EMBEDDING_DTYPES.values()}
+
+
+def encode_embedding(embedding: Union[list[float], np.ndarray], dtype: str = 'float32') -> bytes:
+    """
+    Encode embedding into the compact binary format
+    :param embedding: embedding vector
+    :param dtype: value type, float32 or float16
+    :return:
+    """
+    if dtype not in EMBEDDING_DTYPES:
+        raise ValueError(f'unsupported embedding dtype: {dtype}')
+
+    dtype_code, np_dtype = EMBEDDING_DTYPES[dtype]
+    header = EMBEDDING_FORMAT_MAGIC + bytes([EMBEDDING_FORMAT_VERSION, dtype_code, 0])
+    return header + np.asarray(embedding, dtype=np_dtype).tobytes()
+
+
+def is_compact_embedding(data: bytes) -> bool:
+    """
+    Check whether data is in the compact binary format
+    :param data: encoded embedding
+    :return:
+    """
+    return len(data) >= EMBEDDING_HEADER_SIZE and data[:1] == EMBEDDING_FORMAT_MAGIC
+
+
+def decode_embedding(data: bytes) -> np.ndarray:
+    """
+    Decode embedding in the compact binary format, or a legacy pickled list of floats.
+    Compact data is decoded without copy, so the returned array is read-only.
+    :param data: encoded embedding
+    :return:
+    """
+    if not is_compact_embedding(data):
+        return np.asarray(pickle.loads(data), dtype=np.float64)
+
+    version, dtype_code = data[1], data[2]
+    if version != EMBEDDING_FORMAT_VERSION or dtype_code not in _EMBEDDING_DTYPE_CODES:
+        raise ValueError(f'unsupported embedding format, version: {version}, dtype code: {dtype_code}')
+
+    return np.frombuffer(data, dtype=_EMBEDDING_DTYPE_CODES[dtype_code], offset=EMBEDDING_HEADER_SIZE)
+
+
+def decode_cached_query_embedding(data: bytes) -> np.ndarray:
+    """
+    Decode query embedding cached in redis, in the compact binary format or the legacy base64 encoded float64 format
+    :param data: cached embedding
+    :return:
+    """
+    if is_compact_embedding(data):
+        return decode_embedding(data)
+
+    return np.frombuffer(base64.b64decode(data), dtype='float')
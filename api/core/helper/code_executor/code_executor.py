@@ -4,7 +4,6 @@ from enum import Enum
 from threading import Lock
 from typing import Literal, Optional
 
-from httpx import get, post
 from pydantic import BaseModel
 from yarl import URL
 
@@ -14,6 +13,7 @@ from core.helper.code_executor.javascript.javascript_transformer import NodeJsTe
 from core.helper.code_executor.jinja2.jinja2_transformer import Jinja2TemplateTransformer
 from core.helper.code_executor.python3.python3_transformer import Python3TemplateTransformer
 from core.helper.code_executor.template_transformer import TemplateTransformer
+from core.helper.http_client_pool import HttpClientPool
 
 logger = logging.getLogger(__name__)
 
@@ -91,7 +91,7 @@ class CodeExecutor:
             data['dependencies'] = [dependency.model_dump() for dependency in dependencies]
 
         try:
-            response = post(str(url), json=data, headers=headers, timeout=CODE_EXECUTION_TIMEOUT)
+            response = HttpClientPool.request('POST', str(url), json=data, headers=headers, timeout=CODE_EXECUTION_TIMEOUT)
             if response.status_code == 503:
                 raise CodeExecutionException('Code execution service is unavailable')
             elif response.status_code != 200:
@@ -183,7 +183,7 @@ class CodeExecutor:
         }
 
         try:
-            response = get(str(url), params=data, headers=headers, timeout=CODE_EXECUTION_TIMEOUT)
+            response = HttpClientPool.request('GET', str(url), params=data, headers=headers, timeout=CODE_EXECUTION_TIMEOUT)
             if response.status_code != 200:
                 raise Exception(f'Failed to list dependencies, got status code {response.status_code}, please check if the sandbox service is running')
             response = response.json()
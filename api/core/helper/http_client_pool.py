@@ -0,0 +1,160 @@
+"""
+Process-wide pool of keep-alive HTTP clients
+"""
+
+import logging
+import os
+import threading
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import Any, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+HTTP_CLIENT_MAX_CONNECTIONS = int(os.getenv('HTTP_CLIENT_MAX_CONNECTIONS', '100'))
+HTTP_CLIENT_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('HTTP_CLIENT_MAX_KEEPALIVE_CONNECTIONS', '20'))
+HTTP_CLIENT_MAX_CONNECTIONS_PER_HOST = int(os.getenv('HTTP_CLIENT_MAX_CONNECTIONS_PER_HOST', '20'))
+HTTP_CLIENT_KEEPALIVE_EXPIRY = float(os.getenv('HTTP_CLIENT_KEEPALIVE_EXPIRY', '30'))
+HTTP_CLIENT_HTTP2_ENABLED = os.getenv('HTTP_CLIENT_HTTP2_ENABLED', 'false').lower() == 'true'
+
+
+def _http2_available() -> bool:
+    if not HTTP_CLIENT_HTTP2_ENABLED:
+        return False
+
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logger.warning('HTTP_CLIENT_HTTP2_ENABLED is set but the h2 package is not installed, using HTTP/1.1')
+        return False
+
+    return True
+
+
+class HttpClientPool:
+    """
+    Pool of `httpx.Client`s shared by the threads of a process, one per proxy configuration.
+
+    Requests to the same host reuse keep-alive connections instead of opening a connection
+    and doing a TLS handshake per request. Concurrent requests to a host are capped to
+    HTTP_CLIENT_MAX_CONNECTIONS_PER_HOST, further requests wait for a slot. The clients never
+    store cookies of responses, so requests made for different tenants do not share state.
+    """
+    _clients: dict[tuple, httpx.Client] = {}
+    _host_slots: dict[tuple[str, str, int], threading.BoundedSemaphore] = {}
+    _pid: Optional[int] = None
+    _lock = threading.Lock()
+
+    _metrics = {
+        'requests': 0,
+        'new_connections': 0,
+    }
+
+    @classmethod
+    def request(cls, method: str, url: str, proxies: Optional[dict[str, str]] = None, **kwargs: Any) -> httpx.Response:
+        """
+        Send a request with the pooled client
+        :param method: http method
+        :param url: url
+        :param proxies: proxy urls keyed by url pattern like `http://`, None for direct connections
+        :param kwargs: arguments of `httpx.Client.request`
+        :return:
+        """
+        client = cls._get_client(proxies)
+        request_url = httpx.URL(url)
+        extensions = {**kwargs.pop('extensions', {}), 'trace': cls._trace}
+
+        with cls._get_host_slot(request_url):
+            with cls._lock:
+                cls._metrics['requests'] += 1
+            return client.request(method, request_url, extensions=extensions, **kwargs)
+
+    @classmethod
+    def get_metrics(cls) -> dict:
+        """
+        Get the number of requests of the process, and of connections opened and reused by them
+        :return:
+        """
+        with cls._lock:
+            requests = cls._metrics['requests']
+            new_connections = cls._metrics['new_connections']
+
+        return {
+            'requests': requests,
+            'new_connections': new_connections,
+            'reused_connections': max(requests - new_connections, 0),
+            'clients': len(cls._clients),
+        }
+
+    @classmethod
+    def close(cls) -> None:
+        """
+        Close the clients and their connections
+        :return:
+        """
+        with cls._lock:
+            clients, cls._clients = cls._clients, {}
+            cls._host_slots = {}
+
+        for client in clients.values():
+            client.close()
+
+    @classmethod
+    def _get_client(cls, proxies: Optional[dict[str, str]]) -> httpx.Client:
+        client_key = tuple(sorted(proxies.items())) if proxies else ()
+        with cls._lock:
+            if cls._pid != os.getpid():
+                # connections of the parent process can not be shared with a forked worker
+                cls._clients = {}
+                cls._host_slots = {}
+                cls._pid = os.getpid()
+
+            client = cls._clients.get(client_key)
+            if client is None:
+                client = cls._create_client(proxies)
+                cls._clients[client_key] = client
+
+            return client
+
+    @staticmethod
+    def _create_client(proxies: Optional[dict[str, str]]) -> httpx.Client:
+        limits = httpx.Limits(
+            max_connections=HTTP_CLIENT_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_CLIENT_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTP_CLIENT_KEEPALIVE_EXPIRY,
+        )
+        http2 = _http2_available()
+
+        mounts = None
+        if proxies:
+            mounts = {
+                pattern: httpx.HTTPTransport(proxy=proxy_url, limits=limits, http2=http2)
+                for pattern, proxy_url in proxies.items()
+            }
+
+        return httpx.Client(
+            limits=limits,
+            http2=http2,
+            mounts=mounts,
+            # reject all cookies set by responses
+            cookies=CookieJar(policy=DefaultCookiePolicy(allowed_domains=[])),
+        )
+
+    @classmethod
+    def _get_host_slot(cls, url: httpx.URL) -> threading.BoundedSemaphore:
+        host_key = (url.scheme, url.host, url.port or (443 if url.scheme == 'https' else 80))
+        with cls._lock:
+            host_slot = cls._host_slots.get(host_key)
+            if host_slot is None:
+                host_slot = threading.BoundedSemaphore(HTTP_CLIENT_MAX_CONNECTIONS_PER_HOST)
+                cls._host_slots[host_key] = host_slot
+
+            return host_slot
+
+    @classmethod
+    def _trace(cls, event_name: str, info: dict) -> None:
+        # connections are only set up by requests which can not reuse a keep-alive connection
+        if event_name == 'connection.connect_tcp.complete':
+            with cls._lock:
+                cls._metrics['new_connections'] += 1
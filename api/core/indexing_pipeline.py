@@ -0,0 +1,253 @@
+import contextlib
+import queue
+import threading
+import time
+from collections.abc import Callable, Iterable
+from typing import Any, Optional
+
+from flask import Flask
+
+# marks the end of the items of a stage queue
+_END_OF_STREAM = object()
+
+
+class PipelineStage:
+    """
+    Stage of an indexing pipeline.
+
+    `process` is called with every item put into the stage and returns the items passed to the next stage,
+    so a stage can drop, split or batch items. `flush` is called once after the last item of the stage
+    to emit the items still buffered.
+    """
+
+    def __init__(self, name: str,
+                 process: Callable[[Any], Iterable[Any]],
+                 flush: Optional[Callable[[], Iterable[Any]]] = None,
+                 workers: int = 1) -> None:
+        self.name = name
+        self.process = process
+        self.flush = flush
+        self.workers = max(workers, 1)
+
+
+class PipelineStageMetrics:
+    """
+    Progress metrics of a pipeline stage
+    """
+
+    def __init__(self, name: str, workers: int) -> None:
+        self.name = name
+        self.workers = workers
+        self.items_in = 0
+        self.items_out = 0
+        self.busy_seconds = 0.0
+        self.queue_size = 0
+        self.max_queue_size = 0
+        self.finished = False
+
+    def to_dict(self) -> dict:
+        return {
+            'stage': self.name,
+            'workers': self.workers,
+            'items_in': self.items_in,
+            'items_out': self.items_out,
+            'busy_seconds': round(self.busy_seconds, 3),
+            'queue_size': self.queue_size,
+            'max_queue_size': self.max_queue_size,
+            'finished': self.finished,
+        }
+
+
+class PipelineStoppedError(Exception):
+    """
+    Raised in the stages of a pipeline stopped by the failure of another stage
+    """
+    pass
+
+
+class IndexingPipeline:
+    """
+    Run items through stages in order, each stage in its own worker threads.
+
+    Stages are connected by bounded queues, so a fast stage blocks once the next one falls `queue_size`
+    items behind and only a few items are held in memory at a time. The first error of any stage stops
+    the whole pipeline and is raised by `run`.
+    """
+
+    def __init__(self, stages: list[PipelineStage],
+                 queue_size: int = 2,
+                 flask_app: Optional[Flask] = None) -> None:
+        self.stages = stages
+        self.queue_size = max(queue_size, 1)
+        self.flask_app = flask_app
+        self._source_metrics: Optional[PipelineStageMetrics] = None
+        self._metrics = [PipelineStageMetrics(stage.name, stage.workers) for stage in stages]
+        self._metrics_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._error: Optional[BaseException] = None
+
+    def run(self, items: Iterable[Any], source_name: str = 'source') -> list[Any]:
+        """
+        Run items through the stages
+        :param items: items of the first stage, iterated in a worker thread
+        :param source_name: stage name of the items iteration in metrics
+        :return: items emitted by the last stage
+        """
+        self._source_metrics = PipelineStageMetrics(source_name, 1)
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        results = []
+        remaining_workers = [stage.workers for stage in self.stages]
+
+        threads = [threading.Thread(target=self._run_source, args=(items, queues, results))]
+        for stage_index, stage in enumerate(self.stages):
+            for _ in range(stage.workers):
+                threads.append(threading.Thread(
+                    target=self._run_stage,
+                    args=(stage_index, queues, remaining_workers, results)
+                ))
+
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if self._error is not None:
+            raise self._error
+
+        return results
+
+    def get_metrics(self) -> list[dict]:
+        """
+        Get progress metrics of the source and the stages
+        :return:
+        """
+        with self._metrics_lock:
+            metrics = [self._source_metrics] if self._source_metrics else []
+            return [stage_metrics.to_dict() for stage_metrics in metrics + self._metrics]
+
+    def _run_source(self, items: Iterable[Any], queues: list[queue.Queue], results: list) -> None:
+        metrics = self._source_metrics
+        output_queue = queues[0] if queues else None
+        output_metrics = self._metrics[0] if queues else None
+        with self._app_context():
+            try:
+                iterator = iter(items)
+                while True:
+                    started_at = time.perf_counter()
+                    try:
+                        item = next(iterator)
+                    except StopIteration:
+                        break
+                    finally:
+                        self._add_busy_time(metrics, time.perf_counter() - started_at)
+
+                    self._emit(metrics, item, output_queue, output_metrics, results)
+
+                with self._metrics_lock:
+                    metrics.finished = True
+                if output_queue is not None:
+                    for _ in range(self.stages[0].workers):
+                        self._put(output_queue, _END_OF_STREAM)
+            except PipelineStoppedError:
+                pass
+            except BaseException as e:
+                self._fail(e)
+
+    def _run_stage(self, stage_index: int, queues: list[queue.Queue], remaining_workers: list[int],
+                   results: list) -> None:
+        stage = self.stages[stage_index]
+        metrics = self._metrics[stage_index]
+        input_queue = queues[stage_index]
+        output_queue = queues[stage_index + 1] if stage_index + 1 < len(queues) else None
+        output_metrics = self._metrics[stage_index + 1] if stage_index + 1 < len(queues) else None
+        with self._app_context():
+            try:
+                while True:
+                    item = self._get(input_queue)
+                    with self._metrics_lock:
+                        metrics.queue_size = input_queue.qsize()
+                    if item is _END_OF_STREAM:
+                        break
+
+                    with self._metrics_lock:
+                        metrics.items_in += 1
+                    self._process(metrics, stage.process, output_queue, output_metrics, results, item)
+
+                with self._metrics_lock:
+                    remaining_workers[stage_index] -= 1
+                    is_last_worker = remaining_workers[stage_index] == 0
+
+                if is_last_worker:
+                    if stage.flush:
+                        self._process(metrics, lambda _: stage.flush(), output_queue, output_metrics, results, None)
+                    with self._metrics_lock:
+                        metrics.finished = True
+                    if output_queue is not None:
+                        for _ in range(self.stages[stage_index + 1].workers):
+                            self._put(output_queue, _END_OF_STREAM)
+            except PipelineStoppedError:
+                pass
+            except BaseException as e:
+                self._fail(e)
+
+    def _process(self, metrics: PipelineStageMetrics, process: Callable[[Any], Iterable[Any]],
+                 output_queue: Optional[queue.Queue], output_metrics: Optional[PipelineStageMetrics],
+                 results: list, item: Any) -> None:
+        started_at = time.perf_counter()
+        try:
+            outputs = process(item) or []
+            for output in outputs:
+                self._add_busy_time(metrics, time.perf_counter() - started_at)
+                # time blocked by the next stage is not counted as busy time
+                self._emit(metrics, output, output_queue, output_metrics, results)
+                started_at = time.perf_counter()
+        finally:
+            self._add_busy_time(metrics, time.perf_counter() - started_at)
+
+    def _emit(self, metrics: PipelineStageMetrics, item: Any, output_queue: Optional[queue.Queue],
+              output_metrics: Optional[PipelineStageMetrics], results: list) -> None:
+        if output_queue is None:
+            with self._metrics_lock:
+                results.append(item)
+        else:
+            self._put(output_queue, item)
+            with self._metrics_lock:
+                output_metrics.queue_size = output_queue.qsize()
+                output_metrics.max_queue_size = max(output_metrics.max_queue_size, output_metrics.queue_size)
+
+        with self._metrics_lock:
+            metrics.items_out += 1
+
+    def _add_busy_time(self, metrics: PipelineStageMetrics, seconds: float) -> None:
+        with self._metrics_lock:
+            metrics.busy_seconds += seconds
+
+    def _put(self, output_queue: queue.Queue, item: Any) -> None:
+        while True:
+            if self._stop_event.is_set():
+                raise PipelineStoppedError()
+            try:
+                output_queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _get(self, input_queue: queue.Queue) -> Any:
+        while True:
+            if self._stop_event.is_set():
+                raise PipelineStoppedError()
+            try:
+                return input_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+    def _fail(self, error: BaseException) -> None:
+        with self._metrics_lock:
+            if self._error is None:
+                self._error = error
+        self._stop_event.set()
+
+    def _app_context(self):
+        if self.flask_app is None:
+            return contextlib.nullcontext()
+        return self.flask_app.app_context()
@@ -1,23 +1,28 @@
-import concurrent.futures
 import datetime
+import itertools
 import json
 import logging
 import re
 import threading
 import time
 import uuid
+from collections.abc import Callable
 from typing import Optional, cast
 
 from flask import Flask, current_app
 from flask_login import current_user
+from pydantic import BaseModel
+from sqlalchemy import func
 from sqlalchemy.orm.exc import ObjectDeletedError
 
 from core.errors.error import ProviderTokenNotInitError
+from core.indexing_pipeline import IndexingPipeline, PipelineStage
 from core.llm_generator.llm_generator import LLMGenerator
 from core.model_manager import ModelInstance, ModelManager
 from core.model_runtime.entities.model_entities import ModelType, PriceType
 from core.model_runtime.model_providers.__base.large_language_model import LargeLanguageModel
 from core.model_runtime.model_providers.__base.text_embedding_model import TextEmbeddingModel
+from core.rag.datasource.dataset_counter import DatasetCounter
 from core.rag.datasource.keyword.keyword_factory import Keyword
 from core.rag.docstore.dataset_docstore import DatasetDocumentStore
 from core.rag.extractor.entity.extract_setting import ExtractSetting
@@ -38,6 +43,48 @@ from models.dataset import Document as DatasetDocument
 from models.model import UploadFile
 from services.feature_service import FeatureService
 
+# seconds to keep the indexing checkpoint and metrics of a document
+INDEXING_CHECKPOINT_EXPIRE = 7 * 24 * 3600
+
+
+class IndexingBatch(BaseModel):
+    """
+    Segments split from consecutive pages of a document, saved and indexed together
+    """
+    index: int
+    # number of pages of the document split up to this batch
+    pages_end: int
+    documents: list[Document]
+    # max segment position of the document once the batch is saved
+    position: int = 0
+    tokens: int = 0
+
+
+class IndexingCheckpoint(BaseModel):
+    """
+    Last batch of a document indexed without gaps, indexing resumes after it
+    """
+    batches: int = 0
+    pages: int = 0
+    position: int = 0
+    tokens: int = 0
+
+    @staticmethod
+    def _cache_key(document_id: str) -> str:
+        return 'document_{}_indexing_checkpoint'.format(document_id)
+
+    @classmethod
+    def get(cls, document_id: str) -> Optional['IndexingCheckpoint']:
+        checkpoint = redis_client.get(cls._cache_key(document_id))
+        return cls.model_validate_json(checkpoint) if checkpoint else None
+
+    def save(self, document_id: str) -> None:
+        redis_client.setex(self._cache_key(document_id), INDEXING_CHECKPOINT_EXPIRE, self.model_dump_json())
+
+    @classmethod
+    def delete(cls, document_id: str) -> None:
+        redis_client.delete(cls._cache_key(document_id))
+
 
 class IndexingRunner:
 
@@ -63,22 +110,13 @@ class IndexingRunner:
                     first()
                 index_type = dataset_document.doc_form
                 index_processor = IndexProcessorFactory(index_type).init_index_processor()
+                # a new run starts over, drop the checkpoint of the previous run
+                IndexingCheckpoint.delete(dataset_document.id)
                 # extract
                 text_docs = self._extract(index_processor, dataset_document, processing_rule.to_dict())
 
-                # transform
-                documents = self._transform(index_processor, dataset, text_docs, dataset_document.doc_language,
-                                            processing_rule.to_dict())
-                # save segment
-                self._load_segments(dataset, dataset_document, documents)
-
-                # load
-                self._load(
-                    index_processor=index_processor,
-                    dataset=dataset,
-                    dataset_document=dataset_document,
-                    documents=documents
-                )
+                # transform, save segments and load them in batches
+                self._run_pipeline(index_processor, dataset, dataset_document, processing_rule.to_dict(), text_docs)
             except DocumentIsPausedException:
                 raise DocumentIsPausedException('Document paused, document id: {}'.format(dataset_document.id))
             except ProviderTokenNotInitError as e:
@@ -106,6 +144,21 @@ class IndexingRunner:
             if not dataset:
                 raise ValueError("no dataset found")
 
+            # get the process rule
+            processing_rule = db.session.query(DatasetProcessRule). \
+                filter(DatasetProcessRule.id == dataset_document.dataset_process_rule_id). \
+                first()
+
+            index_type = dataset_document.doc_form
+            index_processor = IndexProcessorFactory(index_type).init_index_processor()
+
+            # resume after the last committed batch of an interrupted run
+            checkpoint = IndexingCheckpoint.get(dataset_document.id)
+            if checkpoint:
+                self._resume_pipeline(index_processor, dataset, dataset_document, processing_rule.to_dict(),
+                                      checkpoint)
+                return
+
             # get exist document_segment list and delete
             document_segments = DocumentSegment.query.filter_by(
                 dataset_id=dataset.id,
@@ -115,29 +168,11 @@ class IndexingRunner:
             for document_segment in document_segments:
                 db.session.delete(document_segment)
             db.session.commit()
-            # get the process rule
-            processing_rule = db.session.query(DatasetProcessRule). \
-                filter(DatasetProcessRule.id == dataset_document.dataset_process_rule_id). \
-                first()
-
-            index_type = dataset_document.doc_form
-            index_processor = IndexProcessorFactory(index_type).init_index_processor()
             # extract
             text_docs = self._extract(index_processor, dataset_document, processing_rule.to_dict())
 
-            # transform
-            documents = self._transform(index_processor, dataset, text_docs, dataset_document.doc_language,
-                                        processing_rule.to_dict())
-            # save segment
-            self._load_segments(dataset, dataset_document, documents)
-
-            # load
-            self._load(
-                index_processor=index_processor,
-                dataset=dataset,
-                dataset_document=dataset_document,
-                documents=documents
-            )
+            # transform, save segments and load them in batches
+            self._run_pipeline(index_processor, dataset, dataset_document, processing_rule.to_dict(), text_docs)
         except DocumentIsPausedException:
             raise DocumentIsPausedException('Document paused, document id: {}'.format(dataset_document.id))
         except ProviderTokenNotInitError as e:
@@ -163,6 +198,21 @@ class IndexingRunner:
             if not dataset:
                 raise ValueError("no dataset found")
 
+            # get the process rule
+            processing_rule = db.session.query(DatasetProcessRule). \
+                filter(DatasetProcessRule.id == dataset_document.dataset_process_rule_id). \
+                first()
+
+            index_type = dataset_document.doc_form
+            index_processor = IndexProcessorFactory(index_type).init_index_processor()
+
+            # resume after the last committed batch of an interrupted run
+            checkpoint = IndexingCheckpoint.get(dataset_document.id)
+            if checkpoint:
+                self._resume_pipeline(index_processor, dataset, dataset_document, processing_rule.to_dict(),
+                                      checkpoint)
+                return
+
             # get exist document_segment list and delete
             document_segments = DocumentSegment.query.filter_by(
                 dataset_id=dataset.id,
@@ -187,13 +237,6 @@ class IndexingRunner:
                         documents.append(document)
 
             # build index
-            # get the process rule
-            processing_rule = db.session.query(DatasetProcessRule). \
-                filter(DatasetProcessRule.id == dataset_document.dataset_process_rule_id). \
-                first()
-
-            index_type = dataset_document.doc_form
-            index_processor = IndexProcessorFactory(index_type).init_index_processor()
             self._load(
                 index_processor=index_processor,
                 dataset=dataset,
@@ -654,46 +697,146 @@ class IndexingRunner:
     def _load(self, index_processor: BaseIndexProcessor, dataset: Dataset,
               dataset_document: DatasetDocument, documents: list[Document]) -> None:
         """
-        insert index and update document/segment status to completed
+        insert index of saved segments and update document/segment status to completed
         """
+        indexing_start_at = time.perf_counter()
+        batch_size = int(current_app.config.get('INDEXING_PIPELINE_BATCH_SIZE', 50))
+        batches = [
+            IndexingBatch(index=batch_index, pages_end=0, documents=documents[i:i + batch_size])
+            for batch_index, i in enumerate(range(0, len(documents), batch_size))
+        ]
 
-        embedding_model_instance = None
-        if dataset.indexing_technique == 'high_quality':
-            embedding_model_instance = self.model_manager.get_model_instance(
-                tenant_id=dataset.tenant_id,
-                provider=dataset.embedding_model_provider,
-                model_type=ModelType.TEXT_EMBEDDING,
-                model=dataset.embedding_model
-            )
+        pipeline = IndexingPipeline(
+            stages=self._get_index_stages(index_processor, dataset.id, dataset_document.id),
+            queue_size=int(current_app.config.get('INDEXING_PIPELINE_QUEUE_SIZE', 2)),
+            flask_app=current_app._get_current_object()
+        )
+        tokens = sum(batch.tokens for batch in pipeline.run(batches, source_name='segments'))
+        self._save_indexing_metrics(dataset_document.id, pipeline)
+        indexing_end_at = time.perf_counter()
+
+        # update document status to completed
+        self._update_document_index_status(
+            document_id=dataset_document.id,
+            after_indexing_status="completed",
+            extra_update_params={
+                DatasetDocument.tokens: tokens,
+                DatasetDocument.completed_at: datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None),
+                DatasetDocument.indexing_latency: indexing_end_at - indexing_start_at,
+            }
+        )
 
-        # chunk nodes by chunk size
+    def _run_pipeline(self, index_processor: BaseIndexProcessor, dataset: Dataset,
+                      dataset_document: DatasetDocument, process_rule: dict, text_docs: list[Document],
+                      checkpoint: Optional[IndexingCheckpoint] = None) -> None:
+        """
+        Split the extracted pages of a document, save and index the segments in batches.
+
+        Pages flow through the split, store, embed and keyword stages of a pipeline, so the next pages
+        are split while the previous batches are embedded, and only a few batches are held in memory.
+        A checkpoint is saved after every indexed batch, so a paused or failed document resumes
+        after the last committed batch instead of starting over.
+        """
+        checkpoint = checkpoint or IndexingCheckpoint()
         indexing_start_at = time.perf_counter()
-        tokens = 0
-        chunk_size = 10
-
-        # create keyword index
-        create_keyword_thread = threading.Thread(target=self._process_keyword_index,
-                                                 args=(current_app._get_current_object(),
-                                                       dataset.id, dataset_document.id, documents))
-        create_keyword_thread.start()
-        if dataset.indexing_technique == 'high_quality':
-            with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-                futures = []
-                for i in range(0, len(documents), chunk_size):
-                    chunk_documents = documents[i:i + chunk_size]
-                    futures.append(executor.submit(self._process_chunk, current_app._get_current_object(), index_processor,
-                                                   chunk_documents, dataset,
-                                                   dataset_document, embedding_model_instance))
-
-                for future in futures:
-                    tokens += future.result()
-
-        create_keyword_thread.join()
+        batch_size = int(current_app.config.get('INDEXING_PIPELINE_BATCH_SIZE', 50))
+        dataset_id = dataset.id
+        tenant_id = dataset.tenant_id
+        document_id = dataset_document.id
+        created_by = dataset_document.created_by
+        doc_language = dataset_document.doc_language
+        embedding_model_instance = self._get_embedding_model_instance(dataset)
+        total_pages = len(text_docs)
+
+        def iter_pages():
+            for page_index in range(checkpoint.pages, total_pages):
+                # drop the reference of the page, it is released once split
+                text_doc, text_docs[page_index] = text_docs[page_index], None
+                yield page_index, text_doc
+
+        split_documents = []
+        batch_indexes = itertools.count(checkpoint.batches)
+
+        def split_page(page: tuple[int, Document]):
+            page_index, text_doc = page
+            split_documents.extend(index_processor.transform(
+                [text_doc], embedding_model_instance=embedding_model_instance, process_rule=process_rule,
+                tenant_id=tenant_id, doc_language=doc_language
+            ))
+            # batches end on page boundaries, so a resumed document restarts from the next page
+            if len(split_documents) >= batch_size:
+                yield self._pop_batch(next(batch_indexes), page_index + 1, split_documents)
+
+        def flush_split():
+            if split_documents:
+                yield self._pop_batch(next(batch_indexes), total_pages, split_documents)
+
+        stored_batches = 0
+
+        def store_batch(batch: IndexingBatch):
+            nonlocal stored_batches
+            self._check_document_paused_status(document_id)
+            batch_dataset = self._get_dataset(dataset_id)
+            doc_store = DatasetDocumentStore(dataset=batch_dataset, user_id=created_by, document_id=document_id)
+            doc_store.add_documents(batch.documents)
+
+            cur_time = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+            if stored_batches == 0:
+                # update document status to indexing
+                self._update_document_index_status(
+                    document_id=document_id,
+                    after_indexing_status="indexing",
+                    extra_update_params={
+                        DatasetDocument.cleaning_completed_at: cur_time,
+                    }
+                )
+            stored_batches += 1
+
+            # update segment status to indexing
+            node_ids = [document.metadata['doc_id'] for document in batch.documents]
+            DocumentSegment.query.filter(
+                DocumentSegment.document_id == document_id,
+                DocumentSegment.index_node_id.in_(node_ids)
+            ).update({
+                DocumentSegment.status: "indexing",
+                DocumentSegment.indexing_at: cur_time
+            }, synchronize_session=False)
+            db.session.commit()
+
+            batch.position = db.session.query(func.max(DocumentSegment.position)).filter(
+                DocumentSegment.document_id == document_id
+            ).scalar() or 0
+            yield batch
+
+        def flush_store():
+            cur_time = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+            extra_update_params = {DatasetDocument.splitting_completed_at: cur_time}
+            if stored_batches == 0:
+                extra_update_params[DatasetDocument.cleaning_completed_at] = cur_time
+            self._update_document_index_status(
+                document_id=document_id,
+                after_indexing_status="indexing",
+                extra_update_params=extra_update_params
+            )
+            return []
+
+        pipeline = IndexingPipeline(
+            stages=[
+                PipelineStage('split', split_page, flush=flush_split),
+                PipelineStage('store', store_batch, flush=flush_store),
+                *self._get_index_stages(index_processor, dataset_id, document_id, checkpoint,
+                                        metrics=lambda: pipeline.get_metrics())
+            ],
+            queue_size=int(current_app.config.get('INDEXING_PIPELINE_QUEUE_SIZE', 2)),
+            flask_app=current_app._get_current_object()
+        )
+        tokens = checkpoint.tokens + sum(batch.tokens for batch in pipeline.run(iter_pages(), source_name='extract'))
+        self._save_indexing_metrics(document_id, pipeline)
         indexing_end_at = time.perf_counter()
 
         # update document status to completed
         self._update_document_index_status(
-            document_id=dataset_document.id,
+            document_id=document_id,
             after_indexing_status="completed",
             extra_update_params={
                 DatasetDocument.tokens: tokens,
@@ -701,60 +844,146 @@ class IndexingRunner:
                 DatasetDocument.indexing_latency: indexing_end_at - indexing_start_at,
             }
         )
+        IndexingCheckpoint.delete(document_id)
 
-    def _process_keyword_index(self, flask_app, dataset_id, document_id, documents):
-        with flask_app.app_context():
-            dataset = Dataset.query.filter_by(id=dataset_id).first()
-            if not dataset:
-                raise ValueError("no dataset found")
+    def _resume_pipeline(self, index_processor: BaseIndexProcessor, dataset: Dataset,
+                         dataset_document: DatasetDocument, process_rule: dict,
+                         checkpoint: IndexingCheckpoint) -> None:
+        """
+        Resume the indexing of a document after the last committed batch of the checkpoint.
+        """
+        # segments after the checkpoint may be partly indexed, clean and index them again
+        uncommitted_segments = DocumentSegment.query.filter(
+            DocumentSegment.document_id == dataset_document.id,
+            DocumentSegment.position > checkpoint.position
+        ).all()
+        if uncommitted_segments:
+            index_processor.clean(dataset, [segment.index_node_id for segment in uncommitted_segments])
+            for segment in uncommitted_segments:
+                db.session.delete(segment)
+            db.session.commit()
+
+        text_docs = self._extract(index_processor, dataset_document, process_rule)
+        self._run_pipeline(index_processor, dataset, dataset_document, process_rule, text_docs, checkpoint)
+
+    def _get_index_stages(self, index_processor: BaseIndexProcessor, dataset_id: str, document_id: str,
+                          checkpoint: Optional[IndexingCheckpoint] = None,
+                          metrics: Optional[Callable[[], list[dict]]] = None) -> list[PipelineStage]:
+        """
+        Get the pipeline stages indexing batches of saved segments.
+
+        Batches are embedded by several workers and may finish out of order, the checkpoint only
+        advances over the batches indexed without gaps.
+
+        Keyword stores like the jieba keyword table rewrite the whole table of the dataset on every
+        write, so keywords are written for many batches at once, at least once per document.
+        """
+        def embed_batch(batch: IndexingBatch):
+            # check document is paused
+            self._check_document_paused_status(document_id)
+            dataset = self._get_dataset(dataset_id)
+            if dataset.indexing_technique == 'high_quality':
+                embedding_model_instance = self._get_embedding_model_instance(dataset)
+                batch.tokens = embedding_model_instance.get_text_embedding_num_tokens(
+                    [document.page_content for document in batch.documents]
+                )
+
+                # load index
+                index_processor.load(dataset, batch.documents, with_keywords=False)
+                self._complete_segments(document_id, batch.documents)
+            yield batch
+
+        indexed_batches = {}
+        keyword_batches = []
+        keyword_batch_size = int(current_app.config.get('INDEXING_PIPELINE_KEYWORD_BATCH_SIZE', 1000))
+
+        def index_keywords(batch: IndexingBatch):
+            keyword_batches.append(batch)
+            if sum(len(keyword_batch.documents) for keyword_batch in keyword_batches) >= keyword_batch_size:
+                yield from flush_keywords()
+
+        def flush_keywords():
+            if not keyword_batches:
+                return
+
+            documents = [document for keyword_batch in keyword_batches for document in keyword_batch.documents]
+            dataset = self._get_dataset(dataset_id)
             keyword = Keyword(dataset)
             keyword.create(documents)
             if dataset.indexing_technique != 'high_quality':
-                document_ids = [document.metadata['doc_id'] for document in documents]
-                db.session.query(DocumentSegment).filter(
-                    DocumentSegment.document_id == document_id,
-                    DocumentSegment.index_node_id.in_(document_ids),
-                    DocumentSegment.status == "indexing"
-                ).update({
-                    DocumentSegment.status: "completed",
-                    DocumentSegment.enabled: True,
-                    DocumentSegment.completed_at: datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
-                })
-
-                db.session.commit()
+                self._complete_segments(document_id, documents)
+
+            batches = list(keyword_batches)
+            keyword_batches.clear()
+            if checkpoint:
+                for batch in batches:
+                    indexed_batches[batch.index] = batch
+                advanced = False
+                while checkpoint.batches in indexed_batches:
+                    committed_batch = indexed_batches.pop(checkpoint.batches)
+                    checkpoint.batches += 1
+                    checkpoint.pages = committed_batch.pages_end
+                    checkpoint.position = committed_batch.position
+                    checkpoint.tokens += committed_batch.tokens
+                    advanced = True
+                if advanced:
+                    checkpoint.save(document_id)
+                    if metrics:
+                        redis_client.setex(self._indexing_metrics_cache_key(document_id),
+                                           INDEXING_CHECKPOINT_EXPIRE, json.dumps(metrics()))
+            yield from batches
 
-    def _process_chunk(self, flask_app, index_processor, chunk_documents, dataset, dataset_document,
-                       embedding_model_instance):
-        with flask_app.app_context():
-            # check document is paused
-            self._check_document_paused_status(dataset_document.id)
+        return [
+            PipelineStage('embed', embed_batch,
+                          workers=int(current_app.config.get('INDEXING_PIPELINE_EMBEDDING_WORKERS', 4))),
+            PipelineStage('keyword', index_keywords, flush=flush_keywords),
+        ]
 
-            tokens = 0
-            if dataset.indexing_technique == 'high_quality' or embedding_model_type_instance:
-                tokens += sum(
-                    embedding_model_instance.get_text_embedding_num_tokens(
-                        [document.page_content]
-                    )
-                    for document in chunk_documents
-                )
+    @staticmethod
+    def _pop_batch(batch_index: int, pages_end: int, documents: list[Document]) -> IndexingBatch:
+        batch = IndexingBatch(index=batch_index, pages_end=pages_end, documents=list(documents))
+        documents.clear()
+        return batch
+
+    @staticmethod
+    def _get_dataset(dataset_id: str) -> Dataset:
+        dataset = Dataset.query.filter_by(id=dataset_id).first()
+        if not dataset:
+            raise ValueError("no dataset found")
+        return dataset
+
+    @staticmethod
+    def _complete_segments(document_id: str, documents: list[Document]) -> None:
+        document_ids = [document.metadata['doc_id'] for document in documents]
+        db.session.query(DocumentSegment).filter(
+            DocumentSegment.document_id == document_id,
+            DocumentSegment.index_node_id.in_(document_ids),
+            DocumentSegment.status == "indexing"
+        ).update({
+            DocumentSegment.status: "completed",
+            DocumentSegment.enabled: True,
+            DocumentSegment.completed_at: datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+        }, synchronize_session=False)
 
-            # load index
-            index_processor.load(dataset, chunk_documents, with_keywords=False)
+        db.session.commit()
 
-            document_ids = [document.metadata['doc_id'] for document in chunk_documents]
-            db.session.query(DocumentSegment).filter(
-                DocumentSegment.document_id == dataset_document.id,
-                DocumentSegment.index_node_id.in_(document_ids),
-                DocumentSegment.status == "indexing"
-            ).update({
-                DocumentSegment.status: "completed",
-                DocumentSegment.enabled: True,
-                DocumentSegment.completed_at: datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
-            })
+    @staticmethod
+    def _indexing_metrics_cache_key(document_id: str) -> str:
+        return 'document_{}_indexing_metrics'.format(document_id)
 
-            db.session.commit()
+    def _save_indexing_metrics(self, document_id: str, pipeline: IndexingPipeline) -> None:
+        redis_client.setex(self._indexing_metrics_cache_key(document_id), INDEXING_CHECKPOINT_EXPIRE,
+                           json.dumps(pipeline.get_metrics()))
 
-            return tokens
+    @classmethod
+    def get_indexing_metrics(cls, document_id: str) -> Optional[list[dict]]:
+        """
+        Get progress metrics of the pipeline stages of the last indexing of a document
+        :param document_id: document id
+        :return:
+        """
+        metrics = redis_client.get(cls._indexing_metrics_cache_key(document_id))
+        return json.loads(metrics) if metrics else None
 
     def _check_document_paused_status(self, document_id: str):
         indexing_cache_key = 'document_{}_is_paused'.format(document_id)
@@ -784,6 +1013,9 @@ class IndexingRunner:
         DatasetDocument.query.filter_by(id=document_id).update(update_params)
         db.session.commit()
 
+        if after_indexing_status == 'completed':
+            DatasetCounter.refresh(document.dataset_id)
+
     def _update_segments_by_document(self, dataset_document_id: str, update_params: dict) -> None:
         """
         Update the document segment by document id.
@@ -814,59 +1046,32 @@ class IndexingRunner:
 
     def _transform(self, index_processor: BaseIndexProcessor, dataset: Dataset,
                    text_docs: list[Document], doc_language: str, process_rule: dict) -> list[Document]:
-        # get embedding model instance
-        embedding_model_instance = None
-        if dataset.indexing_technique == 'high_quality':
-            if dataset.embedding_model_provider:
-                embedding_model_instance = self.model_manager.get_model_instance(
-                    tenant_id=dataset.tenant_id,
-                    provider=dataset.embedding_model_provider,
-                    model_type=ModelType.TEXT_EMBEDDING,
-                    model=dataset.embedding_model
-                )
-            else:
-                embedding_model_instance = self.model_manager.get_default_model_instance(
-                    tenant_id=dataset.tenant_id,
-                    model_type=ModelType.TEXT_EMBEDDING,
-                )
-
-        documents = index_processor.transform(text_docs, embedding_model_instance=embedding_model_instance,
+        documents = index_processor.transform(text_docs,
+                                              embedding_model_instance=self._get_embedding_model_instance(dataset),
                                               process_rule=process_rule, tenant_id=dataset.tenant_id,
                                               doc_language=doc_language)
 
         return documents
 
-    def _load_segments(self, dataset, dataset_document, documents):
-        # save node to document segment
-        doc_store = DatasetDocumentStore(
-            dataset=dataset,
-            user_id=dataset_document.created_by,
-            document_id=dataset_document.id
-        )
-
-        # add document segments
-        doc_store.add_documents(documents)
+    def _get_embedding_model_instance(self, dataset: Dataset) -> Optional[ModelInstance]:
+        """
+        Get the embedding model instance of a high quality dataset
+        """
+        if dataset.indexing_technique != 'high_quality':
+            return None
 
-        # update document status to indexing
-        cur_time = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
-        self._update_document_index_status(
-            document_id=dataset_document.id,
-            after_indexing_status="indexing",
-            extra_update_params={
-                DatasetDocument.cleaning_completed_at: cur_time,
-                DatasetDocument.splitting_completed_at: cur_time,
-            }
-        )
+        if dataset.embedding_model_provider:
+            return self.model_manager.get_model_instance(
+                tenant_id=dataset.tenant_id,
+                provider=dataset.embedding_model_provider,
+                model_type=ModelType.TEXT_EMBEDDING,
+                model=dataset.embedding_model
+            )
 
-        # update segment status to indexing
-        self._update_segments_by_document(
-            dataset_document_id=dataset_document.id,
-            update_params={
-                DocumentSegment.status: "indexing",
-                DocumentSegment.indexing_at: datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
-            }
+        return self.model_manager.get_default_model_instance(
+            tenant_id=dataset.tenant_id,
+            model_type=ModelType.TEXT_EMBEDDING,
         )
-        pass
 
 
 class DocumentIsPausedException(Exception):
@@ -2,6 +2,7 @@ from typing import Optional
 
 from core.app.app_config.features.file_upload.manager import FileUploadConfigManager
 from core.file.message_file_parser import MessageFileParser
+from core.memory.token_counter import PromptMessageTokenCounter
 from core.model_manager import ModelInstance
 from core.model_runtime.entities.message_entities import (
     AssistantPromptMessage,
@@ -83,19 +84,8 @@ class TokenBufferMemory:
             return []
 
         # prune the chat message if it exceeds the max token limit
-        curr_message_tokens = self.model_instance.get_llm_num_tokens(
-            prompt_messages
-        )
-
-        if curr_message_tokens > max_token_limit:
-            pruned_memory = []
-            while curr_message_tokens > max_token_limit and prompt_messages:
-                pruned_memory.append(prompt_messages.pop(0))
-                curr_message_tokens = self.model_instance.get_llm_num_tokens(
-                    prompt_messages
-                )
-
-        return prompt_messages
+        token_counter = PromptMessageTokenCounter(self.model_instance)
+        return token_counter.prune_messages(prompt_messages, max_token_limit)
 
     def get_history_prompt_text(self, human_prefix: str = "Human",
                                 ai_prefix: str = "Assistant",
@@ -0,0 +1,68 @@
+import threading
+
+from cachetools import LRUCache
+
+from core.model_manager import ModelInstance
+from core.model_runtime.entities.message_entities import PromptMessage
+from libs import helper
+
+
+class PromptMessageTokenCounter:
+    """
+    Count tokens of prompt messages for a model instance.
+
+    Token counts of single messages are cached process-wide by model and message content,
+    so the history of a conversation is only tokenized once across calls, and pruning
+    the oldest messages subtracts their counts instead of recounting the remaining history.
+    """
+    _cache = LRUCache(maxsize=10000)
+    _cache_lock = threading.Lock()
+
+    def __init__(self, model_instance: ModelInstance) -> None:
+        self.model_instance = model_instance
+
+    def get_num_tokens(self, prompt_messages: list[PromptMessage]) -> int:
+        """
+        Get number of tokens of prompt messages
+        :param prompt_messages: prompt messages
+        :return:
+        """
+        return self.model_instance.get_llm_num_tokens(prompt_messages)
+
+    def get_message_num_tokens(self, prompt_message: PromptMessage) -> int:
+        """
+        Get number of tokens of a single prompt message, cached
+        :param prompt_message: prompt message
+        :return:
+        """
+        cache_key = (
+            self.model_instance.provider,
+            self.model_instance.model,
+            helper.generate_text_hash(prompt_message.model_dump_json())
+        )
+        with self._cache_lock:
+            num_tokens = self._cache.get(cache_key)
+
+        if num_tokens is None:
+            num_tokens = self.get_num_tokens([prompt_message])
+            with self._cache_lock:
+                self._cache[cache_key] = num_tokens
+
+        return num_tokens
+
+    def prune_messages(self, prompt_messages: list[PromptMessage], max_token_limit: int) -> list[PromptMessage]:
+        """
+        Remove the oldest prompt messages until the rest fit in max token limit
+        :param prompt_messages: prompt messages, oldest first
+        :param max_token_limit: max token limit
+        :return: remaining prompt messages
+        """
+        prompt_messages = list(prompt_messages)
+        curr_message_tokens = self.get_num_tokens(prompt_messages)
+        while curr_message_tokens > max_token_limit and prompt_messages:
+            curr_message_tokens -= self.get_message_num_tokens(prompt_messages.pop(0))
+            if curr_message_tokens <= max_token_limit and prompt_messages:
+                # counts of single messages include per-request overhead, so confirm with an exact count
+                curr_message_tokens = self.get_num_tokens(prompt_messages)
+
+        return prompt_messages
@@ -2,7 +2,7 @@ from os.path import abspath, dirname, join
 from threading import Lock
 from typing import Any
 
-from transformers import GPT2Tokenizer as TransformerGPT2Tokenizer
+from tokenizers import ByteLevelBPETokenizer
 
 _tokenizer = None
 _lock = Lock()
@@ -14,20 +14,41 @@ class GPT2Tokenizer:
             use gpt2 tokenizer to get num tokens
         """
         _tokenizer = GPT2Tokenizer.get_encoder()
-        tokens = _tokenizer.encode(text, verbose=False)
+        tokens = _tokenizer.encode(text).ids
         return len(tokens)
     
     @staticmethod
     def get_num_tokens(text: str) -> int:
         return GPT2Tokenizer._get_num_tokens_by_gpt2(text)
+
+    @staticmethod
+    def get_num_tokens_list(texts: list[str]) -> list[int]:
+        """
+            get num tokens of each text, texts are encoded in parallel by the tokenizer
+        """
+        _tokenizer = GPT2Tokenizer.get_encoder()
+        return [len(encoding.ids) for encoding in _tokenizer.encode_batch(texts)]
     
     @staticmethod
     def get_encoder() -> Any:
+        """
+            get the gpt2 byte-level BPE tokenizer of the `tokenizers` library, loaded once per process,
+            it gives the same tokens as the `transformers` GPT2Tokenizer much faster.
+            Load it before forking worker processes to share it between them.
+        """
         global _tokenizer, _lock
+        if _tokenizer is not None:
+            return _tokenizer
+
         with _lock:
             if _tokenizer is None:
                 base_path = abspath(__file__)
                 gpt2_tokenizer_path = join(dirname(base_path), 'gpt2')
-                _tokenizer = TransformerGPT2Tokenizer.from_pretrained(gpt2_tokenizer_path)
+                tokenizer = ByteLevelBPETokenizer(
+                    join(gpt2_tokenizer_path, 'vocab.json'),
+                    join(gpt2_tokenizer_path, 'merges.txt')
+                )
+                tokenizer.add_special_tokens(['<|endoftext|>'])
+                _tokenizer = tokenizer
 
-            return _tokenizer
\ No newline at end of file
+            return _tokenizer
@@ -1,4 +1,5 @@
 from core.moderation.base import Moderation, ModerationAction, ModerationInputsResult, ModerationOutputsResult
+from core.moderation.keywords.keywords_matcher import KeywordsMatcher
 
 
 class KeywordsModeration(Moderation):
@@ -31,10 +32,7 @@ class KeywordsModeration(Moderation):
             if query:
                 inputs['query__'] = query
 
-            # Filter out empty values
-            keywords_list = [keyword for keyword in self.config['keywords'].split('\n') if keyword]
-
-            flagged = self._is_violated(inputs, keywords_list)
+            flagged = self._is_violated(inputs, KeywordsMatcher.from_config(self.config['keywords']))
 
         return ModerationInputsResult(flagged=flagged, action=ModerationAction.DIRECT_OUTPUT, preset_response=preset_response)
 
@@ -43,23 +41,14 @@ class KeywordsModeration(Moderation):
         preset_response = ""
 
         if self.config['outputs_config']['enabled']:
-            # Filter out empty values
-            keywords_list = [keyword for keyword in self.config['keywords'].split('\n') if keyword]
-
-            flagged = self._is_violated({'text': text}, keywords_list)
+            flagged = self._is_violated({'text': text}, KeywordsMatcher.from_config(self.config['keywords']))
             preset_response = self.config['outputs_config']['preset_response']
 
         return ModerationOutputsResult(flagged=flagged, action=ModerationAction.DIRECT_OUTPUT, preset_response=preset_response)
 
-    def _is_violated(self, inputs: dict, keywords_list: list) -> bool:
+    def _is_violated(self, inputs: dict, keywords_matcher: KeywordsMatcher) -> bool:
         for value in inputs.values():
-            if self._check_keywords_in_value(keywords_list, value):
+            if keywords_matcher.match(value):
                 return True
 
         return False
-
-    def _check_keywords_in_value(self, keywords_list, value):
-        for keyword in keywords_list:
-            if keyword.lower() in value.lower():
-                return True
-        return False
@@ -0,0 +1,77 @@
+from collections import deque
+from functools import lru_cache
+
+
+class KeywordsMatcher:
+    """
+    Aho-Corasick automaton of the keywords of a moderation config, matching all keywords
+    case-insensitively in one pass over a text.
+    """
+
+    def __init__(self, keywords: list[str]) -> None:
+        # goto transitions, failure links and whether a keyword ends at each state
+        self._transitions: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._matched: list[bool] = [False]
+
+        for keyword in keywords:
+            self._add_keyword(keyword.lower())
+        self._build_fail_links()
+
+    @classmethod
+    @lru_cache(maxsize=256)
+    def from_config(cls, keywords: str) -> 'KeywordsMatcher':
+        """
+        Get the matcher of the keywords of a moderation config, one per line, matchers are cached by keywords
+        :param keywords: keywords config
+        :return:
+        """
+        # Filter out empty values
+        return cls([keyword for keyword in keywords.split('\n') if keyword])
+
+    def match(self, text: str) -> bool:
+        """
+        Check whether the text contains any keyword
+        :param text: text
+        :return:
+        """
+        transitions = self._transitions
+        fail = self._fail
+        matched = self._matched
+
+        state = 0
+        for char in text.lower():
+            while state and char not in transitions[state]:
+                state = fail[state]
+            state = transitions[state].get(char, 0)
+            if matched[state]:
+                return True
+
+        return False
+
+    def _add_keyword(self, keyword: str) -> None:
+        state = 0
+        for char in keyword:
+            next_state = self._transitions[state].get(char)
+            if next_state is None:
+                next_state = len(self._transitions)
+                self._transitions[state][char] = next_state
+                self._transitions.append({})
+                self._fail.append(0)
+                self._matched.append(False)
+            state = next_state
+        self._matched[state] = True
+
+    def _build_fail_links(self) -> None:
+        queue = deque(self._transitions[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._transitions[state].items():
+                queue.append(next_state)
+
+                fail_state = self._fail[state]
+                while fail_state and char not in self._transitions[fail_state]:
+                    fail_state = self._fail[fail_state]
+                self._fail[next_state] = self._transitions[fail_state].get(char, 0)
+                # a state also matches when a keyword is a suffix of its path
+                self._matched[next_state] = self._matched[next_state] or self._matched[self._fail[next_state]]
@@ -1,10 +1,9 @@
 import logging
 import threading
-import time
 from typing import Any, Optional
 
 from flask import Flask, current_app
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 
 from core.app.apps.base_app_queue_manager import AppQueueManager, PublishFrom
 from core.app.entities.queue_entities import QueueMessageReplaceEvent
@@ -20,7 +19,17 @@ class ModerationRule(BaseModel):
 
 
 class OutputModeration(BaseModel):
+    """
+    Moderation of a streamed answer.
+
+    Chunks are appended to the buffer by the task pipeline, which wakes the moderation thread
+    once another `OUTPUT_MODERATION_BUFFER_SIZE` characters arrived. The thread only moderates
+    the new text, with the last `OUTPUT_MODERATION_BUFFER_OVERLAP` characters moderated before,
+    so content split between two windows is still flagged. The whole answer is moderated once
+    more when it is finished.
+    """
     DEFAULT_BUFFER_SIZE: int = 300
+    DEFAULT_BUFFER_OVERLAP: int = 100
 
     tenant_id: str
     app_id: str
@@ -31,6 +40,9 @@ class OutputModeration(BaseModel):
     thread: Optional[threading.Thread] = None
     thread_running: bool = True
     buffer: str = ''
+    buffer_size: int = DEFAULT_BUFFER_SIZE
+    moderated_length: int = 0
+    new_chunk_event: threading.Event = Field(default_factory=threading.Event)
     is_final_chunk: bool = False
     final_output: Optional[str] = None
     model_config = ConfigDict(arbitrary_types_allowed=True)
@@ -47,6 +59,9 @@ class OutputModeration(BaseModel):
         if not self.thread:
             self.thread = self.start_thread()
 
+        if len(self.buffer) - self.moderated_length >= self.buffer_size:
+            self.new_chunk_event.set()
+
     def moderation_completion(self, completion: str, public_event: bool = False) -> str:
         self.buffer = completion
         self.is_final_chunk = True
@@ -76,10 +91,12 @@ class OutputModeration(BaseModel):
         return final_output
 
     def start_thread(self) -> threading.Thread:
-        buffer_size = int(current_app.config.get('MODERATION_BUFFER_SIZE', self.DEFAULT_BUFFER_SIZE))
+        buffer_size = int(current_app.config.get('OUTPUT_MODERATION_BUFFER_SIZE', self.DEFAULT_BUFFER_SIZE))
+        self.buffer_size = buffer_size if buffer_size > 0 else self.DEFAULT_BUFFER_SIZE
+        buffer_overlap = int(current_app.config.get('OUTPUT_MODERATION_BUFFER_OVERLAP', self.DEFAULT_BUFFER_OVERLAP))
         thread = threading.Thread(target=self.worker, kwargs={
             'flask_app': current_app._get_current_object(),
-            'buffer_size': buffer_size if buffer_size > 0 else self.DEFAULT_BUFFER_SIZE
+            'buffer_overlap': max(buffer_overlap, 0)
         })
 
         thread.start()
@@ -89,30 +106,39 @@ class OutputModeration(BaseModel):
     def stop_thread(self):
         if self.thread and self.thread.is_alive():
             self.thread_running = False
+            self.new_chunk_event.set()
 
-    def worker(self, flask_app: Flask, buffer_size: int):
+    def worker(self, flask_app: Flask, buffer_overlap: int):
         with flask_app.app_context():
-            current_length = 0
             while self.thread_running:
-                moderation_buffer = self.buffer
-                buffer_length = len(moderation_buffer)
-                if not self.is_final_chunk:
-                    chunk_length = buffer_length - current_length
-                    if 0 <= chunk_length < buffer_size:
-                        time.sleep(1)
-                        continue
+                self.new_chunk_event.wait()
+                self.new_chunk_event.clear()
+                if not self.thread_running:
+                    break
 
-                current_length = buffer_length
+                moderation_buffer = self.buffer
+                window_start = max(self.moderated_length - buffer_overlap, 0)
 
                 result = self.moderation(
                     tenant_id=self.tenant_id,
                     app_id=self.app_id,
-                    moderation_buffer=moderation_buffer
+                    moderation_buffer=moderation_buffer[window_start:]
                 )
+                self.moderated_length = len(moderation_buffer)
 
                 if not result or not result.flagged:
                     continue
 
+                if result.action != ModerationAction.DIRECT_OUTPUT:
+                    # the overridden text of a window can not be spliced into the answer, override the whole of it
+                    result = self.moderation(
+                        tenant_id=self.tenant_id,
+                        app_id=self.app_id,
+                        moderation_buffer=moderation_buffer
+                    )
+                    if not result or not result.flagged:
+                        continue
+
                 if result.action == ModerationAction.DIRECT_OUTPUT:
                     final_output = result.preset_response
                     self.final_output = final_output
@@ -0,0 +1,129 @@
+import logging
+from typing import Optional
+
+from flask import current_app, has_app_context
+from sqlalchemy import func
+
+from extensions.ext_database import db
+from extensions.ext_redis import redis_client
+from models.dataset import Document, DocumentSegment
+
+logger = logging.getLogger(__name__)
+
+# seconds a dataset without available documents or segments is cached, datasets being indexed
+# must not be skipped by retrieval for long if a refresh was missed
+EMPTY_DATASET_CACHE_TTL = 30
+
+
+class DatasetCounter:
+    """
+    Numbers of available documents and segments of datasets, cached in redis.
+
+    Retrieval checks them before every search, so they are counted once and kept for
+    DATASET_COUNTER_CACHE_TTL seconds instead of running COUNT queries over the documents and
+    segments of the dataset per query. Tasks changing which documents or segments are available,
+    like indexing, enabling, disabling and deleting them, count them again with `refresh`.
+    Cached numbers expire, so numbers missed by a refresh are reconciled with the database.
+    """
+
+    @classmethod
+    def get(cls, dataset_id: str) -> tuple[int, int]:
+        """
+        Get the numbers of available documents and segments of a dataset
+        :param dataset_id: dataset id
+        :return: number of available documents, number of available segments
+        """
+        return cls.get_many([dataset_id])[dataset_id]
+
+    @classmethod
+    def get_many(cls, dataset_ids: list[str]) -> dict[str, tuple[int, int]]:
+        """
+        Get the numbers of available documents and segments of datasets
+        :param dataset_ids: dataset ids
+        :return: dataset id -> (number of available documents, number of available segments)
+        """
+        dataset_ids = list(dict.fromkeys(dataset_ids))
+        if not dataset_ids:
+            return {}
+
+        counts = {}
+        try:
+            cached_counts = redis_client.mget([cls._cache_key(dataset_id) for dataset_id in dataset_ids])
+        except Exception:
+            logger.warning('Failed to get cached dataset counters', exc_info=True)
+            cached_counts = [None] * len(dataset_ids)
+
+        for dataset_id, cached_count in zip(dataset_ids, cached_counts):
+            parsed_count = cls._parse(cached_count)
+            counts[dataset_id] = parsed_count if parsed_count is not None else cls.refresh(dataset_id)
+
+        return counts
+
+    @classmethod
+    def is_available(cls, dataset_id: str) -> bool:
+        """
+        Check whether a dataset has available documents and segments to retrieve
+        :param dataset_id: dataset id
+        :return:
+        """
+        document_count, segment_count = cls.get(dataset_id)
+        return document_count > 0 and segment_count > 0
+
+    @classmethod
+    def refresh(cls, dataset_id: str) -> tuple[int, int]:
+        """
+        Count the available documents and segments of a dataset and cache them
+        :param dataset_id: dataset id
+        :return: number of available documents, number of available segments
+        """
+        document_count = db.session.query(func.count(Document.id)).filter(
+            Document.dataset_id == dataset_id,
+            Document.indexing_status == 'completed',
+            Document.enabled == True,
+            Document.archived == False
+        ).scalar()
+        segment_count = db.session.query(func.count(DocumentSegment.id)).filter(
+            DocumentSegment.dataset_id == dataset_id,
+            DocumentSegment.status == 'completed',
+            DocumentSegment.enabled == True
+        ).scalar()
+
+        ttl = cls._get_ttl() if document_count and segment_count else EMPTY_DATASET_CACHE_TTL
+        try:
+            redis_client.setex(cls._cache_key(dataset_id), ttl, f'{document_count}:{segment_count}')
+        except Exception:
+            logger.warning(f'Failed to cache counters of dataset {dataset_id}', exc_info=True)
+
+        return document_count, segment_count
+
+    @classmethod
+    def invalidate(cls, dataset_id: str) -> None:
+        """
+        Delete the cached numbers of a dataset, they are counted again on next use
+        :param dataset_id: dataset id
+        :return:
+        """
+        redis_client.delete(cls._cache_key(dataset_id))
+
+    @staticmethod
+    def _cache_key(dataset_id: str) -> str:
+        return f'dataset_counter:{dataset_id}'
+
+    @staticmethod
+    def _parse(cached_count: Optional[bytes]) -> Optional[tuple[int, int]]:
+        if cached_count is None:
+            return None
+
+        try:
+            if isinstance(cached_count, bytes):
+                cached_count = cached_count.decode('utf-8')
+            document_count, segment_count = cached_count.split(':')
+            return int(document_count), int(segment_count)
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _get_ttl() -> int:
+        if not has_app_context():
+            return 600
+        return int(current_app.config.get('DATASET_COUNTER_CACHE_TTL', 600))
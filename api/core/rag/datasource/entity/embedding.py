@@ -19,3 +19,11 @@ class Embeddings(ABC):
     async def aembed_query(self, text: str) -> list[float]:
         """Asynchronous Embed query text."""
         raise NotImplementedError
+
+
+class QueryEmbedding:
+    """Embedding of a query, shared by the datasets of the same embedding model."""
+
+    def __init__(self, embeddings: Embeddings, vector: list[float]) -> None:
+        self.embeddings = embeddings
+        self.vector = vector
@@ -8,6 +8,7 @@ from pydantic import BaseModel
 from core.rag.datasource.keyword.jieba.jieba_keyword_table_handler import JiebaKeywordTableHandler
 from core.rag.datasource.keyword.keyword_base import BaseKeyword
 from core.rag.models.document import Document
+from core.rag.retrieval.segment_hydrator import SegmentHydrator
 from extensions.ext_database import db
 from extensions.ext_redis import redis_client
 from extensions.ext_storage import storage
@@ -28,11 +29,13 @@ class Jieba(BaseKeyword):
         with redis_client.lock(lock_name, timeout=600):
             keyword_table_handler = JiebaKeywordTableHandler()
             keyword_table = self._get_dataset_keyword_table()
+            node_keywords = {}
             for text in texts:
                 keywords = keyword_table_handler.extract_keywords(text.page_content, self._config.max_keywords_per_chunk)
-                self._update_segment_keywords(self.dataset.id, text.metadata['doc_id'], list(keywords))
+                node_keywords[text.metadata['doc_id']] = list(keywords)
                 keyword_table = self._add_text_to_keyword_table(keyword_table, text.metadata['doc_id'], list(keywords))
 
+            self._update_segments_keywords(node_keywords)
             self._save_dataset_keyword_table(keyword_table)
 
             return self
@@ -44,6 +47,7 @@ class Jieba(BaseKeyword):
 
             keyword_table = self._get_dataset_keyword_table()
             keywords_list = kwargs.get('keywords_list', None)
+            node_keywords = {}
             for i in range(len(texts)):
                 text = texts[i]
                 if keywords_list:
@@ -53,9 +57,10 @@ class Jieba(BaseKeyword):
                                                                           self._config.max_keywords_per_chunk)
                 else:
                     keywords = keyword_table_handler.extract_keywords(text.page_content, self._config.max_keywords_per_chunk)
-                self._update_segment_keywords(self.dataset.id, text.metadata['doc_id'], list(keywords))
+                node_keywords[text.metadata['doc_id']] = list(keywords)
                 keyword_table = self._add_text_to_keyword_table(keyword_table, text.metadata['doc_id'], list(keywords))
 
+            self._update_segments_keywords(node_keywords)
             self._save_dataset_keyword_table(keyword_table)
 
     def text_exists(self, id: str) -> bool:
@@ -97,22 +102,17 @@ class Jieba(BaseKeyword):
         sorted_chunk_indices = self._retrieve_ids_by_query(keyword_table, query, k)
 
         documents = []
-        for chunk_index in sorted_chunk_indices:
-            segment = db.session.query(DocumentSegment).filter(
-                DocumentSegment.dataset_id == self.dataset.id,
-                DocumentSegment.index_node_id == chunk_index
-            ).first()
-
-            if segment:
-                documents.append(Document(
-                    page_content=segment.content,
-                    metadata={
-                        "doc_id": chunk_index,
-                        "doc_hash": segment.index_node_hash,
-                        "document_id": segment.document_id,
-                        "dataset_id": segment.dataset_id,
-                    }
-                ))
+        segments = SegmentHydrator.get_segments(sorted_chunk_indices, dataset_id=self.dataset.id)
+        for segment in segments:
+            documents.append(Document(
+                page_content=segment.content,
+                metadata={
+                    "doc_id": segment.index_node_id,
+                    "doc_hash": segment.index_node_hash,
+                    "document_id": segment.document_id,
+                    "dataset_id": segment.dataset_id,
+                }
+            ))
 
         return documents
 
@@ -219,19 +219,9 @@ class Jieba(BaseKeyword):
 
         return sorted_chunk_indices[: k]
 
-    def _update_segment_keywords(self, dataset_id: str, node_id: str, keywords: list[str]):
-        document_segment = db.session.query(DocumentSegment).filter(
-            DocumentSegment.dataset_id == dataset_id,
-            DocumentSegment.index_node_id == node_id
-        ).first()
-        if document_segment:
-            document_segment.keywords = keywords
-            db.session.add(document_segment)
-            db.session.commit()
-
     def create_segment_keywords(self, node_id: str, keywords: list[str]):
         keyword_table = self._get_dataset_keyword_table()
-        self._update_segment_keywords(self.dataset.id, node_id, keywords)
+        self._update_segments_keywords({node_id: keywords})
         keyword_table = self._add_text_to_keyword_table(keyword_table, node_id, keywords)
         self._save_dataset_keyword_table(keyword_table)
 
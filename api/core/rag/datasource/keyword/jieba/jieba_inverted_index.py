@@ -0,0 +1,297 @@
+import json
+import math
+from collections import defaultdict
+from typing import Any
+
+from pydantic import BaseModel
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from core.rag.datasource.keyword.jieba.jieba_keyword_table_handler import JiebaKeywordTableHandler
+from core.rag.datasource.keyword.keyword_base import BaseKeyword
+from core.rag.models.document import Document
+from core.rag.retrieval.segment_hydrator import SegmentHydrator
+from extensions.ext_database import db
+from extensions.ext_redis import redis_client
+from models.dataset import Dataset, DatasetKeywordPosting, DocumentSegment
+
+# max number of postings in a single insert statement
+POSTINGS_INSERT_BATCH_SIZE = 1000
+# seconds to cache the statistics of a dataset keyword index, writes invalidate the cache
+KEYWORD_INDEX_STATS_CACHE_TTL = 600
+
+
+class InvertedIndexConfig(BaseModel):
+    max_keywords_per_chunk: int = 10
+    # BM25 parameters
+    k1: float = 1.2
+    b: float = 0.75
+
+
+class JiebaInvertedIndex(BaseKeyword):
+    """
+    Jieba keyword index stored as postings, one row per keyword and segment.
+
+    Unlike the keyword table of `Jieba`, which is loaded and rewritten as a whole,
+    writes only touch the postings of the changed segments and searches only load
+    the postings of the query keywords, so no dataset-wide lock is needed.
+    Search results are ranked with BM25.
+    """
+
+    def __init__(self, dataset: Dataset):
+        super().__init__(dataset)
+        self._config = InvertedIndexConfig()
+
+    def create(self, texts: list[Document], **kwargs) -> BaseKeyword:
+        self.add_texts(texts, **kwargs)
+        return self
+
+    def add_texts(self, texts: list[Document], **kwargs):
+        keyword_table_handler = JiebaKeywordTableHandler()
+        keywords_list = kwargs.get('keywords_list', None)
+
+        node_keywords = {}
+        node_contents = {}
+        for i, text in enumerate(texts):
+            keywords = keywords_list[i] if keywords_list else None
+            if not keywords:
+                keywords = keyword_table_handler.extract_keywords(text.page_content,
+                                                                  self._config.max_keywords_per_chunk)
+            node_keywords[text.metadata['doc_id']] = list(keywords)
+            node_contents[text.metadata['doc_id']] = text.page_content
+
+        self._update_segments_keywords(node_keywords)
+        self._save_postings(node_keywords, node_contents)
+
+    def text_exists(self, id: str) -> bool:
+        posting = db.session.query(DatasetKeywordPosting.id).filter(
+            DatasetKeywordPosting.dataset_id == self.dataset.id,
+            DatasetKeywordPosting.index_node_id == id
+        ).first()
+
+        return posting is not None
+
+    def delete_by_ids(self, ids: list[str]) -> None:
+        if not ids:
+            return
+
+        db.session.query(DatasetKeywordPosting).filter(
+            DatasetKeywordPosting.dataset_id == self.dataset.id,
+            DatasetKeywordPosting.index_node_id.in_(ids)
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        self._clear_stats_cache()
+
+    def delete_by_document_id(self, document_id: str):
+        segment_node_ids = select(DocumentSegment.index_node_id).where(
+            DocumentSegment.dataset_id == self.dataset.id,
+            DocumentSegment.document_id == document_id
+        )
+
+        db.session.query(DatasetKeywordPosting).filter(
+            DatasetKeywordPosting.dataset_id == self.dataset.id,
+            DatasetKeywordPosting.index_node_id.in_(segment_node_ids)
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        self._clear_stats_cache()
+
+    def search(
+            self, query: str,
+            **kwargs: Any
+    ) -> list[Document]:
+        k = kwargs.get('top_k', 4)
+
+        sorted_chunk_indices = self._retrieve_ids_by_query(query, k)
+        if not sorted_chunk_indices:
+            return []
+
+        documents = []
+        segments = SegmentHydrator.get_segments(sorted_chunk_indices, dataset_id=self.dataset.id)
+        for segment in segments:
+            documents.append(Document(
+                page_content=segment.content,
+                metadata={
+                    "doc_id": segment.index_node_id,
+                    "doc_hash": segment.index_node_hash,
+                    "document_id": segment.document_id,
+                    "dataset_id": segment.dataset_id,
+                }
+            ))
+
+        return documents
+
+    def delete(self) -> None:
+        db.session.query(DatasetKeywordPosting).filter(
+            DatasetKeywordPosting.dataset_id == self.dataset.id
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        self._clear_stats_cache()
+
+    def create_segment_keywords(self, node_id: str, keywords: list[str]):
+        self._update_segments_keywords({node_id: keywords})
+        segment = db.session.query(DocumentSegment).filter(
+            DocumentSegment.dataset_id == self.dataset.id,
+            DocumentSegment.index_node_id == node_id
+        ).first()
+        self._save_postings({node_id: keywords}, {node_id: segment.content if segment else ''})
+
+    def multi_create_segment_keywords(self, pre_segment_data_list: list):
+        keyword_table_handler = JiebaKeywordTableHandler()
+        node_keywords = {}
+        node_contents = {}
+        for pre_segment_data in pre_segment_data_list:
+            segment = pre_segment_data['segment']
+            if pre_segment_data['keywords']:
+                segment.keywords = pre_segment_data['keywords']
+            else:
+                keywords = keyword_table_handler.extract_keywords(segment.content,
+                                                                  self._config.max_keywords_per_chunk)
+                segment.keywords = list(keywords)
+            node_keywords[segment.index_node_id] = segment.keywords
+            node_contents[segment.index_node_id] = segment.content
+
+        self._save_postings(node_keywords, node_contents)
+
+    def update_segment_keywords_index(self, node_id: str, keywords: list[str]):
+        segment = db.session.query(DocumentSegment).filter(
+            DocumentSegment.dataset_id == self.dataset.id,
+            DocumentSegment.index_node_id == node_id
+        ).first()
+        self._save_postings({node_id: keywords}, {node_id: segment.content if segment else ''})
+
+    def _save_postings(self, node_keywords: dict[str, list[str]], node_contents: dict[str, str]) -> None:
+        """
+        Replace postings of index nodes
+        :param node_keywords: index node id -> keywords
+        :param node_contents: index node id -> content, used for term frequency and segment length
+        :return:
+        """
+        if not node_keywords:
+            return
+
+        rows = []
+        for node_id, keywords in node_keywords.items():
+            content = node_contents.get(node_id) or ''
+            # truncate before de-duplicating, keywords sharing the first 255 chars are one posting
+            for keyword in {keyword[:255] for keyword in keywords if keyword}:
+                rows.append({
+                    'dataset_id': self.dataset.id,
+                    'keyword': keyword,
+                    'index_node_id': node_id,
+                    'term_frequency': max(content.count(keyword), 1),
+                    'segment_length': len(content),
+                })
+
+        db.session.query(DatasetKeywordPosting).filter(
+            DatasetKeywordPosting.dataset_id == self.dataset.id,
+            DatasetKeywordPosting.index_node_id.in_(list(node_keywords.keys()))
+        ).delete(synchronize_session=False)
+
+        for i in range(0, len(rows), POSTINGS_INSERT_BATCH_SIZE):
+            statement = insert(DatasetKeywordPosting).values(rows[i:i + POSTINGS_INSERT_BATCH_SIZE])
+            db.session.execute(statement.on_conflict_do_update(
+                index_elements=['dataset_id', 'keyword', 'index_node_id'],
+                set_={
+                    'term_frequency': statement.excluded.term_frequency,
+                    'segment_length': statement.excluded.segment_length,
+                }
+            ))
+
+        db.session.commit()
+        self._clear_stats_cache()
+
+    def _retrieve_ids_by_query(self, query: str, k: int = 4) -> list[str]:
+        keyword_table_handler = JiebaKeywordTableHandler()
+        keywords = list(keyword_table_handler.extract_keywords(query))
+        if not keywords:
+            return []
+
+        postings = db.session.query(
+            DatasetKeywordPosting.keyword,
+            DatasetKeywordPosting.index_node_id,
+            DatasetKeywordPosting.term_frequency,
+            DatasetKeywordPosting.segment_length
+        ).filter(
+            DatasetKeywordPosting.dataset_id == self.dataset.id,
+            DatasetKeywordPosting.keyword.in_(keywords)
+        ).all()
+        if not postings:
+            return []
+
+        segment_count, average_segment_length = self._get_stats()
+        scores = self.score_postings(
+            postings,
+            segment_count=segment_count,
+            average_segment_length=average_segment_length,
+            k1=self._config.k1,
+            b=self._config.b
+        )
+
+        sorted_chunk_indices = sorted(scores.keys(), key=lambda x: scores[x], reverse=True)
+        return sorted_chunk_indices[: k]
+
+    @staticmethod
+    def score_postings(postings: list[tuple[str, str, int, int]],
+                       segment_count: int,
+                       average_segment_length: float,
+                       k1: float = 1.2,
+                       b: float = 0.75) -> dict[str, float]:
+        """
+        Score index nodes by BM25
+        :param postings: postings of query keywords, as (keyword, index node id, term frequency, segment length)
+        :param segment_count: number of indexed segments in the dataset
+        :param average_segment_length: average length of indexed segments in the dataset
+        :param k1: term frequency saturation
+        :param b: segment length normalization
+        :return: index node id -> score
+        """
+        document_frequencies: dict[str, int] = defaultdict(int)
+        for keyword, _, _, _ in postings:
+            document_frequencies[keyword] += 1
+
+        segment_count = max(segment_count, max(document_frequencies.values()))
+        average_segment_length = average_segment_length or 1
+
+        scores: dict[str, float] = defaultdict(float)
+        for keyword, node_id, term_frequency, segment_length in postings:
+            document_frequency = document_frequencies[keyword]
+            idf = math.log(1 + (segment_count - document_frequency + 0.5) / (document_frequency + 0.5))
+            length_norm = 1 - b + b * segment_length / average_segment_length
+            scores[node_id] += idf * term_frequency * (k1 + 1) / (term_frequency + k1 * length_norm)
+
+        return scores
+
+    def _get_stats(self) -> tuple[int, float]:
+        """
+        Get number and average length of indexed segments in the dataset
+        :return:
+        """
+        cache_key = self._stats_cache_key()
+        cached_stats = redis_client.get(cache_key)
+        if cached_stats:
+            segment_count, average_segment_length = json.loads(cached_stats)
+            return segment_count, average_segment_length
+
+        segment_lengths = db.session.query(
+            DatasetKeywordPosting.index_node_id,
+            func.max(DatasetKeywordPosting.segment_length).label('segment_length')
+        ).filter(
+            DatasetKeywordPosting.dataset_id == self.dataset.id
+        ).group_by(DatasetKeywordPosting.index_node_id).subquery()
+
+        segment_count, average_segment_length = db.session.query(
+            func.count(segment_lengths.c.index_node_id),
+            func.avg(segment_lengths.c.segment_length)
+        ).one()
+        segment_count = segment_count or 0
+        average_segment_length = float(average_segment_length or 0)
+
+        redis_client.setex(cache_key, KEYWORD_INDEX_STATS_CACHE_TTL,
+                           json.dumps([segment_count, average_segment_length]))
+        return segment_count, average_segment_length
+
+    def _clear_stats_cache(self) -> None:
+        redis_client.delete(self._stats_cache_key())
+
+    def _stats_cache_key(self) -> str:
+        return 'keyword_index_stats_{}'.format(self.dataset.id)
@@ -3,8 +3,14 @@ from __future__ import annotations
 from abc import ABC, abstractmethod
 from typing import Any
 
+from sqlalchemy import update
+
 from core.rag.models.document import Document
-from models.dataset import Dataset
+from extensions.ext_database import db
+from models.dataset import Dataset, DocumentSegment
+
+# max number of segments in a single keywords update
+SEGMENT_KEYWORDS_UPDATE_BATCH_SIZE = 1000
 
 
 class BaseKeyword(ABC):
@@ -52,3 +58,23 @@ class BaseKeyword(ABC):
 
     def _get_uuids(self, texts: list[Document]) -> list[str]:
         return [text.metadata['doc_id'] for text in texts]
+
+    def _update_segments_keywords(self, node_keywords: dict[str, list[str]]) -> None:
+        """
+        Update keywords of segments with one bulk update per batch
+        :param node_keywords: index node id -> keywords
+        :return:
+        """
+        node_ids = list(node_keywords.keys())
+        for i in range(0, len(node_ids), SEGMENT_KEYWORDS_UPDATE_BATCH_SIZE):
+            segments = db.session.query(DocumentSegment.id, DocumentSegment.index_node_id).filter(
+                DocumentSegment.dataset_id == self.dataset.id,
+                DocumentSegment.index_node_id.in_(node_ids[i:i + SEGMENT_KEYWORDS_UPDATE_BATCH_SIZE])
+            ).all()
+            if segments:
+                db.session.execute(update(DocumentSegment), [
+                    {'id': segment.id, 'keywords': node_keywords[segment.index_node_id]}
+                    for segment in segments
+                ])
+
+        db.session.commit()
@@ -4,6 +4,8 @@ from typing import Optional
 from flask import Flask, current_app
 
 from core.rag.data_post_processor.data_post_processor import DataPostProcessor
+from core.rag.datasource.dataset_counter import DatasetCounter
+from core.rag.datasource.entity.embedding import QueryEmbedding
 from core.rag.datasource.keyword.keyword_factory import Keyword
 from core.rag.datasource.vdb.vector_factory import Vector
 from core.rag.retrieval.retrival_methods import RetrievalMethod
@@ -26,11 +28,12 @@ class RetrievalService:
 
     @classmethod
     def retrieve(cls, retrival_method: str, dataset_id: str, query: str,
-                 top_k: int, score_threshold: Optional[float] = .0, reranking_model: Optional[dict] = None):
+                 top_k: int, score_threshold: Optional[float] = .0, reranking_model: Optional[dict] = None,
+                 query_embedding: Optional[QueryEmbedding] = None):
         dataset = db.session.query(Dataset).filter(
             Dataset.id == dataset_id
         ).first()
-        if not dataset or dataset.available_document_count == 0 or dataset.available_segment_count == 0:
+        if not dataset or not DatasetCounter.is_available(dataset.id):
             return []
         all_documents = []
         threads = []
@@ -39,7 +42,7 @@ class RetrievalService:
         if retrival_method == 'keyword_search':
             keyword_thread = threading.Thread(target=RetrievalService.keyword_search, kwargs={
                 'flask_app': current_app._get_current_object(),
-                'dataset_id': dataset_id,
+                'dataset': dataset,
                 'query': query,
                 'top_k': top_k,
                 'all_documents': all_documents,
@@ -51,7 +54,7 @@ class RetrievalService:
         if RetrievalMethod.is_support_semantic_search(retrival_method):
             embedding_thread = threading.Thread(target=RetrievalService.embedding_search, kwargs={
                 'flask_app': current_app._get_current_object(),
-                'dataset_id': dataset_id,
+                'dataset': dataset,
                 'query': query,
                 'top_k': top_k,
                 'score_threshold': score_threshold,
@@ -59,6 +62,7 @@ class RetrievalService:
                 'all_documents': all_documents,
                 'retrival_method': retrival_method,
                 'exceptions': exceptions,
+                'query_embedding': query_embedding,
             })
             threads.append(embedding_thread)
             embedding_thread.start()
@@ -67,7 +71,7 @@ class RetrievalService:
         if RetrievalMethod.is_support_fulltext_search(retrival_method):
             full_text_index_thread = threading.Thread(target=RetrievalService.full_text_index_search, kwargs={
                 'flask_app': current_app._get_current_object(),
-                'dataset_id': dataset_id,
+                'dataset': dataset,
                 'query': query,
                 'retrival_method': retrival_method,
                 'score_threshold': score_threshold,
@@ -75,6 +79,7 @@ class RetrievalService:
                 'reranking_model': reranking_model,
                 'all_documents': all_documents,
                 'exceptions': exceptions,
+                'query_embedding': query_embedding,
             })
             threads.append(full_text_index_thread)
             full_text_index_thread.start()
@@ -97,13 +102,12 @@ class RetrievalService:
         return all_documents
 
     @classmethod
-    def keyword_search(cls, flask_app: Flask, dataset_id: str, query: str,
+    def keyword_search(cls, flask_app: Flask, dataset: Dataset, query: str,
                        top_k: int, all_documents: list, exceptions: list):
         with flask_app.app_context():
             try:
-                dataset = db.session.query(Dataset).filter(
-                    Dataset.id == dataset_id
-                ).first()
+                # the loaded dataset is attached to the session of this thread without querying it again
+                dataset = db.session.merge(dataset, load=False)
 
                 keyword = Keyword(
                     dataset=dataset
@@ -118,21 +122,22 @@ class RetrievalService:
                 exceptions.append(str(e))
 
     @classmethod
-    def embedding_search(cls, flask_app: Flask, dataset_id: str, query: str,
+    def embedding_search(cls, flask_app: Flask, dataset: Dataset, query: str,
                          top_k: int, score_threshold: Optional[float], reranking_model: Optional[dict],
-                         all_documents: list, retrival_method: str, exceptions: list):
+                         all_documents: list, retrival_method: str, exceptions: list,
+                         query_embedding: Optional[QueryEmbedding] = None):
         with flask_app.app_context():
             try:
-                dataset = db.session.query(Dataset).filter(
-                    Dataset.id == dataset_id
-                ).first()
+                dataset = db.session.merge(dataset, load=False)
 
                 vector = Vector(
-                    dataset=dataset
+                    dataset=dataset,
+                    embeddings=query_embedding.embeddings if query_embedding else None
                 )
 
                 documents = vector.search_by_vector(
                     query,
+                    query_vector=query_embedding.vector if query_embedding else None,
                     search_type='similarity_score_threshold',
                     top_k=top_k,
                     score_threshold=score_threshold,
@@ -156,17 +161,17 @@ class RetrievalService:
                 exceptions.append(str(e))
 
     @classmethod
-    def full_text_index_search(cls, flask_app: Flask, dataset_id: str, query: str,
+    def full_text_index_search(cls, flask_app: Flask, dataset: Dataset, query: str,
                                top_k: int, score_threshold: Optional[float], reranking_model: Optional[dict],
-                               all_documents: list, retrival_method: str, exceptions: list):
+                               all_documents: list, retrival_method: str, exceptions: list,
+                               query_embedding: Optional[QueryEmbedding] = None):
         with flask_app.app_context():
             try:
-                dataset = db.session.query(Dataset).filter(
-                    Dataset.id == dataset_id
-                ).first()
+                dataset = db.session.merge(dataset, load=False)
 
                 vector_processor = Vector(
                     dataset=dataset,
+                    embeddings=query_embedding.embeddings if query_embedding else None
                 )
 
                 documents = vector_processor.search_by_full_text(
@@ -10,6 +10,7 @@ from pymilvus import MilvusClient, MilvusException, connections
 from core.rag.datasource.entity.embedding import Embeddings
 from core.rag.datasource.vdb.field import Field
 from core.rag.datasource.vdb.vector_base import BaseVector
+from core.rag.datasource.vdb.vector_client_registry import VectorClientRegistry
 from core.rag.datasource.vdb.vector_factory import AbstractVectorFactory
 from core.rag.datasource.vdb.vector_type import VectorType
 from core.rag.models.document import Document
@@ -56,7 +57,12 @@ class MilvusVector(BaseVector):
     def __init__(self, collection_name: str, config: MilvusConfig):
         super().__init__(collection_name)
         self._client_config = config
-        self._client = self._init_client(config)
+        # the client is shared by all MilvusVector instances with the same config
+        self._client = VectorClientRegistry.get_client(
+            VectorType.MILVUS,
+            config,
+            create_client=lambda: self._init_client(config)
+        )
         self._consistency_level = 'Session'
         self._fields = []
 
@@ -7,7 +7,7 @@ from flask import current_app
 from numpy import ndarray
 from pgvecto_rs.sqlalchemy import Vector
 from pydantic import BaseModel, model_validator
-from sqlalchemy import Float, String, create_engine, insert, select, text
+from sqlalchemy import Engine, Float, String, create_engine, insert, select, text
 from sqlalchemy import text as sql_text
 from sqlalchemy.dialects import postgresql
 from sqlalchemy.orm import Mapped, Session, mapped_column
@@ -15,6 +15,7 @@ from sqlalchemy.orm import Mapped, Session, mapped_column
 from core.rag.datasource.entity.embedding import Embeddings
 from core.rag.datasource.vdb.pgvecto_rs.collection import CollectionORM
 from core.rag.datasource.vdb.vector_base import BaseVector
+from core.rag.datasource.vdb.vector_client_registry import VectorClientRegistry
 from core.rag.datasource.vdb.vector_factory import AbstractVectorFactory
 from core.rag.datasource.vdb.vector_type import VectorType
 from core.rag.models.document import Document
@@ -52,10 +53,14 @@ class PGVectoRS(BaseVector):
         super().__init__(collection_name)
         self._client_config = config
         self._url = f"postgresql+psycopg2://{config.user}:{config.password}@{config.host}:{config.port}/{config.database}"
-        self._client = create_engine(self._url)
-        with Session(self._client) as session:
-            session.execute(text("CREATE EXTENSION IF NOT EXISTS vectors"))
-            session.commit()
+        # the engine is shared by all PGVectoRS instances with the same config
+        self._client = VectorClientRegistry.get_client(
+            VectorType.PGVECTO_RS,
+            config,
+            create_client=self._create_engine,
+            close_client=lambda engine: engine.dispose(),
+            pool_stats=VectorClientRegistry.get_engine_pool_stats
+        )
         self._fields = []
 
         class _Table(CollectionORM):
@@ -72,6 +77,14 @@ class PGVectoRS(BaseVector):
         self._table = _Table
         self._distance_op = "<=>"
 
+    def _create_engine(self) -> Engine:
+        engine = create_engine(self._url, pool_pre_ping=True)
+        with Session(engine) as session:
+            session.execute(text("CREATE EXTENSION IF NOT EXISTS vectors"))
+            session.commit()
+
+        return engine
+
     def get_type(self) -> str:
         return VectorType.PGVECTO_RS
 
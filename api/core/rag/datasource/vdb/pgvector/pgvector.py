@@ -1,4 +1,5 @@
 import json
+import threading
 import uuid
 from contextlib import contextmanager
 from typing import Any
@@ -10,6 +11,7 @@ from pydantic import BaseModel, model_validator
 
 from core.rag.datasource.entity.embedding import Embeddings
 from core.rag.datasource.vdb.vector_base import BaseVector
+from core.rag.datasource.vdb.vector_client_registry import VectorClientRegistry
 from core.rag.datasource.vdb.vector_factory import AbstractVectorFactory
 from core.rag.datasource.vdb.vector_type import VectorType
 from core.rag.models.document import Document
@@ -23,6 +25,9 @@ class PGVectorConfig(BaseModel):
     user: str
     password: str
     database: str
+    min_connection: int = 1
+    max_connection: int = 20
+    pool_timeout: int = 30
 
     @model_validator(mode='before')
     def validate_config(cls, values: dict) -> dict:
@@ -49,19 +54,60 @@ CREATE TABLE IF NOT EXISTS {table_name} (
 """
 
 
+class BlockingConnectionPool(psycopg2.pool.ThreadedConnectionPool):
+    """
+    Threaded connection pool that waits for a connection to be returned when all of them are in use,
+    instead of raising PoolError right away
+    """
+
+    def __init__(self, minconn: int, maxconn: int, *args, timeout: float = 30, **kwargs):
+        super().__init__(minconn, maxconn, *args, **kwargs)
+        self._semaphore = threading.BoundedSemaphore(maxconn)
+        self._timeout = timeout
+
+    def getconn(self, key=None, blocking: bool = True):
+        acquired = self._semaphore.acquire(timeout=self._timeout) if blocking else self._semaphore.acquire(False)
+        if not acquired:
+            raise psycopg2.pool.PoolError(f"connection pool exhausted, no connection returned in {self._timeout}s")
+
+        try:
+            return super().getconn(key)
+        except Exception:
+            self._semaphore.release()
+            raise
+
+    def putconn(self, conn, key=None, close=False):
+        super().putconn(conn, key, close)
+        self._semaphore.release()
+
+
 class PGVector(BaseVector):
     def __init__(self, collection_name: str, config: PGVectorConfig):
         super().__init__(collection_name)
-        self.pool = self._create_connection_pool(config)
+        self._client_config = config
         self.table_name = f"embedding_{collection_name}"
 
     def get_type(self) -> str:
         return VectorType.PGVECTOR
 
-    def _create_connection_pool(self, config: PGVectorConfig):
-        return psycopg2.pool.SimpleConnectionPool(
-            1,
-            5,
+    @property
+    def pool(self) -> BlockingConnectionPool:
+        # the connection pool is shared by all PGVector instances with the same config
+        return VectorClientRegistry.get_client(
+            VectorType.PGVECTOR,
+            self._client_config,
+            create_client=lambda: self._create_connection_pool(self._client_config),
+            health_check=self._check_connection_pool,
+            close_client=lambda pool: pool.closeall(),
+            pool_stats=self._get_connection_pool_stats
+        )
+
+    @staticmethod
+    def _create_connection_pool(config: PGVectorConfig) -> BlockingConnectionPool:
+        return BlockingConnectionPool(
+            config.min_connection,
+            config.max_connection,
+            timeout=config.pool_timeout,
             host=config.host,
             port=config.port,
             user=config.user,
@@ -69,16 +115,53 @@ class PGVector(BaseVector):
             database=config.database,
         )
 
+    @staticmethod
+    def _check_connection_pool(pool: BlockingConnectionPool) -> bool:
+        try:
+            conn = pool.getconn(blocking=False)
+        except psycopg2.pool.PoolError:
+            # all connections are in use
+            return True
+
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+        except psycopg2.Error:
+            # discard the stale connection only, the pool opens a new one when needed
+            pool.putconn(conn, close=True)
+            return True
+
+        pool.putconn(conn)
+        return True
+
+    @staticmethod
+    def _get_connection_pool_stats(pool: BlockingConnectionPool) -> dict:
+        return {
+            'pool_size': len(pool._pool) + len(pool._used),
+            'pool_in_use': len(pool._used),
+            'pool_max_size': pool.maxconn,
+        }
+
     @contextmanager
     def _get_cursor(self):
-        conn = self.pool.getconn()
-        cur = conn.cursor()
+        pool = self.pool
+        conn = pool.getconn()
+        if conn.closed:
+            # drop connections closed by the server while idle in the pool
+            pool.putconn(conn, close=True)
+            conn = pool.getconn()
+
         try:
-            yield cur
+            cur = conn.cursor()
+            try:
+                yield cur
+            finally:
+                cur.close()
+                conn.commit()
         finally:
-            cur.close()
-            conn.commit()
-            self.pool.putconn(conn)
+            # always return the connection, a connection that is not returned holds a slot of the pool
+            pool.putconn(conn)
 
     def create(self, texts: list[Document], embeddings: list[list[float]], **kwargs):
         dimension = len(embeddings[0])
@@ -194,5 +277,8 @@ class PGVectorFactory(AbstractVectorFactory):
                 user=config.get("PGVECTOR_USER"),
                 password=config.get("PGVECTOR_PASSWORD"),
                 database=config.get("PGVECTOR_DATABASE"),
+                min_connection=config.get("PGVECTOR_MIN_CONNECTION"),
+                max_connection=config.get("PGVECTOR_MAX_CONNECTION"),
+                pool_timeout=config.get("PGVECTOR_POOL_TIMEOUT"),
             ),
         )
\ No newline at end of file
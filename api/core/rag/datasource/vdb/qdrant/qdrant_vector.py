@@ -22,6 +22,7 @@ from qdrant_client.local.qdrant_local import QdrantLocal
 from core.rag.datasource.entity.embedding import Embeddings
 from core.rag.datasource.vdb.field import Field
 from core.rag.datasource.vdb.vector_base import BaseVector
+from core.rag.datasource.vdb.vector_client_registry import VectorClientRegistry
 from core.rag.datasource.vdb.vector_factory import AbstractVectorFactory
 from core.rag.datasource.vdb.vector_type import VectorType
 from core.rag.models.document import Document
@@ -71,7 +72,12 @@ class QdrantVector(BaseVector):
     def __init__(self, collection_name: str, group_id: str, config: QdrantConfig, distance_func: str = 'Cosine'):
         super().__init__(collection_name)
         self._client_config = config
-        self._client = qdrant_client.QdrantClient(**self._client_config.to_qdrant_params())
+        # the client is shared by all QdrantVector instances with the same config
+        self._client = VectorClientRegistry.get_client(
+            VectorType.QDRANT,
+            config,
+            create_client=lambda: qdrant_client.QdrantClient(**self._client_config.to_qdrant_params())
+        )
         self._distance_func = distance_func.upper()
         self._group_id = group_id
 
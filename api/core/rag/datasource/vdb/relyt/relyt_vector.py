@@ -20,6 +20,7 @@ except ImportError:
     from sqlalchemy.ext.declarative import declarative_base
 
 from core.rag.datasource.vdb.vector_base import BaseVector
+from core.rag.datasource.vdb.vector_client_registry import VectorClientRegistry
 from core.rag.models.document import Document
 from extensions.ext_redis import redis_client
 
@@ -55,7 +56,14 @@ class RelytVector(BaseVector):
         self.embedding_dimension = 1536
         self._client_config = config
         self._url = f"postgresql+psycopg2://{config.user}:{config.password}@{config.host}:{config.port}/{config.database}"
-        self.client = create_engine(self._url)
+        # the engine is shared by all RelytVector instances with the same config
+        self.client = VectorClientRegistry.get_client(
+            VectorType.RELYT,
+            config,
+            create_client=lambda: create_engine(self._url, pool_pre_ping=True),
+            close_client=lambda engine: engine.dispose(),
+            pool_stats=VectorClientRegistry.get_engine_pool_stats
+        )
         self._fields = []
         self._group_id = group_id
 
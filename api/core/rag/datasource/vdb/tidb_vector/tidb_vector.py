@@ -11,6 +11,7 @@ from sqlalchemy.orm import Session, declarative_base
 
 from core.rag.datasource.entity.embedding import Embeddings
 from core.rag.datasource.vdb.vector_base import BaseVector
+from core.rag.datasource.vdb.vector_client_registry import VectorClientRegistry
 from core.rag.datasource.vdb.vector_factory import AbstractVectorFactory
 from core.rag.datasource.vdb.vector_type import VectorType
 from core.rag.models.document import Document
@@ -67,7 +68,14 @@ class TiDBVector(BaseVector):
         self._url = (f"mysql+pymysql://{config.user}:{config.password}@{config.host}:{config.port}/{config.database}?"
                      f"ssl_verify_cert=true&ssl_verify_identity=true")
         self._distance_func = distance_func.lower()
-        self._engine = create_engine(self._url)
+        # the engine is shared by all TiDBVector instances with the same config
+        self._engine = VectorClientRegistry.get_client(
+            VectorType.TIDB_VECTOR,
+            config,
+            create_client=lambda: create_engine(self._url, pool_pre_ping=True),
+            close_client=lambda engine: engine.dispose(),
+            pool_stats=VectorClientRegistry.get_engine_pool_stats
+        )
         self._orm_base = declarative_base()
         self._dimension = 1536
 
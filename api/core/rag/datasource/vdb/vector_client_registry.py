@@ -0,0 +1,193 @@
+import logging
+import threading
+import time
+from collections.abc import Callable
+from typing import Any, Optional, TypeVar
+
+from flask import current_app, has_app_context
+from pydantic import BaseModel
+from sqlalchemy import Engine
+from sqlalchemy.pool import QueuePool
+
+from libs import helper
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+class _PooledClient:
+    """
+    Client shared by all vector instances with the same vector type and connection config
+    """
+
+    def __init__(self, vector_type: str, config_hash: str) -> None:
+        self.vector_type = vector_type
+        self.config_hash = config_hash
+        self.lock = threading.Lock()
+        self.client: Optional[Any] = None
+        self.close_client: Optional[Callable[[Any], None]] = None
+        self.pool_stats: Optional[Callable[[Any], dict]] = None
+        self.last_used_at = time.monotonic()
+        self.last_checked_at = time.monotonic()
+        self.created_count = 0
+        self.reused_count = 0
+        self.unhealthy_count = 0
+
+    def close(self) -> None:
+        client, self.client = self.client, None
+        if client is not None and self.close_client:
+            try:
+                self.close_client(client)
+            except Exception:
+                logger.exception(f'Failed to close {self.vector_type} vector client')
+
+
+class VectorClientRegistry:
+    """
+    Process-wide registry of vector store clients, keyed by vector type and connection config.
+
+    Vector instances are created for every retrieval and indexing call, so creating clients or
+    connection pools in their constructors opens new connections each time. Factories get
+    clients from the registry instead, which creates them once, checks their health
+    periodically and drops the ones left idle.
+
+    Vector instances keep the client they got for their whole life, e.g. during a long indexing
+    run, so idle and unhealthy clients are not closed: the registry only drops its reference, and
+    the client is released once the last instance using it is garbage collected.
+    """
+    _clients: dict[tuple[str, str], _PooledClient] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_client(cls, vector_type: str,
+                   config: BaseModel,
+                   create_client: Callable[[], T],
+                   health_check: Optional[Callable[[T], bool]] = None,
+                   close_client: Optional[Callable[[T], None]] = None,
+                   pool_stats: Optional[Callable[[T], dict]] = None) -> T:
+        """
+        Get the shared client of vector type and connection config, created on first use
+        :param vector_type: vector type
+        :param config: connection config of the client
+        :param create_client: create a new client
+        :param health_check: check whether the client is still usable, unhealthy clients are recreated
+        :param close_client: release the resources of the client, on `close_all`
+        :param pool_stats: get connection pool usage of the client, for metrics
+        :return:
+        """
+        config_getter = current_app.config.get if has_app_context() else dict().get
+        idle_timeout = config_getter('VECTOR_STORE_CLIENT_IDLE_TIMEOUT', 600)
+        health_check_interval = config_getter('VECTOR_STORE_CLIENT_HEALTH_CHECK_INTERVAL', 30)
+        cls._evict_idle_clients(idle_timeout)
+
+        key = (vector_type, helper.generate_text_hash(config.model_dump_json()))
+        with cls._lock:
+            pooled_client = cls._clients.get(key)
+            if pooled_client is None:
+                pooled_client = _PooledClient(vector_type, key[1][:12])
+                cls._clients[key] = pooled_client
+            # mark as used before releasing the registry lock, so it is not evicted meanwhile
+            pooled_client.last_used_at = time.monotonic()
+
+        with pooled_client.lock:
+            now = time.monotonic()
+            if (pooled_client.client is not None and health_check
+                    and now - pooled_client.last_checked_at >= health_check_interval):
+                pooled_client.last_checked_at = now
+                healthy = False
+                try:
+                    healthy = health_check(pooled_client.client)
+                except Exception:
+                    logger.warning(f'Health check of {vector_type} vector client failed', exc_info=True)
+
+                if not healthy:
+                    # other threads and vector instances may still use it, so it is dropped, not closed
+                    pooled_client.unhealthy_count += 1
+                    pooled_client.client = None
+
+            if pooled_client.client is None:
+                pooled_client.client = create_client()
+                pooled_client.close_client = close_client
+                pooled_client.pool_stats = pool_stats
+                pooled_client.last_checked_at = now
+                pooled_client.created_count += 1
+            else:
+                pooled_client.reused_count += 1
+
+            pooled_client.last_used_at = now
+            return pooled_client.client
+
+    @staticmethod
+    def get_engine_pool_stats(engine: Engine) -> dict:
+        """
+        Get connection pool usage of a SQLAlchemy engine client
+        :param engine: SQLAlchemy engine
+        :return:
+        """
+        pool = engine.pool
+        if not isinstance(pool, QueuePool):
+            return {}
+
+        return {
+            'pool_size': pool.checkedin() + pool.checkedout(),
+            'pool_in_use': pool.checkedout(),
+            'pool_max_size': pool.size() + max(pool._max_overflow, 0),
+        }
+
+    @classmethod
+    def get_metrics(cls) -> list[dict]:
+        """
+        Get usage metrics of the registered clients
+        :return:
+        """
+        with cls._lock:
+            pooled_clients = list(cls._clients.values())
+
+        now = time.monotonic()
+        metrics = []
+        for pooled_client in pooled_clients:
+            with pooled_client.lock:
+                client_metrics = {
+                    'vector_type': pooled_client.vector_type,
+                    'config_hash': pooled_client.config_hash,
+                    'created_count': pooled_client.created_count,
+                    'reused_count': pooled_client.reused_count,
+                    'unhealthy_count': pooled_client.unhealthy_count,
+                    'idle_seconds': round(now - pooled_client.last_used_at, 3),
+                }
+                if pooled_client.client is not None and pooled_client.pool_stats:
+                    try:
+                        client_metrics.update(pooled_client.pool_stats(pooled_client.client))
+                    except Exception:
+                        logger.warning(f'Failed to get pool stats of {pooled_client.vector_type} vector client',
+                                       exc_info=True)
+
+            metrics.append(client_metrics)
+
+        return metrics
+
+    @classmethod
+    def close_all(cls) -> None:
+        """
+        Close all registered clients
+        :return:
+        """
+        with cls._lock:
+            pooled_clients = list(cls._clients.values())
+            cls._clients.clear()
+
+        for pooled_client in pooled_clients:
+            with pooled_client.lock:
+                pooled_client.close()
+
+    @classmethod
+    def _evict_idle_clients(cls, idle_timeout: float) -> None:
+        now = time.monotonic()
+        with cls._lock:
+            idle_keys = [key for key, pooled_client in cls._clients.items()
+                         if now - pooled_client.last_used_at >= idle_timeout]
+            idle_clients = [cls._clients.pop(key) for key in idle_keys]
+
+        for pooled_client in idle_clients:
+            logger.info(f'Drop idle {pooled_client.vector_type} vector client {pooled_client.config_hash}')
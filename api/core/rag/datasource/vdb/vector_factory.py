@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, Optional
 
 from flask import current_app
 
@@ -28,11 +28,12 @@ class AbstractVectorFactory(ABC):
 
 
 class Vector:
-    def __init__(self, dataset: Dataset, attributes: list = None):
+    def __init__(self, dataset: Dataset, attributes: list = None, embeddings: Optional[Embeddings] = None):
         if attributes is None:
             attributes = ['doc_id', 'dataset_id', 'document_id', 'doc_hash']
         self._dataset = dataset
-        self._embeddings = self._get_embeddings()
+        # embeddings of the embedding model of the dataset, shared by the datasets of a retrieval if given
+        self._embeddings = embeddings or self._get_embeddings()
         self._attributes = attributes
         self._vector_processor = self._init_vector()
 
@@ -116,7 +117,7 @@ class Vector:
             self, query: str,
             **kwargs: Any
     ) -> list[Document]:
-        query_vector = self._embeddings.embed_query(query)
+        query_vector = kwargs.pop('query_vector', None) or self._embeddings.embed_query(query)
         return self._vector_processor.search_by_vector(query_vector, **kwargs)
 
     def search_by_full_text(
@@ -1,14 +1,17 @@
 from collections.abc import Sequence
 from typing import Any, Optional
 
-from sqlalchemy import func
+from sqlalchemy import func, insert
 
-from core.model_manager import ModelManager
+from core.model_manager import ModelInstance, ModelManager
 from core.model_runtime.entities.model_entities import ModelType
 from core.rag.models.document import Document
 from extensions.ext_database import db
 from models.dataset import Dataset, DocumentSegment
 
+# max number of segments saved with a single insert
+DOCUMENT_SEGMENT_INSERT_BATCH_SIZE = 1000
+
 
 class DatasetDocumentStore:
     def __init__(
@@ -63,6 +66,10 @@ class DatasetDocumentStore:
     def add_documents(
             self, docs: Sequence[Document], allow_update: bool = True
     ) -> None:
+        for doc in docs:
+            if not isinstance(doc, Document):
+                raise ValueError("doc must be a Document")
+
         max_position = db.session.query(func.max(DocumentSegment.position)).filter(
             DocumentSegment.document_id == self._document_id
         ).scalar()
@@ -79,56 +86,83 @@ class DatasetDocumentStore:
                 model=self._dataset.embedding_model
             )
 
-        for doc in docs:
-            if not isinstance(doc, Document):
-                raise ValueError("doc must be a Document")
-
-            segment_document = self.get_document_segment(doc_id=doc.metadata['doc_id'])
-
-            # NOTE: doc could already exist in the store, but we overwrite it
-            if not allow_update and segment_document:
-                raise ValueError(
-                    f"doc_id {doc.metadata['doc_id']} already exists. "
-                    "Set allow_update to True to overwrite."
-                )
+        for i in range(0, len(docs), DOCUMENT_SEGMENT_INSERT_BATCH_SIZE):
+            batch_docs = docs[i:i + DOCUMENT_SEGMENT_INSERT_BATCH_SIZE]
+            max_position = self._add_document_batch(batch_docs, embedding_model, max_position, allow_update)
+
+    def _add_document_batch(self, docs: Sequence[Document], embedding_model: Optional[ModelInstance],
+                            max_position: int, allow_update: bool) -> int:
+        """
+        Save a batch of documents as segments, with a single insert of the new segments
+        :param docs: documents
+        :param embedding_model: embedding model instance to count the tokens of high quality datasets
+        :param max_position: max segment position of the document before the batch
+        :param allow_update: overwrite the segments of existing docs
+        :return: max segment position of the document after the batch
+        """
+        doc_ids = [doc.metadata['doc_id'] for doc in docs]
+        segments_by_doc_id = self.get_document_segments(doc_ids)
+
+        # NOTE: doc could already exist in the store, but we overwrite it
+        if not allow_update and segments_by_doc_id:
+            raise ValueError(
+                f"doc_id {next(iter(segments_by_doc_id))} already exists. "
+                "Set allow_update to True to overwrite."
+            )
 
-            # calc embedding use tokens
-            if embedding_model:
-                tokens = embedding_model.get_text_embedding_num_tokens(
-                    texts=[doc.page_content]
-                )
-            else:
-                tokens = 0
+        # calc embedding use tokens
+        if embedding_model:
+            tokens_list = embedding_model.get_text_embedding_num_tokens_list(
+                texts=[doc.page_content for doc in docs]
+            )
+        else:
+            tokens_list = [0] * len(docs)
 
+        new_segments = []
+        for doc, tokens in zip(docs, tokens_list):
+            answer = doc.metadata.pop('answer', '') if doc.metadata.get('answer') else None
+            segment_document = segments_by_doc_id.get(doc.metadata['doc_id'])
             if not segment_document:
                 max_position += 1
 
-                segment_document = DocumentSegment(
-                    tenant_id=self._dataset.tenant_id,
-                    dataset_id=self._dataset.id,
-                    document_id=self._document_id,
-                    index_node_id=doc.metadata['doc_id'],
-                    index_node_hash=doc.metadata['doc_hash'],
-                    position=max_position,
-                    content=doc.page_content,
-                    word_count=len(doc.page_content),
-                    tokens=tokens,
-                    enabled=False,
-                    created_by=self._user_id,
-                )
-                if doc.metadata.get('answer'):
-                    segment_document.answer = doc.metadata.pop('answer', '')
-
-                db.session.add(segment_document)
+                new_segments.append({
+                    'tenant_id': self._dataset.tenant_id,
+                    'dataset_id': self._dataset.id,
+                    'document_id': self._document_id,
+                    'index_node_id': doc.metadata['doc_id'],
+                    'index_node_hash': doc.metadata['doc_hash'],
+                    'position': max_position,
+                    'content': doc.page_content,
+                    'answer': answer,
+                    'word_count': len(doc.page_content),
+                    'tokens': tokens,
+                    'enabled': False,
+                    'created_by': self._user_id,
+                })
+                # a doc id repeated in the batch updates the segment inserted first
+                segments_by_doc_id[doc.metadata['doc_id']] = new_segments[-1]
+            elif isinstance(segment_document, dict):
+                segment_document.update({
+                    'content': doc.page_content,
+                    'index_node_hash': doc.metadata['doc_hash'],
+                    'word_count': len(doc.page_content),
+                    'tokens': tokens,
+                })
+                if answer:
+                    segment_document['answer'] = answer
             else:
                 segment_document.content = doc.page_content
-                if doc.metadata.get('answer'):
-                    segment_document.answer = doc.metadata.pop('answer', '')
+                if answer:
+                    segment_document.answer = answer
                 segment_document.index_node_hash = doc.metadata['doc_hash']
                 segment_document.word_count = len(doc.page_content)
                 segment_document.tokens = tokens
 
-            db.session.commit()
+        if new_segments:
+            db.session.execute(insert(DocumentSegment), new_segments)
+        db.session.commit()
+
+        return max_position
 
     def document_exists(self, doc_id: str) -> bool:
         """Check if document exists."""
@@ -194,3 +228,24 @@ class DatasetDocumentStore:
         ).first()
 
         return document_segment
+
+    def get_document_segments(self, doc_ids: list[str]) -> dict[str, DocumentSegment]:
+        """
+        Get segments of docs with a single query
+        :param doc_ids: doc ids
+        :return: doc id -> segment
+        """
+        if not doc_ids:
+            return {}
+
+        document_segments = db.session.query(DocumentSegment).filter(
+            DocumentSegment.dataset_id == self._dataset.id,
+            DocumentSegment.index_node_id.in_(doc_ids)
+        ).all()
+
+        segments_by_doc_id = {}
+        for document_segment in document_segments:
+            # keep the first segment of a doc id, like `get_document_segment`
+            segments_by_doc_id.setdefault(document_segment.index_node_id, document_segment)
+
+        return segments_by_doc_id
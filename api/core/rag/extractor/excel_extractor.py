@@ -1,8 +1,9 @@
 """Abstract interface for document loader implementations."""
-from typing import Optional
+from typing import Optional, Union
 
 import pandas as pd
 
+from core.rag.extractor.extraction_process_pool import ExtractionProcessPool
 from core.rag.extractor.extractor_base import BaseExtractor
 from core.rag.models.document import Document
 
@@ -31,15 +32,28 @@ class ExcelExtractor(BaseExtractor):
         documents = []
         # Read each worksheet of an Excel file using Pandas
         excel_file = pd.ExcelFile(self._file_path)
-        for sheet_name in excel_file.sheet_names:
-            df: pd.DataFrame = excel_file.parse(sheet_name=sheet_name)
+        if ExtractionProcessPool.get_pool_size() and len(excel_file.sheet_names) > 1:
+            # parse the worksheets in the extraction process pool
+            jobs = [(self._file_path, sheet_name) for sheet_name in excel_file.sheet_names]
+            sheets = ExtractionProcessPool.map_ordered(_extract_sheet, jobs)
+        else:
+            sheets = (_extract_sheet(excel_file, sheet_name) for sheet_name in excel_file.sheet_names)
 
-            # filter out rows with all NaN values
-            df.dropna(how='all', inplace=True)
-
-            # transform each row into a Document
-            documents += [Document(page_content=';'.join(f'"{k}":"{v}"' for k, v in row.items() if pd.notna(v)),
-                                   metadata={'source': self._file_path},
-                                   ) for _, row in df.iterrows()]
+        for contents in sheets:
+            documents += [Document(page_content=content, metadata={'source': self._file_path})
+                          for content in contents]
 
         return documents
+
+
+def _extract_sheet(excel_file: Union[str, pd.ExcelFile], sheet_name: str) -> list[str]:
+    """Extract the rows of a worksheet, run by the extraction process pool for large files."""
+    if isinstance(excel_file, str):
+        excel_file = pd.ExcelFile(excel_file)
+    df: pd.DataFrame = excel_file.parse(sheet_name=sheet_name)
+
+    # filter out rows with all NaN values
+    df.dropna(how='all', inplace=True)
+
+    # transform each row into a Document content
+    return [';'.join(f'"{k}":"{v}"' for k, v in row.items() if pd.notna(v)) for _, row in df.iterrows()]
@@ -11,6 +11,7 @@ from core.rag.extractor.csv_extractor import CSVExtractor
 from core.rag.extractor.entity.datasource_type import DatasourceType
 from core.rag.extractor.entity.extract_setting import ExtractSetting
 from core.rag.extractor.excel_extractor import ExcelExtractor
+from core.rag.extractor.extraction_cache import ExtractionCache
 from core.rag.extractor.firecrawl.firecrawl_web_extractor import FirecrawlWebExtractor
 from core.rag.extractor.html_extractor import HtmlExtractor
 from core.rag.extractor.markdown_extractor import MarkdownExtractor
@@ -32,6 +33,21 @@ from models.model import UploadFile
 
 SUPPORT_URL_CONTENT_TYPES = ['application/pdf', 'text/plain', 'application/json']
 USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+# extractors of which the documents are cached, the others are cheaper to run again than to load from storage
+CACHED_EXTRACTORS = (
+    PdfExtractor,
+    WordExtractor,
+    ExcelExtractor,
+    HtmlExtractor,
+    UnstructuredEmailExtractor,
+    UnstructuredEpubExtractor,
+    UnstructuredMarkdownExtractor,
+    UnstructuredMsgExtractor,
+    UnstructuredPPTExtractor,
+    UnstructuredPPTXExtractor,
+    UnstructuredTextExtractor,
+    UnstructuredXmlExtractor,
+)
 
 
 class ExtractProcessor:
@@ -87,6 +103,7 @@ class ExtractProcessor:
                 file_path: str = None) -> list[Document]:
         if extract_setting.datasource_type == DatasourceType.FILE.value:
             with tempfile.TemporaryDirectory() as temp_dir:
+                upload_file = None
                 if not file_path:
                     upload_file: UploadFile = extract_setting.upload_file
                     suffix = Path(upload_file.key).suffix
@@ -145,6 +162,8 @@ class ExtractProcessor:
                     else:
                         # txt
                         extractor = TextExtractor(file_path, autodetect_encoding=True)
+                if upload_file and isinstance(extractor, CACHED_EXTRACTORS):
+                    return ExtractionCache.extract(extractor, upload_file, file_path)
                 return extractor.extract()
         elif extract_setting.datasource_type == DatasourceType.NOTION.value:
             extractor = NotionExtractor(
@@ -0,0 +1,157 @@
+import datetime
+import gzip
+import hashlib
+import json
+import logging
+from typing import Optional
+
+from flask import current_app
+
+from core.rag.extractor.extractor_base import BaseExtractor
+from core.rag.models.document import Document
+from extensions.ext_redis import redis_client
+from extensions.ext_storage import storage
+from models.model import UploadFile
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractionCache:
+    """
+    Cache of the documents extracted from upload files, stored in `storage`.
+
+    Entries are keyed by the content hash of the file and the name and version of the extractor,
+    so estimating, re-indexing and duplicate documents of the same file skip parsing it again,
+    while a changed extractor parses it anew. Sizes of the entries of a tenant are accounted in redis
+    to report and clear them.
+    """
+
+    @classmethod
+    def extract(cls, extractor: BaseExtractor, upload_file: UploadFile, file_path: str) -> list[Document]:
+        """
+        Get the documents of an upload file from the cache, or extract and cache them
+        :param extractor: extractor of the file
+        :param upload_file: upload file
+        :param file_path: local path of the downloaded file
+        :return:
+        """
+        if not current_app.config.get('EXTRACTION_CACHE_ENABLED', True):
+            return extractor.extract()
+
+        content_hash = upload_file.hash or cls._get_file_hash(file_path)
+        cache_key = cls._cache_key(upload_file.tenant_id, content_hash, extractor)
+        documents = cls._load(cache_key)
+        if documents is not None:
+            return documents
+
+        documents = extractor.extract()
+        cls._save(cache_key, upload_file, content_hash, extractor, documents)
+        return documents
+
+    @classmethod
+    def invalidate(cls, upload_file: UploadFile) -> int:
+        """
+        Delete the cached documents of an upload file, extracted by any extractor
+        :param upload_file: upload file
+        :return: number of deleted entries
+        """
+        if not upload_file.hash:
+            return 0
+
+        prefix = cls._cache_key_prefix(upload_file.tenant_id, upload_file.hash)
+        cache_keys = [cache_key for cache_key in cls._get_entry_sizes(upload_file.tenant_id)
+                      if cache_key.startswith(prefix)]
+        cls._delete(upload_file.tenant_id, cache_keys)
+        return len(cache_keys)
+
+    @classmethod
+    def clear(cls, tenant_id: str) -> int:
+        """
+        Delete all cached documents of a tenant
+        :param tenant_id: tenant id
+        :return: number of deleted entries
+        """
+        cache_keys = list(cls._get_entry_sizes(tenant_id))
+        cls._delete(tenant_id, cache_keys)
+        return len(cache_keys)
+
+    @classmethod
+    def get_size(cls, tenant_id: str) -> dict:
+        """
+        Get the number of entries and the total size in bytes of the cached documents of a tenant
+        :param tenant_id: tenant id
+        :return:
+        """
+        entry_sizes = cls._get_entry_sizes(tenant_id)
+        return {
+            'entries': len(entry_sizes),
+            'size': sum(entry_sizes.values()),
+        }
+
+    @classmethod
+    def _load(cls, cache_key: str) -> Optional[list[Document]]:
+        try:
+            if not storage.exists(cache_key):
+                return None
+            entry = json.loads(gzip.decompress(storage.load(cache_key)))
+            return [Document(**document) for document in entry['documents']]
+        except FileNotFoundError:
+            return None
+        except Exception:
+            logger.warning(f'Failed to load extraction cache {cache_key}', exc_info=True)
+            return None
+
+    @classmethod
+    def _save(cls, cache_key: str, upload_file: UploadFile, content_hash: str,
+              extractor: BaseExtractor, documents: list[Document]) -> None:
+        entry = {
+            'content_hash': content_hash,
+            'extractor': type(extractor).__name__,
+            'extractor_version': extractor.version,
+            'file_name': upload_file.name,
+            'file_size': upload_file.size,
+            'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'documents': [document.model_dump() for document in documents],
+        }
+        try:
+            data = gzip.compress(json.dumps(entry, ensure_ascii=False).encode('utf-8'))
+            storage.save(cache_key, data)
+            redis_client.hset(cls._size_cache_key(upload_file.tenant_id), cache_key, len(data))
+        except Exception:
+            logger.warning(f'Failed to save extraction cache {cache_key}', exc_info=True)
+
+    @classmethod
+    def _delete(cls, tenant_id: str, cache_keys: list[str]) -> None:
+        for cache_key in cache_keys:
+            try:
+                storage.delete(cache_key)
+            except FileNotFoundError:
+                pass
+        if cache_keys:
+            redis_client.hdel(cls._size_cache_key(tenant_id), *cache_keys)
+
+    @classmethod
+    def _get_entry_sizes(cls, tenant_id: str) -> dict[str, int]:
+        entry_sizes = redis_client.hgetall(cls._size_cache_key(tenant_id))
+        return {cache_key.decode('utf-8'): int(size) for cache_key, size in entry_sizes.items()}
+
+    @staticmethod
+    def _get_file_hash(file_path: str) -> str:
+        # the same hash as the `hash` of upload files
+        file_hash = hashlib.sha3_256()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                file_hash.update(block)
+        return file_hash.hexdigest()
+
+    @staticmethod
+    def _cache_key_prefix(tenant_id: str, content_hash: str) -> str:
+        return f'extraction_cache/{tenant_id}/{content_hash}/'
+
+    @classmethod
+    def _cache_key(cls, tenant_id: str, content_hash: str, extractor: BaseExtractor) -> str:
+        return f'{cls._cache_key_prefix(tenant_id, content_hash)}{type(extractor).__name__}_v{extractor.version}.json.gz'
+
+    @staticmethod
+    def _size_cache_key(tenant_id: str) -> str:
+        return f'extraction_cache_size_{tenant_id}'
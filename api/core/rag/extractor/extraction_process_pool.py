@@ -0,0 +1,113 @@
+import logging
+import multiprocessing
+import threading
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Optional
+
+from flask import current_app, has_app_context
+
+logger = logging.getLogger(__name__)
+
+
+def _limit_job_memory(memory_limit: int) -> None:
+    """
+    Cap the address space of a pool process, it runs one job at a time so the cap applies per job
+    """
+    if memory_limit <= 0:
+        return
+
+    try:
+        import resource
+    except ImportError:
+        # not available on windows
+        return
+
+    limit = memory_limit * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+class ExtractionProcessPool:
+    """
+    Process pool running the parsing jobs of large files on all cores.
+
+    Extractors shard a file into jobs, e.g. page ranges of a PDF or sheets of a spreadsheet, and read
+    the results back in job order as they finish, so the first documents are available before the last
+    jobs are done. The pool is created on first use with the `spawn` start method, so pool processes
+    do not inherit the state of the worker, and every job is capped to `EXTRACTION_JOB_MEMORY_LIMIT`.
+    A job exceeding it fails with a `MemoryError` without affecting the worker.
+    """
+    _executor: Optional[ProcessPoolExecutor] = None
+    _executor_size = 0
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_pool_size(cls) -> int:
+        """
+        Get the number of pool processes, 0 when extraction runs in the calling thread
+        :return:
+        """
+        if not has_app_context():
+            return 0
+
+        if multiprocessing.current_process().daemon:
+            # daemonic processes like prefork celery workers can not start pool processes
+            return 0
+
+        return int(current_app.config.get('EXTRACTION_PROCESS_POOL_SIZE', 0))
+
+    @classmethod
+    def map_ordered(cls, function: Callable[..., Any], jobs: list[tuple]) -> Iterator[Any]:
+        """
+        Run the jobs in the pool, yield their results in job order
+        :param function: module level function run by pool processes
+        :param jobs: arguments of each job
+        :return:
+        """
+        executor = cls._get_executor()
+        futures: list[Future] = [executor.submit(function, *job) for job in jobs]
+        try:
+            for future in futures:
+                yield future.result()
+        except BrokenProcessPool:
+            # a pool process died, start a new pool for the next extraction
+            with cls._lock:
+                if cls._executor is executor:
+                    cls._executor = None
+            raise
+        finally:
+            # jobs not started yet are dropped when the caller stops early or a job fails
+            for future in futures:
+                future.cancel()
+
+    @classmethod
+    def shutdown(cls) -> None:
+        """
+        Stop the pool processes
+        :return:
+        """
+        with cls._lock:
+            executor, cls._executor = cls._executor, None
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    @classmethod
+    def _get_executor(cls) -> ProcessPoolExecutor:
+        pool_size = cls.get_pool_size()
+        with cls._lock:
+            if cls._executor is None or cls._executor_size != pool_size:
+                if cls._executor is not None:
+                    cls._executor.shutdown(wait=False)
+
+                memory_limit = int(current_app.config.get('EXTRACTION_JOB_MEMORY_LIMIT', 0))
+                cls._executor = ProcessPoolExecutor(
+                    max_workers=max(pool_size, 1),
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_limit_job_memory,
+                    initargs=(memory_limit,)
+                )
+                cls._executor_size = pool_size
+                logger.info(f'Started extraction process pool of {pool_size} processes')
+
+            return cls._executor
@@ -6,6 +6,9 @@ class BaseExtractor(ABC):
     """Interface for extract files.
     """
 
+    # version of the extracted documents, bump it when they change to invalidate the extraction cache
+    version: int = 1
+
     @abstractmethod
     def extract(self):
         raise NotImplementedError
@@ -1,11 +1,12 @@
 """Abstract interface for document loader implementations."""
 from collections.abc import Iterator
-from typing import Optional
+
+from flask import current_app
 
 from core.rag.extractor.blod.blod import Blob
+from core.rag.extractor.extraction_process_pool import ExtractionProcessPool
 from core.rag.extractor.extractor_base import BaseExtractor
 from core.rag.models.document import Document
-from extensions.ext_storage import storage
 
 
 class PdfExtractor(BaseExtractor):
@@ -18,42 +19,46 @@ class PdfExtractor(BaseExtractor):
 
     def __init__(
             self,
-            file_path: str,
-            file_cache_key: Optional[str] = None
+            file_path: str
     ):
         """Initialize with file path."""
         self._file_path = file_path
-        self._file_cache_key = file_cache_key
 
     def extract(self) -> list[Document]:
-        plaintext_file_key = ''
-        plaintext_file_exists = False
-        if self._file_cache_key:
-            try:
-                text = storage.load(self._file_cache_key).decode('utf-8')
-                plaintext_file_exists = True
-                return [Document(page_content=text)]
-            except FileNotFoundError:
-                pass
-        documents = list(self.load())
-        text_list = []
-        for document in documents:
-            text_list.append(document.page_content)
-        text = "\n\n".join(text_list)
-
-        # save plaintext file for caching
-        if not plaintext_file_exists and plaintext_file_key:
-            storage.save(plaintext_file_key, text.encode('utf-8'))
-
-        return documents
+        return list(self.load())
 
     def load(
             self,
     ) -> Iterator[Document]:
         """Lazy load given path as pages."""
+        if ExtractionProcessPool.get_pool_size():
+            pages_per_job = int(current_app.config.get('EXTRACTION_PDF_PAGES_PER_JOB', 50))
+            page_count = self._get_page_count()
+            if page_count > pages_per_job:
+                yield from self._load_in_process_pool(page_count, pages_per_job)
+                return
+
         blob = Blob.from_path(self._file_path)
         yield from self.parse(blob)
 
+    def _get_page_count(self) -> int:
+        import pypdfium2
+
+        pdf_reader = pypdfium2.PdfDocument(self._file_path, autoclose=True)
+        try:
+            return len(pdf_reader)
+        finally:
+            pdf_reader.close()
+
+    def _load_in_process_pool(self, page_count: int, pages_per_job: int) -> Iterator[Document]:
+        """Load pages in the extraction process pool, sharded by page range."""
+        jobs = [(self._file_path, start, min(start + pages_per_job, page_count))
+                for start in range(0, page_count, pages_per_job)]
+        for (_, start, _), contents in zip(jobs, ExtractionProcessPool.map_ordered(_extract_page_range, jobs)):
+            for page_number, content in enumerate(contents, start=start):
+                metadata = {"source": self._file_path, "page": page_number}
+                yield Document(page_content=content, metadata=metadata)
+
     def parse(self, blob: Blob) -> Iterator[Document]:
         """Lazily parse the blob."""
         import pypdfium2
@@ -70,3 +75,22 @@ class PdfExtractor(BaseExtractor):
                     yield Document(page_content=content, metadata=metadata)
             finally:
                 pdf_reader.close()
+
+
+def _extract_page_range(file_path: str, start: int, end: int) -> list[str]:
+    """Extract the text of pages [start, end) of a pdf file, run by the extraction process pool."""
+    import pypdfium2
+
+    contents = []
+    pdf_reader = pypdfium2.PdfDocument(file_path, autoclose=True)
+    try:
+        for page_number in range(start, end):
+            page = pdf_reader[page_number]
+            text_page = page.get_textpage()
+            contents.append(text_page.get_text_range())
+            text_page.close()
+            page.close()
+    finally:
+        pdf_reader.close()
+
+    return contents
@@ -19,16 +19,13 @@ class RerankRunner:
         :param user: unique user id if needed
         :return:
         """
-        docs = []
-        doc_id = []
-        unique_documents = []
+        # drop duplicated documents, keep the first one of each segment
+        unique_documents = {}
         for document in documents:
-            if document.metadata['doc_id'] not in doc_id:
-                doc_id.append(document.metadata['doc_id'])
-                docs.append(document.page_content)
-                unique_documents.append(document)
+            unique_documents.setdefault(document.metadata['doc_id'], document)
 
-        documents = unique_documents
+        documents = list(unique_documents.values())
+        docs = [document.page_content for document in documents]
 
         rerank_result = self.rerank_model_instance.invoke_rerank(
             query=query,
@@ -42,13 +39,14 @@ class RerankRunner:
 
         for result in rerank_result.docs:
             # format document
+            metadata = documents[result.index].metadata
             rerank_document = Document(
                 page_content=result.text,
                 metadata={
-                    "doc_id": documents[result.index].metadata['doc_id'],
-                    "doc_hash": documents[result.index].metadata['doc_hash'],
-                    "document_id": documents[result.index].metadata['document_id'],
-                    "dataset_id": documents[result.index].metadata['dataset_id'],
+                    "doc_id": metadata['doc_id'],
+                    "doc_hash": metadata['doc_hash'],
+                    "document_id": metadata['document_id'],
+                    "dataset_id": metadata['dataset_id'],
                     'score': result.score
                 }
             )
@@ -12,9 +12,14 @@ from core.model_manager import ModelInstance, ModelManager
 from core.model_runtime.entities.message_entities import PromptMessageTool
 from core.model_runtime.entities.model_entities import ModelFeature, ModelType
 from core.model_runtime.model_providers.__base.large_language_model import LargeLanguageModel
+from core.rag.datasource.dataset_counter import DatasetCounter
+from core.rag.datasource.entity.embedding import QueryEmbedding
 from core.rag.datasource.retrieval_service import RetrievalService
 from core.rag.models.document import Document
 from core.rag.rerank.rerank import RerankRunner
+from core.rag.retrieval.retrieval_planner import RetrievalPlanner
+from core.rag.retrieval.retrieval_recorder import RetrievalRecorder
+from core.rag.retrieval.retriever_resource_builder import RetrieverResourceBuilder
 from core.rag.retrieval.retrival_methods import RetrievalMethod
 from core.rag.retrieval.router.multi_dataset_function_call_router import FunctionCallMultiDatasetRouter
 from core.rag.retrieval.router.multi_dataset_react_route import ReactMultiDatasetRouter
@@ -22,8 +27,7 @@ from core.tools.tool.dataset_retriever.dataset_multi_retriever_tool import Datas
 from core.tools.tool.dataset_retriever.dataset_retriever_base_tool import DatasetRetrieverBaseTool
 from core.tools.tool.dataset_retriever.dataset_retriever_tool import DatasetRetrieverTool
 from extensions.ext_database import db
-from models.dataset import Dataset, DatasetQuery, DocumentSegment
-from models.dataset import Document as DatasetDocument
+from models.dataset import Dataset, DocumentSegment
 
 default_retrieval_model = {
     'search_method': RetrievalMethod.SEMANTIC_SEARCH,
@@ -105,8 +109,7 @@ class DatasetRetrieval:
                 continue
 
             # pass if dataset is not available
-            if (dataset and dataset.available_document_count == 0
-                    and dataset.available_document_count == 0):
+            if not DatasetCounter.is_available(dataset.id):
                 continue
 
             available_datasets.append(dataset)
@@ -149,40 +152,10 @@ class DatasetRetrieval:
                 else:
                     document_context_list.append(segment.get_sign_content())
             if show_retrieve_source:
-                context_list = []
-                resource_number = 1
-                for segment in sorted_segments:
-                    dataset = Dataset.query.filter_by(
-                        id=segment.dataset_id
-                    ).first()
-                    document = DatasetDocument.query.filter(DatasetDocument.id == segment.document_id,
-                                                            DatasetDocument.enabled == True,
-                                                            DatasetDocument.archived == False,
-                                                            ).first()
-                    if dataset and document:
-                        source = {
-                            'position': resource_number,
-                            'dataset_id': dataset.id,
-                            'dataset_name': dataset.name,
-                            'document_id': document.id,
-                            'document_name': document.name,
-                            'data_source_type': document.data_source_type,
-                            'segment_id': segment.id,
-                            'retriever_from': invoke_from.to_source(),
-                            'score': document_score_list.get(segment.index_node_id, None)
-                        }
-
-                        if invoke_from.to_source() == 'dev':
-                            source['hit_count'] = segment.hit_count
-                            source['word_count'] = segment.word_count
-                            source['segment_position'] = segment.position
-                            source['index_node_hash'] = segment.index_node_hash
-                        if segment.answer:
-                            source['content'] = f'question:{segment.content} \nanswer:{segment.answer}'
-                        else:
-                            source['content'] = segment.content
-                        context_list.append(source)
-                    resource_number += 1
+                context_list = RetrieverResourceBuilder(sorted_segments).build(
+                    retriever_from=invoke_from.to_source(),
+                    document_score_list=document_score_list
+                )
                 if hit_callback:
                     hit_callback.return_retriever_resource_info(context_list)
 
@@ -275,6 +248,8 @@ class DatasetRetrieval:
         threads = []
         all_documents = []
         dataset_ids = [dataset.id for dataset in available_datasets]
+        # embed the query once per embedding model instead of once per dataset
+        query_embeddings = RetrievalPlanner.embed_query(query, available_datasets)
         for dataset in available_datasets:
             retrieval_thread = threading.Thread(target=self._retriever, kwargs={
                 'flask_app': current_app._get_current_object(),
@@ -282,6 +257,7 @@ class DatasetRetrieval:
                 'query': query,
                 'top_k': top_k,
                 'all_documents': all_documents,
+                'query_embedding': query_embeddings.get(dataset.id),
             })
             threads.append(retrieval_thread)
             retrieval_thread.start()
@@ -307,45 +283,23 @@ class DatasetRetrieval:
 
     def _on_retrival_end(self, documents: list[Document]) -> None:
         """Handle retrival end."""
-        for document in documents:
-            query = db.session.query(DocumentSegment).filter(
-                DocumentSegment.index_node_id == document.metadata['doc_id']
-            )
-
-            # if 'dataset_id' in document.metadata:
-            if 'dataset_id' in document.metadata:
-                query = query.filter(DocumentSegment.dataset_id == document.metadata['dataset_id'])
-
-            # add hit count to document segment
-            query.update(
-                {DocumentSegment.hit_count: DocumentSegment.hit_count + 1},
-                synchronize_session=False
-            )
-
-            db.session.commit()
+        RetrievalRecorder.record_hits(documents)
 
     def _on_query(self, query: str, dataset_ids: list[str], app_id: str, user_from: str, user_id: str) -> None:
         """
         Handle query.
         """
-        if not query:
-            return
-        dataset_queries = []
-        for dataset_id in dataset_ids:
-            dataset_query = DatasetQuery(
-                dataset_id=dataset_id,
-                content=query,
-                source='app',
-                source_app_id=app_id,
-                created_by_role=user_from,
-                created_by=user_id
-            )
-            dataset_queries.append(dataset_query)
-        if dataset_queries:
-            db.session.add_all(dataset_queries)
-        db.session.commit()
+        RetrievalRecorder.record_queries(
+            query=query,
+            dataset_ids=dataset_ids,
+            source='app',
+            source_app_id=app_id,
+            created_by_role=user_from,
+            created_by=user_id
+        )
 
-    def _retriever(self, flask_app: Flask, dataset_id: str, query: str, top_k: int, all_documents: list):
+    def _retriever(self, flask_app: Flask, dataset_id: str, query: str, top_k: int, all_documents: list,
+                   query_embedding: Optional[QueryEmbedding] = None):
         with flask_app.app_context():
             dataset = db.session.query(Dataset).filter(
                 Dataset.id == dataset_id
@@ -376,7 +330,8 @@ class DatasetRetrieval:
                                                           score_threshold=retrieval_model['score_threshold']
                                                           if retrieval_model['score_threshold_enabled'] else None,
                                                           reranking_model=retrieval_model['reranking_model']
-                                                          if retrieval_model['reranking_enable'] else None
+                                                          if retrieval_model['reranking_enable'] else None,
+                                                          query_embedding=query_embedding
                                                           )
 
                     all_documents.extend(documents)
@@ -411,8 +366,7 @@ class DatasetRetrieval:
                 continue
 
             # pass if dataset is not available
-            if (dataset and dataset.available_document_count == 0
-                    and dataset.available_document_count == 0):
+            if not DatasetCounter.is_available(dataset.id):
                 continue
 
             available_datasets.append(dataset)
@@ -0,0 +1,85 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from flask import Flask, current_app
+
+from core.embedding.cached_embedding import CacheEmbedding
+from core.model_manager import ModelManager
+from core.model_runtime.entities.model_entities import ModelType
+from core.rag.datasource.entity.embedding import QueryEmbedding
+from core.rag.datasource.retrieval_service import default_retrieval_model
+from core.rag.retrieval.retrival_methods import RetrievalMethod
+from models.dataset import Dataset
+
+logger = logging.getLogger(__name__)
+
+
+class RetrievalPlanner:
+    """
+    Plan the searches of a retrieval over multiple datasets.
+
+    Datasets searched by vector are grouped by their embedding model, and the query is embedded
+    once per group before the datasets are searched, instead of once per dataset by each
+    retriever thread. The embedding model instance is shared by the datasets of a group as well.
+    """
+
+    @classmethod
+    def embed_query(cls, query: str, datasets: list[Dataset]) -> dict[str, QueryEmbedding]:
+        """
+        Embed the query for the datasets searched by vector
+        :param query: query
+        :param datasets: datasets
+        :return: dataset id -> query embedding, datasets whose query embedding failed are not included
+        """
+        dataset_groups: dict[tuple[str, str, str], list[Dataset]] = {}
+        for dataset in datasets:
+            if dataset.indexing_technique != 'high_quality':
+                continue
+
+            retrieval_model = dataset.retrieval_model if dataset.retrieval_model else default_retrieval_model
+            if not RetrievalMethod.is_support_semantic_search(retrieval_model['search_method']):
+                continue
+
+            group_key = (dataset.tenant_id, dataset.embedding_model_provider, dataset.embedding_model)
+            dataset_groups.setdefault(group_key, []).append(dataset)
+
+        if not dataset_groups:
+            return {}
+
+        flask_app = current_app._get_current_object()
+        if len(dataset_groups) == 1:
+            group_embeddings = [cls._embed_group(flask_app, query, group_key) for group_key in dataset_groups]
+        else:
+            with ThreadPoolExecutor(max_workers=len(dataset_groups)) as executor:
+                group_embeddings = list(executor.map(
+                    lambda group_key: cls._embed_group(flask_app, query, group_key), dataset_groups
+                ))
+
+        query_embeddings = {}
+        for group_datasets, query_embedding in zip(dataset_groups.values(), group_embeddings):
+            if query_embedding is None:
+                continue
+
+            for dataset in group_datasets:
+                query_embeddings[dataset.id] = query_embedding
+
+        return query_embeddings
+
+    @staticmethod
+    def _embed_group(flask_app: Flask, query: str, group_key: tuple[str, str, str]) -> Optional[QueryEmbedding]:
+        with flask_app.app_context():
+            tenant_id, provider, model = group_key
+            try:
+                embedding_model = ModelManager().get_model_instance(
+                    tenant_id=tenant_id,
+                    provider=provider,
+                    model_type=ModelType.TEXT_EMBEDDING,
+                    model=model
+                )
+                embeddings = CacheEmbedding(embedding_model)
+                return QueryEmbedding(embeddings=embeddings, vector=embeddings.embed_query(query))
+            except Exception:
+                # the datasets of the group embed the query themselves and report the error
+                logger.warning(f'Failed to embed query with {provider} {model}', exc_info=True)
+                return None
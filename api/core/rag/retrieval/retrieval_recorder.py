@@ -0,0 +1,194 @@
+import datetime
+import json
+import logging
+import uuid
+from collections import Counter, defaultdict
+from typing import Optional
+
+from flask import current_app, has_app_context
+
+from core.rag.models.document import Document
+from extensions.ext_database import db
+from extensions.ext_redis import redis_client
+from models.dataset import DatasetQuery, DocumentSegment
+
+logger = logging.getLogger(__name__)
+
+# max number of buffered query logs or segments written in a single statement
+FLUSH_BATCH_SIZE = 1000
+
+
+class RetrievalRecorder:
+    """
+    Buffer of the segment hits and dataset queries of retrievals.
+
+    Retrievals only add hit increments and query logs to redis, instead of updating the hit count
+    of every retrieved segment and inserting the queries inside the request. They are written to
+    the database in batches by `flush_dataset_analytics_task`, run by celery beat and scheduled by
+    the first retrieval recorded after a flush, every DATASET_ANALYTICS_FLUSH_INTERVAL seconds.
+    Hits of the same segment are summed up, so a hot segment is updated once per flush.
+    """
+    SEGMENT_HITS_KEY = 'retrieval_recorder:segment_hits'
+    QUERIES_KEY = 'retrieval_recorder:queries'
+    FLUSH_SCHEDULED_KEY = 'retrieval_recorder:flush_scheduled'
+
+    @classmethod
+    def record_hits(cls, documents: list[Document]) -> None:
+        """
+        Add a hit to the segments of retrieved documents
+        :param documents: retrieved documents
+        :return:
+        """
+        hits = Counter(
+            f"{document.metadata.get('dataset_id') or ''}:{document.metadata['doc_id']}"
+            for document in documents
+            if document.metadata and document.metadata.get('doc_id')
+        )
+        if not hits:
+            return
+
+        try:
+            pipeline = redis_client.pipeline(transaction=False)
+            for field, count in hits.items():
+                pipeline.hincrby(cls.SEGMENT_HITS_KEY, field, count)
+            pipeline.execute()
+        except Exception:
+            logger.warning('Failed to record segment hits', exc_info=True)
+            return
+
+        cls._schedule_flush()
+
+    @classmethod
+    def record_queries(cls, query: str, dataset_ids: list[str], source: str,
+                       created_by_role: str, created_by: str,
+                       source_app_id: Optional[str] = None) -> None:
+        """
+        Add the log of a query to datasets
+        :param query: query
+        :param dataset_ids: dataset ids
+        :param source: source of the query, like `app`
+        :param created_by_role: role of the user, `account` or `end_user`
+        :param created_by: user id
+        :param source_app_id: app id
+        :return:
+        """
+        if not query or not dataset_ids:
+            return
+
+        created_at = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None).isoformat()
+        dataset_queries = [
+            json.dumps({
+                'dataset_id': dataset_id,
+                'content': query,
+                'source': source,
+                'source_app_id': source_app_id,
+                'created_by_role': created_by_role,
+                'created_by': created_by,
+                'created_at': created_at,
+            })
+            for dataset_id in dataset_ids
+        ]
+        try:
+            redis_client.rpush(cls.QUERIES_KEY, *dataset_queries)
+        except Exception:
+            logger.warning('Failed to record dataset queries', exc_info=True)
+            return
+
+        cls._schedule_flush()
+
+    @classmethod
+    def flush(cls) -> tuple[int, int]:
+        """
+        Write the buffered segment hits and dataset queries to the database
+        :return: number of updated segments, number of inserted queries
+        """
+        return cls._flush_segment_hits(), cls._flush_queries()
+
+    @classmethod
+    def _flush_segment_hits(cls) -> int:
+        # take the buffered hits, hits recorded meanwhile go to a new buffer
+        flushing_key = f'{cls.SEGMENT_HITS_KEY}:{uuid.uuid4()}'
+        if not redis_client.exists(cls.SEGMENT_HITS_KEY):
+            return 0
+        try:
+            redis_client.rename(cls.SEGMENT_HITS_KEY, flushing_key)
+        except Exception:
+            # flushed by another worker
+            return 0
+
+        hits = redis_client.hgetall(flushing_key)
+        # segments hit the same number of times are updated by the same statement
+        node_ids_by_hits = defaultdict(list)
+        for field, count in hits.items():
+            field = field.decode('utf-8') if isinstance(field, bytes) else field
+            dataset_id, node_id = field.split(':', 1)
+            node_ids_by_hits[(dataset_id, int(count))].append(node_id)
+
+        try:
+            # a stable order of the updates, so concurrent flushes do not deadlock on segment rows
+            for (dataset_id, count), node_ids in sorted(node_ids_by_hits.items()):
+                node_ids.sort()
+                for i in range(0, len(node_ids), FLUSH_BATCH_SIZE):
+                    query = db.session.query(DocumentSegment).filter(
+                        DocumentSegment.index_node_id.in_(node_ids[i:i + FLUSH_BATCH_SIZE])
+                    )
+                    if dataset_id:
+                        query = query.filter(DocumentSegment.dataset_id == dataset_id)
+                    query.update(
+                        {DocumentSegment.hit_count: DocumentSegment.hit_count + count},
+                        synchronize_session=False
+                    )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            # put the hits back to flush them next time
+            pipeline = redis_client.pipeline(transaction=False)
+            for field, count in hits.items():
+                pipeline.hincrby(cls.SEGMENT_HITS_KEY, field, int(count))
+            pipeline.execute()
+            raise
+        finally:
+            redis_client.delete(flushing_key)
+
+        return len(hits)
+
+    @classmethod
+    def _flush_queries(cls) -> int:
+        total = 0
+        while True:
+            pipeline = redis_client.pipeline(transaction=True)
+            pipeline.lrange(cls.QUERIES_KEY, 0, FLUSH_BATCH_SIZE - 1)
+            pipeline.ltrim(cls.QUERIES_KEY, FLUSH_BATCH_SIZE, -1)
+            dataset_queries, _ = pipeline.execute()
+            if not dataset_queries:
+                return total
+
+            try:
+                for dataset_query in dataset_queries:
+                    dataset_query = json.loads(dataset_query)
+                    dataset_query['created_at'] = datetime.datetime.fromisoformat(dataset_query['created_at'])
+                    db.session.add(DatasetQuery(**dataset_query))
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                redis_client.lpush(cls.QUERIES_KEY, *reversed(dataset_queries))
+                raise
+
+            total += len(dataset_queries)
+
+    @classmethod
+    def _schedule_flush(cls) -> None:
+        # the first record after a flush schedules the next one, celery beat is not always deployed
+        interval = cls._get_flush_interval()
+        try:
+            if redis_client.set(cls.FLUSH_SCHEDULED_KEY, 1, nx=True, ex=interval):
+                from tasks.flush_dataset_analytics_task import flush_dataset_analytics_task
+                flush_dataset_analytics_task.apply_async(countdown=interval)
+        except Exception:
+            logger.warning('Failed to schedule the flush of dataset analytics', exc_info=True)
+
+    @staticmethod
+    def _get_flush_interval() -> int:
+        if not has_app_context():
+            return 60
+        return int(current_app.config.get('DATASET_ANALYTICS_FLUSH_INTERVAL', 60))
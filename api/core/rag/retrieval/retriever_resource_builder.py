@@ -0,0 +1,122 @@
+from typing import Optional
+
+from flask import g, has_app_context
+from sqlalchemy import Row
+
+from extensions.ext_database import db
+from models.dataset import Dataset, DocumentSegment
+from models.dataset import Document as DatasetDocument
+
+
+class RetrieverResourceBuilder:
+    """
+    Build the retriever resources, i.e. the sources cited by answers, of retrieved segments.
+
+    The datasets and documents of all segments are loaded with one query each instead of two queries
+    per segment, and cached in the app context, so the resources of all retrievals of a request,
+    like the ones of several dataset tools of an agent, load a dataset or document once.
+
+    Only the columns used by the resources are loaded and cached, not ORM instances, as the
+    app context outlives the commits and session closes of an agent run or a workflow.
+    """
+
+    DATASET_COLUMNS = (Dataset.id, Dataset.name)
+    DOCUMENT_COLUMNS = (DatasetDocument.id, DatasetDocument.name, DatasetDocument.data_source_type,
+                        DatasetDocument.enabled, DatasetDocument.archived)
+
+    def __init__(self, segments: list[DocumentSegment]) -> None:
+        self._segments = segments
+        self._datasets = self._load(Dataset, self.DATASET_COLUMNS, [segment.dataset_id for segment in segments])
+        self._documents = self._load(DatasetDocument, self.DOCUMENT_COLUMNS,
+                                     [segment.document_id for segment in segments])
+
+    def get_dataset(self, segment: DocumentSegment) -> Optional[Row]:
+        """
+        Get the dataset of a segment
+        :param segment: segment
+        :return: id and name of the dataset
+        """
+        return self._datasets.get(segment.dataset_id)
+
+    def get_document(self, segment: DocumentSegment) -> Optional[Row]:
+        """
+        Get the document of a segment, None if the document is disabled or archived
+        :param segment: segment
+        :return: id, name, data_source_type, enabled and archived of the document
+        """
+        document = self._documents.get(segment.document_id)
+        if not document or not document.enabled or document.archived:
+            return None
+        return document
+
+    def build(self, retriever_from: str, document_score_list: dict[str, float]) -> list[dict]:
+        """
+        Build the retriever resources of the segments, in the order of the segments
+        :param retriever_from: source of the retrieval, detailed resources for `dev`
+        :param document_score_list: index node id -> score
+        :return:
+        """
+        context_list = []
+        for resource_number, segment in enumerate(self._segments, start=1):
+            dataset = self.get_dataset(segment)
+            document = self.get_document(segment)
+            if not dataset or not document:
+                continue
+
+            source = {
+                'position': resource_number,
+                'dataset_id': dataset.id,
+                'dataset_name': dataset.name,
+                'document_id': document.id,
+                'document_name': document.name,
+                'data_source_type': document.data_source_type,
+                'segment_id': segment.id,
+                'retriever_from': retriever_from,
+                'score': document_score_list.get(segment.index_node_id, None)
+            }
+
+            if retriever_from == 'dev':
+                source['hit_count'] = segment.hit_count
+                source['word_count'] = segment.word_count
+                source['segment_position'] = segment.position
+                source['index_node_hash'] = segment.index_node_hash
+            if segment.answer:
+                source['content'] = f'question:{segment.content} \nanswer:{segment.answer}'
+            else:
+                source['content'] = segment.content
+            context_list.append(source)
+
+        return context_list
+
+    @classmethod
+    def _load(cls, model: type[db.Model], columns: tuple, ids: list[str]) -> dict[str, Row]:
+        cache = cls._get_cache()
+        rows = {}
+        missing_ids = []
+        for row_id in dict.fromkeys(ids):
+            cache_key = (model.__tablename__, row_id)
+            if cache is not None and cache_key in cache:
+                if cache[cache_key] is not None:
+                    rows[row_id] = cache[cache_key]
+            else:
+                missing_ids.append(row_id)
+
+        if missing_ids:
+            for row in db.session.query(*columns).filter(model.id.in_(missing_ids)).all():
+                rows[row.id] = row
+
+            if cache is not None:
+                for row_id in missing_ids:
+                    cache[(model.__tablename__, row_id)] = rows.get(row_id)
+
+        return rows
+
+    @staticmethod
+    def _get_cache() -> Optional[dict]:
+        if not has_app_context():
+            return None
+
+        if '_retriever_resource_cache' not in g:
+            g._retriever_resource_cache = {}
+
+        return g._retriever_resource_cache
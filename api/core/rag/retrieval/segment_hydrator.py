@@ -0,0 +1,60 @@
+from typing import Optional
+
+from extensions.ext_database import db
+from models.dataset import DocumentSegment
+
+# max number of index node ids in a single segment query
+SEGMENT_QUERY_BATCH_SIZE = 1000
+
+
+class SegmentHydrator:
+    """
+    Load document segments of retrieved index nodes.
+
+    All hits are fetched with batched `IN` queries instead of one query per hit. Segments are not
+    cached beyond a call: the app context outlives the commits and session closes of an agent run
+    or a workflow, which would expire or detach cached rows, or keep a disabled segment available.
+    """
+
+    @classmethod
+    def get_segments(cls, index_node_ids: list[str],
+                     dataset_id: Optional[str] = None,
+                     available_only: bool = False) -> list[DocumentSegment]:
+        """
+        Get segments of index nodes, in the order of index node ids, missing segments are skipped
+        :param index_node_ids: index node ids
+        :param dataset_id: dataset id, segments of all datasets if None
+        :param available_only: only enabled and completed segments
+        :return:
+        """
+        segments_by_node_id = cls.get_segments_by_node_id(index_node_ids, dataset_id, available_only)
+        return [segments_by_node_id[node_id] for node_id in dict.fromkeys(index_node_ids)
+                if node_id in segments_by_node_id]
+
+    @classmethod
+    def get_segments_by_node_id(cls, index_node_ids: list[str],
+                                dataset_id: Optional[str] = None,
+                                available_only: bool = False) -> dict[str, DocumentSegment]:
+        """
+        Get segments of index nodes
+        :param index_node_ids: index node ids
+        :param dataset_id: dataset id, segments of all datasets if None
+        :param available_only: only enabled and completed segments
+        :return: index node id -> segment
+        """
+        node_ids = list(dict.fromkeys(index_node_ids))
+        segments_by_node_id = {}
+        for i in range(0, len(node_ids), SEGMENT_QUERY_BATCH_SIZE):
+            batch_node_ids = node_ids[i:i + SEGMENT_QUERY_BATCH_SIZE]
+            query = db.session.query(DocumentSegment).filter(DocumentSegment.index_node_id.in_(batch_node_ids))
+            if dataset_id:
+                query = query.filter(DocumentSegment.dataset_id == dataset_id)
+            if available_only:
+                # filtered before picking the first segment, so an unavailable duplicate does not hide it
+                query = query.filter(DocumentSegment.enabled == True, DocumentSegment.status == 'completed')
+
+            for segment in query.all():
+                # keep the first segment of an index node, like `first()` did
+                segments_by_node_id.setdefault(segment.index_node_id, segment)
+
+        return segments_by_node_id
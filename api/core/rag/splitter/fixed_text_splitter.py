@@ -3,6 +3,8 @@ from __future__ import annotations
 
 from typing import Any, Optional
 
+from cachetools import LRUCache
+
 from core.model_manager import ModelInstance
 from core.model_runtime.model_providers.__base.tokenizers.gpt2_tokenzier import GPT2Tokenizer
 from core.rag.splitter.text_splitter import (
@@ -15,6 +17,53 @@ from core.rag.splitter.text_splitter import (
     Union,
 )
 
+# max number of pieces of which token counts are memoized by a splitter
+TOKEN_LENGTH_CACHE_SIZE = 10000
+
+
+class TokenLengthFunction:
+    """
+    Count tokens of the pieces of a text for splitters.
+
+    Counts are memoized per piece, so the splitters do not tokenize a piece again when they merge
+    splits or pop overlapping pieces, and the pieces not counted yet are tokenized in one batch.
+    """
+
+    def __init__(self, embedding_model_instance: Optional[ModelInstance]) -> None:
+        self._embedding_model_instance = embedding_model_instance
+        self._cache = LRUCache(maxsize=TOKEN_LENGTH_CACHE_SIZE)
+
+    def __call__(self, text: str) -> int:
+        return self.batch([text])[0]
+
+    def batch(self, texts: list[str]) -> list[int]:
+        """
+        Count tokens of texts
+        :param texts: texts
+        :return: number of tokens of each text
+        """
+        lengths = {}
+        missing_texts = []
+        for text in dict.fromkeys(texts):
+            if not text:
+                lengths[text] = 0
+            elif text in self._cache:
+                lengths[text] = self._cache[text]
+            else:
+                missing_texts.append(text)
+
+        if missing_texts:
+            if self._embedding_model_instance:
+                counts = self._embedding_model_instance.get_text_embedding_num_tokens_list(texts=missing_texts)
+            else:
+                counts = GPT2Tokenizer.get_num_tokens_list(missing_texts)
+
+            for text, count in zip(missing_texts, counts):
+                lengths[text] = count
+                self._cache[text] = count
+
+        return [lengths[text] for text in texts]
+
 
 class EnhanceRecursiveCharacterTextSplitter(RecursiveCharacterTextSplitter):
     """
@@ -29,16 +78,7 @@ class EnhanceRecursiveCharacterTextSplitter(RecursiveCharacterTextSplitter):
             disallowed_special: Union[Literal[all], Collection[str]] = "all",
             **kwargs: Any,
     ):
-        def _token_encoder(text: str) -> int:
-            if not text:
-                return 0
-
-            if embedding_model_instance:
-                return embedding_model_instance.get_text_embedding_num_tokens(
-                    texts=[text]
-                )
-            else:
-                return GPT2Tokenizer.get_num_tokens(text)
+        _token_encoder = TokenLengthFunction(embedding_model_instance)
 
         if issubclass(cls, TokenTextSplitter):
             extra_kwargs = {
@@ -50,6 +90,11 @@ class EnhanceRecursiveCharacterTextSplitter(RecursiveCharacterTextSplitter):
 
         return cls(length_function=_token_encoder, **kwargs)
 
+    def _get_lengths(self, texts: list[str]) -> list[int]:
+        if isinstance(self._length_function, TokenLengthFunction):
+            return self._length_function.batch(texts)
+        return super()._get_lengths(texts)
+
 
 class FixedRecursiveCharacterTextSplitter(EnhanceRecursiveCharacterTextSplitter):
     def __init__(self, fixed_separator: str = "\n\n", separators: Optional[list[str]] = None, **kwargs: Any):
@@ -66,8 +111,8 @@ class FixedRecursiveCharacterTextSplitter(EnhanceRecursiveCharacterTextSplitter)
             chunks = list(text)
 
         final_chunks = []
-        for chunk in chunks:
-            if self._length_function(chunk) > self._chunk_size:
+        for chunk, chunk_len in zip(chunks, self._get_lengths(chunks)):
+            if chunk_len > self._chunk_size:
                 final_chunks.extend(self.recursive_split_text(chunk))
             else:
                 final_chunks.append(chunk)
@@ -93,17 +138,20 @@ class FixedRecursiveCharacterTextSplitter(EnhanceRecursiveCharacterTextSplitter)
             splits = list(text)
         # Now go merging things, recursively splitting longer texts.
         _good_splits = []
-        for s in splits:
-            if self._length_function(s) < self._chunk_size:
+        _good_lengths = []
+        for s, s_len in zip(splits, self._get_lengths(splits)):
+            if s_len < self._chunk_size:
                 _good_splits.append(s)
+                _good_lengths.append(s_len)
             else:
                 if _good_splits:
-                    merged_text = self._merge_splits(_good_splits, separator)
+                    merged_text = self._merge_splits(_good_splits, separator, _good_lengths)
                     final_chunks.extend(merged_text)
                     _good_splits = []
+                    _good_lengths = []
                 other_info = self.recursive_split_text(s)
                 final_chunks.extend(other_info)
         if _good_splits:
-            merged_text = self._merge_splits(_good_splits, separator)
+            merged_text = self._merge_splits(_good_splits, separator, _good_lengths)
             final_chunks.extend(merged_text)
         return final_chunks
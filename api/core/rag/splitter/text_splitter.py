@@ -109,16 +109,25 @@ class TextSplitter(BaseDocumentTransformer, ABC):
         else:
             return text
 
-    def _merge_splits(self, splits: Iterable[str], separator: str) -> list[str]:
+    def _get_lengths(self, texts: list[str]) -> list[int]:
+        """Measure the lengths of texts, override it to measure them in one batch."""
+        return [self._length_function(text) for text in texts]
+
+    def _merge_splits(self, splits: Iterable[str], separator: str,
+                      lengths: Optional[list[int]] = None) -> list[str]:
         # We now want to combine these smaller pieces into medium size
         # chunks to send to the LLM.
+        splits = list(splits)
+        if lengths is None:
+            lengths = self._get_lengths(splits)
         separator_len = self._length_function(separator)
 
         docs = []
         current_doc: list[str] = []
+        # lengths of the pieces of current_doc, so popping them is counted without measuring again
+        current_lengths: list[int] = []
         total = 0
-        for d in splits:
-            _len = self._length_function(d)
+        for d, _len in zip(splits, lengths):
             if (
                     total + _len + (separator_len if len(current_doc) > 0 else 0)
                     > self._chunk_size
@@ -140,11 +149,13 @@ class TextSplitter(BaseDocumentTransformer, ABC):
                             > self._chunk_size
                             and total > 0
                     ):
-                        total -= self._length_function(current_doc[0]) + (
+                        total -= current_lengths[0] + (
                             separator_len if len(current_doc) > 1 else 0
                         )
                         current_doc = current_doc[1:]
+                        current_lengths = current_lengths[1:]
             current_doc.append(d)
+            current_lengths.append(_len)
             total += _len + (separator_len if len(current_doc) > 1 else 0)
         doc = self._join_docs(current_doc, separator)
         if doc is not None:
@@ -511,22 +522,25 @@ class RecursiveCharacterTextSplitter(TextSplitter):
         splits = _split_text_with_regex(text, separator, self._keep_separator)
         # Now go merging things, recursively splitting longer texts.
         _good_splits = []
+        _good_lengths = []
         _separator = "" if self._keep_separator else separator
-        for s in splits:
-            if self._length_function(s) < self._chunk_size:
+        for s, s_len in zip(splits, self._get_lengths(splits)):
+            if s_len < self._chunk_size:
                 _good_splits.append(s)
+                _good_lengths.append(s_len)
             else:
                 if _good_splits:
-                    merged_text = self._merge_splits(_good_splits, _separator)
+                    merged_text = self._merge_splits(_good_splits, _separator, _good_lengths)
                     final_chunks.extend(merged_text)
                     _good_splits = []
+                    _good_lengths = []
                 if not new_separators:
                     final_chunks.append(s)
                 else:
                     other_info = self._split_text(s, new_separators)
                     final_chunks.extend(other_info)
         if _good_splits:
-            merged_text = self._merge_splits(_good_splits, _separator)
+            merged_text = self._merge_splits(_good_splits, _separator, _good_lengths)
             final_chunks.extend(merged_text)
         return final_chunks
 
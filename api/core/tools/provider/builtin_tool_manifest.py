@@ -0,0 +1,171 @@
+import hashlib
+import json
+import logging
+from os import listdir, path
+from threading import Lock
+from typing import Optional
+
+from pydantic import BaseModel
+
+from core.tools.entities.common_entities import I18nObject
+from core.tools.utils.yaml_utils import load_yaml_file
+
+logger = logging.getLogger(__name__)
+
+BUILTIN_PROVIDER_PATH = path.join(path.dirname(path.realpath(__file__)), 'builtin')
+BUILTIN_TOOL_MANIFEST_PATH = path.join(BUILTIN_PROVIDER_PATH, '_manifest.json')
+
+
+class BuiltinToolProviderManifest(BaseModel):
+    """
+    Identity of a builtin provider and of its tools
+    """
+    name: str
+    directory: str
+    icon: str
+    tool_labels: dict[str, I18nObject]
+    yaml_hash: str
+
+
+class BuiltinToolManifest:
+    """
+    Index of the builtin providers, read from the prebuilt `_manifest.json` instead of importing
+    the providers and parsing their yaml files.
+
+    Entries are keyed by a hash of the yaml files of a provider. Providers added or changed after
+    the manifest was built are read from their yaml files, so a stale manifest is slower, not wrong.
+    Rebuild it with `flask build-builtin-tool-manifest`.
+    """
+    _providers: Optional[dict[str, BuiltinToolProviderManifest]] = None
+    _tool_labels: dict[str, I18nObject] = {}
+    _lock = Lock()
+
+    @classmethod
+    def get_providers(cls) -> dict[str, BuiltinToolProviderManifest]:
+        """
+        Get the manifests of the builtin providers, keyed by provider name
+        :return:
+        """
+        if cls._providers is None:
+            with cls._lock:
+                if cls._providers is None:
+                    providers = cls._load()
+                    cls._tool_labels = {
+                        tool_name: label
+                        for provider in providers.values()
+                        for tool_name, label in provider.tool_labels.items()
+                    }
+                    cls._providers = providers
+
+        return cls._providers
+
+    @classmethod
+    def get_provider(cls, provider: str) -> Optional[BuiltinToolProviderManifest]:
+        """
+        Get the manifest of a builtin provider
+        :param provider: provider name
+        :return:
+        """
+        return cls.get_providers().get(provider)
+
+    @classmethod
+    def get_tool_label(cls, tool_name: str) -> Optional[I18nObject]:
+        """
+        Get the label of a builtin tool
+        :param tool_name: tool name
+        :return:
+        """
+        cls.get_providers()
+        return cls._tool_labels.get(tool_name)
+
+    @classmethod
+    def build(cls) -> int:
+        """
+        Build the manifest of all builtin providers from their yaml files and save it
+        :return: number of providers
+        """
+        providers = [cls._build_provider(directory) for directory in cls._list_provider_directories()]
+        providers = [provider for provider in providers if provider]
+        with open(BUILTIN_TOOL_MANIFEST_PATH, 'w', encoding='utf-8') as f:
+            json.dump([provider.model_dump() for provider in providers], f, ensure_ascii=False, indent=2)
+            f.write('\n')
+
+        cls.clear()
+        return len(providers)
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            cls._providers = None
+            cls._tool_labels = {}
+
+    @classmethod
+    def _load(cls) -> dict[str, BuiltinToolProviderManifest]:
+        prebuilt_providers = {}
+        try:
+            with open(BUILTIN_TOOL_MANIFEST_PATH, encoding='utf-8') as f:
+                for provider_dict in json.load(f):
+                    provider = BuiltinToolProviderManifest(**provider_dict)
+                    prebuilt_providers[provider.directory] = provider
+        except FileNotFoundError:
+            logger.info('Builtin tool manifest not found, reading the yaml files of builtin providers')
+        except Exception:
+            logger.warning('Failed to load builtin tool manifest, reading the yaml files of builtin providers',
+                           exc_info=True)
+
+        providers = {}
+        for directory in cls._list_provider_directories():
+            provider = prebuilt_providers.get(directory)
+            if not provider or provider.yaml_hash != cls._get_yaml_hash(directory):
+                provider = cls._build_provider(directory)
+            if provider:
+                providers[provider.name] = provider
+
+        return providers
+
+    @classmethod
+    def _build_provider(cls, directory: str) -> Optional[BuiltinToolProviderManifest]:
+        try:
+            provider_yaml = load_yaml_file(path.join(BUILTIN_PROVIDER_PATH, directory, f'{directory}.yaml'))
+            tool_labels = {}
+            for tool_file in cls._list_tool_files(directory):
+                tool_yaml = load_yaml_file(path.join(BUILTIN_PROVIDER_PATH, directory, 'tools', tool_file))
+                tool_labels[tool_yaml['identity']['name']] = I18nObject(**tool_yaml['identity']['label'])
+
+            return BuiltinToolProviderManifest(
+                name=provider_yaml['identity']['name'],
+                directory=directory,
+                icon=provider_yaml['identity']['icon'],
+                tool_labels=tool_labels,
+                yaml_hash=cls._get_yaml_hash(directory),
+            )
+        except Exception as e:
+            logger.error(f'load builtin provider manifest {directory} error: {e}')
+            return None
+
+    @staticmethod
+    def _list_provider_directories() -> list[str]:
+        return sorted(
+            directory for directory in listdir(BUILTIN_PROVIDER_PATH)
+            if not directory.startswith('__') and path.isdir(path.join(BUILTIN_PROVIDER_PATH, directory))
+        )
+
+    @staticmethod
+    def _list_tool_files(directory: str) -> list[str]:
+        tool_path = path.join(BUILTIN_PROVIDER_PATH, directory, 'tools')
+        if not path.isdir(tool_path):
+            return []
+        return sorted(x for x in listdir(tool_path) if x.endswith('.yaml') and not x.startswith('__'))
+
+    @classmethod
+    def _get_yaml_hash(cls, directory: str) -> str:
+        yaml_hash = hashlib.sha256()
+        yaml_files = [f'{directory}.yaml'] + [path.join('tools', x) for x in cls._list_tool_files(directory)]
+        for yaml_file in yaml_files:
+            yaml_hash.update(yaml_file.encode('utf-8'))
+            try:
+                with open(path.join(BUILTIN_PROVIDER_PATH, directory, yaml_file), 'rb') as f:
+                    yaml_hash.update(f.read())
+            except FileNotFoundError:
+                pass
+        return yaml_hash.hexdigest()
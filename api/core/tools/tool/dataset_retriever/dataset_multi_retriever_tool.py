@@ -1,4 +1,5 @@
 import threading
+from typing import Optional
 
 from flask import Flask, current_app
 from pydantic import BaseModel, Field
@@ -6,12 +7,15 @@ from pydantic import BaseModel, Field
 from core.callback_handler.index_tool_callback_handler import DatasetIndexToolCallbackHandler
 from core.model_manager import ModelManager
 from core.model_runtime.entities.model_entities import ModelType
+from core.rag.datasource.entity.embedding import QueryEmbedding
 from core.rag.datasource.retrieval_service import RetrievalService
 from core.rag.rerank.rerank import RerankRunner
+from core.rag.retrieval.retrieval_planner import RetrievalPlanner
+from core.rag.retrieval.retriever_resource_builder import RetrieverResourceBuilder
 from core.rag.retrieval.retrival_methods import RetrievalMethod
 from core.tools.tool.dataset_retriever.dataset_retriever_base_tool import DatasetRetrieverBaseTool
 from extensions.ext_database import db
-from models.dataset import Dataset, Document, DocumentSegment
+from models.dataset import Dataset, DocumentSegment
 
 default_retrieval_model = {
     'search_method': RetrievalMethod.SEMANTIC_SEARCH,
@@ -51,13 +55,20 @@ class DatasetMultiRetrieverTool(DatasetRetrieverBaseTool):
     def _run(self, query: str) -> str:
         threads = []
         all_documents = []
+        # embed the query once per embedding model instead of once per dataset
+        datasets = db.session.query(Dataset).filter(
+            Dataset.tenant_id == self.tenant_id,
+            Dataset.id.in_(self.dataset_ids)
+        ).all()
+        query_embeddings = RetrievalPlanner.embed_query(query, datasets)
         for dataset_id in self.dataset_ids:
             retrieval_thread = threading.Thread(target=self._retriever, kwargs={
                 'flask_app': current_app._get_current_object(),
                 'dataset_id': dataset_id,
                 'query': query,
                 'all_documents': all_documents,
-                'hit_callbacks': self.hit_callbacks
+                'hit_callbacks': self.hit_callbacks,
+                'query_embedding': query_embeddings.get(dataset_id),
             })
             threads.append(retrieval_thread)
             retrieval_thread.start()
@@ -104,40 +115,10 @@ class DatasetMultiRetrieverTool(DatasetRetrieverBaseTool):
                 else:
                     document_context_list.append(segment.get_sign_content())
             if self.return_resource:
-                context_list = []
-                resource_number = 1
-                for segment in sorted_segments:
-                    dataset = Dataset.query.filter_by(
-                        id=segment.dataset_id
-                    ).first()
-                    document = Document.query.filter(Document.id == segment.document_id,
-                                                     Document.enabled == True,
-                                                     Document.archived == False,
-                                                     ).first()
-                    if dataset and document:
-                        source = {
-                            'position': resource_number,
-                            'dataset_id': dataset.id,
-                            'dataset_name': dataset.name,
-                            'document_id': document.id,
-                            'document_name': document.name,
-                            'data_source_type': document.data_source_type,
-                            'segment_id': segment.id,
-                            'retriever_from': self.retriever_from,
-                            'score': document_score_list.get(segment.index_node_id, None)
-                        }
-
-                        if self.retriever_from == 'dev':
-                            source['hit_count'] = segment.hit_count
-                            source['word_count'] = segment.word_count
-                            source['segment_position'] = segment.position
-                            source['index_node_hash'] = segment.index_node_hash
-                        if segment.answer:
-                            source['content'] = f'question:{segment.content} \nanswer:{segment.answer}'
-                        else:
-                            source['content'] = segment.content
-                        context_list.append(source)
-                    resource_number += 1
+                context_list = RetrieverResourceBuilder(sorted_segments).build(
+                    retriever_from=self.retriever_from,
+                    document_score_list=document_score_list
+                )
 
                 for hit_callback in self.hit_callbacks:
                     hit_callback.return_retriever_resource_info(context_list)
@@ -145,7 +126,8 @@ class DatasetMultiRetrieverTool(DatasetRetrieverBaseTool):
             return str("\n".join(document_context_list))
 
     def _retriever(self, flask_app: Flask, dataset_id: str, query: str, all_documents: list,
-                   hit_callbacks: list[DatasetIndexToolCallbackHandler]):
+                   hit_callbacks: list[DatasetIndexToolCallbackHandler],
+                   query_embedding: Optional[QueryEmbedding] = None):
         with flask_app.app_context():
             dataset = db.session.query(Dataset).filter(
                 Dataset.tenant_id == self.tenant_id,
@@ -180,7 +162,8 @@ class DatasetMultiRetrieverTool(DatasetRetrieverBaseTool):
                                                           score_threshold=retrieval_model['score_threshold']
                                                           if retrieval_model['score_threshold_enabled'] else None,
                                                           reranking_model=retrieval_model['reranking_model']
-                                                          if retrieval_model['reranking_enable'] else None
+                                                          if retrieval_model['reranking_enable'] else None,
+                                                          query_embedding=query_embedding
                                                           )
 
                     all_documents.extend(documents)
\ No newline at end of file
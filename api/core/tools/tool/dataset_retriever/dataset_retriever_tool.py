@@ -2,10 +2,11 @@
 from pydantic import BaseModel, Field
 
 from core.rag.datasource.retrieval_service import RetrievalService
+from core.rag.retrieval.retriever_resource_builder import RetrieverResourceBuilder
 from core.rag.retrieval.retrival_methods import RetrievalMethod
 from core.tools.tool.dataset_retriever.dataset_retriever_base_tool import DatasetRetrieverBaseTool
 from extensions.ext_database import db
-from models.dataset import Dataset, Document, DocumentSegment
+from models.dataset import Dataset, DocumentSegment
 
 default_retrieval_model = {
     'search_method': RetrievalMethod.SEMANTIC_SEARCH,
@@ -110,38 +111,10 @@ class DatasetRetrieverTool(DatasetRetrieverBaseTool):
                     else:
                         document_context_list.append(segment.get_sign_content())
                 if self.return_resource:
-                    context_list = []
-                    resource_number = 1
-                    for segment in sorted_segments:
-                        context = {}
-                        document = Document.query.filter(Document.id == segment.document_id,
-                                                         Document.enabled == True,
-                                                         Document.archived == False,
-                                                         ).first()
-                        if dataset and document:
-                            source = {
-                                'position': resource_number,
-                                'dataset_id': dataset.id,
-                                'dataset_name': dataset.name,
-                                'document_id': document.id,
-                                'document_name': document.name,
-                                'data_source_type': document.data_source_type,
-                                'segment_id': segment.id,
-                                'retriever_from': self.retriever_from,
-                                'score': document_score_list.get(segment.index_node_id, None)
-
-                            }
-                            if self.retriever_from == 'dev':
-                                source['hit_count'] = segment.hit_count
-                                source['word_count'] = segment.word_count
-                                source['segment_position'] = segment.position
-                                source['index_node_hash'] = segment.index_node_hash
-                            if segment.answer:
-                                source['content'] = f'question:{segment.content} \nanswer:{segment.answer}'
-                            else:
-                                source['content'] = segment.content
-                            context_list.append(source)
-                        resource_number += 1
+                    context_list = RetrieverResourceBuilder(sorted_segments).build(
+                        retriever_from=self.retriever_from,
+                        document_score_list=document_score_list
+                    )
 
                     for hit_callback in self.hit_callbacks:
                         hit_callback.return_retriever_resource_info(context_list)
@@ -2,8 +2,8 @@ import json
 import logging
 import mimetypes
 from collections.abc import Generator
-from os import listdir, path
-from threading import Lock
+from os import path
+from threading import RLock
 from typing import Any, Union
 
 from flask import current_app
@@ -22,6 +22,7 @@ from core.tools.entities.tool_entities import (
 from core.tools.errors import ToolProviderNotFoundError
 from core.tools.provider.api_tool_provider import ApiToolProviderController
 from core.tools.provider.builtin._positions import BuiltinToolProviderSort
+from core.tools.provider.builtin_tool_manifest import BUILTIN_PROVIDER_PATH, BuiltinToolManifest
 from core.tools.provider.builtin_tool_provider import BuiltinToolProviderController
 from core.tools.tool.api_tool import ApiTool
 from core.tools.tool.builtin_tool import BuiltinTool
@@ -40,10 +41,10 @@ from services.tools.tools_transform_service import ToolTransformService
 logger = logging.getLogger(__name__)
 
 class ToolManager:
-    _builtin_provider_lock = Lock()
+    # reentrant, providers are resolved while the listing of all providers holds it
+    _builtin_provider_lock = RLock()
     _builtin_providers = {}
     _builtin_providers_loaded = False
-    _builtin_tools_labels = {}
 
     @classmethod
     def get_builtin_provider(cls, provider: str) -> BuiltinToolProviderController:
@@ -53,9 +54,13 @@ class ToolManager:
             :param provider: the name of the provider
             :return: the provider
         """
-        if len(cls._builtin_providers) == 0:
-            # init the builtin providers
-            cls.load_builtin_providers_cache()
+        if provider not in cls._builtin_providers:
+            # only import the provider which is used
+            provider_manifest = BuiltinToolManifest.get_provider(provider)
+            if provider_manifest is not None:
+                with cls._builtin_provider_lock:
+                    if provider not in cls._builtin_providers:
+                        cls._load_builtin_provider(provider_manifest.directory)
 
         if provider not in cls._builtin_providers:
             raise ToolProviderNotFoundError(f'builtin provider {provider} not found')
@@ -301,10 +306,12 @@ class ToolManager:
             :return: the absolute path of the icon, the mime type of the icon
         """
         # get provider
-        provider_controller = cls.get_builtin_provider(provider)
+        provider_manifest = BuiltinToolManifest.get_provider(provider)
+        if provider_manifest is None:
+            raise ToolProviderNotFoundError(f'builtin provider {provider} not found')
 
-        absolute_path = path.join(path.dirname(path.realpath(__file__)), 'provider', 'builtin', provider, '_assets',
-                                  provider_controller.identity.icon)
+        absolute_path = path.join(BUILTIN_PROVIDER_PATH, provider_manifest.directory, '_assets',
+                                  provider_manifest.icon)
         # check if the icon exists
         if not path.exists(absolute_path):
             raise ToolProviderNotFoundError(f'builtin provider {provider} icon not found')
@@ -334,33 +341,38 @@ class ToolManager:
         """
             list all the builtin providers
         """
-        for provider in listdir(path.join(path.dirname(path.realpath(__file__)), 'provider', 'builtin')):
-            if provider.startswith('__'):
-                continue
-
-            if path.isdir(path.join(path.dirname(path.realpath(__file__)), 'provider', 'builtin', provider)):
-                if provider.startswith('__'):
-                    continue
-
-                # init provider
-                try:
-                    provider_class = load_single_subclass_from_source(
-                        module_name=f'core.tools.provider.builtin.{provider}.{provider}',
-                        script_path=path.join(path.dirname(path.realpath(__file__)),
-                                            'provider', 'builtin', provider, f'{provider}.py'),
-                        parent_type=BuiltinToolProviderController)
-                    provider: BuiltinToolProviderController = provider_class()
-                    cls._builtin_providers[provider.identity.name] = provider
-                    for tool in provider.get_tools():
-                        cls._builtin_tools_labels[tool.identity.name] = tool.identity.label
-                    yield provider
+        for provider_manifest in list(BuiltinToolManifest.get_providers().values()):
+            provider = cls._builtin_providers.get(provider_manifest.name) \
+                or cls._load_builtin_provider(provider_manifest.directory)
+            if provider:
+                yield provider
 
-                except Exception as e:
-                    logger.error(f'load builtin provider {provider} error: {e}')
-                    continue
         # set builtin providers loaded
         cls._builtin_providers_loaded = True
 
+    @classmethod
+    def _load_builtin_provider(cls, directory: str) -> Union[BuiltinToolProviderController, None]:
+        """
+            import a builtin provider and its tools
+
+            :param directory: the directory of the provider
+            :return: the provider, None if it can not be loaded
+        """
+        try:
+            provider_class = load_single_subclass_from_source(
+                module_name=f'core.tools.provider.builtin.{directory}.{directory}',
+                script_path=path.join(BUILTIN_PROVIDER_PATH, directory, f'{directory}.py'),
+                parent_type=BuiltinToolProviderController)
+            provider: BuiltinToolProviderController = provider_class()
+            # import the tools of the provider
+            provider.get_tools()
+        except Exception as e:
+            logger.error(f'load builtin provider {directory} error: {e}')
+            return None
+
+        cls._builtin_providers[provider.identity.name] = provider
+        return provider
+
     @classmethod
     def load_builtin_providers_cache(cls):
         for _ in cls.list_builtin_providers():
@@ -380,14 +392,7 @@ class ToolManager:
 
             :return: the label of the tool
         """
-        if len(cls._builtin_tools_labels) == 0:
-            # init the builtin providers
-            cls.load_builtin_providers_cache()
-
-        if tool_name not in cls._builtin_tools_labels:
-            return None
-
-        return cls._builtin_tools_labels[tool_name]
+        return BuiltinToolManifest.get_tool_label(tool_name)
 
     @classmethod
     def user_list_providers(cls, user_id: str, tenant_id: str, typ: UserToolProviderTypeLiteral) -> list[UserToolProvider]:
@@ -593,5 +598,3 @@ class ToolManager:
             return json.loads(provider.icon)
         else:
             raise ValueError(f"provider type {provider_type} not found")
-
-ToolManager.load_builtin_providers_cache()
\ No newline at end of file
@@ -0,0 +1,143 @@
+from typing import Any, Optional
+
+from core.app.entities.queue_entities import AppQueueEvent
+from core.workflow.callbacks.base_workflow_callback import BaseWorkflowCallback
+from core.workflow.entities.base_node_data_entities import BaseNodeData
+from core.workflow.entities.node_entities import NodeType
+
+
+class BufferedWorkflowCallback(BaseWorkflowCallback):
+    """
+    Buffer workflow events and replay them to other callbacks later.
+
+    Used by nodes running concurrently with other runs of the same node id, like items of a parallel iteration,
+    so the events of each run can be published in order instead of interleaving.
+    """
+
+    def __init__(self) -> None:
+        self._events: list[tuple[str, dict]] = []
+
+    def flush(self, callbacks: list[BaseWorkflowCallback]) -> None:
+        """
+        Replay buffered events to callbacks in the order they were recorded
+        :param callbacks: workflow callbacks
+        :return:
+        """
+        events, self._events = self._events, []
+        for method_name, kwargs in events:
+            for callback in callbacks:
+                getattr(callback, method_name)(**kwargs)
+
+    def _record(self, method_name: str, **kwargs) -> None:
+        self._events.append((method_name, kwargs))
+
+    def on_workflow_run_started(self) -> None:
+        self._record('on_workflow_run_started')
+
+    def on_workflow_run_succeeded(self) -> None:
+        self._record('on_workflow_run_succeeded')
+
+    def on_workflow_run_failed(self, error: str) -> None:
+        self._record('on_workflow_run_failed', error=error)
+
+    def on_workflow_node_execute_started(self, node_id: str,
+                                         node_type: NodeType,
+                                         node_data: BaseNodeData,
+                                         node_run_index: int = 1,
+                                         predecessor_node_id: Optional[str] = None) -> None:
+        self._record(
+            'on_workflow_node_execute_started',
+            node_id=node_id,
+            node_type=node_type,
+            node_data=node_data,
+            node_run_index=node_run_index,
+            predecessor_node_id=predecessor_node_id
+        )
+
+    def on_workflow_node_execute_succeeded(self, node_id: str,
+                                           node_type: NodeType,
+                                           node_data: BaseNodeData,
+                                           inputs: Optional[dict] = None,
+                                           process_data: Optional[dict] = None,
+                                           outputs: Optional[dict] = None,
+                                           execution_metadata: Optional[dict] = None) -> None:
+        self._record(
+            'on_workflow_node_execute_succeeded',
+            node_id=node_id,
+            node_type=node_type,
+            node_data=node_data,
+            inputs=inputs,
+            process_data=process_data,
+            outputs=outputs,
+            execution_metadata=execution_metadata
+        )
+
+    def on_workflow_node_execute_failed(self, node_id: str,
+                                        node_type: NodeType,
+                                        node_data: BaseNodeData,
+                                        error: str,
+                                        inputs: Optional[dict] = None,
+                                        outputs: Optional[dict] = None,
+                                        process_data: Optional[dict] = None) -> None:
+        self._record(
+            'on_workflow_node_execute_failed',
+            node_id=node_id,
+            node_type=node_type,
+            node_data=node_data,
+            error=error,
+            inputs=inputs,
+            outputs=outputs,
+            process_data=process_data
+        )
+
+    def on_node_text_chunk(self, node_id: str, text: str, metadata: Optional[dict] = None) -> None:
+        self._record('on_node_text_chunk', node_id=node_id, text=text, metadata=metadata)
+
+    def on_workflow_iteration_started(self,
+                                      node_id: str,
+                                      node_type: NodeType,
+                                      node_run_index: int = 1,
+                                      node_data: Optional[BaseNodeData] = None,
+                                      inputs: dict = None,
+                                      predecessor_node_id: Optional[str] = None,
+                                      metadata: Optional[dict] = None) -> None:
+        self._record(
+            'on_workflow_iteration_started',
+            node_id=node_id,
+            node_type=node_type,
+            node_run_index=node_run_index,
+            node_data=node_data,
+            inputs=inputs,
+            predecessor_node_id=predecessor_node_id,
+            metadata=metadata
+        )
+
+    def on_workflow_iteration_next(self, node_id: str,
+                                   node_type: NodeType,
+                                   index: int,
+                                   node_run_index: int,
+                                   output: Optional[Any],
+                                   ) -> None:
+        self._record(
+            'on_workflow_iteration_next',
+            node_id=node_id,
+            node_type=node_type,
+            index=index,
+            node_run_index=node_run_index,
+            output=output
+        )
+
+    def on_workflow_iteration_completed(self, node_id: str,
+                                        node_type: NodeType,
+                                        node_run_index: int,
+                                        outputs: dict) -> None:
+        self._record(
+            'on_workflow_iteration_completed',
+            node_id=node_id,
+            node_type=node_type,
+            node_run_index=node_run_index,
+            outputs=outputs
+        )
+
+    def on_event(self, event: AppQueueEvent) -> None:
+        self._record('on_event', event=event)
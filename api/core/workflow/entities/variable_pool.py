@@ -1,3 +1,5 @@
+import sys
+import threading
 from enum import Enum
 from typing import Any, Optional, Union
 
@@ -21,17 +23,57 @@ class ValueType(Enum):
     FILE = "file"
 
 
+class _VariableTrieNode:
+    """
+    Node of variable trie, keyed by a segment of the variable selector.
+    """
+    __slots__ = ('has_value', 'value', 'size', 'children')
+
+    def __init__(self) -> None:
+        self.has_value = False
+        self.value = None
+        # estimated size in bytes of value
+        self.size = 0
+        self.children: dict[str, _VariableTrieNode] = {}
+
+    def get_total_size(self) -> int:
+        """
+        Get estimated size in bytes of values in this subtree
+        """
+        return self.size + sum(child.get_total_size() for child in self.children.values())
+
+
+# returned by lookups when the selector is not found in a pool, None is a valid variable value
+_NOT_FOUND = object()
+
+
 class VariablePool:
+    """
+    Variables of a workflow run, stored per node in a trie keyed by variable selector segments.
+
+    Nested values are not exploded on append: `['llm', 'usage', 'total_tokens']` is resolved lazily
+    by walking into the dict stored at `['llm', 'usage']` or `['llm']`.
+    Child pools created by `create_child_pool` read through to their parent and keep their own writes,
+    so sub scopes like iteration items and parallel branches don't need to copy the variables.
+    """
 
     def __init__(self, system_variables: dict[SystemVariable, Any],
-                 user_inputs: dict) -> None:
+                 user_inputs: dict,
+                 parent: Optional['VariablePool'] = None) -> None:
         # system variables
         # for example:
         # {
         #     'query': 'abc',
         #     'files': []
         # }
-        self.variables_mapping = {}
+        # node id -> root of variable trie
+        self.variables_mapping: dict[str, _VariableTrieNode] = {}
+        # node id -> estimated size in bytes of variables appended to this pool
+        self.variables_size: dict[str, int] = {}
+        self.parent = parent
+        # node ids cleared in this pool, hides the variables of parent
+        self._cleared_node_ids: set[str] = set()
+        self._lock = threading.RLock()
         self.user_inputs = user_inputs
         self.system_variables = system_variables
         for system_variable, value in system_variables.items():
@@ -39,18 +81,31 @@ class VariablePool:
 
     def append_variable(self, node_id: str, variable_key_list: list[str], value: VariableValue) -> None:
         """
-        Append variable
+        Append variable, replaces the variable and the variables nested in it
         :param node_id: node id
         :param variable_key_list: variable key list, like: ['result', 'text']
         :param value: value
         :return:
         """
-        if node_id not in self.variables_mapping:
-            self.variables_mapping[node_id] = {}
+        with self._lock:
+            trie_node = self.variables_mapping.get(node_id)
+            if not trie_node:
+                trie_node = self.variables_mapping[node_id] = _VariableTrieNode()
 
-        variable_key_list_hash = hash(tuple(variable_key_list))
+            for variable_key in variable_key_list:
+                child = trie_node.children.get(variable_key)
+                if not child:
+                    child = trie_node.children[variable_key] = _VariableTrieNode()
+                trie_node = child
 
-        self.variables_mapping[node_id][variable_key_list_hash] = value
+            replaced_size = trie_node.get_total_size()
+
+            trie_node.has_value = True
+            trie_node.value = value
+            trie_node.size = _estimate_size(value)
+            trie_node.children = {}
+
+            self.variables_size[node_id] = self.variables_size.get(node_id, 0) - replaced_size + trie_node.size
 
     def get_variable_value(self, variable_selector: list[str],
                            target_value_type: Optional[ValueType] = None) -> Optional[VariableValue]:
@@ -63,16 +118,9 @@ class VariablePool:
         if len(variable_selector) < 2:
             raise ValueError('Invalid value selector')
 
-        node_id = variable_selector[0]
-        if node_id not in self.variables_mapping:
-            return None
-
-        # fetch variable keys, pop node_id
-        variable_key_list = variable_selector[1:]
-
-        variable_key_list_hash = hash(tuple(variable_key_list))
-
-        value = self.variables_mapping[node_id].get(variable_key_list_hash)
+        value = self._lookup(variable_selector[0], variable_selector[1:])
+        if value is _NOT_FOUND:
+            value = None
 
         if target_value_type:
             if target_value_type == ValueType.STRING:
@@ -91,11 +139,84 @@ class VariablePool:
 
         return value
 
+    def _lookup(self, node_id: str, variable_key_list: list[str]) -> Any:
+        """
+        Lookup variable in this pool, then in parent pools
+        :return: value, or _NOT_FOUND
+        """
+        with self._lock:
+            trie_node = self.variables_mapping.get(node_id)
+            cleared = node_id in self._cleared_node_ids
+
+            # walk the trie as deep as possible, remember the deepest value on the path
+            deepest_value = _NOT_FOUND
+            remaining_key_list = variable_key_list
+            depth = 0
+            while trie_node:
+                if trie_node.has_value:
+                    deepest_value = trie_node.value
+                    remaining_key_list = variable_key_list[depth:]
+
+                if depth == len(variable_key_list):
+                    break
+
+                trie_node = trie_node.children.get(variable_key_list[depth])
+                depth += 1
+
+        if deepest_value is not _NOT_FOUND:
+            # lazily walk into nested dict values
+            value = deepest_value
+            for variable_key in remaining_key_list:
+                if not isinstance(value, dict) or variable_key not in value:
+                    return _NOT_FOUND
+                value = value[variable_key]
+            return value
+
+        if self.parent and not cleared:
+            return self.parent._lookup(node_id, variable_key_list)
+
+        return _NOT_FOUND
+
+    def create_child_pool(self) -> 'VariablePool':
+        """
+        Create child pool for an isolated scope, like an item of parallel iteration.
+        The child reads the variables of this pool, variables appended to the child are not visible here.
+        :return:
+        """
+        child_pool = VariablePool(system_variables={}, user_inputs=self.user_inputs, parent=self)
+        child_pool.system_variables = self.system_variables
+        return child_pool
+
+    def get_node_variables_size(self, node_id: str) -> int:
+        """
+        Get estimated size in bytes of variables appended by node to this pool
+        :param node_id: node id
+        :return:
+        """
+        return self.variables_size.get(node_id, 0)
+
     def clear_node_variables(self, node_id: str) -> None:
         """
         Clear node variables
         :param node_id: node id
         :return:
         """
-        if node_id in self.variables_mapping:
-            self.variables_mapping.pop(node_id)
\ No newline at end of file
+        with self._lock:
+            self.variables_mapping.pop(node_id, None)
+            self.variables_size.pop(node_id, None)
+            if self.parent:
+                self._cleared_node_ids.add(node_id)
+
+
+def _estimate_size(value: Any) -> int:
+    """
+    Estimate memory size in bytes of variable value
+    """
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            sys.getsizeof(key) + _estimate_size(item) for key, item in value.items()
+        )
+    elif isinstance(value, list | tuple):
+        return sys.getsizeof(value) + sum(_estimate_size(item) for item in value)
+
+    return sys.getsizeof(value)
@@ -1,7 +1,6 @@
+import threading
 from typing import Optional
 
-from pydantic import BaseModel
-
 from core.app.entities.app_invoke_entities import InvokeFrom
 from core.workflow.entities.base_node_data_entities import BaseIterationState
 from core.workflow.entities.node_entities import NodeRunResult
@@ -37,15 +36,22 @@ class WorkflowRunState:
 
     workflow_nodes_and_results: list[WorkflowNodeAndResult]
 
-    class NodeRun(BaseModel):
-        node_id: str
-        iteration_node_id: str
-
-    workflow_node_runs: list[NodeRun]
+    # ids of nodes already ran in the current iteration round
+    workflow_node_ran_ids: set[str]
     workflow_node_steps: int
 
     current_iteration_state: Optional[BaseIterationState]
 
+    # node id -> ids of top-level nodes not yet finished which reference its variables
+    pending_variable_consumers: Optional[dict[str, set[str]]]
+
+    # guards counters and results when nodes of parallel branches run concurrently
+    lock: threading.Lock
+    # serializes iteration nodes running in parallel branches, they share current_iteration_state
+    iteration_lock: threading.Lock
+    # serializes nodes of parallel branches streaming text to end nodes, so their chunks are not interleaved
+    stream_lock: threading.Lock
+
     def __init__(self, workflow: Workflow,
                  start_at: float,
                  variable_pool: VariablePool,
@@ -70,4 +76,10 @@ class WorkflowRunState:
 
         self.current_iteration_state = None
         self.workflow_node_steps = 1
-        self.workflow_node_runs = []
\ No newline at end of file
+        self.workflow_node_ran_ids = set()
+
+        self.pending_variable_consumers = None
+
+        self.lock = threading.Lock()
+        self.iteration_lock = threading.Lock()
+        self.stream_lock = threading.Lock()
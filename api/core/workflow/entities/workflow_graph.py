@@ -0,0 +1,219 @@
+import json
+import logging
+import threading
+from typing import Optional
+
+from core.helper.lru_cache import LRUCache
+from core.workflow.entities.node_entities import NodeType
+from libs import helper
+from models.workflow import Workflow
+
+logger = logging.getLogger(__name__)
+
+
+class WorkflowGraph:
+    """
+    Compiled workflow graph.
+
+    Indexes the nodes and edges of a workflow graph once, so the engine can resolve nodes,
+    outgoing edges and iteration children without scanning the raw graph dict on every step.
+    Instances are shared between runs of the same workflow version and must be treated as read-only.
+    """
+    _cache = LRUCache(capacity=256)
+    _cache_lock = threading.Lock()
+
+    def __init__(self, graph: dict) -> None:
+        if not graph:
+            raise ValueError('workflow graph not found')
+
+        if 'nodes' not in graph or 'edges' not in graph:
+            raise ValueError('nodes or edges not found in workflow graph')
+
+        if not isinstance(graph.get('nodes'), list):
+            raise ValueError('nodes in workflow graph must be a list')
+
+        if not isinstance(graph.get('edges'), list):
+            raise ValueError('edges in workflow graph must be a list')
+
+        self.graph = graph
+
+        # node id -> node config, in graph order
+        self.node_configs: dict[str, dict] = {}
+        # node id -> node type
+        self.node_types: dict[str, NodeType] = {}
+        # source node id -> outgoing edges, in graph order
+        self.outgoing_edges: dict[str, list[dict]] = {}
+        # target node id -> incoming edges, in graph order
+        self.incoming_edges: dict[str, list[dict]] = {}
+        # iteration node id -> nested node ids
+        self.iteration_children: dict[str, list[str]] = {}
+        # nested node id -> iteration node id
+        self.node_iteration_ids: dict[str, str] = {}
+        self.start_node_id: Optional[str] = None
+
+        for node_config in graph['nodes']:
+            node_id = node_config.get('id')
+            if not node_id:
+                continue
+
+            node_data = node_config.get('data', {})
+            self.node_configs[node_id] = node_config
+
+            try:
+                node_type = NodeType.value_of(node_data.get('type'))
+            except ValueError:
+                # unknown node types are kept as configs only, they fail when instantiated
+                node_type = None
+
+            if node_type:
+                self.node_types[node_id] = node_type
+                if node_type == NodeType.START and not self.start_node_id:
+                    self.start_node_id = node_id
+
+            iteration_id = node_data.get('iteration_id')
+            if iteration_id:
+                self.iteration_children.setdefault(iteration_id, []).append(node_id)
+                self.node_iteration_ids[node_id] = iteration_id
+
+        for edge in graph['edges']:
+            source = edge.get('source')
+            target = edge.get('target')
+            if source:
+                self.outgoing_edges.setdefault(source, []).append(edge)
+            if target:
+                self.incoming_edges.setdefault(target, []).append(edge)
+
+        # top-level node id -> ids of top-level nodes whose variables it references, built on first use
+        self._variable_references: Optional[dict[str, set[str]]] = None
+        self._variable_references_extracted = False
+
+        # answer nodes stream through ordered routes of the chatflow, which rely on sequential runs
+        self.has_answer_nodes = NodeType.ANSWER in self.node_types.values()
+
+        # top-level nodes fanning out to multiple targets from the same source handle
+        self.has_parallel_branches = False
+        for source, edges in self.outgoing_edges.items():
+            if source in self.node_iteration_ids:
+                continue
+
+            source_handles = [edge.get('sourceHandle') or 'source' for edge in edges]
+            if len(source_handles) != len(set(source_handles)):
+                self.has_parallel_branches = True
+                break
+
+    @classmethod
+    def from_workflow(cls, workflow: Workflow) -> 'WorkflowGraph':
+        """
+        Get compiled graph of workflow, cached by workflow id and graph hash
+        :param workflow: Workflow instance
+        :return:
+        """
+        if not workflow.graph:
+            raise ValueError('workflow graph not found')
+
+        cache_key = (workflow.id, helper.generate_text_hash(workflow.graph))
+        with cls._cache_lock:
+            compiled_graph = cls._cache.get(cache_key)
+
+        if compiled_graph:
+            return compiled_graph
+
+        compiled_graph = cls(json.loads(workflow.graph))
+        with cls._cache_lock:
+            cls._cache.put(cache_key, compiled_graph)
+
+        return compiled_graph
+
+    def get_node_config(self, node_id: str) -> Optional[dict]:
+        """
+        Get node config by node id
+        :param node_id: node id
+        :return:
+        """
+        return self.node_configs.get(node_id)
+
+    def get_node_type(self, node_id: str) -> Optional[NodeType]:
+        """
+        Get node type by node id
+        :param node_id: node id
+        :return:
+        """
+        return self.node_types.get(node_id)
+
+    def get_outgoing_edges(self, node_id: str) -> list[dict]:
+        """
+        Get outgoing edges of node
+        :param node_id: source node id
+        :return:
+        """
+        return self.outgoing_edges.get(node_id, [])
+
+    def get_incoming_edges(self, node_id: str) -> list[dict]:
+        """
+        Get incoming edges of node
+        :param node_id: target node id
+        :return:
+        """
+        return self.incoming_edges.get(node_id, [])
+
+    def get_iteration_children(self, iteration_node_id: str) -> list[str]:
+        """
+        Get nested node ids of iteration node
+        :param iteration_node_id: iteration node id
+        :return:
+        """
+        return self.iteration_children.get(iteration_node_id, [])
+
+    def get_top_level_incoming_edges(self, node_id: str) -> list[dict]:
+        """
+        Get incoming edges of node whose source is not nested in an iteration
+        :param node_id: target node id
+        :return:
+        """
+        return [
+            edge for edge in self.get_incoming_edges(node_id)
+            if edge.get('source') not in self.node_iteration_ids
+        ]
+
+    def get_variable_references(self, node_classes: dict[NodeType, type]) -> Optional[dict[str, set[str]]]:
+        """
+        Get variable references between top-level nodes, from the variable selectors each node class
+        extracts from its config.
+        References of nodes nested in an iteration are counted as references of the iteration node.
+        :param node_classes: node type -> node class
+        :return: top-level node id -> referenced top-level node ids,
+            None if the references of a node cannot be extracted, so no reference may be missed
+        """
+        if self._variable_references_extracted:
+            return self._variable_references
+
+        variable_references: Optional[dict[str, set[str]]] = {}
+        for node_id, node_config in self.node_configs.items():
+            node_cls = node_classes.get(self.node_types.get(node_id))
+            if not node_cls:
+                variable_references = None
+                break
+
+            try:
+                variable_selectors = node_cls.extract_referenced_variable_selectors(node_config)
+            except Exception:
+                logger.warning(f'Failed to extract variable references of node {node_id}', exc_info=True)
+                variable_references = None
+                break
+
+            consumer_node_id = self.node_iteration_ids.get(node_id, node_id)
+            referenced_node_ids = variable_references.setdefault(consumer_node_id, set())
+            for variable_selector in variable_selectors:
+                if not variable_selector:
+                    continue
+
+                source_node_id = variable_selector[0]
+                if (source_node_id not in self.node_configs or source_node_id in self.node_iteration_ids
+                        or source_node_id == consumer_node_id):
+                    continue
+
+                referenced_node_ids.add(source_node_id)
+
+        self._variable_references = variable_references
+        self._variable_references_extracted = True
+        return variable_references
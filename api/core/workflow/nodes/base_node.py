@@ -122,6 +122,15 @@ class BaseNode(ABC):
         node_data = cls._node_data_cls(**config.get("data", {}))
         return cls._extract_variable_selector_to_variable_mapping(node_data)
 
+    @classmethod
+    def extract_referenced_variable_selectors(cls, config: dict) -> list[list[str]]:
+        """
+        Extract selectors of all variables the node reads from the variable pool
+        :param config: node config
+        :return:
+        """
+        return list(cls.extract_variable_selector_to_variable_mapping(config).values())
+
     @classmethod
     @abstractmethod
     def _extract_variable_selector_to_variable_mapping(cls, node_data: BaseNodeData) -> dict[str, list[str]]:
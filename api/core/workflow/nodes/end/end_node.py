@@ -79,6 +79,16 @@ class EndNode(BaseNode):
 
         return generate_nodes
 
+    @classmethod
+    def extract_referenced_variable_selectors(cls, config: dict) -> list[list[str]]:
+        """
+        Extract selectors of all variables the node reads from the variable pool
+        :param config: node config
+        :return:
+        """
+        node_data = cls._node_data_cls(**config.get("data", {}))
+        return [variable_selector.value_selector for variable_selector in node_data.outputs]
+
     @classmethod
     def _extract_variable_selector_to_variable_mapping(cls, node_data: BaseNodeData) -> dict[str, list[str]]:
         """
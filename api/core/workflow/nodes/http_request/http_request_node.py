@@ -106,6 +106,17 @@ class HttpRequestNode(BaseNode):
         timeout.write = min(timeout.write, MAX_WRITE_TIMEOUT)
         return timeout
 
+    @classmethod
+    def extract_referenced_variable_selectors(cls, config: dict) -> list[list[str]]:
+        """
+        Extract selectors of all variables the node reads from the variable pool, raises if they cannot be extracted
+        :param config: node config
+        :return:
+        """
+        node_data = cls._node_data_cls(**config.get("data", {}))
+        http_executor = HttpExecutor(node_data=node_data, timeout=HTTP_REQUEST_DEFAULT_TIMEOUT)
+        return [variable_selector.value_selector for variable_selector in http_executor.variable_selectors]
+
     @classmethod
     def _extract_variable_selector_to_variable_mapping(cls, node_data: HttpRequestNodeData) -> dict[str, list[str]]:
         """
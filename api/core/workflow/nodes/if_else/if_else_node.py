@@ -388,6 +388,16 @@ class IfElseNode(BaseNode):
             return True
         return False
 
+    @classmethod
+    def extract_referenced_variable_selectors(cls, config: dict) -> list[list[str]]:
+        """
+        Extract selectors of all variables the node reads from the variable pool
+        :param config: node config
+        :return:
+        """
+        node_data = cls._node_data_cls(**config.get("data", {}))
+        return [condition.variable_selector for condition in node_data.conditions]
+
     @classmethod
     def _extract_variable_selector_to_variable_mapping(cls, node_data: BaseNodeData) -> dict[str, list[str]]:
         """
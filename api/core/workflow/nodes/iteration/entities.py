@@ -1,4 +1,4 @@
-from typing import Any, Optional
+from typing import Any, Literal, Optional
 
 from core.workflow.entities.base_node_data_entities import BaseIterationNodeData, BaseIterationState
 
@@ -10,6 +10,13 @@ class IterationNodeData(BaseIterationNodeData):
     parent_loop_id: Optional[str] = None # redundant field, not used currently
     iterator_selector: list[str] # variable selector
     output_selector: list[str] # output selector
+    is_parallel: bool = False # run iterations concurrently
+    parallel_nums: int = 10 # max number of concurrent iterations in parallel mode
+    # error policy in parallel mode
+    # terminated: fail the iteration on the first failed item
+    # continue-on-error: keep None as output of failed items
+    # remove-abnormal-output: drop outputs of failed items
+    error_handle_mode: Literal['terminated', 'continue-on-error', 'remove-abnormal-output'] = 'terminated'
 
 class IterationState(BaseIterationState):
     """
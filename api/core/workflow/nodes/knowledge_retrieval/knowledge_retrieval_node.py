@@ -1,7 +1,5 @@
 from typing import Any, cast
 
-from sqlalchemy import func
-
 from core.app.app_config.entities import DatasetRetrieveConfigEntity
 from core.app.entities.app_invoke_entities import ModelConfigWithCredentialsEntity
 from core.entities.agent_entities import PlanningStrategy
@@ -10,7 +8,9 @@ from core.errors.error import ModelCurrentlyNotSupportError, ProviderTokenNotIni
 from core.model_manager import ModelInstance, ModelManager
 from core.model_runtime.entities.model_entities import ModelFeature, ModelType
 from core.model_runtime.model_providers.__base.large_language_model import LargeLanguageModel
+from core.rag.datasource.dataset_counter import DatasetCounter
 from core.rag.retrieval.dataset_retrieval import DatasetRetrieval
+from core.rag.retrieval.retriever_resource_builder import RetrieverResourceBuilder
 from core.rag.retrieval.retrival_methods import RetrievalMethod
 from core.workflow.entities.base_node_data_entities import BaseNodeData
 from core.workflow.entities.node_entities import NodeRunResult, NodeType
@@ -18,7 +18,7 @@ from core.workflow.entities.variable_pool import VariablePool
 from core.workflow.nodes.base_node import BaseNode
 from core.workflow.nodes.knowledge_retrieval.entities import KnowledgeRetrievalNodeData
 from extensions.ext_database import db
-from models.dataset import Dataset, Document, DocumentSegment
+from models.dataset import Dataset, DocumentSegment
 from models.workflow import WorkflowNodeExecutionStatus
 
 default_retrieval_model = {
@@ -79,31 +79,17 @@ class KnowledgeRetrievalNode(BaseNode):
         available_datasets = []
         dataset_ids = node_data.dataset_ids
 
-        # Subquery: Count the number of available documents for each dataset
-        subquery = db.session.query(
-            Document.dataset_id,
-            func.count(Document.id).label('available_document_count')
-        ).filter(
-            Document.indexing_status == 'completed',
-            Document.enabled == True,
-            Document.archived == False,
-            Document.dataset_id.in_(dataset_ids)
-        ).group_by(Document.dataset_id).having(
-            func.count(Document.id) > 0
-        ).subquery()
-
-        results = db.session.query(Dataset).join(
-            subquery, Dataset.id == subquery.c.dataset_id
-        ).filter(
+        results = db.session.query(Dataset).filter(
             Dataset.tenant_id == self.tenant_id,
             Dataset.id.in_(dataset_ids)
         ).all()
 
+        # pass if dataset is not available
+        dataset_counts = DatasetCounter.get_many([dataset.id for dataset in results])
         for dataset in results:
-            # pass if dataset is not available
-            if not dataset:
-                continue
-            available_datasets.append(dataset)
+            document_count, segment_count = dataset_counts[dataset.id]
+            if document_count > 0 and segment_count > 0:
+                available_datasets.append(dataset)
         all_documents = []
         dataset_retrieval = DatasetRetrieval()
         if node_data.retrieval_mode == DatasetRetrieveConfigEntity.RetrieveStrategy.SINGLE.value:
@@ -166,17 +152,12 @@ class KnowledgeRetrievalNode(BaseNode):
                                          key=lambda segment: index_node_id_to_position.get(segment.index_node_id,
                                                                                            float('inf')))
 
+                resource_builder = RetrieverResourceBuilder(sorted_segments)
+                resource_number = 1
                 for segment in sorted_segments:
-                    dataset = Dataset.query.filter_by(
-                        id=segment.dataset_id
-                    ).first()
-                    document = Document.query.filter(Document.id == segment.document_id,
-                                                     Document.enabled == True,
-                                                     Document.archived == False,
-                                                     ).first()
-                    resource_number = 1
+                    dataset = resource_builder.get_dataset(segment)
+                    document = resource_builder.get_document(segment)
                     if dataset and document:
-
                         source = {
                             'metadata': {
                                 '_source': 'knowledge',
@@ -49,6 +49,21 @@ class VariableAggregatorNode(BaseNode):
             inputs=inputs
         )
 
+    @classmethod
+    def extract_referenced_variable_selectors(cls, config: dict) -> list[list[str]]:
+        """
+        Extract selectors of all variables the node reads from the variable pool
+        :param config: node config
+        :return:
+        """
+        node_data = cls._node_data_cls(**config.get("data", {}))
+        variable_selectors = list(node_data.variables)
+        if node_data.advanced_settings:
+            for group in node_data.advanced_settings.groups:
+                variable_selectors.extend(group.variables)
+
+        return variable_selectors
+
     @classmethod
     def _extract_variable_selector_to_variable_mapping(cls, node_data: BaseNodeData) -> dict[str, list[str]]:
         return {}
@@ -1,17 +1,21 @@
 import logging
 import time
-from typing import Optional, cast
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Optional, cast
 
-from flask import current_app
+from flask import Flask, current_app
 
 from core.app.app_config.entities import FileExtraConfig
 from core.app.apps.base_app_queue_manager import GenerateTaskStoppedException
 from core.app.entities.app_invoke_entities import InvokeFrom
 from core.file.file_obj import FileTransferMethod, FileType, FileVar
+from core.model_runtime.utils.encoders import jsonable_encoder
 from core.workflow.callbacks.base_workflow_callback import BaseWorkflowCallback
+from core.workflow.callbacks.buffered_workflow_callback import BufferedWorkflowCallback
 from core.workflow.entities.node_entities import NodeRunMetadataKey, NodeRunResult, NodeType
-from core.workflow.entities.variable_pool import VariablePool, VariableValue
+from core.workflow.entities.variable_pool import VariablePool
 from core.workflow.entities.workflow_entities import WorkflowNodeAndResult, WorkflowRunState
+from core.workflow.entities.workflow_graph import WorkflowGraph
 from core.workflow.errors import WorkflowNodeRunFailedError
 from core.workflow.nodes.answer.answer_node import AnswerNode
 from core.workflow.nodes.base_node import BaseIterationNode, BaseNode, UserFrom
@@ -19,7 +23,7 @@ from core.workflow.nodes.code.code_node import CodeNode
 from core.workflow.nodes.end.end_node import EndNode
 from core.workflow.nodes.http_request.http_request_node import HttpRequestNode
 from core.workflow.nodes.if_else.if_else_node import IfElseNode
-from core.workflow.nodes.iteration.entities import IterationState
+from core.workflow.nodes.iteration.entities import IterationNodeData, IterationState
 from core.workflow.nodes.iteration.iteration_node import IterationNode
 from core.workflow.nodes.knowledge_retrieval.knowledge_retrieval_node import KnowledgeRetrievalNode
 from core.workflow.nodes.llm.entities import LLMNodeData
@@ -56,6 +60,9 @@ node_classes = {
 
 logger = logging.getLogger(__name__)
 
+# variables of a node are released from the pool once consumed, only if they are larger than this
+RELEASE_VARIABLES_MIN_SIZE = 1024 * 1024
+
 
 class WorkflowEngineManager:
     def get_default_configs(self) -> list[dict]:
@@ -105,20 +112,9 @@ class WorkflowEngineManager:
         :param callbacks: workflow callbacks
         :param call_depth: call depth
         """
-        # fetch workflow graph
-        graph = workflow.graph_dict
-        if not graph:
-            raise ValueError('workflow graph not found')
-
-        if 'nodes' not in graph or 'edges' not in graph:
-            raise ValueError('nodes or edges not found in workflow graph')
+        # fetch and compile workflow graph
+        WorkflowGraph.from_workflow(workflow)
 
-        if not isinstance(graph.get('nodes'), list):
-            raise ValueError('nodes in workflow graph must be a list')
-
-        if not isinstance(graph.get('edges'), list):
-            raise ValueError('edges in workflow graph must be a list')
-        
         # init variable pool
         if not variable_pool:
             variable_pool = VariablePool(
@@ -171,7 +167,16 @@ class WorkflowEngineManager:
         :param end_at: force specific end node
         :return:
         """
-        graph = workflow.graph_dict
+        graph = WorkflowGraph.from_workflow(workflow)
+
+        if graph.has_parallel_branches and not graph.has_answer_nodes and not start_at and not end_at:
+            # run independent branches concurrently
+            self._run_workflow_in_parallel(
+                graph=graph,
+                workflow_run_state=workflow_run_state,
+                callbacks=callbacks
+            )
+            return
 
         try:
             predecessor_node: BaseNode = None
@@ -208,18 +213,21 @@ class WorkflowEngineManager:
                         if isinstance(next_iteration, NodeRunResult):
                             if next_iteration.outputs:
                                 for variable_key, variable_value in next_iteration.outputs.items():
-                                    # append variables to variable pool recursively
-                                    self._append_variables_recursively(
-                                        variable_pool=workflow_run_state.variable_pool,
+                                    workflow_run_state.variable_pool.append_variable(
                                         node_id=current_iteration_node.node_id,
                                         variable_key_list=[variable_key],
-                                        variable_value=variable_value
+                                        value=variable_value
                                     )
                             self._workflow_iteration_completed(
                                 current_iteration_node=current_iteration_node,
                                 workflow_run_state=workflow_run_state,
                                 callbacks=callbacks
                             )
+                            self._release_consumed_variables(
+                                graph=graph,
+                                workflow_run_state=workflow_run_state,
+                                node_id=current_iteration_node.node_id
+                            )
                             # iteration has ended
                             next_node = self._get_next_overall_node(
                                 workflow_run_state=workflow_run_state,
@@ -256,6 +264,23 @@ class WorkflowEngineManager:
                 if self._is_timed_out(start_at=workflow_run_state.start_at, max_execution_time=max_execution_time):
                     raise ValueError('Max execution time {}s reached.'.format(max_execution_time))
 
+                # handle parallel iteration nodes, all iterations run before moving on
+                if isinstance(next_node, IterationNode) and next_node.node_data.is_parallel:
+                    self._run_iteration_in_parallel(
+                        graph=graph,
+                        workflow_run_state=workflow_run_state,
+                        iteration_node=next_node,
+                        predecessor_node=predecessor_node,
+                        callbacks=callbacks
+                    )
+                    self._release_consumed_variables(
+                        graph=graph,
+                        workflow_run_state=workflow_run_state,
+                        node_id=next_node.node_id
+                    )
+                    predecessor_node = next_node
+                    continue
+
                 # handle iteration nodes
                 if isinstance(next_node, BaseIterationNode):
                     current_iteration_node = next_node
@@ -305,6 +330,11 @@ class WorkflowEngineManager:
                     predecessor_node=predecessor_node,
                     callbacks=callbacks
                 )
+                self._release_consumed_variables(
+                    graph=graph,
+                    workflow_run_state=workflow_run_state,
+                    node_id=next_node.node_id
+                )
 
                 if next_node.node_type in [NodeType.END]:
                     break
@@ -331,6 +361,453 @@ class WorkflowEngineManager:
             callbacks=callbacks
         )
 
+    def _run_workflow_in_parallel(self, graph: WorkflowGraph,
+                                  workflow_run_state: WorkflowRunState,
+                                  callbacks: list[BaseWorkflowCallback] = None) -> None:
+        """
+        Run workflow as a DAG, nodes whose incoming edges are all resolved run concurrently
+        :param graph: workflow graph
+        :param workflow_run_state: workflow run state
+        :param callbacks: workflow callbacks
+        :return:
+        """
+        start_node = self._get_node(workflow_run_state, graph, graph.start_node_id, callbacks)
+        if not start_node:
+            self._workflow_run_failed(
+                error='Start node not found in workflow graph.',
+                callbacks=callbacks
+            )
+            return
+
+        max_parallelism = current_app.config.get("WORKFLOW_MAX_PARALLELISM", 1)
+        try:
+            with ThreadPoolExecutor(max_workers=max_parallelism) as executor:
+                self._schedule_parallel_nodes(
+                    executor=executor,
+                    graph=graph,
+                    workflow_run_state=workflow_run_state,
+                    start_node=start_node,
+                    callbacks=callbacks
+                )
+        except GenerateTaskStoppedException:
+            return
+        except Exception as e:
+            self._workflow_run_failed(
+                error=str(e),
+                callbacks=callbacks
+            )
+            return
+
+        # workflow run success
+        self._workflow_run_success(
+            callbacks=callbacks
+        )
+
+    def _schedule_parallel_nodes(self, executor: ThreadPoolExecutor,
+                                 graph: WorkflowGraph,
+                                 workflow_run_state: WorkflowRunState,
+                                 start_node: BaseNode,
+                                 callbacks: list[BaseWorkflowCallback] = None) -> None:
+        """
+        Submit ready nodes to executor until no node is ready or running, or the end node finished
+        :param executor: executor of node runs
+        :param graph: workflow graph
+        :param workflow_run_state: workflow run state
+        :param start_node: start node
+        :param callbacks: workflow callbacks
+        :return:
+        """
+        max_execution_steps = current_app.config.get("WORKFLOW_MAX_EXECUTION_STEPS")
+        max_execution_time = current_app.config.get("WORKFLOW_MAX_EXECUTION_TIME")
+        flask_app = current_app._get_current_object()
+        stream_node_ids = self._get_stream_node_ids(graph)
+
+        # number of unresolved incoming edges of each top-level node, nodes are ready when it reaches 0
+        pending_edge_counts = {
+            node_id: len(graph.get_top_level_incoming_edges(node_id))
+            for node_id in graph.node_configs
+            if node_id not in graph.node_iteration_ids
+        }
+        # activated nodes and the latest predecessor which activated them
+        activated_predecessors: dict[str, Optional[BaseNode]] = {}
+
+        running_futures: dict[Future, BaseNode] = {}
+        ready_nodes: list[tuple[BaseNode, Optional[BaseNode]]] = [(start_node, None)]
+        try:
+            while ready_nodes or running_futures:
+                for node, predecessor_node in ready_nodes:
+                    # max steps reached
+                    if workflow_run_state.workflow_node_steps > max_execution_steps:
+                        raise ValueError('Max steps {} reached.'.format(max_execution_steps))
+
+                    # or max execution time reached
+                    if self._is_timed_out(start_at=workflow_run_state.start_at,
+                                          max_execution_time=max_execution_time):
+                        raise ValueError('Max execution time {}s reached.'.format(max_execution_time))
+
+                    future = executor.submit(
+                        self._run_workflow_node_in_thread,
+                        flask_app=flask_app,
+                        graph=graph,
+                        workflow_run_state=workflow_run_state,
+                        node=node,
+                        predecessor_node=predecessor_node,
+                        callbacks=callbacks,
+                        is_stream_node=node.node_id in stream_node_ids
+                    )
+                    running_futures[future] = node
+
+                ready_nodes = []
+                done_futures, _ = wait(running_futures, return_when=FIRST_COMPLETED)
+                for future in done_futures:
+                    node = running_futures.pop(future)
+                    # raise the error of failed node
+                    future.result()
+
+                    if node.node_type == NodeType.END:
+                        # workflow run finished, nodes of other branches are not started anymore
+                        return
+
+                    self._release_consumed_variables(
+                        graph=graph,
+                        workflow_run_state=workflow_run_state,
+                        node_id=node.node_id
+                    )
+
+                    for next_node_id in self._resolve_parallel_outgoing_edges(
+                        graph=graph,
+                        node=node,
+                        pending_edge_counts=pending_edge_counts,
+                        activated_predecessors=activated_predecessors
+                    ):
+                        next_node = self._get_node(workflow_run_state, graph, next_node_id, callbacks)
+                        if next_node:
+                            ready_nodes.append((next_node, activated_predecessors[next_node_id]))
+        finally:
+            # drop queued nodes, running nodes are waited by the executor
+            for future in running_futures:
+                future.cancel()
+
+    @staticmethod
+    def _get_stream_node_ids(graph: WorkflowGraph) -> set[str]:
+        """
+        Get ids of the nodes whose text is streamed out through end nodes
+        :param graph: workflow graph
+        :return:
+        """
+        stream_node_ids = set()
+        for node_id, node_type in graph.node_types.items():
+            if node_type == NodeType.END:
+                stream_node_ids.update(EndNode.extract_generate_nodes(graph.graph, graph.node_configs[node_id]))
+
+        return stream_node_ids
+
+    def _run_workflow_node_in_thread(self, flask_app: Flask,
+                                     graph: WorkflowGraph,
+                                     workflow_run_state: WorkflowRunState,
+                                     node: BaseNode,
+                                     predecessor_node: Optional[BaseNode] = None,
+                                     callbacks: list[BaseWorkflowCallback] = None,
+                                     is_stream_node: bool = False) -> None:
+        """
+        Run workflow node of parallel branch in worker thread
+        """
+        with flask_app.app_context():
+            if isinstance(node, IterationNode) and node.node_data.is_parallel:
+                with workflow_run_state.iteration_lock:
+                    self._run_iteration_in_parallel(
+                        graph=graph,
+                        workflow_run_state=workflow_run_state,
+                        iteration_node=node,
+                        predecessor_node=predecessor_node,
+                        callbacks=callbacks
+                    )
+            elif isinstance(node, BaseIterationNode):
+                # iteration nodes share current_iteration_state of the run
+                with workflow_run_state.iteration_lock:
+                    self._run_iteration_node(
+                        graph=graph,
+                        workflow_run_state=workflow_run_state,
+                        iteration_node=node,
+                        predecessor_node=predecessor_node,
+                        callbacks=callbacks
+                    )
+            elif is_stream_node:
+                # text chunks of the run are streamed out in order of the nodes, so they run one at a time
+                with workflow_run_state.stream_lock:
+                    self._run_workflow_node(
+                        workflow_run_state=workflow_run_state,
+                        node=node,
+                        predecessor_node=predecessor_node,
+                        callbacks=callbacks
+                    )
+            else:
+                self._run_workflow_node(
+                    workflow_run_state=workflow_run_state,
+                    node=node,
+                    predecessor_node=predecessor_node,
+                    callbacks=callbacks
+                )
+
+    def _run_iteration_node(self, graph: WorkflowGraph,
+                            workflow_run_state: WorkflowRunState,
+                            iteration_node: BaseIterationNode,
+                            predecessor_node: Optional[BaseNode] = None,
+                            callbacks: list[BaseWorkflowCallback] = None) -> None:
+        """
+        Run iteration node and its nested nodes until the iteration ends
+        """
+        workflow_run_state.current_iteration_state = iteration_node.run(
+            variable_pool=workflow_run_state.variable_pool
+        )
+        self._workflow_iteration_started(
+            graph=graph,
+            current_iteration_node=iteration_node,
+            workflow_run_state=workflow_run_state,
+            predecessor_node_id=predecessor_node.node_id if predecessor_node else None,
+            callbacks=callbacks
+        )
+
+        try:
+            while True:
+                next_iteration = iteration_node.get_next_iteration(
+                    variable_pool=workflow_run_state.variable_pool,
+                    state=workflow_run_state.current_iteration_state
+                )
+                self._workflow_iteration_next(
+                    graph=graph,
+                    current_iteration_node=iteration_node,
+                    workflow_run_state=workflow_run_state,
+                    callbacks=callbacks
+                )
+
+                if isinstance(next_iteration, NodeRunResult):
+                    # iteration has ended
+                    if next_iteration.outputs:
+                        for variable_key, variable_value in next_iteration.outputs.items():
+                            workflow_run_state.variable_pool.append_variable(
+                                node_id=iteration_node.node_id,
+                                variable_key_list=[variable_key],
+                                value=variable_value
+                            )
+                    self._workflow_iteration_completed(
+                        current_iteration_node=iteration_node,
+                        workflow_run_state=workflow_run_state,
+                        callbacks=callbacks
+                    )
+                    break
+
+                self._run_iteration_nested_nodes(
+                    graph=graph,
+                    workflow_run_state=workflow_run_state,
+                    iteration_node=iteration_node,
+                    start_node_id=next_iteration,
+                    callbacks=callbacks
+                )
+        finally:
+            workflow_run_state.current_iteration_state = None
+
+    def _run_iteration_in_parallel(self, graph: WorkflowGraph,
+                                   workflow_run_state: WorkflowRunState,
+                                   iteration_node: IterationNode,
+                                   predecessor_node: Optional[BaseNode] = None,
+                                   callbacks: list[BaseWorkflowCallback] = None) -> None:
+        """
+        Run items of iteration node concurrently, each item in a child variable pool.
+        Outputs are gathered in input order, events of each item are published in input order too.
+        """
+        node_data = cast(IterationNodeData, iteration_node.node_data)
+        state = cast(IterationState, iteration_node.run(
+            variable_pool=workflow_run_state.variable_pool
+        ))
+        workflow_run_state.current_iteration_state = state
+        self._workflow_iteration_started(
+            graph=graph,
+            current_iteration_node=iteration_node,
+            workflow_run_state=workflow_run_state,
+            predecessor_node_id=predecessor_node.node_id if predecessor_node else None,
+            callbacks=callbacks
+        )
+
+        try:
+            iterator = state.inputs.get('iterator_selector') or []
+            flask_app = current_app._get_current_object()
+
+            state.index = 0
+            self._workflow_iteration_next(
+                graph=graph,
+                current_iteration_node=iteration_node,
+                workflow_run_state=workflow_run_state,
+                callbacks=callbacks
+            )
+
+            with ThreadPoolExecutor(max_workers=max(1, node_data.parallel_nums)) as executor:
+                futures = []
+                for index, item in enumerate(iterator):
+                    item_callback = BufferedWorkflowCallback()
+                    future = executor.submit(
+                        self._run_iteration_item,
+                        flask_app=flask_app,
+                        graph=graph,
+                        workflow_run_state=workflow_run_state,
+                        iteration_node=iteration_node,
+                        index=index,
+                        item=item,
+                        callbacks=[item_callback]
+                    )
+                    futures.append((future, item_callback))
+
+                try:
+                    for index, (future, item_callback) in enumerate(futures):
+                        error = None
+                        try:
+                            output = future.result()
+                        except GenerateTaskStoppedException:
+                            raise
+                        except Exception as e:
+                            output = None
+                            error = e
+
+                        if callbacks:
+                            item_callback.flush(callbacks)
+
+                        if error:
+                            if node_data.error_handle_mode == 'terminated':
+                                raise error
+                            elif node_data.error_handle_mode == 'continue-on-error':
+                                state.outputs.append(None)
+                        elif output is not None:
+                            state.outputs.append(output)
+
+                        state.index = index + 1
+                        state.current_output = output
+                        self._workflow_iteration_next(
+                            graph=graph,
+                            current_iteration_node=iteration_node,
+                            workflow_run_state=workflow_run_state,
+                            callbacks=callbacks
+                        )
+                except Exception:
+                    # drop queued items, running items are waited by the executor
+                    for future, _ in futures:
+                        future.cancel()
+                    raise
+
+            workflow_run_state.variable_pool.append_variable(
+                node_id=iteration_node.node_id,
+                variable_key_list=['output'],
+                value=jsonable_encoder(state.outputs)
+            )
+            self._workflow_iteration_completed(
+                current_iteration_node=iteration_node,
+                workflow_run_state=workflow_run_state,
+                callbacks=callbacks
+            )
+        finally:
+            workflow_run_state.current_iteration_state = None
+
+    def _run_iteration_item(self, flask_app: Flask,
+                            graph: WorkflowGraph,
+                            workflow_run_state: WorkflowRunState,
+                            iteration_node: IterationNode,
+                            index: int,
+                            item: Any,
+                            callbacks: list[BaseWorkflowCallback] = None) -> Any:
+        """
+        Run one item of parallel iteration in worker thread
+        :return: output of the item
+        """
+        with flask_app.app_context():
+            node_data = cast(IterationNodeData, iteration_node.node_data)
+
+            variable_pool = workflow_run_state.variable_pool.create_child_pool()
+            variable_pool.append_variable(iteration_node.node_id, ['index'], index)
+            variable_pool.append_variable(iteration_node.node_id, ['item'], item)
+
+            self._run_iteration_nested_nodes(
+                graph=graph,
+                workflow_run_state=workflow_run_state,
+                iteration_node=iteration_node,
+                start_node_id=node_data.start_node_id,
+                callbacks=callbacks,
+                variable_pool=variable_pool
+            )
+
+            return variable_pool.get_variable_value(node_data.output_selector)
+
+    def _run_iteration_nested_nodes(self, graph: WorkflowGraph,
+                                    workflow_run_state: WorkflowRunState,
+                                    iteration_node: BaseIterationNode,
+                                    start_node_id: str,
+                                    callbacks: list[BaseWorkflowCallback] = None,
+                                    variable_pool: Optional[VariablePool] = None) -> None:
+        """
+        Run nested nodes of one iteration in sequence, from start node to the last nested node
+        :param variable_pool: variable pool of the iteration, defaults to the pool of the run
+        """
+        nested_predecessor_node = iteration_node
+        nested_node = self._get_node(workflow_run_state, graph, start_node_id, callbacks)
+        while nested_node:
+            self._run_workflow_node(
+                workflow_run_state=workflow_run_state,
+                node=nested_node,
+                predecessor_node=nested_predecessor_node,
+                callbacks=callbacks,
+                variable_pool=variable_pool
+            )
+            nested_predecessor_node = nested_node
+            nested_node = self._get_next_overall_node(
+                workflow_run_state=workflow_run_state,
+                graph=graph,
+                predecessor_node=nested_node,
+                callbacks=callbacks
+            )
+
+    def _resolve_parallel_outgoing_edges(self, graph: WorkflowGraph,
+                                         node: BaseNode,
+                                         pending_edge_counts: dict[str, int],
+                                         activated_predecessors: dict[str, Optional[BaseNode]]) -> list[str]:
+        """
+        Resolve outgoing edges of a finished node, and get the nodes which become ready.
+        A node with multiple incoming edges waits until all of them are resolved (join),
+        nodes which are reachable only from untaken branches are skipped.
+        :param graph: workflow graph
+        :param node: finished node
+        :param pending_edge_counts: unresolved incoming edge counts of nodes
+        :param activated_predecessors: activated nodes and their predecessor
+        :return: ready node ids
+        """
+        source_handle = node.node_run_result.edge_source_handle if node.node_run_result else None
+
+        ready_node_ids = []
+        # (target node id, taken, source node)
+        resolving_edges = [
+            (edge.get('target'), not source_handle or edge.get('sourceHandle') == source_handle, node)
+            for edge in graph.get_outgoing_edges(node.node_id)
+        ]
+        while resolving_edges:
+            target_node_id, taken, source_node = resolving_edges.pop(0)
+            if target_node_id not in pending_edge_counts:
+                continue
+
+            pending_edge_counts[target_node_id] -= 1
+            if taken:
+                activated_predecessors[target_node_id] = source_node
+
+            if pending_edge_counts[target_node_id] > 0:
+                continue
+
+            if target_node_id in activated_predecessors:
+                ready_node_ids.append(target_node_id)
+            else:
+                # all incoming branches are not taken, skip the node and its downstream
+                resolving_edges.extend([
+                    (edge.get('target'), False, None)
+                    for edge in graph.get_outgoing_edges(target_node_id)
+                ])
+
+        return ready_node_ids
+
     def single_step_run_workflow_node(self, workflow: Workflow,
                                       node_id: str,
                                       user_id: str,
@@ -344,21 +821,12 @@ class WorkflowEngineManager:
         :return:
         """
         # fetch node info from workflow graph
-        graph = workflow.graph_dict
-        if not graph:
-            raise ValueError('workflow graph not found')
-
-        nodes = graph.get('nodes')
-        if not nodes:
+        graph = WorkflowGraph.from_workflow(workflow)
+        if not graph.node_configs:
             raise ValueError('nodes not found in workflow graph')
 
         # fetch node config from node id
-        node_config = None
-        for node in nodes:
-            if node.get('id') == node_id:
-                node_config = node
-                break
-
+        node_config = graph.get_node_config(node_id)
         if not node_config:
             raise ValueError('node id not found in workflow graph')
 
@@ -426,24 +894,16 @@ class WorkflowEngineManager:
         Single iteration run workflow node
         """
         # fetch node info from workflow graph
-        graph = workflow.graph_dict
-        if not graph:
-            raise ValueError('workflow graph not found')
-
-        nodes = graph.get('nodes')
-        if not nodes:
+        graph = WorkflowGraph.from_workflow(workflow)
+        if not graph.node_configs:
             raise ValueError('nodes not found in workflow graph')
 
-        for node in nodes:
-            if node.get('id') == node_id:
-                if node.get('data', {}).get('type') in [
-                    NodeType.ITERATION.value,
-                    NodeType.LOOP.value,
-                ]:
-                    node_config = node
-                else:
-                    raise ValueError('node id is not an iteration node')
-        
+        if graph.get_node_config(node_id) and graph.get_node_type(node_id) not in [
+            NodeType.ITERATION,
+            NodeType.LOOP,
+        ]:
+            raise ValueError('node id is not an iteration node')
+
         # init variable pool
         variable_pool = VariablePool(
             system_variables={},
@@ -452,10 +912,10 @@ class WorkflowEngineManager:
 
         # variable selector to variable mapping
         iteration_nested_nodes = [
-            node for node in nodes 
+            node for node in graph.node_configs.values()
             if node.get('data', {}).get('iteration_id') == node_id or node.get('id') == node_id
         ]
-        iteration_nested_node_ids = [node.get('id') for node in iteration_nested_nodes]
+        iteration_nested_node_ids = {node.get('id') for node in iteration_nested_nodes}
 
         if not iteration_nested_nodes:
             raise ValueError('iteration has no nested nodes')
@@ -508,10 +968,9 @@ class WorkflowEngineManager:
 
         # fetch end node of iteration
         end_node_id = None
-        for edge in graph.get('edges'):
-            if edge.get('source') == node_id:
-                end_node_id = edge.get('target')
-                break
+        outgoing_edges = graph.get_outgoing_edges(node_id)
+        if outgoing_edges:
+            end_node_id = outgoing_edges[0].get('target')
 
         if not end_node_id:
             raise ValueError('end node of iteration not found')
@@ -561,7 +1020,7 @@ class WorkflowEngineManager:
                     error=error
                 )
 
-    def _workflow_iteration_started(self, graph: dict, 
+    def _workflow_iteration_started(self, graph: WorkflowGraph,
                                     current_iteration_node: BaseIterationNode,
                                     workflow_run_state: WorkflowRunState,
                                     predecessor_node_id: Optional[str] = None,
@@ -574,12 +1033,7 @@ class WorkflowEngineManager:
         :return:
         """
         # get nested nodes
-        iteration_nested_nodes = [
-            node for node in graph.get('nodes')
-            if node.get('data', {}).get('iteration_id') == current_iteration_node.node_id
-        ]
-
-        if not iteration_nested_nodes:
+        if not graph.get_iteration_children(current_iteration_node.node_id):
             raise ValueError('iteration has no nested nodes')
 
         if callbacks:
@@ -596,9 +1050,10 @@ class WorkflowEngineManager:
                     )
 
         # add steps
-        workflow_run_state.workflow_node_steps += 1
+        with workflow_run_state.lock:
+            workflow_run_state.workflow_node_steps += 1
 
-    def _workflow_iteration_next(self, graph: dict,
+    def _workflow_iteration_next(self, graph: WorkflowGraph,
                                  current_iteration_node: BaseIterationNode,
                                  workflow_run_state: WorkflowRunState, 
                                  callbacks: list[BaseWorkflowCallback] = None) -> None:
@@ -617,18 +1072,14 @@ class WorkflowEngineManager:
                         node_run_index=workflow_run_state.workflow_node_steps,
                         output=workflow_run_state.current_iteration_state.get_current_output()
                     )
+        iteration_nested_node_ids = graph.get_iteration_children(current_iteration_node.node_id)
+
         # clear ran nodes
-        workflow_run_state.workflow_node_runs = [
-            node_run for node_run in workflow_run_state.workflow_node_runs
-            if node_run.iteration_node_id != current_iteration_node.node_id
-        ]
+        workflow_run_state.workflow_node_ran_ids.difference_update(iteration_nested_node_ids)
 
         # clear variables in current iteration
-        nodes = graph.get('nodes')
-        nodes = [node for node in nodes if node.get('data', {}).get('iteration_id') == current_iteration_node.node_id]
-
-        for node in nodes:
-            workflow_run_state.variable_pool.clear_node_variables(node_id=node.get('id'))
+        for node_id in iteration_nested_node_ids:
+            workflow_run_state.variable_pool.clear_node_variables(node_id=node_id)
     
     def _workflow_iteration_completed(self, current_iteration_node: BaseIterationNode,
                                         workflow_run_state: WorkflowRunState, 
@@ -646,7 +1097,7 @@ class WorkflowEngineManager:
                     )
 
     def _get_next_overall_node(self, workflow_run_state: WorkflowRunState,
-                       graph: dict,
+                       graph: WorkflowGraph,
                        predecessor_node: Optional[BaseNode] = None,
                        callbacks: list[BaseWorkflowCallback] = None,
                        start_at: Optional[str] = None,
@@ -659,38 +1110,21 @@ class WorkflowEngineManager:
         :param callbacks: workflow callbacks
         :return:
         """
-        nodes = graph.get('nodes')
-        if not nodes:
+        if not graph.node_configs:
             return None
 
         if not predecessor_node:
-            for node_config in nodes:
-                node_cls = None
-                if start_at:
-                    if node_config.get('id') == start_at:
-                        node_cls = node_classes.get(NodeType.value_of(node_config.get('data', {}).get('type')))
-                else:
-                    if node_config.get('data', {}).get('type', '') == NodeType.START.value:
-                        node_cls = StartNode
-                if node_cls:
-                    return node_cls(
-                        tenant_id=workflow_run_state.tenant_id,
-                        app_id=workflow_run_state.app_id,
-                        workflow_id=workflow_run_state.workflow_id,
-                        user_id=workflow_run_state.user_id,
-                        user_from=workflow_run_state.user_from,
-                        invoke_from=workflow_run_state.invoke_from,
-                        config=node_config,
-                        callbacks=callbacks,
-                        workflow_call_depth=workflow_run_state.workflow_call_depth
-                    )
-                
+            return self._get_node(
+                workflow_run_state=workflow_run_state,
+                graph=graph,
+                node_id=start_at or graph.start_node_id,
+                callbacks=callbacks
+            )
         else:
-            edges = graph.get('edges')
             source_node_id = predecessor_node.node_id
 
             # fetch all outgoing edges from source node
-            outgoing_edges = [edge for edge in edges if edge.get('source') == source_node_id]
+            outgoing_edges = graph.get_outgoing_edges(source_node_id)
             if not outgoing_edges:
                 return None
 
@@ -714,59 +1148,45 @@ class WorkflowEngineManager:
             if end_at and target_node_id == end_at:
                 return None
 
-            # fetch target node from target node id
-            target_node_config = None
-            for node in nodes:
-                if node.get('id') == target_node_id:
-                    target_node_config = node
-                    break
-
-            if not target_node_config:
-                return None
-
             # get next node
-            target_node = node_classes.get(NodeType.value_of(target_node_config.get('data', {}).get('type')))
-
-            return target_node(
-                tenant_id=workflow_run_state.tenant_id,
-                app_id=workflow_run_state.app_id,
-                workflow_id=workflow_run_state.workflow_id,
-                user_id=workflow_run_state.user_id,
-                user_from=workflow_run_state.user_from,
-                invoke_from=workflow_run_state.invoke_from,
-                config=target_node_config,
-                callbacks=callbacks,
-                workflow_call_depth=workflow_run_state.workflow_call_depth
+            return self._get_node(
+                workflow_run_state=workflow_run_state,
+                graph=graph,
+                node_id=target_node_id,
+                callbacks=callbacks
             )
-        
-    def _get_node(self, workflow_run_state: WorkflowRunState, 
-                  graph: dict, 
-                  node_id: str,
+
+    def _get_node(self, workflow_run_state: WorkflowRunState,
+                  graph: WorkflowGraph,
+                  node_id: Optional[str],
                   callbacks: list[BaseWorkflowCallback]) -> Optional[BaseNode]:
         """
         Get node from graph by node id
         """
-        nodes = graph.get('nodes')
-        if not nodes:
+        if not node_id:
             return None
 
-        for node_config in nodes:
-            if node_config.get('id') == node_id:
-                node_type = NodeType.value_of(node_config.get('data', {}).get('type'))
-                node_cls = node_classes.get(node_type)
-                return node_cls(
-                    tenant_id=workflow_run_state.tenant_id,
-                    app_id=workflow_run_state.app_id,
-                    workflow_id=workflow_run_state.workflow_id,
-                    user_id=workflow_run_state.user_id,
-                    user_from=workflow_run_state.user_from,
-                    invoke_from=workflow_run_state.invoke_from,
-                    config=node_config,
-                    callbacks=callbacks,
-                    workflow_call_depth=workflow_run_state.workflow_call_depth
-                )
+        node_config = graph.get_node_config(node_id)
+        if not node_config:
+            return None
 
-        return None
+        node_type = graph.get_node_type(node_id)
+        if not node_type:
+            # raise for unknown node types
+            node_type = NodeType.value_of(node_config.get('data', {}).get('type'))
+
+        node_cls = node_classes.get(node_type)
+        return node_cls(
+            tenant_id=workflow_run_state.tenant_id,
+            app_id=workflow_run_state.app_id,
+            workflow_id=workflow_run_state.workflow_id,
+            user_id=workflow_run_state.user_id,
+            user_from=workflow_run_state.user_from,
+            invoke_from=workflow_run_state.invoke_from,
+            config=node_config,
+            callbacks=callbacks,
+            workflow_call_depth=workflow_run_state.workflow_call_depth
+        )
 
     def _is_timed_out(self, start_at: float, max_execution_time: int) -> bool:
         """
@@ -781,49 +1201,94 @@ class WorkflowEngineManager:
         """
         Check node has ran
         """
-        return bool([
-            node_and_result for node_and_result in workflow_run_state.workflow_node_runs
-            if node_and_result.node_id == node_id
-        ])
+        return node_id in workflow_run_state.workflow_node_ran_ids
+
+    def _release_consumed_variables(self, graph: WorkflowGraph,
+                                    workflow_run_state: WorkflowRunState,
+                                    node_id: str) -> None:
+        """
+        Release large variables which are no longer referenced by unfinished nodes, after a top-level node finished
+        :param graph: workflow graph
+        :param workflow_run_state: workflow run state
+        :param node_id: finished node id
+        :return:
+        """
+        if node_id in graph.node_iteration_ids:
+            return
+
+        variable_references = graph.get_variable_references(node_classes)
+        if variable_references is None:
+            # references of some node are unknown, keep all variables
+            return
+
+        with workflow_run_state.lock:
+            if workflow_run_state.pending_variable_consumers is None:
+                pending_variable_consumers = {}
+                for consumer_node_id, referenced_node_ids in variable_references.items():
+                    for referenced_node_id in referenced_node_ids:
+                        pending_variable_consumers.setdefault(referenced_node_id, set()).add(consumer_node_id)
+                workflow_run_state.pending_variable_consumers = pending_variable_consumers
+
+            pending_variable_consumers = workflow_run_state.pending_variable_consumers
+            releasable_node_ids = [node_id]
+            for referenced_node_id in variable_references.get(node_id, set()):
+                consumer_node_ids = pending_variable_consumers.get(referenced_node_id)
+                if consumer_node_ids is not None:
+                    consumer_node_ids.discard(node_id)
+                    releasable_node_ids.append(referenced_node_id)
+
+            for releasable_node_id in releasable_node_ids:
+                if pending_variable_consumers.get(releasable_node_id):
+                    continue
+
+                variable_pool = workflow_run_state.variable_pool
+                if variable_pool.get_node_variables_size(releasable_node_id) < RELEASE_VARIABLES_MIN_SIZE:
+                    continue
+
+                variable_pool.clear_node_variables(releasable_node_id)
 
     def _run_workflow_node(self, workflow_run_state: WorkflowRunState,
                            node: BaseNode,
                            predecessor_node: Optional[BaseNode] = None,
-                           callbacks: list[BaseWorkflowCallback] = None) -> None:
+                           callbacks: list[BaseWorkflowCallback] = None,
+                           variable_pool: Optional[VariablePool] = None) -> None:
+        # nodes of parallel iteration items run in their own child pool
+        variable_pool = variable_pool or workflow_run_state.variable_pool
+
+        workflow_nodes_and_result = WorkflowNodeAndResult(
+            node=node,
+            result=None
+        )
+
+        with workflow_run_state.lock:
+            node_run_index = workflow_run_state.workflow_node_steps
+
+            # add to workflow_nodes_and_results
+            workflow_run_state.workflow_nodes_and_results.append(workflow_nodes_and_result)
+
+            # add steps
+            workflow_run_state.workflow_node_steps += 1
+
         if callbacks:
             for callback in callbacks:
                 callback.on_workflow_node_execute_started(
                     node_id=node.node_id,
                     node_type=node.node_type,
                     node_data=node.node_data,
-                    node_run_index=workflow_run_state.workflow_node_steps,
+                    node_run_index=node_run_index,
                     predecessor_node_id=predecessor_node.node_id if predecessor_node else None
                 )
 
         db.session.close()
 
-        workflow_nodes_and_result = WorkflowNodeAndResult(
-            node=node,
-            result=None
-        )
-
-        # add to workflow_nodes_and_results
-        workflow_run_state.workflow_nodes_and_results.append(workflow_nodes_and_result)
-
-        # add steps
-        workflow_run_state.workflow_node_steps += 1
-
         # mark node as running
         if workflow_run_state.current_iteration_state:
-            workflow_run_state.workflow_node_runs.append(WorkflowRunState.NodeRun(
-                node_id=node.node_id,
-                iteration_node_id=workflow_run_state.current_iteration_state.iteration_node_id
-            ))
+            workflow_run_state.workflow_node_ran_ids.add(node.node_id)
 
         try:
             # run node, result must have inputs, process_data, outputs, execution_metadata
             node_run_result = node.run(
-                variable_pool=workflow_run_state.variable_pool
+                variable_pool=variable_pool
             )
         except GenerateTaskStoppedException as e:
             node_run_result = NodeRunResult(
@@ -870,49 +1335,18 @@ class WorkflowEngineManager:
 
         if node_run_result.outputs:
             for variable_key, variable_value in node_run_result.outputs.items():
-                # append variables to variable pool recursively
-                self._append_variables_recursively(
-                    variable_pool=workflow_run_state.variable_pool,
+                variable_pool.append_variable(
                     node_id=node.node_id,
                     variable_key_list=[variable_key],
-                    variable_value=variable_value
+                    value=variable_value
                 )
 
         if node_run_result.metadata and node_run_result.metadata.get(NodeRunMetadataKey.TOTAL_TOKENS):
-            workflow_run_state.total_tokens += int(node_run_result.metadata.get(NodeRunMetadataKey.TOTAL_TOKENS))
+            with workflow_run_state.lock:
+                workflow_run_state.total_tokens += int(node_run_result.metadata.get(NodeRunMetadataKey.TOTAL_TOKENS))
 
         db.session.close()
 
-    def _append_variables_recursively(self, variable_pool: VariablePool,
-                                      node_id: str,
-                                      variable_key_list: list[str],
-                                      variable_value: VariableValue):
-        """
-        Append variables recursively
-        :param variable_pool: variable pool
-        :param node_id: node id
-        :param variable_key_list: variable key list
-        :param variable_value: variable value
-        :return:
-        """
-        variable_pool.append_variable(
-            node_id=node_id,
-            variable_key_list=variable_key_list,
-            value=variable_value
-        )
-
-        # if variable_value is a dict, then recursively append variables
-        if isinstance(variable_value, dict):
-            for key, value in variable_value.items():
-                # construct new key list
-                new_key_list = variable_key_list + [key]
-                self._append_variables_recursively(
-                    variable_pool=variable_pool,
-                    node_id=node_id,
-                    variable_key_list=new_key_list,
-                    variable_value=value
-                )
-
     @classmethod
     def handle_special_values(cls, value: Optional[dict]) -> Optional[dict]:
         """
@@ -42,6 +42,7 @@ def init_app(app: Flask) -> Celery:
     imports = [
         "schedule.clean_embedding_cache_task",
         "schedule.clean_unused_datasets_task",
+        "tasks.flush_dataset_analytics_task",
     ]
 
     beat_schedule = {
@@ -52,6 +53,10 @@ def init_app(app: Flask) -> Celery:
         'clean_unused_datasets_task': {
             'task': 'schedule.clean_unused_datasets_task.clean_unused_datasets_task',
             'schedule': timedelta(days=1),
+        },
+        'flush_dataset_analytics_task': {
+            'task': 'tasks.flush_dataset_analytics_task.flush_dataset_analytics_task',
+            'schedule': timedelta(seconds=int(app.config.get('DATASET_ANALYTICS_FLUSH_INTERVAL', 60))),
         }
     }
     celery_app.conf.update(
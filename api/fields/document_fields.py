@@ -71,6 +71,7 @@ document_status_fields = {
     'stopped_at': TimestampField,
     'completed_segments': fields.Integer,
     'total_segments': fields.Integer,
+    'indexing_metrics': fields.Raw,
 }
 
 document_status_fields_list = {
@@ -0,0 +1,93 @@
+from collections.abc import Callable, Iterable
+from typing import Any, Optional, TypeVar
+
+T = TypeVar('T')
+
+
+class batched_property:
+    """
+    Property computed by a query per instance, that can be loaded for a batch of instances with one query.
+
+    The batch loader of the property is declared like the setter of a property, and gets the ids
+    of the instances of the batch and returns the value of the property of each of them:
+
+        @batched_property
+        def message_count(self):
+            return db.session.query(Message).filter(Message.conversation_id == self.id).count()
+
+        @message_count.batch_loader
+        def message_count(ids):
+            ...
+            return {conversation_id: count for ...}
+
+    Instances not attached to a `BatchLoader` compute the property with their own query.
+    """
+
+    def __init__(self, fget: Callable[[Any], Any], fload: Optional[Callable[[list[str]], dict]] = None) -> None:
+        self.fget = fget
+        self.fload = fload
+        self.name = fget.__name__
+        self.__doc__ = fget.__doc__
+
+    def batch_loader(self, fload: Callable[[list[str]], dict]) -> 'batched_property':
+        return type(self)(self.fget, fload)
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+
+        batch = instance.__dict__.get(BatchLoader.ATTRIBUTE)
+        if batch is None or self.fload is None:
+            return self.fget(instance)
+
+        return batch.get(instance, self)
+
+
+class BatchLoader:
+    """
+    Load the batched properties of the instances of a list, like a page of a list endpoint.
+
+    A property is loaded for all instances the first time it is read on one of them, so a page
+    marshalled with the property runs one query for it instead of one query per row, and
+    properties that are not marshalled are not queried at all.
+    """
+
+    ATTRIBUTE = '_batch_loader'
+
+    def __init__(self, instances: list) -> None:
+        self._ids = list(dict.fromkeys(instance.id for instance in instances))
+        self._values: dict[str, dict] = {}
+
+    @classmethod
+    def attach(cls, instances: Iterable[T]) -> list[T]:
+        """
+        Attach the instances to a batch
+        :param instances: instances of a model
+        :return: instances
+        """
+        instances = list(instances)
+        if not instances:
+            return instances
+
+        batch = cls(instances)
+        for instance in instances:
+            instance.__dict__[cls.ATTRIBUTE] = batch
+
+        return instances
+
+    def get(self, instance, prop: batched_property) -> Any:
+        """
+        Get the value of a batched property of an instance, loading it for the batch if needed
+        :param instance: instance
+        :param prop: batched property
+        :return:
+        """
+        if prop.name not in self._values:
+            self._values[prop.name] = prop.fload(self._ids)
+
+        values = self._values[prop.name]
+        if instance.id not in values:
+            # not in the batch when it was loaded
+            return prop.fget(instance)
+
+        return values[instance.id]
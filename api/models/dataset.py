@@ -4,7 +4,6 @@ import hmac
 import json
 import logging
 import os
-import pickle
 import re
 import time
 from json import JSONDecodeError
@@ -13,11 +12,13 @@ from flask import current_app
 from sqlalchemy import func
 from sqlalchemy.dialects.postgresql import JSONB
 
+from core.embedding.embedding_codec import decode_embedding, encode_embedding
 from core.rag.retrieval.retrival_methods import RetrievalMethod
 from extensions.ext_database import db
 from extensions.ext_storage import storage
 from models import StringUUID
 from models.account import Account
+from models.batch_loader import batched_property
 from models.model import App, Tag, TagBinding, UploadFile
 
 
@@ -75,15 +76,31 @@ class Dataset(db.Model):
         return DatasetProcessRule.query.filter(DatasetProcessRule.dataset_id == self.id) \
             .order_by(DatasetProcessRule.created_at.desc()).first()
 
-    @property
+    @batched_property
     def app_count(self):
         return db.session.query(func.count(AppDatasetJoin.id)).filter(AppDatasetJoin.dataset_id == self.id,
                                                                       App.id == AppDatasetJoin.app_id).scalar()
 
-    @property
+    @app_count.batch_loader
+    def app_count(ids):
+        app_counts = dict.fromkeys(ids, 0)
+        app_counts.update(db.session.query(AppDatasetJoin.dataset_id, func.count(AppDatasetJoin.id))
+                          .filter(AppDatasetJoin.dataset_id.in_(ids), App.id == AppDatasetJoin.app_id)
+                          .group_by(AppDatasetJoin.dataset_id).all())
+        return app_counts
+
+    @batched_property
     def document_count(self):
         return db.session.query(func.count(Document.id)).filter(Document.dataset_id == self.id).scalar()
 
+    @document_count.batch_loader
+    def document_count(ids):
+        document_counts = dict.fromkeys(ids, 0)
+        document_counts.update(db.session.query(Document.dataset_id, func.count(Document.id))
+                               .filter(Document.dataset_id.in_(ids))
+                               .group_by(Document.dataset_id).all())
+        return document_counts
+
     @property
     def available_document_count(self):
         return db.session.query(func.count(Document.id)).filter(
@@ -101,11 +118,19 @@ class Dataset(db.Model):
             DocumentSegment.enabled == True
         ).scalar()
 
-    @property
+    @batched_property
     def word_count(self):
         return Document.query.with_entities(func.coalesce(func.sum(Document.word_count))) \
             .filter(Document.dataset_id == self.id).scalar()
 
+    @word_count.batch_loader
+    def word_count(ids):
+        word_counts = dict.fromkeys(ids)
+        word_counts.update(db.session.query(Document.dataset_id, func.sum(Document.word_count))
+                           .filter(Document.dataset_id.in_(ids))
+                           .group_by(Document.dataset_id).all())
+        return word_counts
+
     @property
     def doc_form(self):
         document = db.session.query(Document).filter(
@@ -343,15 +368,31 @@ class Document(db.Model):
     def dataset(self):
         return db.session.query(Dataset).filter(Dataset.id == self.dataset_id).one_or_none()
 
-    @property
+    @batched_property
     def segment_count(self):
         return DocumentSegment.query.filter(DocumentSegment.document_id == self.id).count()
 
-    @property
+    @segment_count.batch_loader
+    def segment_count(ids):
+        segment_counts = dict.fromkeys(ids, 0)
+        segment_counts.update(db.session.query(DocumentSegment.document_id, func.count(DocumentSegment.id))
+                              .filter(DocumentSegment.document_id.in_(ids))
+                              .group_by(DocumentSegment.document_id).all())
+        return segment_counts
+
+    @batched_property
     def hit_count(self):
         return DocumentSegment.query.with_entities(func.coalesce(func.sum(DocumentSegment.hit_count))) \
             .filter(DocumentSegment.document_id == self.id).scalar()
 
+    @hit_count.batch_loader
+    def hit_count(ids):
+        hit_counts = dict.fromkeys(ids)
+        hit_counts.update(db.session.query(DocumentSegment.document_id, func.sum(DocumentSegment.hit_count))
+                          .filter(DocumentSegment.document_id.in_(ids))
+                          .group_by(DocumentSegment.document_id).all())
+        return hit_counts
+
 
 class DocumentSegment(db.Model):
     __tablename__ = 'document_segments'
@@ -531,6 +572,23 @@ class DatasetKeywordTable(db.Model):
                 return None
 
 
+class DatasetKeywordPosting(db.Model):
+    __tablename__ = 'dataset_keyword_postings'
+    __table_args__ = (
+        db.PrimaryKeyConstraint('id', name='dataset_keyword_posting_pkey'),
+        db.UniqueConstraint('dataset_id', 'keyword', 'index_node_id', name='dataset_keyword_posting_keyword_idx'),
+        db.Index('dataset_keyword_posting_node_idx', 'dataset_id', 'index_node_id'),
+    )
+
+    id = db.Column(StringUUID, primary_key=True, server_default=db.text('uuid_generate_v4()'))
+    dataset_id = db.Column(StringUUID, nullable=False)
+    keyword = db.Column(db.String(255), nullable=False)
+    index_node_id = db.Column(db.String(255), nullable=False)
+    term_frequency = db.Column(db.Integer, nullable=False, server_default=db.text('1'))
+    segment_length = db.Column(db.Integer, nullable=False, server_default=db.text('0'))
+    created_at = db.Column(db.DateTime, nullable=False, server_default=db.text('CURRENT_TIMESTAMP(0)'))
+
+
 class Embedding(db.Model):
     __tablename__ = 'embeddings'
     __table_args__ = (
@@ -548,10 +606,14 @@ class Embedding(db.Model):
                               server_default=db.text("''::character varying"))
 
     def set_embedding(self, embedding_data: list[float]):
-        self.embedding = pickle.dumps(embedding_data, protocol=pickle.HIGHEST_PROTOCOL)
+        self.embedding = encode_embedding(
+            embedding_data,
+            dtype=current_app.config.get('EMBEDDING_CACHE_DTYPE') or 'float32'
+        )
 
     def get_embedding(self) -> list[float]:
-        return pickle.loads(self.embedding)
+        # rows stored before the compact format are pickled lists and still readable
+        return decode_embedding(self.embedding).tolist()
 
 
 class DatasetCollectionBinding(db.Model):
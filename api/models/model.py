@@ -6,7 +6,7 @@ from typing import Optional
 
 from flask import current_app, request
 from flask_login import UserMixin
-from sqlalchemy import Float, text
+from sqlalchemy import Float, func, text
 
 from core.file.tool_file_parser import ToolFileParser
 from core.file.upload_file_parser import UploadFileParser
@@ -15,6 +15,7 @@ from libs.helper import generate_string
 
 from . import StringUUID
 from .account import Account, Tenant
+from .batch_loader import batched_property
 
 
 class DifySetup(db.Model):
@@ -555,19 +556,34 @@ class Conversation(db.Model):
             else:
                 return ''
 
-    @property
+    @batched_property
     def annotated(self):
         return db.session.query(MessageAnnotation).filter(MessageAnnotation.conversation_id == self.id).count() > 0
 
+    @annotated.batch_loader
+    def annotated(ids):
+        annotated_ids = {conversation_id for conversation_id, in db.session.query(MessageAnnotation.conversation_id)
+                         .filter(MessageAnnotation.conversation_id.in_(ids))
+                         .group_by(MessageAnnotation.conversation_id).all()}
+        return {conversation_id: conversation_id in annotated_ids for conversation_id in ids}
+
     @property
     def annotation(self):
         return db.session.query(MessageAnnotation).filter(MessageAnnotation.conversation_id == self.id).first()
 
-    @property
+    @batched_property
     def message_count(self):
         return db.session.query(Message).filter(Message.conversation_id == self.id).count()
 
-    @property
+    @message_count.batch_loader
+    def message_count(ids):
+        message_counts = dict.fromkeys(ids, 0)
+        message_counts.update(db.session.query(Message.conversation_id, func.count(Message.id))
+                              .filter(Message.conversation_id.in_(ids))
+                              .group_by(Message.conversation_id).all())
+        return message_counts
+
+    @batched_property
     def user_feedback_stats(self):
         like = db.session.query(MessageFeedback) \
             .filter(MessageFeedback.conversation_id == self.id,
@@ -581,7 +597,11 @@ class Conversation(db.Model):
 
         return {'like': like, 'dislike': dislike}
 
-    @property
+    @user_feedback_stats.batch_loader
+    def user_feedback_stats(ids):
+        return MessageFeedback.get_conversation_stats(ids, 'user')
+
+    @batched_property
     def admin_feedback_stats(self):
         like = db.session.query(MessageFeedback) \
             .filter(MessageFeedback.conversation_id == self.id,
@@ -595,9 +615,23 @@ class Conversation(db.Model):
 
         return {'like': like, 'dislike': dislike}
 
-    @property
+    @admin_feedback_stats.batch_loader
+    def admin_feedback_stats(ids):
+        return MessageFeedback.get_conversation_stats(ids, 'admin')
+
+    @batched_property
     def first_message(self):
-        return db.session.query(Message).filter(Message.conversation_id == self.id).first()
+        return db.session.query(Message).filter(Message.conversation_id == self.id) \
+            .order_by(Message.created_at.asc()).first()
+
+    @first_message.batch_loader
+    def first_message(ids):
+        first_messages = dict.fromkeys(ids)
+        first_messages.update((message.conversation_id, message) for message in db.session.query(Message)
+                              .filter(Message.conversation_id.in_(ids))
+                              .distinct(Message.conversation_id)
+                              .order_by(Message.conversation_id, Message.created_at.asc()).all())
+        return first_messages
 
     @property
     def app(self):
@@ -723,29 +757,51 @@ class Message(db.Model):
 
         return re_sign_file_url_answer
 
-    @property
+    @batched_property
     def user_feedback(self):
         feedback = db.session.query(MessageFeedback).filter(MessageFeedback.message_id == self.id,
                                                             MessageFeedback.from_source == 'user').first()
         return feedback
 
-    @property
+    @user_feedback.batch_loader
+    def user_feedback(ids):
+        return MessageFeedback.get_message_feedbacks(ids, 'user')
+
+    @batched_property
     def admin_feedback(self):
         feedback = db.session.query(MessageFeedback).filter(MessageFeedback.message_id == self.id,
                                                             MessageFeedback.from_source == 'admin').first()
         return feedback
 
-    @property
+    @admin_feedback.batch_loader
+    def admin_feedback(ids):
+        return MessageFeedback.get_message_feedbacks(ids, 'admin')
+
+    @batched_property
     def feedbacks(self):
         feedbacks = db.session.query(MessageFeedback).filter(MessageFeedback.message_id == self.id).all()
         return feedbacks
 
-    @property
+    @feedbacks.batch_loader
+    def feedbacks(ids):
+        feedbacks = {message_id: [] for message_id in ids}
+        for feedback in db.session.query(MessageFeedback).filter(MessageFeedback.message_id.in_(ids)).all():
+            feedbacks[feedback.message_id].append(feedback)
+        return feedbacks
+
+    @batched_property
     def annotation(self):
         annotation = db.session.query(MessageAnnotation).filter(MessageAnnotation.message_id == self.id).first()
         return annotation
 
-    @property
+    @annotation.batch_loader
+    def annotation(ids):
+        annotations = dict.fromkeys(ids)
+        for annotation in db.session.query(MessageAnnotation).filter(MessageAnnotation.message_id.in_(ids)).all():
+            annotations[annotation.message_id] = annotations[annotation.message_id] or annotation
+        return annotations
+
+    @batched_property
     def annotation_hit_history(self):
         annotation_history = (db.session.query(AppAnnotationHitHistory)
                               .filter(AppAnnotationHitHistory.message_id == self.id).first())
@@ -755,6 +811,15 @@ class Message(db.Model):
             return annotation
         return None
 
+    @annotation_hit_history.batch_loader
+    def annotation_hit_history(ids):
+        annotations = dict.fromkeys(ids)
+        for message_id, annotation in db.session.query(AppAnnotationHitHistory.message_id, MessageAnnotation) \
+                .join(MessageAnnotation, MessageAnnotation.id == AppAnnotationHitHistory.annotation_id) \
+                .filter(AppAnnotationHitHistory.message_id.in_(ids)).all():
+            annotations[message_id] = annotations[message_id] or annotation
+        return annotations
+
     @property
     def app_model_config(self):
         conversation = db.session.query(Conversation).filter(Conversation.id == self.conversation_id).first()
@@ -864,6 +929,38 @@ class MessageFeedback(db.Model):
         account = db.session.query(Account).filter(Account.id == self.from_account_id).first()
         return account
 
+    @classmethod
+    def get_conversation_stats(cls, conversation_ids: list[str], from_source: str) -> dict[str, dict]:
+        """
+        Get the like and dislike counts of conversations with one grouped query
+        :param conversation_ids: conversation ids
+        :param from_source: user or admin
+        :return: conversation id -> like and dislike counts
+        """
+        stats = {conversation_id: {'like': 0, 'dislike': 0} for conversation_id in conversation_ids}
+        rows = db.session.query(cls.conversation_id, cls.rating, func.count(cls.id)) \
+            .filter(cls.conversation_id.in_(conversation_ids),
+                    cls.from_source == from_source,
+                    cls.rating.in_(['like', 'dislike'])) \
+            .group_by(cls.conversation_id, cls.rating).all()
+        for conversation_id, rating, count in rows:
+            stats[conversation_id][rating] = count
+        return stats
+
+    @classmethod
+    def get_message_feedbacks(cls, message_ids: list[str], from_source: str) -> dict[str, Optional['MessageFeedback']]:
+        """
+        Get the feedbacks of messages with one query
+        :param message_ids: message ids
+        :param from_source: user or admin
+        :return: message id -> feedback
+        """
+        feedbacks = dict.fromkeys(message_ids)
+        for feedback in db.session.query(cls).filter(cls.message_id.in_(message_ids),
+                                                     cls.from_source == from_source).all():
+            feedbacks[feedback.message_id] = feedbacks[feedback.message_id] or feedback
+        return feedbacks
+
 
 class MessageFile(db.Model):
     __tablename__ = 'message_files'
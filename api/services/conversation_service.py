@@ -7,6 +7,7 @@ from core.llm_generator.llm_generator import LLMGenerator
 from extensions.ext_database import db
 from libs.infinite_scroll_pagination import InfiniteScrollPagination
 from models.account import Account
+from models.batch_loader import BatchLoader
 from models.model import App, Conversation, EndUser, Message
 from services.errors.conversation import ConversationNotExistsError, LastConversationNotExistsError
 from services.errors.message import MessageNotExistsError
@@ -64,7 +65,7 @@ class ConversationService:
                 has_more = True
 
         return InfiniteScrollPagination(
-            data=conversations,
+            data=BatchLoader.attach(conversations),
             limit=limit,
             has_more=has_more
         )
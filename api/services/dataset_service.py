@@ -13,6 +13,7 @@ from sqlalchemy import func
 from core.errors.error import LLMBadRequestError, ProviderTokenNotInitError
 from core.model_manager import ModelManager
 from core.model_runtime.entities.model_entities import ModelType
+from core.rag.datasource.dataset_counter import DatasetCounter
 from core.rag.datasource.keyword.keyword_factory import Keyword
 from core.rag.models.document import Document as RAGDocument
 from core.rag.retrieval.retrival_methods import RetrievalMethod
@@ -22,6 +23,7 @@ from extensions.ext_database import db
 from extensions.ext_redis import redis_client
 from libs import helper
 from models.account import Account
+from models.batch_loader import BatchLoader
 from models.dataset import (
     AppDatasetJoin,
     Dataset,
@@ -79,7 +81,7 @@ class DatasetService:
             error_out=False
         )
 
-        return datasets.items, datasets.total
+        return BatchLoader.attach(datasets.items), datasets.total
 
     @staticmethod
     def get_process_rules(dataset_id):
@@ -105,7 +107,7 @@ class DatasetService:
         datasets = Dataset.query.filter(Dataset.id.in_(ids),
                                         Dataset.tenant_id == tenant_id).paginate(
             page=1, per_page=len(ids), max_per_page=len(ids), error_out=False)
-        return datasets.items, datasets.total
+        return BatchLoader.attach(datasets.items), datasets.total
 
     @staticmethod
     def create_empty_dataset(tenant_id: str, name: str, indexing_technique: Optional[str], account: Account):
@@ -1251,6 +1253,7 @@ class SegmentService:
                 segment_document.status = 'error'
                 segment_document.error = str(e)
                 db.session.commit()
+            DatasetCounter.invalidate(dataset.id)
             segment = db.session.query(DocumentSegment).filter(DocumentSegment.id == segment_document.id).first()
             return segment
 
@@ -1317,6 +1320,7 @@ class SegmentService:
                     segment_document.status = 'error'
                     segment_document.error = str(e)
             db.session.commit()
+            DatasetCounter.invalidate(dataset.id)
             return segment_data_list
 
     @classmethod
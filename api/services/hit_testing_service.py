@@ -7,13 +7,15 @@ from sklearn.manifold import TSNE
 from core.embedding.cached_embedding import CacheEmbedding
 from core.model_manager import ModelManager
 from core.model_runtime.entities.model_entities import ModelType
+from core.rag.datasource.dataset_counter import DatasetCounter
 from core.rag.datasource.entity.embedding import Embeddings
 from core.rag.datasource.retrieval_service import RetrievalService
 from core.rag.models.document import Document
 from core.rag.retrieval.retrival_methods import RetrievalMethod
+from core.rag.retrieval.segment_hydrator import SegmentHydrator
 from extensions.ext_database import db
 from models.account import Account
-from models.dataset import Dataset, DatasetQuery, DocumentSegment
+from models.dataset import Dataset, DatasetQuery
 
 default_retrieval_model = {
     'search_method': RetrievalMethod.SEMANTIC_SEARCH,
@@ -30,7 +32,7 @@ default_retrieval_model = {
 class HitTestingService:
     @classmethod
     def retrieve(cls, dataset: Dataset, query: str, account: Account, retrieval_model: dict, limit: int = 10) -> dict:
-        if dataset.available_document_count == 0 or dataset.available_segment_count == 0:
+        if not DatasetCounter.is_available(dataset.id):
             return {
                 "query": {
                     "content": query,
@@ -69,6 +71,7 @@ class HitTestingService:
         end = time.perf_counter()
         logging.debug(f"Hit testing retrieve in {end - start:0.4f} seconds")
 
+        # written right away, the retrieval testing records show the query just tested
         dataset_query = DatasetQuery(
             dataset_id=dataset.id,
             content=query,
@@ -94,17 +97,18 @@ class HitTestingService:
 
         query_position = tsne_position_data.pop(0)
 
+        segments_by_node_id = SegmentHydrator.get_segments_by_node_id(
+            [document.metadata['doc_id'] for document in documents],
+            dataset_id=dataset.id,
+            available_only=True
+        )
+
         i = 0
         records = []
         for document in documents:
             index_node_id = document.metadata['doc_id']
 
-            segment = db.session.query(DocumentSegment).filter(
-                DocumentSegment.dataset_id == dataset.id,
-                DocumentSegment.enabled == True,
-                DocumentSegment.status == 'completed',
-                DocumentSegment.index_node_id == index_node_id
-            ).first()
+            segment = segments_by_node_id.get(index_node_id)
 
             if not segment:
                 i += 1
@@ -10,6 +10,7 @@ from core.model_runtime.entities.model_entities import ModelType
 from extensions.ext_database import db
 from libs.infinite_scroll_pagination import InfiniteScrollPagination
 from models.account import Account
+from models.batch_loader import BatchLoader
 from models.model import App, AppMode, AppModelConfig, EndUser, Message, MessageFeedback
 from services.conversation_service import ConversationService
 from services.errors.conversation import ConversationCompletedError, ConversationNotExistsError
@@ -70,7 +71,7 @@ class MessageService:
         history_messages = list(reversed(history_messages))
 
         return InfiniteScrollPagination(
-            data=history_messages,
+            data=BatchLoader.attach(history_messages),
             limit=limit,
             has_more=has_more
         )
@@ -121,7 +122,7 @@ class MessageService:
                 has_more = True
 
         return InfiniteScrollPagination(
-            data=history_messages,
+            data=BatchLoader.attach(history_messages),
             limit=limit,
             has_more=has_more
         )
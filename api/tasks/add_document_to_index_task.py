@@ -6,6 +6,7 @@ import click
 from celery import shared_task
 from werkzeug.exceptions import NotFound
 
+from core.rag.datasource.dataset_counter import DatasetCounter
 from core.rag.index_processor.index_processor_factory import IndexProcessorFactory
 from core.rag.models.document import Document
 from extensions.ext_database import db
@@ -63,6 +64,7 @@ def add_document_to_index_task(dataset_document_id: str):
         index_type = dataset.doc_form
         index_processor = IndexProcessorFactory(index_type).init_index_processor()
         index_processor.load(dataset, documents)
+        DatasetCounter.refresh(dataset.id)
 
         end_at = time.perf_counter()
         logging.info(
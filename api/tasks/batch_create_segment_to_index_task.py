@@ -10,6 +10,7 @@ from sqlalchemy import func
 from core.indexing_runner import IndexingRunner
 from core.model_manager import ModelManager
 from core.model_runtime.entities.model_entities import ModelType
+from core.rag.datasource.dataset_counter import DatasetCounter
 from extensions.ext_database import db
 from extensions.ext_redis import redis_client
 from libs import helper
@@ -91,6 +92,7 @@ def batch_create_segment_to_index_task(job_id: str, content: list, dataset_id: s
         indexing_runner = IndexingRunner()
         indexing_runner.batch_add_segments(document_segments, dataset)
         db.session.commit()
+        DatasetCounter.refresh(dataset.id)
         redis_client.setex(indexing_cache_key, 600, 'completed')
         end_at = time.perf_counter()
         logging.info(click.style('Segment batch created job: {} latency: {}'.format(job_id, end_at - start_at), fg='green'))
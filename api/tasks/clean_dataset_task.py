@@ -4,6 +4,7 @@ import time
 import click
 from celery import shared_task
 
+from core.rag.datasource.dataset_counter import DatasetCounter
 from core.rag.index_processor.index_processor_factory import IndexProcessorFactory
 from extensions.ext_database import db
 from models.dataset import (
@@ -66,6 +67,7 @@ def clean_dataset_task(dataset_id: str, tenant_id: str, indexing_technique: str,
         db.session.query(AppDatasetJoin).filter(AppDatasetJoin.dataset_id == dataset_id).delete()
 
         db.session.commit()
+        DatasetCounter.invalidate(dataset_id)
 
         end_at = time.perf_counter()
         logging.info(
@@ -4,6 +4,7 @@ import time
 import click
 from celery import shared_task
 
+from core.rag.datasource.dataset_counter import DatasetCounter
 from core.rag.index_processor.index_processor_factory import IndexProcessorFactory
 from extensions.ext_database import db
 from models.dataset import Dataset, DocumentSegment
@@ -39,6 +40,7 @@ def clean_document_task(document_id: str, dataset_id: str, doc_form: str):
                 db.session.delete(segment)
 
             db.session.commit()
+            DatasetCounter.refresh(dataset.id)
             end_at = time.perf_counter()
             logging.info(
                 click.style('Cleaned document when document deleted: {} latency: {}'.format(document_id, end_at - start_at), fg='green'))
@@ -7,6 +7,7 @@ import click
 from celery import shared_task
 from werkzeug.exceptions import NotFound
 
+from core.rag.datasource.dataset_counter import DatasetCounter
 from core.rag.index_processor.index_processor_factory import IndexProcessorFactory
 from core.rag.models.document import Document
 from extensions.ext_database import db
@@ -79,6 +80,7 @@ def create_segment_to_index_task(segment_id: str, keywords: Optional[list[str]]
         }
         DocumentSegment.query.filter_by(id=segment.id).update(update_params)
         db.session.commit()
+        DatasetCounter.refresh(dataset.id)
 
         end_at = time.perf_counter()
         logging.info(click.style('Segment created to index: {} latency: {}'.format(segment.id, end_at - start_at), fg='green'))
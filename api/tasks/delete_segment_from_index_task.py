@@ -4,6 +4,7 @@ import time
 import click
 from celery import shared_task
 
+from core.rag.datasource.dataset_counter import DatasetCounter
 from core.rag.index_processor.index_processor_factory import IndexProcessorFactory
 from extensions.ext_database import db
 from extensions.ext_redis import redis_client
@@ -42,6 +43,7 @@ def delete_segment_from_index_task(segment_id: str, index_node_id: str, dataset_
         index_type = dataset_document.doc_form
         index_processor = IndexProcessorFactory(index_type).init_index_processor()
         index_processor.clean(dataset, [index_node_id])
+        DatasetCounter.refresh(dataset.id)
 
         end_at = time.perf_counter()
         logging.info(click.style('Segment deleted from index: {} latency: {}'.format(segment_id, end_at - start_at), fg='green'))
@@ -5,6 +5,7 @@ import click
 from celery import shared_task
 from werkzeug.exceptions import NotFound
 
+from core.rag.datasource.dataset_counter import DatasetCounter
 from core.rag.index_processor.index_processor_factory import IndexProcessorFactory
 from extensions.ext_database import db
 from extensions.ext_redis import redis_client
@@ -51,6 +52,7 @@ def disable_segment_from_index_task(segment_id: str):
         index_type = dataset_document.doc_form
         index_processor = IndexProcessorFactory(index_type).init_index_processor()
         index_processor.clean(dataset, [segment.index_node_id])
+        DatasetCounter.refresh(dataset.id)
 
         end_at = time.perf_counter()
         logging.info(click.style('Segment removed from index: {} latency: {}'.format(segment.id, end_at - start_at), fg='green'))
@@ -58,5 +60,6 @@ def disable_segment_from_index_task(segment_id: str):
         logging.exception("remove segment from index failed")
         segment.enabled = True
         db.session.commit()
+        DatasetCounter.refresh(segment.dataset_id)
     finally:
         redis_client.delete(indexing_cache_key)
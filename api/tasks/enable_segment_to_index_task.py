@@ -6,6 +6,7 @@ import click
 from celery import shared_task
 from werkzeug.exceptions import NotFound
 
+from core.rag.datasource.dataset_counter import DatasetCounter
 from core.rag.index_processor.index_processor_factory import IndexProcessorFactory
 from core.rag.models.document import Document
 from extensions.ext_database import db
@@ -63,6 +64,7 @@ def enable_segment_to_index_task(segment_id: str):
         index_processor = IndexProcessorFactory(dataset_document.doc_form).init_index_processor()
         # save vector index
         index_processor.load(dataset, [document])
+        DatasetCounter.refresh(dataset.id)
 
         end_at = time.perf_counter()
         logging.info(click.style('Segment enabled to index: {} latency: {}'.format(segment.id, end_at - start_at), fg='green'))
@@ -0,0 +1,25 @@
+import logging
+import time
+
+import click
+from celery import shared_task
+
+from core.rag.retrieval.retrieval_recorder import RetrievalRecorder
+
+
+@shared_task(queue='dataset')
+def flush_dataset_analytics_task():
+    """
+    Write the buffered segment hits and dataset queries of retrievals to the database
+
+    Usage: flush_dataset_analytics_task.delay()
+    """
+    start_at = time.perf_counter()
+
+    try:
+        segment_count, query_count = RetrievalRecorder.flush()
+        end_at = time.perf_counter()
+        logging.info(click.style('Flushed hits of {} segments and {} dataset queries latency: {}'.format(
+            segment_count, query_count, end_at - start_at), fg='green'))
+    except Exception:
+        logging.exception("flush dataset analytics failed")
@@ -5,6 +5,7 @@ import click
 from celery import shared_task
 from werkzeug.exceptions import NotFound
 
+from core.rag.datasource.dataset_counter import DatasetCounter
 from core.rag.index_processor.index_processor_factory import IndexProcessorFactory
 from extensions.ext_database import db
 from extensions.ext_redis import redis_client
@@ -46,6 +47,7 @@ def remove_document_from_index_task(document_id: str):
                 index_processor.clean(dataset, index_node_ids)
             except Exception:
                 logging.exception(f"clean dataset {dataset.id} from index failed")
+        DatasetCounter.refresh(dataset.id)
 
         end_at = time.perf_counter()
         logging.info(
@@ -55,5 +57,6 @@ def remove_document_from_index_task(document_id: str):
         if not document.archived:
             document.enabled = True
             db.session.commit()
+            DatasetCounter.refresh(document.dataset_id)
     finally:
         redis_client.delete(indexing_cache_key)
@@ -10,6 +10,8 @@ from httpx import Request as HttpxRequest
 from requests import Response as RequestsResponse
 from yarl import URL
 
+from core.helper.http_client_pool import HttpClientPool
+
 MOCK = os.getenv('MOCK_SWITCH', 'false') == 'true'
 
 class MockedHttp:
@@ -81,5 +83,6 @@ def setup_http_mock(request, monkeypatch: MonkeyPatch):
 
     monkeypatch.setattr(requests, "request", MockedHttp.requests_request)
     monkeypatch.setattr(httpx, "request", MockedHttp.httpx_request)
+    monkeypatch.setattr(HttpClientPool, "request", MockedHttp.httpx_request)
     yield
     monkeypatch.undo()
\ No newline at end of file
@@ -0,0 +1,80 @@
+import threading
+import time
+from unittest.mock import MagicMock
+
+from flask import Flask
+
+from core.agent.fc_agent_runner import FunctionCallAgentRunner
+from core.tools.entities.tool_entities import ToolInvokeMeta
+from core.tools.tool_engine import ToolEngine
+
+
+def _runner() -> FunctionCallAgentRunner:
+    runner = FunctionCallAgentRunner.__new__(FunctionCallAgentRunner)
+    runner.user_id = 'user'
+    runner.tenant_id = 'tenant'
+    runner.message = MagicMock()
+    runner.application_generate_entity = MagicMock()
+    runner.agent_callback = MagicMock()
+    return runner
+
+
+def _tool(name: str) -> MagicMock:
+    tool = MagicMock()
+    tool.identity.name = name
+    return tool
+
+
+def _mock_agent_invoke(monkeypatch, delays: dict[str, float]) -> list[str]:
+    running = []
+    lock = threading.Lock()
+
+    def agent_invoke(tool, tool_parameters, **kwargs):
+        with lock:
+            running.append(tool.identity.name)
+        time.sleep(delays[tool.identity.name])
+        return f"{tool.identity.name}: {tool_parameters['query']}", [], ToolInvokeMeta.empty()
+
+    monkeypatch.setattr(ToolEngine, 'agent_invoke', agent_invoke)
+    return running
+
+
+def test_invoke_tools_concurrently_in_order(monkeypatch):
+    _mock_agent_invoke(monkeypatch, {'slow': 0.3, 'fast': 0.1, 'search': 0.2})
+    tool_calls = [
+        ('call-1', 'slow', {'query': 'a'}),
+        ('call-2', 'unknown', {'query': 'b'}),
+        ('call-3', 'fast', {'query': 'c'}),
+        ('call-4', 'search', {'query': 'd'}),
+    ]
+    tool_instances = {name: _tool(name) for name in ('slow', 'fast', 'search')}
+
+    with Flask(__name__).app_context():
+        started_at = time.perf_counter()
+        results = _runner()._invoke_tools(tool_calls, tool_instances)
+        elapsed = time.perf_counter() - started_at
+
+    assert [result[0] if result else None for result in results] == ['slow: a', None, 'fast: c', 'search: d']
+    # the round takes as long as the slowest tool call, not the sum of them
+    assert elapsed < 0.5
+
+
+def test_invoke_tools_with_bounded_pool_and_timeout(monkeypatch):
+    _mock_agent_invoke(monkeypatch, {'slow': 1.5, 'fast': 0.6})
+    tool_calls = [
+        ('call-1', 'fast', {'query': 'a'}),
+        ('call-2', 'fast', {'query': 'b'}),
+        ('call-3', 'slow', {'query': 'c'}),
+    ]
+    tool_instances = {name: _tool(name) for name in ('slow', 'fast')}
+    app = Flask(__name__)
+    app.config['AGENT_TOOL_CALL_MAX_WORKERS'] = 2
+    app.config['AGENT_TOOL_CALL_TIMEOUT'] = 1
+
+    with app.app_context():
+        results = _runner()._invoke_tools(tool_calls, tool_instances)
+
+    # the slow tool call waits for a worker of the pool before its timeout starts
+    assert [result[0] for result in results[:2]] == ['fast: a', 'fast: b']
+    assert results[2][0] == 'tool invoke error: tool slow timed out after 1 seconds'
+    assert results[2][2].error == 'tool slow timed out after 1 seconds'
@@ -0,0 +1,92 @@
+from unittest.mock import MagicMock
+
+import pytest
+from flask import Flask
+
+from core.app.apps import base_app_queue_manager, task_stop_listener
+from core.app.apps.base_app_queue_manager import PublishFrom
+from core.app.apps.message_based_app_queue_manager import MessageBasedAppQueueManager
+from core.app.apps.task_stop_listener import TaskStopListener
+from core.app.entities.app_invoke_entities import InvokeFrom
+from core.app.entities.queue_entities import (
+    QueueLLMChunkEvent,
+    QueueMessageEndEvent,
+    QueuePingEvent,
+    QueueStopEvent,
+)
+from core.model_runtime.entities.llm_entities import LLMResultChunk, LLMResultChunkDelta
+from core.model_runtime.entities.message_entities import AssistantPromptMessage
+
+
+@pytest.fixture
+def redis_client(monkeypatch):
+    redis_client = MagicMock()
+    redis_client.get.return_value = None
+    monkeypatch.setattr(base_app_queue_manager, 'redis_client', redis_client)
+    monkeypatch.setattr(task_stop_listener, 'redis_client', redis_client)
+    # stop signals are set on the flags directly
+    monkeypatch.setattr(TaskStopListener, '_ensure_thread', MagicMock())
+    return redis_client
+
+
+def _queue_manager(task_id: str) -> MessageBasedAppQueueManager:
+    return MessageBasedAppQueueManager(task_id=task_id, user_id='user', invoke_from=InvokeFrom.SERVICE_API,
+                                       conversation_id='conversation', app_mode='chat', message_id='message')
+
+
+def _chunk_event(content: str, finish_reason=None) -> QueueLLMChunkEvent:
+    return QueueLLMChunkEvent(chunk=LLMResultChunk(
+        model='model',
+        prompt_messages=[],
+        delta=LLMResultChunkDelta(index=0, message=AssistantPromptMessage(content=content),
+                                  finish_reason=finish_reason)
+    ))
+
+
+def test_coalesce_queued_chunks(redis_client):
+    queue_manager = _queue_manager('task-1')
+    for content in ['He', 'llo', ' wor']:
+        queue_manager.publish(_chunk_event(content), PublishFrom.APPLICATION_MANAGER)
+    queue_manager.publish(QueuePingEvent(), PublishFrom.APPLICATION_MANAGER)
+    queue_manager.publish(_chunk_event('ld', finish_reason='stop'), PublishFrom.APPLICATION_MANAGER)
+    queue_manager.publish(_chunk_event('!'), PublishFrom.APPLICATION_MANAGER)
+    queue_manager.publish(QueueMessageEndEvent(), PublishFrom.APPLICATION_MANAGER)
+
+    app = Flask(__name__)
+    app.config['APP_MAX_EXECUTION_TIME'] = 1200
+    with app.app_context():
+        events = [message.event for message in queue_manager.listen()]
+
+    assert [type(event) for event in events] == [QueueLLMChunkEvent, QueuePingEvent, QueueLLMChunkEvent,
+                                                 QueueLLMChunkEvent, QueueMessageEndEvent]
+    assert [event.chunk.delta.message.content for event in events if isinstance(event, QueueLLMChunkEvent)] \
+           == ['Hello wor', 'ld', '!']
+    assert events[2].chunk.delta.finish_reason == 'stop'
+    # the stop flag is read from redis once, not for every message
+    assert redis_client.get.call_count == 1
+
+
+def test_stop_by_signal(redis_client):
+    queue_manager = _queue_manager('task-2')
+    assert not queue_manager._is_stopped()
+
+    # the signal of another process sets the local flag
+    TaskStopListener.register('task-2').set()
+    queue_manager.publish(_chunk_event('text'), PublishFrom.TASK_PIPELINE)
+
+    app = Flask(__name__)
+    app.config['APP_MAX_EXECUTION_TIME'] = 1200
+    with app.app_context():
+        events = [message.event for message in queue_manager.listen()]
+
+    assert isinstance(events[-1], QueueStopEvent)
+    assert redis_client.get.call_count == 1
+
+
+def test_set_stop_flag_publishes_signal(redis_client):
+    _queue_manager('task-3')
+    redis_client.get.return_value = b'end-user-user'
+
+    MessageBasedAppQueueManager.set_stop_flag('task-3', InvokeFrom.SERVICE_API, 'user')
+
+    redis_client.publish.assert_called_once_with(TaskStopListener.CHANNEL, 'task-3')
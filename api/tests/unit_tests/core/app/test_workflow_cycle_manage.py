@@ -0,0 +1,25 @@
+from core.app.entities.task_entities import NodeExecutionInfo, WorkflowTaskState
+from core.app.task_pipeline.workflow_cycle_manage import WorkflowCycleManage
+from core.workflow.entities.node_entities import NodeType
+
+
+def _node_execution_info(node_execution_id: str, node_type: NodeType) -> NodeExecutionInfo:
+    return NodeExecutionInfo(workflow_node_execution_id=node_execution_id, node_type=node_type, start_at=0)
+
+
+def test_output_node_execution_info():
+    cycle_manage = WorkflowCycleManage()
+    cycle_manage._task_state = WorkflowTaskState(ran_node_execution_infos={})
+
+    # linear graphs without end node, like chatflows, output the latest node
+    llm_info = _node_execution_info('llm', NodeType.LLM)
+    cycle_manage._task_state.ran_node_execution_infos['llm'] = llm_info
+    cycle_manage._task_state.latest_node_execution_info = llm_info
+    assert cycle_manage._get_output_node_execution_info() is llm_info
+
+    # a node of a parallel branch started after the end node does not replace its outputs
+    end_info = _node_execution_info('end', NodeType.END)
+    code_info = _node_execution_info('code', NodeType.CODE)
+    cycle_manage._task_state.ran_node_execution_infos.update({'end': end_info, 'code': code_info})
+    cycle_manage._task_state.latest_node_execution_info = code_info
+    assert cycle_manage._get_output_node_execution_info() is end_info
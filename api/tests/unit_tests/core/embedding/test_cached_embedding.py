@@ -0,0 +1,121 @@
+from unittest.mock import MagicMock
+
+import pytest
+from flask import Flask
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import IntegrityError
+
+from core.embedding import cached_embedding as cached_embedding_module
+from core.embedding.cached_embedding import CacheEmbedding
+from core.embedding.embedding_codec import encode_embedding
+from core.model_runtime.entities.model_entities import ModelPropertyKey
+from libs import helper
+
+# unit vectors, so normalized embeddings equal the model output
+VECTORS = {
+    'a': [1.0, 0.0],
+    'b': [0.0, 1.0],
+    'c': [-1.0, 0.0],
+}
+
+
+def _create_model_instance() -> MagicMock:
+    model_instance = MagicMock()
+    model_instance.provider = 'openai'
+    model_instance.model = 'text-embedding-ada-002'
+    model_instance.model_type_instance.get_model_schema.return_value.model_properties = {
+        ModelPropertyKey.MAX_CHUNKS: 10
+    }
+    model_instance.invoke_text_embedding.side_effect = \
+        lambda texts, user=None: MagicMock(embeddings=[VECTORS[text] for text in texts])
+    return model_instance
+
+
+@pytest.fixture
+def session(monkeypatch):
+    session = MagicMock()
+    session.query.return_value.filter.return_value.all.return_value = []
+    monkeypatch.setattr(cached_embedding_module.db, 'session', session)
+    monkeypatch.setattr(CacheEmbedding, '_lru_cache', None)
+    return session
+
+
+def _app(lru_size: int = 0) -> Flask:
+    app = Flask(__name__)
+    app.config['EMBEDDING_CACHE_LRU_SIZE'] = lru_size
+    return app
+
+
+def test_embed_duplicate_texts(session):
+    model_instance = _create_model_instance()
+
+    with _app().app_context():
+        embeddings = CacheEmbedding(model_instance).embed_documents(['a', 'b', 'a'])
+
+    assert embeddings == [VECTORS['a'], VECTORS['b'], VECTORS['a']]
+    # each distinct text is embedded and stored once
+    model_instance.invoke_text_embedding.assert_called_once_with(texts=['a', 'b'], user=None)
+    statement = session.execute.call_args.args[0]
+    assert len(statement.compile(dialect=postgresql.dialect()).params) == 2 * 4
+
+
+def test_embed_partial_cache_hit(session):
+    session.query.return_value.filter.return_value.all.return_value = [
+        (helper.generate_text_hash('b'), encode_embedding(VECTORS['b']))
+    ]
+    model_instance = _create_model_instance()
+
+    with _app().app_context():
+        embeddings = CacheEmbedding(model_instance).embed_documents(['a', 'b', 'c'])
+
+    assert embeddings == [VECTORS['a'], VECTORS['b'], VECTORS['c']]
+    # only the texts missing from the embeddings table are embedded
+    model_instance.invoke_text_embedding.assert_called_once_with(texts=['a', 'c'], user=None)
+    session.commit.assert_called_once()
+
+
+def test_embed_lru_cache_hit_and_eviction(session):
+    model_instance = _create_model_instance()
+
+    with _app(lru_size=2).app_context():
+        cache_embedding = CacheEmbedding(model_instance)
+        cache_embedding.embed_documents(['a', 'b'])
+        session.query.reset_mock()
+
+        # served from the in-process cache without a query
+        assert cache_embedding.embed_documents(['b']) == [VECTORS['b']]
+        session.query.assert_not_called()
+        # hits return the cached list, without converting it again
+        assert cache_embedding.embed_documents(['b'])[0] is cache_embedding.embed_documents(['b'])[0]
+
+        # 'a' is the least recently used and is evicted by 'c'
+        cache_embedding.embed_documents(['c'])
+        session.query.reset_mock()
+        model_instance.invoke_text_embedding.reset_mock()
+
+        assert cache_embedding.embed_documents(['a', 'b', 'c']) == [VECTORS['a'], VECTORS['b'], VECTORS['c']]
+        filter_args = session.query.return_value.filter.call_args.args
+        assert filter_args[2].right.value == [helper.generate_text_hash('a')]
+        model_instance.invoke_text_embedding.assert_called_once_with(texts=['a'], user=None)
+
+
+def test_embed_insert_conflict(session):
+    model_instance = _create_model_instance()
+
+    with _app(lru_size=10).app_context():
+        cache_embedding = CacheEmbedding(model_instance)
+        assert cache_embedding.embed_documents(['a']) == [VECTORS['a']]
+
+        # embeddings stored concurrently by another worker are skipped
+        sql = str(session.execute.call_args.args[0].compile(dialect=postgresql.dialect()))
+        assert 'ON CONFLICT (model_name, hash, provider_name) DO NOTHING' in sql
+
+        # a conflict still raised by the database is rolled back, and the embeddings are returned and cached
+        session.execute.side_effect = IntegrityError('INSERT', {}, Exception())
+        assert cache_embedding.embed_documents(['b']) == [VECTORS['b']]
+        session.rollback.assert_called_once()
+        session.commit.assert_called_once()
+
+        session.query.reset_mock()
+        assert cache_embedding.embed_documents(['b']) == [VECTORS['b']]
+        session.query.assert_not_called()
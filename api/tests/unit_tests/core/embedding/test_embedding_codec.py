@@ -0,0 +1,41 @@
+import base64
+import pickle
+
+import numpy as np
+import pytest
+
+from core.embedding.embedding_codec import (
+    decode_cached_query_embedding,
+    decode_embedding,
+    encode_embedding,
+    is_compact_embedding,
+)
+
+embedding = [0.125, -0.25, 0.5, 1.0]
+
+
+@pytest.mark.parametrize('dtype', ['float32', 'float16'])
+def test_encode_and_decode_embedding(dtype):
+    data = encode_embedding(embedding, dtype=dtype)
+
+    assert is_compact_embedding(data)
+    assert len(data) == 4 + len(embedding) * np.dtype(dtype).itemsize
+    assert decode_embedding(data).tolist() == embedding
+
+
+def test_decode_legacy_embedding():
+    data = pickle.dumps(embedding, protocol=pickle.HIGHEST_PROTOCOL)
+
+    assert not is_compact_embedding(data)
+    assert decode_embedding(data).tolist() == embedding
+
+
+def test_decode_cached_query_embedding():
+    legacy_data = base64.b64encode(np.array(embedding).tobytes())
+    assert decode_cached_query_embedding(legacy_data).tolist() == embedding
+    assert decode_cached_query_embedding(encode_embedding(embedding)).tolist() == embedding
+
+
+def test_encode_unsupported_dtype():
+    with pytest.raises(ValueError):
+        encode_embedding(embedding, dtype='int8')
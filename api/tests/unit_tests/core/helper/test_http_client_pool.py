@@ -0,0 +1,76 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from core.helper import http_client_pool
+from core.helper.http_client_pool import HttpClientPool
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    active = 0
+    max_active = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with _Handler.lock:
+            _Handler.active += 1
+            _Handler.max_active = max(_Handler.max_active, _Handler.active)
+        if self.path == '/slow':
+            time.sleep(0.2)
+        with _Handler.lock:
+            _Handler.active -= 1
+
+        body = (self.headers.get('Cookie') or '').encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Set-Cookie', 'session=secret')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    HttpClientPool.close()
+    server.shutdown()
+    server.server_close()
+
+
+def test_reuse_connections(server_url):
+    metrics = HttpClientPool.get_metrics()
+
+    responses = [HttpClientPool.request('GET', f'{server_url}/') for _ in range(5)]
+
+    assert all(response.status_code == 200 for response in responses)
+    assert HttpClientPool.get_metrics()['requests'] - metrics['requests'] == 5
+    assert HttpClientPool.get_metrics()['new_connections'] - metrics['new_connections'] == 1
+
+
+def test_do_not_store_response_cookies(server_url):
+    HttpClientPool.request('GET', f'{server_url}/')
+
+    assert HttpClientPool.request('GET', f'{server_url}/').text == ''
+    assert HttpClientPool.request('GET', f'{server_url}/', headers={'Cookie': 'a=b'}).text == 'a=b'
+
+
+def test_limit_connections_per_host(server_url, monkeypatch):
+    monkeypatch.setattr(http_client_pool, 'HTTP_CLIENT_MAX_CONNECTIONS_PER_HOST', 2)
+    _Handler.max_active = 0
+
+    threads = [threading.Thread(target=HttpClientPool.request, args=('GET', f'{server_url}/slow'))
+               for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert _Handler.max_active == 2
@@ -0,0 +1,39 @@
+from unittest.mock import MagicMock
+
+from core.memory.token_counter import PromptMessageTokenCounter
+from core.model_runtime.entities.message_entities import AssistantPromptMessage, UserPromptMessage
+
+
+def _model_instance() -> MagicMock:
+    model_instance = MagicMock()
+    model_instance.provider = 'test-provider'
+    model_instance.model = 'test-model'
+    # 3 tokens of overhead per request and 1 token per character
+    model_instance.get_llm_num_tokens.side_effect = \
+        lambda prompt_messages: 3 + sum(len(prompt_message.content) for prompt_message in prompt_messages)
+    return model_instance
+
+
+def test_prune_messages():
+    prompt_messages = [
+        UserPromptMessage(content='a' * 10),
+        AssistantPromptMessage(content='b' * 10),
+        UserPromptMessage(content='c' * 10),
+        AssistantPromptMessage(content='d' * 10),
+    ]
+    model_instance = _model_instance()
+    token_counter = PromptMessageTokenCounter(model_instance)
+
+    assert token_counter.prune_messages(prompt_messages, max_token_limit=100) == prompt_messages
+    assert token_counter.prune_messages(prompt_messages, max_token_limit=23) == prompt_messages[2:]
+    assert token_counter.prune_messages(prompt_messages, max_token_limit=1) == []
+
+
+def test_message_num_tokens_cached():
+    model_instance = _model_instance()
+    token_counter = PromptMessageTokenCounter(model_instance)
+
+    prompt_message = UserPromptMessage(content='cached message')
+    assert token_counter.get_message_num_tokens(prompt_message) == 17
+    assert PromptMessageTokenCounter(model_instance).get_message_num_tokens(prompt_message) == 17
+    assert model_instance.get_llm_num_tokens.call_count == 1
@@ -0,0 +1,77 @@
+import random
+import time
+from unittest.mock import MagicMock
+
+from flask import Flask
+
+from core.app.apps.base_app_queue_manager import AppQueueManager
+from core.moderation.base import ModerationAction, ModerationOutputsResult
+from core.moderation.keywords.keywords_matcher import KeywordsMatcher
+from core.moderation.output_moderation import ModerationRule, OutputModeration
+
+
+def test_keywords_matcher():
+    keywords = ['he', 'she', 'his', 'hers', 'Ölfeld', 'abcd', 'bc']
+    matcher = KeywordsMatcher(keywords)
+    rng = random.Random(0)
+
+    for _ in range(2000):
+        text = ''.join(rng.choices('hesirabcdÖLFEöld ', k=rng.randint(0, 12)))
+        assert matcher.match(text) == any(keyword.lower() in text.lower() for keyword in keywords), text
+
+    assert KeywordsMatcher.from_config('foo\n\nbar') is KeywordsMatcher.from_config('foo\n\nbar')
+    assert not KeywordsMatcher.from_config('').match('anything')
+
+
+def _output_moderation(monkeypatch, flagged_word: str) -> tuple[OutputModeration, list[str]]:
+    windows = []
+
+    def moderation(self, tenant_id, app_id, moderation_buffer):
+        windows.append(moderation_buffer)
+        return ModerationOutputsResult(flagged=flagged_word in moderation_buffer,
+                                       action=ModerationAction.DIRECT_OUTPUT,
+                                       preset_response='moderated')
+
+    output_moderation = OutputModeration(tenant_id='tenant', app_id='app',
+                                         rule=ModerationRule(type='keywords', config={}),
+                                         queue_manager=MagicMock(spec=AppQueueManager))
+    monkeypatch.setattr(OutputModeration, 'moderation', moderation)
+    return output_moderation, windows
+
+
+def test_moderate_incremental_windows(monkeypatch):
+    app = Flask(__name__)
+    app.config['OUTPUT_MODERATION_BUFFER_SIZE'] = 10
+    app.config['OUTPUT_MODERATION_BUFFER_OVERLAP'] = 3
+    output_moderation, windows = _output_moderation(monkeypatch, 'forbidden')
+
+    with app.app_context():
+        for token in ['0123456789', 'abcdefghij', 'klmnopqrs']:
+            output_moderation.append_new_token(token)
+            # wait for the window to be moderated
+            while output_moderation.moderated_length < len(output_moderation.buffer) - 9:
+                time.sleep(0.01)
+        output_moderation.stop_thread()
+        output_moderation.thread.join()
+
+    assert windows == ['0123456789', '789abcdefghij']
+    assert not output_moderation.should_direct_output()
+
+
+def test_flag_content_split_between_windows(monkeypatch):
+    app = Flask(__name__)
+    app.config['OUTPUT_MODERATION_BUFFER_SIZE'] = 10
+    app.config['OUTPUT_MODERATION_BUFFER_OVERLAP'] = 8
+    output_moderation, windows = _output_moderation(monkeypatch, 'forbidden')
+
+    with app.app_context():
+        output_moderation.append_new_token('text forb')
+        output_moderation.append_new_token('i')
+        while output_moderation.moderated_length < 10:
+            time.sleep(0.01)
+        output_moderation.append_new_token('dden words')
+        output_moderation.thread.join(timeout=5)
+
+    assert windows == ['text forbi', 'xt forbidden words']
+    assert output_moderation.get_final_output() == 'moderated'
+    output_moderation.queue_manager.publish.assert_called_once()
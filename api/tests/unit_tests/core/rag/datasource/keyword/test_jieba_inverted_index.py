@@ -0,0 +1,48 @@
+from unittest.mock import MagicMock
+
+from sqlalchemy.dialects import postgresql
+
+from core.rag.datasource.keyword.jieba import jieba_inverted_index as jieba_inverted_index_module
+from core.rag.datasource.keyword.jieba.jieba_inverted_index import JiebaInvertedIndex
+from models.dataset import Dataset
+
+
+def test_score_postings():
+    postings = [
+        # keyword, index node id, term frequency, segment length
+        ('dify', 'node-1', 1, 100),
+        ('dify', 'node-2', 3, 100),
+        ('dify', 'node-3', 1, 100),
+        ('workflow', 'node-1', 1, 100),
+    ]
+    scores = JiebaInvertedIndex.score_postings(postings, segment_count=10, average_segment_length=100)
+
+    # rare keywords weigh more than common ones
+    assert scores['node-1'] > scores['node-2'] > scores['node-3']
+
+
+def test_score_postings_segment_length():
+    postings = [
+        ('dify', 'short', 1, 50),
+        ('dify', 'long', 1, 500),
+    ]
+    scores = JiebaInvertedIndex.score_postings(postings, segment_count=10, average_segment_length=100)
+
+    assert scores['short'] > scores['long']
+
+
+def test_save_postings_truncated_keywords(monkeypatch):
+    session = MagicMock()
+    monkeypatch.setattr(jieba_inverted_index_module.db, 'session', session)
+    monkeypatch.setattr(jieba_inverted_index_module, 'redis_client', MagicMock())
+    long_keyword = 'a' * 300
+
+    JiebaInvertedIndex(Dataset(id='dataset-1'))._save_postings(
+        {'node-1': [long_keyword, long_keyword + 'b', 'dify', 'dify', '']},
+        {'node-1': 'dify'}
+    )
+
+    # keywords sharing the first 255 chars are saved once, an upsert cannot affect a row twice
+    params = session.execute.call_args.args[0].compile(dialect=postgresql.dialect()).params
+    keywords = [value for key, value in params.items() if key.startswith('keyword')]
+    assert sorted(keywords) == sorted(['a' * 255, 'dify'])
@@ -0,0 +1,49 @@
+from unittest.mock import MagicMock
+
+from flask import Flask
+
+from core.rag.datasource import dataset_counter
+from core.rag.datasource.dataset_counter import EMPTY_DATASET_CACHE_TTL, DatasetCounter
+
+
+def _mock_db_and_redis(monkeypatch, counts: list[int]) -> tuple[MagicMock, dict]:
+    db = MagicMock()
+    db.session.query.return_value.filter.return_value.scalar.side_effect = lambda: counts.pop(0)
+    monkeypatch.setattr(dataset_counter, 'db', db)
+
+    cache = {}
+    redis_client = MagicMock()
+    redis_client.mget.side_effect = lambda keys: [cache.get(key, (None,))[0] for key in keys]
+    redis_client.setex.side_effect = lambda key, ttl, value: cache.__setitem__(key, (value.encode('utf-8'), ttl))
+    redis_client.delete.side_effect = lambda key: cache.pop(key, None)
+    monkeypatch.setattr(dataset_counter, 'redis_client', redis_client)
+    return db, cache
+
+
+def test_counts_cached(monkeypatch):
+    db, cache = _mock_db_and_redis(monkeypatch, [3, 120])
+
+    app = Flask(__name__)
+    app.config['DATASET_COUNTER_CACHE_TTL'] = 300
+    with app.app_context():
+        assert DatasetCounter.get('dataset-1') == (3, 120)
+        assert DatasetCounter.is_available('dataset-1')
+
+    # counted once, the second check reads the cache
+    assert db.session.query.call_count == 2
+    assert cache['dataset_counter:dataset-1'][1] == 300
+
+
+def test_refresh_and_invalidate(monkeypatch):
+    db, cache = _mock_db_and_redis(monkeypatch, [3, 120, 0, 0, 1, 10])
+
+    with Flask(__name__).app_context():
+        assert DatasetCounter.get('dataset-1') == (3, 120)
+
+        # all documents disabled
+        assert DatasetCounter.refresh('dataset-1') == (0, 0)
+        assert not DatasetCounter.is_available('dataset-1')
+        assert cache['dataset_counter:dataset-1'][1] == EMPTY_DATASET_CACHE_TTL
+
+        DatasetCounter.invalidate('dataset-1')
+        assert DatasetCounter.get_many(['dataset-1']) == {'dataset-1': (1, 10)}
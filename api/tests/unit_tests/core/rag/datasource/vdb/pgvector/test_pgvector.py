@@ -0,0 +1,51 @@
+import threading
+from unittest.mock import MagicMock
+
+import psycopg2.pool
+import pytest
+
+from core.rag.datasource.vdb.pgvector.pgvector import BlockingConnectionPool, PGVector
+
+
+def _create_pool(monkeypatch, maxconn: int) -> BlockingConnectionPool:
+    monkeypatch.setattr(psycopg2.pool.psycopg2, 'connect', lambda *args, **kwargs: MagicMock(closed=False))
+    return BlockingConnectionPool(1, maxconn, timeout=0.1)
+
+
+def test_getconn_waits_for_returned_connection(monkeypatch):
+    pool = _create_pool(monkeypatch, 1)
+    conn = pool.getconn()
+
+    # exhausted pool raises after the timeout
+    with pytest.raises(psycopg2.pool.PoolError):
+        pool.getconn()
+
+    # a connection returned while waiting is handed over
+    pool._timeout = 5
+    timer = threading.Timer(0.05, pool.putconn, args=(conn,))
+    timer.start()
+    assert pool.getconn() is not None
+    timer.join()
+
+
+def test_health_check_of_busy_pool(monkeypatch):
+    pool = _create_pool(monkeypatch, 1)
+    pool.getconn()
+
+    # does not wait for a connection, a busy pool is healthy
+    assert PGVector._check_connection_pool(pool)
+
+
+def test_health_check_of_stale_connection(monkeypatch):
+    pool = _create_pool(monkeypatch, 2)
+    in_use = pool.getconn()
+    stale = pool.getconn()
+    stale.cursor.return_value.__enter__.return_value.execute.side_effect = psycopg2.OperationalError()
+    pool.putconn(stale)
+
+    # only the stale connection is discarded, the pool and connections in use stay open
+    assert PGVector._check_connection_pool(pool)
+    stale.close.assert_called_once()
+    assert not pool.closed
+    pool.putconn(in_use)
+    assert pool.getconn() is in_use
@@ -0,0 +1,55 @@
+from unittest.mock import MagicMock
+
+from pydantic import BaseModel
+
+from core.rag.datasource.vdb import vector_client_registry
+from core.rag.datasource.vdb.vector_client_registry import VectorClientRegistry
+
+
+class ClientConfig(BaseModel):
+    host: str
+
+
+def test_shared_client(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(vector_client_registry.time, 'monotonic', lambda: now[0])
+    VectorClientRegistry.close_all()
+
+    close_client = MagicMock()
+    health_check = MagicMock(return_value=True)
+
+    def get_client(host: str = 'localhost'):
+        return VectorClientRegistry.get_client(
+            'test',
+            ClientConfig(host=host),
+            create_client=object,
+            health_check=health_check,
+            close_client=close_client
+        )
+
+    # clients are shared by vector type and config
+    client = get_client()
+    assert get_client() is client
+    assert get_client('remote') is not client
+
+    # unhealthy clients are recreated after the health check interval,
+    # but not closed as vector instances may still use them
+    now[0] += 60
+    health_check.return_value = False
+    new_client = get_client()
+    assert new_client is not client
+    close_client.assert_not_called()
+
+    # idle clients are dropped, and not closed either
+    now[0] += 3600
+    health_check.return_value = True
+    assert get_client() is not new_client
+    close_client.assert_not_called()
+
+    metrics = {metric['config_hash']: metric for metric in VectorClientRegistry.get_metrics()}
+    assert len(metrics) == 1
+    assert next(iter(metrics.values()))['created_count'] == 1
+
+    # clients still registered are closed on shutdown
+    VectorClientRegistry.close_all()
+    close_client.assert_called_once()
@@ -0,0 +1,84 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.rag.docstore import dataset_docstore as dataset_docstore_module
+from core.rag.docstore.dataset_docstore import DatasetDocumentStore
+from core.rag.models.document import Document
+from models.dataset import Dataset, DocumentSegment
+
+
+def _document(doc_id: str, content: str, **metadata) -> Document:
+    return Document(page_content=content, metadata={'doc_id': doc_id, 'doc_hash': f'{doc_id}-hash', **metadata})
+
+
+@pytest.fixture
+def session(monkeypatch):
+    session = MagicMock()
+    session.query.return_value.filter.return_value.all.return_value = []
+    monkeypatch.setattr(dataset_docstore_module.db, 'session', session)
+    return session
+
+
+def _docstore() -> DatasetDocumentStore:
+    dataset = Dataset(id='dataset-1', tenant_id='tenant-1')
+    return DatasetDocumentStore(dataset=dataset, user_id='user-1', document_id='document-1')
+
+
+def _inserted_segments(session) -> list[dict]:
+    assert session.execute.call_count == 1
+    return session.execute.call_args.args[1]
+
+
+def test_add_new_segments(session):
+    embedding_model = MagicMock()
+    embedding_model.get_text_embedding_num_tokens_list.return_value = [3, 5, 7]
+    docs = [
+        _document('doc-1', 'one'),
+        _document('doc-2', 'three', answer='answer'),
+        _document('doc-1', 'seven'),
+    ]
+
+    max_position = _docstore()._add_document_batch(docs, embedding_model, 4, allow_update=True)
+
+    # token counts of the whole batch are computed with one call
+    embedding_model.get_text_embedding_num_tokens_list.assert_called_once_with(texts=['one', 'three', 'seven'])
+    segments = _inserted_segments(session)
+    # positions continue after the segments of the document, a repeated doc id updates its new segment
+    assert [(s['index_node_id'], s['position'], s['content'], s['tokens']) for s in segments] == [
+        ('doc-1', 5, 'seven', 7),
+        ('doc-2', 6, 'three', 5),
+    ]
+    assert segments[1]['answer'] == 'answer'
+    assert segments[0]['word_count'] == len('seven')
+    assert all(
+        s['dataset_id'] == 'dataset-1' and s['document_id'] == 'document-1' and s['created_by'] == 'user-1'
+        for s in segments
+    )
+    assert max_position == 6
+    session.commit.assert_called_once()
+
+
+def test_update_existing_segments(session):
+    existing_segment = DocumentSegment(index_node_id='doc-1', content='old', position=1, tokens=1)
+    session.query.return_value.filter.return_value.all.return_value = [existing_segment]
+    docs = [_document('doc-1', 'updated'), _document('doc-2', 'new')]
+
+    max_position = _docstore()._add_document_batch(docs, None, 1, allow_update=True)
+
+    # existing segments keep their position, only new segments are inserted
+    assert existing_segment.content == 'updated'
+    assert existing_segment.index_node_hash == 'doc-1-hash'
+    assert existing_segment.position == 1
+    segments = _inserted_segments(session)
+    assert [(s['index_node_id'], s['position'], s['tokens']) for s in segments] == [('doc-2', 2, 0)]
+    assert max_position == 2
+
+
+def test_existing_segments_without_update(session):
+    session.query.return_value.filter.return_value.all.return_value = [DocumentSegment(index_node_id='doc-1')]
+
+    with pytest.raises(ValueError):
+        _docstore()._add_document_batch([_document('doc-1', 'one')], None, 0, allow_update=False)
+
+    session.execute.assert_not_called()
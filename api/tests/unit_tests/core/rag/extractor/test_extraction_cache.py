@@ -0,0 +1,85 @@
+from unittest.mock import MagicMock
+
+from flask import Flask
+
+from core.rag.extractor import extraction_cache
+from core.rag.extractor.extraction_cache import ExtractionCache
+from core.rag.extractor.extractor_base import BaseExtractor
+from core.rag.models.document import Document
+
+
+class _Extractor(BaseExtractor):
+    def __init__(self) -> None:
+        self.extract_count = 0
+
+    def extract(self) -> list[Document]:
+        self.extract_count += 1
+        return [Document(page_content='page 1', metadata={'page': 0}),
+                Document(page_content='page 2', metadata={'page': 1})]
+
+
+def _mock_storage_and_redis(monkeypatch) -> dict:
+    files = {}
+    storage = MagicMock()
+    storage.exists.side_effect = lambda key: key in files
+    storage.load.side_effect = lambda key: files[key]
+    storage.save.side_effect = lambda key, data: files.__setitem__(key, data)
+    storage.delete.side_effect = lambda key: files.pop(key)
+    monkeypatch.setattr(extraction_cache, 'storage', storage)
+
+    sizes = {}
+    redis_client = MagicMock()
+    redis_client.hset.side_effect = lambda name, key, value: sizes.setdefault(name, {}).__setitem__(key, value)
+    redis_client.hgetall.side_effect = \
+        lambda name: {key.encode('utf-8'): str(value).encode('utf-8') for key, value in sizes.get(name, {}).items()}
+    redis_client.hdel.side_effect = lambda name, *keys: [sizes.get(name, {}).pop(key, None) for key in keys]
+    monkeypatch.setattr(extraction_cache, 'redis_client', redis_client)
+    return files
+
+
+def _upload_file(file_hash: str) -> MagicMock:
+    upload_file = MagicMock()
+    upload_file.tenant_id = 'tenant'
+    upload_file.hash = file_hash
+    upload_file.name = 'file.pdf'
+    upload_file.size = 100
+    return upload_file
+
+
+def test_extract_from_cache(monkeypatch):
+    files = _mock_storage_and_redis(monkeypatch)
+
+    with Flask(__name__).app_context():
+        extractor = _Extractor()
+        documents = ExtractionCache.extract(extractor, _upload_file('hash-1'), 'file.pdf')
+        cached_documents = ExtractionCache.extract(extractor, _upload_file('hash-1'), 'file.pdf')
+
+        assert cached_documents == documents
+        assert extractor.extract_count == 1
+        assert ExtractionCache.get_size('tenant') == {'entries': 1, 'size': len(next(iter(files.values())))}
+
+        # a new extractor version parses the file again
+        extractor.version = 2
+        ExtractionCache.extract(extractor, _upload_file('hash-1'), 'file.pdf')
+        ExtractionCache.extract(extractor, _upload_file('hash-2'), 'file.pdf')
+        assert extractor.extract_count == 3
+        assert ExtractionCache.get_size('tenant')['entries'] == 3
+
+        assert ExtractionCache.invalidate(_upload_file('hash-1')) == 2
+        assert ExtractionCache.get_size('tenant')['entries'] == 1
+        assert ExtractionCache.clear('tenant') == 1
+        assert not files
+
+
+def test_extract_with_cache_disabled(monkeypatch):
+    files = _mock_storage_and_redis(monkeypatch)
+    app = Flask(__name__)
+    app.config['EXTRACTION_CACHE_ENABLED'] = False
+
+    with app.app_context():
+        extractor = _Extractor()
+        ExtractionCache.extract(extractor, _upload_file('hash-1'), 'file.pdf')
+        ExtractionCache.extract(extractor, _upload_file('hash-1'), 'file.pdf')
+
+        assert extractor.extract_count == 2
+        assert not files
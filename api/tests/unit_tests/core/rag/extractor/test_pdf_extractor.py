@@ -0,0 +1,48 @@
+from flask import Flask
+
+from core.rag.extractor.extraction_process_pool import ExtractionProcessPool
+from core.rag.extractor.pdf_extractor import PdfExtractor
+
+
+def _make_pdf(texts: list[str]) -> bytes:
+    objects = ['<< /Type /Catalog /Pages 2 0 R >>', None, '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>']
+    kids = []
+    for text in texts:
+        stream = f'BT /F1 12 Tf 72 720 Td ({text}) Tj ET'
+        objects.append(f'<< /Length {len(stream)} >>\nstream\n{stream}\nendstream')
+        objects.append(f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {len(objects)} 0 R '
+                       f'/Resources << /Font << /F1 3 0 R >> >> >>')
+        kids.append(f'{len(objects)} 0 R')
+    objects[1] = f'<< /Type /Pages /Kids [{" ".join(kids)}] /Count {len(texts)} >>'
+    pdf = b'%PDF-1.4\n'
+    offsets = []
+    for i, obj in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += f'{i} 0 obj\n{obj}\nendobj\n'.encode()
+    xref = len(pdf)
+    pdf += f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode()
+    for offset in offsets:
+        pdf += f'{offset:010d} 00000 n \n'.encode()
+    pdf += f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode()
+    return pdf
+
+
+def test_extract_pdf_in_process_pool(tmp_path):
+    file_path = str(tmp_path / 'file.pdf')
+    with open(file_path, 'wb') as f:
+        f.write(_make_pdf([f'page {i}' for i in range(5)]))
+
+    with Flask(__name__).app_context():
+        documents = PdfExtractor(file_path).extract()
+
+    app = Flask(__name__)
+    app.config['EXTRACTION_PROCESS_POOL_SIZE'] = 2
+    app.config['EXTRACTION_PDF_PAGES_PER_JOB'] = 2
+    with app.app_context():
+        try:
+            pool_documents = PdfExtractor(file_path).extract()
+        finally:
+            ExtractionProcessPool.shutdown()
+
+    assert [document.page_content for document in documents] == [f'page {i}' for i in range(5)]
+    assert pool_documents == documents
@@ -0,0 +1,47 @@
+from unittest.mock import MagicMock
+
+from flask import Flask
+
+from core.rag.retrieval import retrieval_planner
+from core.rag.retrieval.retrieval_planner import RetrievalPlanner
+
+
+def _dataset(dataset_id: str, model: str, indexing_technique: str = 'high_quality',
+             search_method: str = 'semantic_search') -> MagicMock:
+    dataset = MagicMock()
+    dataset.id = dataset_id
+    dataset.tenant_id = 'tenant'
+    dataset.indexing_technique = indexing_technique
+    dataset.embedding_model_provider = 'openai'
+    dataset.embedding_model = model
+    dataset.retrieval_model = {'search_method': search_method}
+    return dataset
+
+
+def test_embed_query_once_per_model(monkeypatch):
+    embedded_models = []
+
+    def cache_embedding(model_instance):
+        embeddings = MagicMock()
+        embeddings.embed_query.side_effect = lambda query: embedded_models.append(model_instance.model) or [0.1]
+        return embeddings
+
+    model_manager = MagicMock()
+    model_manager.return_value.get_model_instance.side_effect = lambda **kwargs: MagicMock(model=kwargs['model'])
+    monkeypatch.setattr(retrieval_planner, 'ModelManager', model_manager)
+    monkeypatch.setattr(retrieval_planner, 'CacheEmbedding', cache_embedding)
+
+    datasets = [
+        _dataset('dataset-1', 'model-a'),
+        _dataset('dataset-2', 'model-a', search_method='hybrid_search'),
+        _dataset('dataset-3', 'model-b'),
+        _dataset('dataset-4', 'model-a', indexing_technique='economy'),
+        _dataset('dataset-5', 'model-a', search_method='full_text_search'),
+    ]
+    with Flask(__name__).app_context():
+        query_embeddings = RetrievalPlanner.embed_query('query', datasets)
+
+    assert sorted(embedded_models) == ['model-a', 'model-b']
+    assert sorted(query_embeddings) == ['dataset-1', 'dataset-2', 'dataset-3']
+    assert query_embeddings['dataset-1'] is query_embeddings['dataset-2']
+    assert query_embeddings['dataset-1'].vector == [0.1]
@@ -0,0 +1,127 @@
+from unittest.mock import MagicMock
+
+from flask import Flask
+
+from core.rag.models.document import Document
+from core.rag.retrieval import retrieval_recorder
+from core.rag.retrieval.retrieval_recorder import RetrievalRecorder
+
+
+class _Redis:
+    """
+    In-memory stand-in of the redis commands used by the recorder
+    """
+
+    def __init__(self) -> None:
+        self.data = {}
+
+    def hincrby(self, name, key, amount):
+        key = key if isinstance(key, bytes) else key.encode('utf-8')
+        hits = self.data.setdefault(name, {})
+        hits[key] = hits.get(key, 0) + amount
+
+    def hgetall(self, name):
+        return dict(self.data.get(name, {}))
+
+    def exists(self, name):
+        return name in self.data
+
+    def rename(self, src, dst):
+        self.data[dst] = self.data.pop(src)
+
+    def delete(self, name):
+        self.data.pop(name, None)
+
+    def rpush(self, name, *values):
+        self.data.setdefault(name, []).extend(value.encode('utf-8') for value in values)
+
+    def lpush(self, name, *values):
+        self.data[name] = list(reversed(values)) + self.data.get(name, [])
+
+    def lrange(self, name, start, end):
+        return self.data.get(name, [])[start:end + 1]
+
+    def ltrim(self, name, start, end):
+        self.data[name] = self.data.get(name, [])[start:]
+        if not self.data[name]:
+            del self.data[name]
+
+    def set(self, name, value, nx=False, ex=None):
+        if nx and name in self.data:
+            return False
+        self.data[name] = value
+        return True
+
+    def pipeline(self, transaction=True):
+        redis = self
+        commands = []
+
+        class _Pipeline:
+            def __getattr__(self, name):
+                return lambda *args: commands.append((getattr(redis, name), args))
+
+            def execute(self):
+                return [command(*args) for command, args in commands]
+
+        return _Pipeline()
+
+
+def _mock_redis_and_db(monkeypatch) -> tuple[_Redis, MagicMock]:
+    redis = _Redis()
+    monkeypatch.setattr(retrieval_recorder, 'redis_client', redis)
+    session = MagicMock()
+    monkeypatch.setattr(retrieval_recorder.db, 'session', session)
+    monkeypatch.setattr(RetrievalRecorder, '_schedule_flush', MagicMock())
+    return redis, session
+
+
+def _document(node_id: str) -> Document:
+    return Document(page_content='content', metadata={'doc_id': node_id, 'dataset_id': 'dataset'})
+
+
+def test_flush_aggregated_hits(monkeypatch):
+    redis, session = _mock_redis_and_db(monkeypatch)
+
+    with Flask(__name__).app_context():
+        for _ in range(3):
+            RetrievalRecorder.record_hits([_document('node-1'), _document('node-2')])
+        RetrievalRecorder.record_hits([_document('node-3')])
+
+        assert redis.data[RetrievalRecorder.SEGMENT_HITS_KEY] == {
+            b'dataset:node-1': 3, b'dataset:node-2': 3, b'dataset:node-3': 1
+        }
+        assert RetrievalRecorder.flush() == (3, 0)
+
+    # one update of the segments hit 3 times and one of the segment hit once, committed together
+    update = session.query.return_value.filter.return_value.filter.return_value.update
+    assert update.call_count == 2
+    assert session.commit.call_count == 1
+    assert redis.data == {}
+
+
+def test_flush_queries(monkeypatch):
+    redis, session = _mock_redis_and_db(monkeypatch)
+
+    with Flask(__name__).app_context():
+        RetrievalRecorder.record_queries('query', ['dataset-1', 'dataset-2'], source='app',
+                                         created_by_role='end_user', created_by='user', source_app_id='app')
+        assert RetrievalRecorder.flush() == (0, 2)
+
+    dataset_queries = [call.args[0] for call in session.add.call_args_list]
+    assert [dataset_query.dataset_id for dataset_query in dataset_queries] == ['dataset-1', 'dataset-2']
+    assert dataset_queries[0].created_at is not None
+    assert redis.data == {}
+
+
+def test_failed_flush_keeps_hits(monkeypatch):
+    redis, session = _mock_redis_and_db(monkeypatch)
+    session.commit.side_effect = Exception('database is down')
+
+    with Flask(__name__).app_context():
+        RetrievalRecorder.record_hits([_document('node-1'), _document('node-1')])
+        try:
+            RetrievalRecorder.flush()
+        except Exception:
+            pass
+
+    assert redis.data[RetrievalRecorder.SEGMENT_HITS_KEY] == {b'dataset:node-1': 2}
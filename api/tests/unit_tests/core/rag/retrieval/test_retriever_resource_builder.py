@@ -0,0 +1,49 @@
+from unittest.mock import MagicMock
+
+from flask import Flask
+
+from core.rag.retrieval import retriever_resource_builder
+from core.rag.retrieval.retriever_resource_builder import RetrieverResourceBuilder
+from models.dataset import Dataset
+
+
+def _row(row_id: str, **kwargs) -> MagicMock:
+    row = MagicMock()
+    row.id = row_id
+    for key, value in kwargs.items():
+        setattr(row, key, value)
+    return row
+
+
+def _segment(segment_id: str, document_id: str) -> MagicMock:
+    return _row(segment_id, dataset_id='dataset', document_id=document_id, index_node_id=f'node-{segment_id}',
+                content=f'content of {segment_id}', answer=None)
+
+
+def test_build(monkeypatch):
+    datasets = [_row('dataset', name='Dataset')]
+    documents = [_row('document-1', name='Document 1', enabled=True, archived=False, data_source_type='upload_file'),
+                 _row('document-2', name='Document 2', enabled=False, archived=False, data_source_type='upload_file')]
+    session = MagicMock()
+    # only columns are queried, cached ORM instances would expire and detach in later commits
+    session.query.side_effect = lambda *columns: MagicMock(**{
+        'filter.return_value.all.return_value': datasets if columns[0].class_ is Dataset else documents
+    })
+    monkeypatch.setattr(retriever_resource_builder.db, 'session', session)
+
+    segments = [_segment('segment-1', 'document-1'), _segment('segment-2', 'document-2'),
+                _segment('segment-3', 'document-1')]
+    with Flask(__name__).app_context():
+        context_list = RetrieverResourceBuilder(segments).build('api', {'node-segment-1': 0.9})
+
+        # segments of the disabled document are skipped, positions are kept
+        assert [(source['position'], source['segment_id'], source['score']) for source in context_list] == [
+            (1, 'segment-1', 0.9), (3, 'segment-3', None)
+        ]
+        assert context_list[0]['document_name'] == 'Document 1'
+        # one query for the datasets and one for the documents
+        assert session.query.call_count == 2
+
+        # loaded once per app context
+        RetrieverResourceBuilder(segments[:1]).build('api', {})
+        assert session.query.call_count == 2
@@ -0,0 +1,49 @@
+from unittest.mock import MagicMock
+
+from sqlalchemy.dialects import postgresql
+
+from core.rag.retrieval import segment_hydrator
+from core.rag.retrieval.segment_hydrator import SegmentHydrator
+
+
+def _segment(index_node_id: str) -> MagicMock:
+    segment = MagicMock()
+    segment.index_node_id = index_node_id
+    return segment
+
+
+def _mock_session(monkeypatch, segments: list) -> MagicMock:
+    session = MagicMock()
+    query = session.query.return_value
+    query.filter.return_value = query
+    query.all.return_value = segments
+    monkeypatch.setattr(segment_hydrator.db, 'session', session)
+    return session
+
+
+def _filter_sql(session) -> str:
+    criteria = [criterion for call in session.query.return_value.filter.call_args_list for criterion in call.args]
+    return ' AND '.join(str(criterion.compile(dialect=postgresql.dialect())) for criterion in criteria)
+
+
+def test_get_segments(monkeypatch):
+    session = _mock_session(monkeypatch, [_segment('node-2'), _segment('node-1'), _segment('node-3')])
+
+    # rank order is preserved and missing segments are skipped
+    hits = SegmentHydrator.get_segments(['node-1', 'node-4', 'node-2', 'node-3', 'node-1'], dataset_id='dataset')
+    assert [segment.index_node_id for segment in hits] == ['node-1', 'node-2', 'node-3']
+    # all hits are loaded with one query
+    assert session.query.call_count == 1
+    assert 'enabled' not in _filter_sql(session)
+
+
+def test_get_available_segments(monkeypatch):
+    session = _mock_session(monkeypatch, [_segment('node-1')])
+
+    hits = SegmentHydrator.get_segments(['node-3', 'node-1'], dataset_id='dataset', available_only=True)
+    assert [segment.index_node_id for segment in hits] == ['node-1']
+
+    # availability is filtered by the query, so an unavailable duplicate of an index node does not hide it
+    filter_sql = _filter_sql(session)
+    assert 'document_segments.enabled = true' in filter_sql
+    assert 'document_segments.status = %(status_1)s' in filter_sql
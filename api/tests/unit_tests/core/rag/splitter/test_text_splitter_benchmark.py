@@ -0,0 +1,136 @@
+import random
+
+import pytest
+
+from core.model_runtime.model_providers.__base.tokenizers.gpt2_tokenzier import GPT2Tokenizer
+from core.rag.splitter.fixed_text_splitter import (
+    EnhanceRecursiveCharacterTextSplitter,
+    FixedRecursiveCharacterTextSplitter,
+)
+
+SEPARATORS = ["\n\n", "。", ". ", " ", ""]
+
+
+def _english_corpus(rng: random.Random) -> str:
+    words = ['index', 'segment', 'dataset', 'retrieval', 'embedding', 'model', 'the', 'of', 'a', 'document',
+             'query', 'vector', 'keyword', 'score', 'chunk', 'token', 'with', 'for', 'and', 'is']
+    paragraphs = []
+    for _ in range(120):
+        sentences = [' '.join(rng.choices(words, k=rng.randint(6, 30))).capitalize() + '.'
+                     for _ in range(rng.randint(2, 12))]
+        paragraphs.append(' '.join(sentences))
+    return '\n\n'.join(paragraphs)
+
+
+def _chinese_corpus(rng: random.Random) -> str:
+    characters = '知识库文档分段检索向量索引模型关键词召回排序数据集问题答案内容处理'
+    paragraphs = []
+    for _ in range(80):
+        sentences = [''.join(rng.choices(characters, k=rng.randint(10, 60))) + '。'
+                     for _ in range(rng.randint(2, 10))]
+        paragraphs.append(''.join(sentences))
+    return '\n\n'.join(paragraphs)
+
+
+def _markdown_corpus(rng: random.Random) -> str:
+    blocks = []
+    for i in range(60):
+        blocks.append(f'## Section {i}')
+        blocks.append(' '.join(rng.choices(['Configure', 'the', 'vector', 'store', 'before', 'indexing'], k=40)))
+        blocks.append('```python\n' + '\n'.join(f'value_{j} = compute({j}, {i})' for j in range(rng.randint(3, 30)))
+                      + '\n```')
+    return '\n\n'.join(blocks)
+
+
+CORPORA = {
+    'english': _english_corpus(random.Random(0)),
+    'chinese': _chinese_corpus(random.Random(1)),
+    'markdown': _markdown_corpus(random.Random(2)),
+}
+
+
+class _CountingLength:
+    """
+    Token length function of the splitters before memoization, counting tokenizer calls
+    """
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def __call__(self, text: str) -> int:
+        self.calls += 1
+        return GPT2Tokenizer.get_num_tokens(text) if text else 0
+
+
+def _splitters(splitter_cls: type[EnhanceRecursiveCharacterTextSplitter]):
+    kwargs = {'chunk_size': 200, 'chunk_overlap': 40, 'separators': SEPARATORS}
+    if splitter_cls is FixedRecursiveCharacterTextSplitter:
+        kwargs['fixed_separator'] = '\n\n'
+    legacy_length = _CountingLength()
+    return (
+        splitter_cls(length_function=legacy_length, **kwargs),
+        splitter_cls.from_encoder(embedding_model_instance=None, **kwargs),
+        legacy_length,
+    )
+
+
+@pytest.mark.parametrize('splitter_cls', [EnhanceRecursiveCharacterTextSplitter,
+                                          FixedRecursiveCharacterTextSplitter])
+@pytest.mark.parametrize('corpus', CORPORA.keys())
+def test_memoized_splitter_keeps_chunks(splitter_cls, corpus):
+    legacy_splitter, splitter, legacy_length = _splitters(splitter_cls)
+
+    chunks = splitter.split_text(CORPORA[corpus])
+
+    assert chunks == legacy_splitter.split_text(CORPORA[corpus])
+    assert legacy_length.calls > len(chunks)
+
+
+class _EmbeddingModelInstance:
+    """
+    Embedding model instance counting tokens with the gpt2 tokenizer, counting invocations
+    """
+
+    def __init__(self) -> None:
+        self.invocations = 0
+
+    def get_text_embedding_num_tokens(self, texts: list[str]) -> int:
+        return sum(self.get_text_embedding_num_tokens_list(texts))
+
+    def get_text_embedding_num_tokens_list(self, texts: list[str]) -> list[int]:
+        self.invocations += 1
+        return [GPT2Tokenizer.get_num_tokens(text) for text in texts]
+
+
+@pytest.mark.parametrize('corpus', CORPORA.keys())
+def test_memoized_splitter_batches_model_invocations(corpus):
+    legacy_model_instance = _EmbeddingModelInstance()
+    model_instance = _EmbeddingModelInstance()
+    kwargs = {'chunk_size': 200, 'chunk_overlap': 40, 'separators': SEPARATORS}
+    # the token encoder of the splitters before memoization
+    legacy_splitter = FixedRecursiveCharacterTextSplitter(
+        length_function=lambda text: legacy_model_instance.get_text_embedding_num_tokens(texts=[text]) if text else 0,
+        **kwargs
+    )
+    splitter = FixedRecursiveCharacterTextSplitter.from_encoder(embedding_model_instance=model_instance, **kwargs)
+
+    assert splitter.split_text(CORPORA[corpus]) == legacy_splitter.split_text(CORPORA[corpus])
+    assert model_instance.invocations * 5 < legacy_model_instance.invocations
+
+
+@pytest.mark.parametrize('memoized', [False, True], ids=['per_piece', 'memoized'])
+@pytest.mark.parametrize('corpus', CORPORA.keys())
+def test_splitter_benchmark(benchmark, corpus, memoized):
+    """
+    Compare splitting with a token count per piece and with memoized, batched token counts
+    """
+    benchmark.group = f'text_splitter_{corpus}'
+
+    def split():
+        # a new splitter per round, like the indexing of a document
+        legacy_splitter, splitter, _ = _splitters(FixedRecursiveCharacterTextSplitter)
+        return (splitter if memoized else legacy_splitter).split_text(CORPORA[corpus])
+
+    chunks = benchmark.pedantic(split, iterations=1, rounds=3)
+
+    assert chunks
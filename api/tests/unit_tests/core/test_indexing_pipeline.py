@@ -0,0 +1,64 @@
+import itertools
+import threading
+
+import pytest
+
+from core.indexing_pipeline import IndexingPipeline, PipelineStage
+
+
+def test_run_stages_in_order():
+    buffer = []
+
+    def batch(item):
+        buffer.append(item)
+        if len(buffer) == 3:
+            yield list(buffer)
+            buffer.clear()
+
+    def flush_batch():
+        if buffer:
+            yield list(buffer)
+
+    pipeline = IndexingPipeline(stages=[
+        PipelineStage('double', lambda item: [item * 2]),
+        PipelineStage('batch', batch, flush=flush_batch),
+        PipelineStage('sum', lambda items: [sum(items)], workers=3),
+    ], queue_size=1)
+
+    results = pipeline.run(range(10), source_name='numbers')
+
+    assert sorted(results) == [6, 18, 24, 42]
+    metrics = {stage_metrics['stage']: stage_metrics for stage_metrics in pipeline.get_metrics()}
+    assert metrics['numbers']['items_out'] == 10
+    assert metrics['double']['items_in'] == 10
+    assert metrics['batch']['items_out'] == 4
+    assert metrics['sum']['items_in'] == 4
+    assert metrics['sum']['workers'] == 3
+    assert all(stage_metrics['finished'] for stage_metrics in metrics.values())
+    assert all(stage_metrics['max_queue_size'] <= 1 for stage_metrics in metrics.values())
+
+
+def test_stop_on_stage_error():
+    processed = []
+    lock = threading.Lock()
+
+    def fail(item):
+        if item == 3:
+            raise ValueError('failed item')
+        return [item]
+
+    def record(item):
+        with lock:
+            processed.append(item)
+        return [item]
+
+    pipeline = IndexingPipeline(stages=[
+        PipelineStage('fail', fail),
+        PipelineStage('record', record),
+    ], queue_size=1)
+
+    with pytest.raises(ValueError, match='failed item'):
+        # an endless source is stopped by the failure
+        pipeline.run(itertools.count())
+
+    assert 3 not in processed
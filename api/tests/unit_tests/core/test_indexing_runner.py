@@ -0,0 +1,53 @@
+from unittest.mock import MagicMock
+
+from flask import Flask
+
+from core import indexing_runner as indexing_runner_module
+from core.indexing_runner import IndexingBatch, IndexingCheckpoint, IndexingRunner
+from core.rag.models.document import Document
+
+
+def _batch(index: int, size: int) -> IndexingBatch:
+    documents = [
+        Document(page_content=f'segment {index}-{i}', metadata={'doc_id': f'{index}-{i}'})
+        for i in range(size)
+    ]
+    return IndexingBatch(index=index, pages_end=index + 1, documents=documents, position=(index + 1) * size)
+
+
+def test_keywords_written_for_many_batches(monkeypatch):
+    keyword_cls = MagicMock()
+    complete_segments = MagicMock()
+    monkeypatch.setattr(indexing_runner_module, 'Keyword', keyword_cls)
+    monkeypatch.setattr(indexing_runner_module, 'redis_client', MagicMock())
+    monkeypatch.setattr(IndexingRunner, '_get_dataset',
+                        staticmethod(lambda dataset_id: MagicMock(indexing_technique='economy')))
+    monkeypatch.setattr(IndexingRunner, '_complete_segments', staticmethod(complete_segments))
+    checkpoint = IndexingCheckpoint()
+
+    app = Flask(__name__)
+    app.config['INDEXING_PIPELINE_KEYWORD_BATCH_SIZE'] = 100
+    with app.app_context():
+        stages = IndexingRunner()._get_index_stages(MagicMock(), 'dataset-id', 'document-id', checkpoint)
+    keyword_stage = next(stage for stage in stages if stage.name == 'keyword')
+
+    # batches are buffered until enough segments are collected
+    assert list(keyword_stage.process(_batch(0, 50))) == []
+    keyword_cls.return_value.create.assert_not_called()
+    assert checkpoint.batches == 0
+
+    assert [batch.index for batch in keyword_stage.process(_batch(1, 50))] == [0, 1]
+    assert len(keyword_cls.return_value.create.call_args.args[0]) == 100
+    assert checkpoint.batches == 2
+    assert checkpoint.position == 100
+
+    # the keywords of the remaining batches are written once the document is split
+    assert list(keyword_stage.process(_batch(2, 30))) == []
+    assert [batch.index for batch in keyword_stage.flush()] == [2]
+    assert keyword_cls.return_value.create.call_count == 2
+    assert checkpoint.batches == 3
+    assert [len(call.args[1]) for call in complete_segments.call_args_list] == [100, 30]
+
+    # nothing left to write
+    assert list(keyword_stage.flush()) == []
+    assert keyword_cls.return_value.create.call_count == 2
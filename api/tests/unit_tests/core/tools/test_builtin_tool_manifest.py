@@ -0,0 +1,68 @@
+import json
+import sys
+
+import pytest
+
+from core.tools.provider import builtin_tool_manifest
+from core.tools.provider.builtin_tool_manifest import BUILTIN_TOOL_MANIFEST_PATH, BuiltinToolManifest
+from core.tools.tool_manager import ToolManager
+
+
+def _clear_builtin_providers():
+    BuiltinToolManifest.clear()
+    ToolManager.clear_builtin_providers_cache()
+    # import the provider modules again, like a new process
+    for module_name in [name for name in sys.modules if name.startswith('core.tools.provider.builtin.')]:
+        del sys.modules[module_name]
+
+
+@pytest.fixture
+def stale_manifest(tmp_path, monkeypatch):
+    with open(BUILTIN_TOOL_MANIFEST_PATH, encoding='utf-8') as f:
+        providers = json.load(f)
+    for provider in providers:
+        if provider['name'] == 'time':
+            provider['yaml_hash'] = 'stale'
+            provider['tool_labels'] = {}
+
+    manifest_path = tmp_path / '_manifest.json'
+    manifest_path.write_text(json.dumps(providers), encoding='utf-8')
+    monkeypatch.setattr(builtin_tool_manifest, 'BUILTIN_TOOL_MANIFEST_PATH', str(manifest_path))
+    BuiltinToolManifest.clear()
+    yield
+    BuiltinToolManifest.clear()
+
+
+def test_read_stale_providers_from_yaml(stale_manifest):
+    assert BuiltinToolManifest.get_provider('time').icon == 'icon.svg'
+    assert BuiltinToolManifest.get_tool_label('current_time').en_US == 'Current Time'
+
+
+def test_import_resolved_provider_only():
+    _clear_builtin_providers()
+
+    provider = ToolManager.get_builtin_provider('time')
+
+    assert provider.get_tool('current_time') is not None
+    assert list(ToolManager._builtin_providers) == ['time']
+    assert not any(name.startswith('core.tools.provider.builtin.google') for name in sys.modules)
+    assert ToolManager.get_tool_label('google_search').en_US == 'GoogleSearch'
+    assert ToolManager.get_builtin_provider_icon('google')[1] == 'image/svg+xml'
+
+
+@pytest.mark.parametrize('lazy', [False, True], ids=['all_providers', 'manifest'])
+def test_builtin_provider_startup_benchmark(benchmark, lazy):
+    """
+    Compare loading all builtin providers on startup with resolving a provider from the manifest
+    """
+    benchmark.group = 'builtin_tool_providers_startup'
+
+    def startup():
+        if lazy:
+            return ToolManager.get_builtin_provider('time')
+        ToolManager.load_builtin_providers_cache()
+        return ToolManager.get_builtin_provider('time')
+
+    provider = benchmark.pedantic(startup, setup=_clear_builtin_providers, iterations=1, rounds=3)
+
+    assert provider.identity.name == 'time'
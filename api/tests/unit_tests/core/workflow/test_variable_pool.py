@@ -0,0 +1,57 @@
+from core.workflow.entities.node_entities import SystemVariable
+from core.workflow.entities.variable_pool import VariablePool
+
+
+def test_nested_variables():
+    pool = VariablePool(system_variables={SystemVariable.QUERY: 'hello'}, user_inputs={})
+    pool.append_variable('llm', ['usage'], {'total_tokens': 10, 'detail': {'prompt_tokens': 4}})
+
+    assert pool.get_variable_value(['sys', 'query']) == 'hello'
+    assert pool.get_variable_value(['llm', 'usage', 'total_tokens']) == 10
+    assert pool.get_variable_value(['llm', 'usage', 'detail', 'prompt_tokens']) == 4
+    assert pool.get_variable_value(['llm', 'usage', 'not_exists']) is None
+    assert pool.get_variable_value(['llm', 'text']) is None
+
+    # explicitly appended nested variables shadow the parent value
+    pool.append_variable('llm', ['usage', 'total_tokens'], 20)
+    assert pool.get_variable_value(['llm', 'usage', 'total_tokens']) == 20
+    assert pool.get_variable_value(['llm', 'usage', 'detail', 'prompt_tokens']) == 4
+
+    # appending a variable replaces the variables nested in it
+    pool.append_variable('llm', ['usage'], {'total_tokens': 30})
+    assert pool.get_variable_value(['llm', 'usage', 'total_tokens']) == 30
+
+    pool.clear_node_variables('llm')
+    assert pool.get_variable_value(['llm', 'usage']) is None
+    assert pool.get_node_variables_size('llm') == 0
+
+
+def test_child_pool():
+    pool = VariablePool(system_variables={}, user_inputs={})
+    pool.append_variable('start', ['text'], 'parent')
+    pool.append_variable('iteration', ['item'], 'a')
+
+    child_pool = pool.create_child_pool()
+    child_pool.append_variable('iteration', ['item'], 'b')
+    child_pool.append_variable('code', ['result'], 'child')
+
+    assert child_pool.get_variable_value(['start', 'text']) == 'parent'
+    assert child_pool.get_variable_value(['iteration', 'item']) == 'b'
+    assert pool.get_variable_value(['iteration', 'item']) == 'a'
+    assert pool.get_variable_value(['code', 'result']) is None
+
+    # clearing in child hides the variables of parent
+    child_pool.clear_node_variables('start')
+    assert child_pool.get_variable_value(['start', 'text']) is None
+    assert pool.get_variable_value(['start', 'text']) == 'parent'
+
+
+def test_variables_size():
+    pool = VariablePool(system_variables={}, user_inputs={})
+    pool.append_variable('llm', ['text'], 'a' * 1000)
+    size = pool.get_node_variables_size('llm')
+    assert size > 1000
+
+    # replacing a variable doesn't count the replaced value
+    pool.append_variable('llm', ['text'], 'a' * 1000)
+    assert pool.get_node_variables_size('llm') == size
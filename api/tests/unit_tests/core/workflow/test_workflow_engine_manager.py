@@ -0,0 +1,411 @@
+import json
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+from flask import Flask
+
+from core.app.entities.app_invoke_entities import InvokeFrom
+from core.workflow import workflow_engine_manager as workflow_engine_manager_module
+from core.workflow.callbacks.buffered_workflow_callback import BufferedWorkflowCallback
+from core.workflow.entities.base_node_data_entities import BaseNodeData
+from core.workflow.entities.node_entities import NodeRunResult, NodeType
+from core.workflow.entities.variable_pool import VariablePool
+from core.workflow.entities.workflow_graph import WorkflowGraph
+from core.workflow.nodes.base_node import BaseNode, UserFrom
+from core.workflow.workflow_engine_manager import RELEASE_VARIABLES_MIN_SIZE, WorkflowEngineManager, node_classes
+from models.workflow import WorkflowNodeExecutionStatus
+
+graph = WorkflowGraph({
+    'nodes': [
+        {'id': 'start', 'data': {'type': 'start', 'title': 'Start'}},
+        {'id': 'http-1', 'data': {'type': 'http-request', 'title': 'HTTP 1'}},
+        {'id': 'http-2', 'data': {'type': 'http-request', 'title': 'HTTP 2'}},
+        {'id': 'if-else', 'data': {'type': 'if-else', 'title': 'If Else'}},
+        {'id': 'llm-true', 'data': {'type': 'llm', 'title': 'LLM'}},
+        {'id': 'llm-false', 'data': {'type': 'llm', 'title': 'LLM'}},
+        {'id': 'aggregator', 'data': {'type': 'variable-aggregator', 'title': 'Aggregator'}},
+        {'id': 'end', 'data': {'type': 'end', 'title': 'End'}},
+    ],
+    'edges': [
+        {'source': 'start', 'target': 'http-1'},
+        {'source': 'start', 'target': 'http-2'},
+        {'source': 'http-1', 'target': 'if-else'},
+        {'source': 'http-2', 'target': 'if-else'},
+        {'source': 'if-else', 'sourceHandle': 'true', 'target': 'llm-true'},
+        {'source': 'if-else', 'sourceHandle': 'false', 'target': 'llm-false'},
+        {'source': 'llm-true', 'target': 'aggregator'},
+        {'source': 'llm-false', 'target': 'aggregator'},
+        {'source': 'aggregator', 'target': 'end'},
+    ]
+})
+
+
+def _finished_node(node_id: str, edge_source_handle: str = None):
+    node = MagicMock()
+    node.node_id = node_id
+    node.node_run_result.edge_source_handle = edge_source_handle
+    return node
+
+
+def test_resolve_parallel_outgoing_edges():
+    workflow_engine_manager = WorkflowEngineManager()
+    pending_edge_counts = {
+        node_id: len(graph.get_top_level_incoming_edges(node_id))
+        for node_id in graph.node_configs
+    }
+    activated_predecessors = {}
+
+    def resolve(node_id: str, edge_source_handle: str = None) -> list[str]:
+        return workflow_engine_manager._resolve_parallel_outgoing_edges(
+            graph=graph,
+            node=_finished_node(node_id, edge_source_handle),
+            pending_edge_counts=pending_edge_counts,
+            activated_predecessors=activated_predecessors
+        )
+
+    # fan out
+    assert resolve('start') == ['http-1', 'http-2']
+
+    # join waits for all incoming branches
+    assert resolve('http-2') == []
+    assert resolve('http-1') == ['if-else']
+    assert activated_predecessors['if-else'].node_id == 'http-1'
+
+    # untaken branch is skipped, the aggregator is ready once the taken branch finished
+    assert resolve('if-else', 'false') == ['llm-false']
+    assert 'llm-true' not in activated_predecessors
+    assert resolve('llm-false') == ['aggregator']
+    assert resolve('aggregator') == ['end']
+
+
+def _run_workflow(monkeypatch, graph: dict, user_inputs: dict) -> tuple[VariablePool, MagicMock]:
+    monkeypatch.setattr(workflow_engine_manager_module, 'db', MagicMock())
+    workflow = MagicMock()
+    workflow.id = 'workflow-id'
+    workflow.type = 'workflow'
+    workflow.graph = json.dumps(graph)
+    callback = MagicMock()
+    variable_pool = VariablePool(system_variables={}, user_inputs=user_inputs)
+
+    app = Flask(__name__)
+    app.config.update(WORKFLOW_CALL_MAX_DEPTH=5, WORKFLOW_MAX_EXECUTION_STEPS=100, WORKFLOW_MAX_EXECUTION_TIME=60,
+                      WORKFLOW_MAX_PARALLELISM=4)
+    with app.app_context():
+        WorkflowEngineManager().run_workflow(
+            workflow=workflow,
+            user_id='user-id',
+            user_from=UserFrom.ACCOUNT,
+            invoke_from=InvokeFrom.DEBUGGER,
+            user_inputs=user_inputs,
+            callbacks=[callback],
+            variable_pool=variable_pool
+        )
+
+    return variable_pool, callback
+
+
+def _node_outputs(callback: MagicMock) -> dict[str, dict]:
+    callback.on_workflow_run_failed.assert_not_called()
+    return {
+        call.kwargs['node_id']: call.kwargs['outputs']
+        for call in callback.on_workflow_node_execute_succeeded.call_args_list
+    }
+
+
+def test_large_variables_are_kept_for_consumers(monkeypatch):
+    text = 'x' * (RELEASE_VARIABLES_MIN_SIZE * 2)
+    variable_pool, callback = _run_workflow(monkeypatch, {
+        'nodes': [
+            {'id': 'start', 'data': {'type': 'start', 'title': 'Start'}},
+            # reads start.text through its conditions, which are not mapped to single step inputs
+            {'id': 'if-else', 'data': {'type': 'if-else', 'title': 'If Else', 'conditions': [
+                {'variable_selector': ['start', 'text'], 'comparison_operator': 'not empty'}
+            ]}},
+            {'id': 'aggregator', 'data': {'type': 'variable-aggregator', 'title': 'Aggregator', 'output_type': 'string',
+                                          'variables': [['start', 'text']]}},
+            {'id': 'end', 'data': {'type': 'end', 'title': 'End', 'outputs': [
+                {'variable': 'text', 'value_selector': ['start', 'text']},
+                {'variable': 'aggregated', 'value_selector': ['aggregator', 'output']},
+            ]}},
+        ],
+        'edges': [
+            {'source': 'start', 'target': 'if-else'},
+            {'source': 'if-else', 'sourceHandle': 'true', 'target': 'aggregator'},
+            {'source': 'aggregator', 'target': 'end'},
+        ]
+    }, user_inputs={'text': text})
+    node_outputs = _node_outputs(callback)
+
+    # every downstream node still sees the large output
+    assert node_outputs['if-else'] == {'result': True}
+    assert node_outputs['aggregator'] == {'output': text}
+    assert node_outputs['end'] == {'text': text, 'aggregated': text}
+
+    # and it is released once all of them finished
+    assert variable_pool.get_node_variables_size('start') == 0
+    assert variable_pool.get_node_variables_size('aggregator') == 0
+
+
+class _ItemNodeData(BaseNodeData):
+    pass
+
+
+class _ItemNode(BaseNode):
+    """
+    Nested node of the parallel iteration tests, upper-cases its item and fails on 'fail'.
+    Earlier items take longer, so the items complete in reverse order.
+    """
+    _node_data_cls = _ItemNodeData
+    node_type = NodeType.CODE
+
+    lock = threading.Lock()
+    running = 0
+    max_running = 0
+    completed_items = []
+    pool_mismatches = []
+
+    def _run(self, variable_pool: VariablePool) -> NodeRunResult:
+        index = variable_pool.get_variable_value(['iteration', 'index'])
+        item = variable_pool.get_variable_value(['iteration', 'item'])
+        with _ItemNode.lock:
+            _ItemNode.running += 1
+            _ItemNode.max_running = max(_ItemNode.max_running, _ItemNode.running)
+
+        time.sleep(0.05 * (5 - index))
+
+        with _ItemNode.lock:
+            _ItemNode.running -= 1
+            _ItemNode.completed_items.append(item)
+            # other items ran in their own child pools meanwhile
+            if variable_pool.get_variable_value(['iteration', 'item']) != item:
+                _ItemNode.pool_mismatches.append(item)
+
+        if item == 'fail':
+            raise ValueError('item failed')
+
+        return NodeRunResult(
+            status=WorkflowNodeExecutionStatus.SUCCEEDED,
+            inputs={'item': item},
+            outputs={'result': item.upper()}
+        )
+
+    @classmethod
+    def _extract_variable_selector_to_variable_mapping(cls, node_data: BaseNodeData) -> dict[str, list[str]]:
+        return {'item': ['iteration', 'item']}
+
+
+def _run_parallel_iteration(monkeypatch, items: list[str], parallel_nums: int = 10,
+                            error_handle_mode: str = 'terminated') -> tuple[VariablePool, MagicMock]:
+    monkeypatch.setitem(node_classes, NodeType.CODE, _ItemNode)
+    monkeypatch.setattr(_ItemNode, 'running', 0)
+    monkeypatch.setattr(_ItemNode, 'max_running', 0)
+    monkeypatch.setattr(_ItemNode, 'completed_items', [])
+    monkeypatch.setattr(_ItemNode, 'pool_mismatches', [])
+
+    return _run_workflow(monkeypatch, {
+        'nodes': [
+            {'id': 'start', 'data': {'type': 'start', 'title': 'Start'}},
+            {'id': 'iteration', 'data': {'type': 'iteration', 'title': 'Iteration', 'start_node_id': 'item',
+                                         'iterator_selector': ['start', 'items'],
+                                         'output_selector': ['item', 'result'],
+                                         'is_parallel': True, 'parallel_nums': parallel_nums,
+                                         'error_handle_mode': error_handle_mode}},
+            {'id': 'item', 'data': {'type': 'code', 'title': 'Item', 'iteration_id': 'iteration'}},
+            {'id': 'end', 'data': {'type': 'end', 'title': 'End', 'outputs': [
+                {'variable': 'output', 'value_selector': ['iteration', 'output']},
+            ]}},
+        ],
+        'edges': [
+            {'source': 'start', 'target': 'iteration'},
+            {'source': 'iteration', 'target': 'end'},
+        ]
+    }, user_inputs={'items': items})
+
+
+def test_parallel_iteration_output_order(monkeypatch):
+    variable_pool, callback = _run_parallel_iteration(monkeypatch, ['a', 'b', 'c', 'd', 'e'])
+
+    # items completed out of order, outputs are gathered in input order
+    assert _ItemNode.completed_items == ['e', 'd', 'c', 'b', 'a']
+    assert _node_outputs(callback)['end'] == {'output': ['A', 'B', 'C', 'D', 'E']}
+
+    # each item ran in its own child pool, which did not leak into the pool of the run
+    assert _ItemNode.pool_mismatches == []
+    assert variable_pool.get_variable_value(['item', 'result']) is None
+
+    # buffered events of the items are replayed in input order
+    item_events = [
+        (call.kwargs['node_id'], call.kwargs['inputs']['item'])
+        for call in callback.on_workflow_node_execute_succeeded.call_args_list
+        if call.kwargs['node_id'] == 'item'
+    ]
+    assert item_events == [('item', 'a'), ('item', 'b'), ('item', 'c'), ('item', 'd'), ('item', 'e')]
+
+
+def test_parallel_iteration_bounds_concurrency(monkeypatch):
+    _run_parallel_iteration(monkeypatch, ['a', 'b', 'c', 'd', 'e'], parallel_nums=2)
+
+    assert _ItemNode.max_running == 2
+
+
+@pytest.mark.parametrize('error_handle_mode,output', [
+    ('continue-on-error', ['A', None, 'C']),
+    ('remove-abnormal-output', ['A', 'C']),
+])
+def test_parallel_iteration_error_handle_mode(monkeypatch, error_handle_mode, output):
+    _, callback = _run_parallel_iteration(monkeypatch, ['a', 'fail', 'c'], error_handle_mode=error_handle_mode)
+
+    assert _node_outputs(callback)['end'] == {'output': output}
+
+
+def test_parallel_iteration_terminated_on_error(monkeypatch):
+    _, callback = _run_parallel_iteration(monkeypatch, ['a', 'fail', 'c'], error_handle_mode='terminated')
+
+    callback.on_workflow_run_failed.assert_called_once()
+    assert 'item failed' in callback.on_workflow_run_failed.call_args.kwargs['error']
+    assert 'end' not in [call.kwargs['node_id'] for call in callback.on_workflow_node_execute_succeeded.call_args_list]
+
+
+class _BranchNode(BaseNode):
+    """
+    LLM node of the parallel branch tests, records which nodes run concurrently
+    """
+    _node_data_cls = _ItemNodeData
+    node_type = NodeType.LLM
+
+    lock = threading.Lock()
+    running = set()
+    overlaps = []
+    completed_nodes = []
+
+    def _run(self, variable_pool: VariablePool) -> NodeRunResult:
+        with _BranchNode.lock:
+            if _BranchNode.running:
+                _BranchNode.overlaps.append({self.node_id, *_BranchNode.running})
+            _BranchNode.running.add(self.node_id)
+
+        time.sleep(0.1)
+
+        with _BranchNode.lock:
+            _BranchNode.running.discard(self.node_id)
+            _BranchNode.completed_nodes.append(self.node_id)
+
+        return NodeRunResult(
+            status=WorkflowNodeExecutionStatus.SUCCEEDED,
+            outputs={'text': self.node_id}
+        )
+
+    @classmethod
+    def _extract_variable_selector_to_variable_mapping(cls, node_data: BaseNodeData) -> dict[str, list[str]]:
+        return {}
+
+
+def _run_branches(monkeypatch, graph: dict) -> MagicMock:
+    monkeypatch.setitem(node_classes, NodeType.LLM, _BranchNode)
+    monkeypatch.setattr(_BranchNode, 'running', set())
+    monkeypatch.setattr(_BranchNode, 'overlaps', [])
+    monkeypatch.setattr(_BranchNode, 'completed_nodes', [])
+
+    _, callback = _run_workflow(monkeypatch, graph, user_inputs={})
+    return callback
+
+
+def test_parallel_stream_nodes_run_one_at_a_time(monkeypatch):
+    callback = _run_branches(monkeypatch, {
+        'nodes': [
+            {'id': 'start', 'data': {'type': 'start', 'title': 'Start'}},
+            {'id': 'llm-1', 'data': {'type': 'llm', 'title': 'LLM 1'}},
+            {'id': 'llm-2', 'data': {'type': 'llm', 'title': 'LLM 2'}},
+            {'id': 'llm-3', 'data': {'type': 'llm', 'title': 'LLM 3'}},
+            {'id': 'end', 'data': {'type': 'end', 'title': 'End', 'outputs': [
+                {'variable': 'text-1', 'value_selector': ['llm-1', 'text']},
+                {'variable': 'text-2', 'value_selector': ['llm-2', 'text']},
+            ]}},
+        ],
+        'edges': [
+            {'source': 'start', 'target': 'llm-1'},
+            {'source': 'start', 'target': 'llm-2'},
+            {'source': 'start', 'target': 'llm-3'},
+            {'source': 'llm-1', 'target': 'end'},
+            {'source': 'llm-2', 'target': 'end'},
+            {'source': 'llm-3', 'target': 'end'},
+        ]
+    })
+
+    assert _node_outputs(callback)['end'] == {'text-1': 'llm-1', 'text-2': 'llm-2'}
+    # nodes streaming text to the end node do not overlap, other nodes still run concurrently
+    assert _BranchNode.overlaps
+    assert all({'llm-1', 'llm-2'} - overlap for overlap in _BranchNode.overlaps)
+
+    # the events of a stream node are not interleaved with the events of the other one
+    events = [
+        call.kwargs['node_id'] for call in callback.method_calls
+        if call.kwargs.get('node_id') in ('llm-1', 'llm-2')
+    ]
+    assert events in (['llm-1', 'llm-1', 'llm-2', 'llm-2'], ['llm-2', 'llm-2', 'llm-1', 'llm-1'])
+
+
+def test_parallel_answer_nodes_run_sequentially(monkeypatch):
+    run_workflow_in_parallel = MagicMock()
+    monkeypatch.setattr(WorkflowEngineManager, '_run_workflow_in_parallel', run_workflow_in_parallel)
+    callback = _run_branches(monkeypatch, {
+        'nodes': [
+            {'id': 'start', 'data': {'type': 'start', 'title': 'Start'}},
+            {'id': 'llm-1', 'data': {'type': 'llm', 'title': 'LLM 1'}},
+            {'id': 'llm-2', 'data': {'type': 'llm', 'title': 'LLM 2'}},
+            {'id': 'answer-1', 'data': {'type': 'answer', 'title': 'Answer 1', 'answer': '{{#llm-1.text#}}'}},
+            {'id': 'answer-2', 'data': {'type': 'answer', 'title': 'Answer 2', 'answer': '{{#llm-2.text#}}'}},
+        ],
+        'edges': [
+            {'source': 'start', 'target': 'llm-1'},
+            {'source': 'start', 'target': 'llm-2'},
+            {'source': 'llm-1', 'target': 'answer-1'},
+            {'source': 'llm-2', 'target': 'answer-2'},
+        ]
+    })
+
+    # answer nodes stream through the ordered routes of the chatflow, so the graph is not run in parallel
+    run_workflow_in_parallel.assert_not_called()
+    assert _BranchNode.overlaps == []
+    assert 'answer-1' in _node_outputs(callback)
+
+
+def test_parallel_run_stops_after_end(monkeypatch):
+    callback = _run_branches(monkeypatch, {
+        'nodes': [
+            {'id': 'start', 'data': {'type': 'start', 'title': 'Start'}},
+            {'id': 'end', 'data': {'type': 'end', 'title': 'End', 'outputs': []}},
+            {'id': 'llm-1', 'data': {'type': 'llm', 'title': 'LLM 1'}},
+            {'id': 'llm-2', 'data': {'type': 'llm', 'title': 'LLM 2'}},
+        ],
+        'edges': [
+            {'source': 'start', 'target': 'end'},
+            {'source': 'start', 'target': 'llm-1'},
+            {'source': 'llm-1', 'target': 'llm-2'},
+        ]
+    })
+
+    # the node running when the end node finished completes, its successor is not started
+    callback.on_workflow_run_succeeded.assert_called_once()
+    assert _BranchNode.completed_nodes == ['llm-1']
+    started_node_ids = [call.kwargs['node_id'] for call in callback.on_workflow_node_execute_started.call_args_list]
+    assert 'llm-2' not in started_node_ids
+
+
+def test_buffered_workflow_callback():
+    buffered_callback = BufferedWorkflowCallback()
+    buffered_callback.on_workflow_node_execute_started(node_id='node', node_type=NodeType.CODE, node_data=None)
+    buffered_callback.on_node_text_chunk(node_id='node', text='chunk')
+
+    # nothing is published before the flush
+    callback = MagicMock()
+    assert callback.method_calls == []
+
+    buffered_callback.flush([callback])
+    assert [call[0] for call in callback.method_calls] == ['on_workflow_node_execute_started', 'on_node_text_chunk']
+
+    # events are replayed once
+    buffered_callback.flush([callback])
+    assert len(callback.method_calls) == 2
@@ -0,0 +1,115 @@
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.workflow.entities.node_entities import NodeType
+from core.workflow.entities.workflow_graph import WorkflowGraph
+from core.workflow.workflow_engine_manager import node_classes
+
+graph = {
+    'nodes': [
+        {'id': 'start', 'data': {'type': 'start', 'title': 'Start'}},
+        {'id': 'iteration', 'data': {'type': 'iteration', 'title': 'Iteration'}},
+        {'id': 'code', 'data': {'type': 'code', 'title': 'Code', 'iteration_id': 'iteration'}},
+        {'id': 'if-else', 'data': {'type': 'if-else', 'title': 'If Else'}},
+        {'id': 'answer-true', 'data': {'type': 'answer', 'title': 'Answer'}},
+        {'id': 'answer-false', 'data': {'type': 'answer', 'title': 'Answer'}},
+    ],
+    'edges': [
+        {'source': 'start', 'target': 'iteration'},
+        {'source': 'iteration', 'target': 'if-else'},
+        {'source': 'if-else', 'sourceHandle': 'true', 'target': 'answer-true'},
+        {'source': 'if-else', 'sourceHandle': 'false', 'target': 'answer-false'},
+    ]
+}
+
+
+def test_compile_graph():
+    compiled_graph = WorkflowGraph(graph)
+
+    assert compiled_graph.start_node_id == 'start'
+    assert compiled_graph.get_node_type('iteration') == NodeType.ITERATION
+    assert compiled_graph.get_node_config('code')['data']['title'] == 'Code'
+    assert compiled_graph.get_node_config('not-exists') is None
+    assert [edge['target'] for edge in compiled_graph.get_outgoing_edges('if-else')] == ['answer-true', 'answer-false']
+    assert compiled_graph.get_outgoing_edges('answer-true') == []
+    assert [edge['source'] for edge in compiled_graph.get_incoming_edges('answer-false')] == ['if-else']
+    assert compiled_graph.get_iteration_children('iteration') == ['code']
+
+
+def test_compile_invalid_graph():
+    with pytest.raises(ValueError):
+        WorkflowGraph({})
+
+    with pytest.raises(ValueError):
+        WorkflowGraph({'nodes': {}, 'edges': []})
+
+
+def test_compiled_graph_cache():
+    workflow = MagicMock()
+    workflow.id = 'workflow-id'
+    workflow.graph = json.dumps(graph)
+
+    compiled_graph = WorkflowGraph.from_workflow(workflow)
+    assert WorkflowGraph.from_workflow(workflow) is compiled_graph
+
+    # a new graph version is compiled again
+    workflow.graph = json.dumps({'nodes': graph['nodes'][:1], 'edges': []})
+    assert WorkflowGraph.from_workflow(workflow) is not compiled_graph
+
+
+def test_parallel_branches():
+    assert not WorkflowGraph(graph).has_parallel_branches
+
+    parallel_graph = {
+        'nodes': graph['nodes'],
+        'edges': graph['edges'] + [{'source': 'start', 'target': 'if-else'}]
+    }
+    assert WorkflowGraph(parallel_graph).has_parallel_branches
+
+
+def test_variable_references():
+    references_graph = {
+        'nodes': [
+            {'id': 'start', 'data': {'type': 'start', 'title': 'Start'}},
+            {'id': 'iteration', 'data': {'type': 'iteration', 'title': 'Iteration', 'start_node_id': 'template',
+                                         'iterator_selector': ['start', 'items'],
+                                         'output_selector': ['template', 'output']}},
+            {'id': 'template', 'data': {'type': 'template-transform', 'title': 'Template', 'iteration_id': 'iteration',
+                                        'template': '{{ item }} {{ query }}',
+                                        'variables': [
+                                            {'variable': 'item', 'value_selector': ['iteration', 'item']},
+                                            {'variable': 'query', 'value_selector': ['start', 'query']},
+                                        ]}},
+            {'id': 'if-else', 'data': {'type': 'if-else', 'title': 'If Else', 'conditions': [
+                {'variable_selector': ['iteration', 'output'], 'comparison_operator': 'not empty'}
+            ]}},
+            {'id': 'answer', 'data': {'type': 'answer', 'title': 'Answer', 'answer': '{{#start.text#}}'}},
+            {'id': 'end', 'data': {'type': 'end', 'title': 'End', 'outputs': [
+                {'variable': 'output', 'value_selector': ['iteration', 'output']},
+                {'variable': 'query', 'value_selector': ['sys', 'query']},
+            ]}},
+        ],
+        'edges': []
+    }
+    variable_references = WorkflowGraph(references_graph).get_variable_references(node_classes)
+
+    # references of nested nodes belong to the iteration node, including the ones mapped to inputs
+    # only for single step runs, like the conditions of if-else and the outputs of end nodes
+    assert variable_references == {
+        'start': set(),
+        'iteration': {'start'},
+        'if-else': {'iteration'},
+        'answer': {'start'},
+        'end': {'iteration'},
+    }
+
+
+def test_unknown_variable_references():
+    # references of unknown node types cannot be extracted, so no variable may be released
+    unknown_graph = {
+        'nodes': graph['nodes'][:1] + [{'id': 'unknown', 'data': {'type': 'unknown', 'title': 'Unknown'}}],
+        'edges': []
+    }
+    assert WorkflowGraph(unknown_graph).get_variable_references(node_classes) is None
@@ -0,0 +1,46 @@
+from unittest.mock import MagicMock
+
+from models import dataset as dataset_module
+from models.batch_loader import BatchLoader, batched_property
+from models.dataset import Dataset
+
+
+class _Row:
+    queries = []
+
+    def __init__(self, row_id: str) -> None:
+        self.id = row_id
+
+    @batched_property
+    def double_id(self):
+        self.queries.append([self.id])
+        return self.id * 2
+
+    @double_id.batch_loader
+    def double_id(ids):
+        _Row.queries.append(ids)
+        return {row_id: row_id * 2 for row_id in ids}
+
+
+def test_batched_property():
+    _Row.queries = []
+    rows = BatchLoader.attach([_Row('a'), _Row('b'), _Row('c')])
+
+    assert [row.double_id for row in rows] == ['aa', 'bb', 'cc']
+    # loaded for the whole batch on first access
+    assert _Row.queries == [['a', 'b', 'c']]
+
+    # rows not attached to a batch query themselves
+    assert _Row('d').double_id == 'dd'
+    assert _Row.queries == [['a', 'b', 'c'], ['d']]
+
+
+def test_batched_model_property(monkeypatch):
+    session = MagicMock()
+    session.query.return_value.filter.return_value.group_by.return_value.all.return_value = [('dataset-1', 3)]
+    monkeypatch.setattr(dataset_module.db, 'session', session)
+
+    datasets = BatchLoader.attach([Dataset(id='dataset-1'), Dataset(id='dataset-2')])
+
+    assert [dataset.document_count for dataset in datasets] == [3, 0]
+    assert session.query.call_count == 1